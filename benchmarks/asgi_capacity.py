@@ -0,0 +1,263 @@
+"""Benchmark of concurrent connections and tail latency of pages under WSGI and ASGI with slow clients.
+
+Usage:
+    python -m benchmarks.asgi_capacity --clients 200 --workers 8 --delay 0.05 --preset small
+
+Every client opens a connection, sends its request slowly and reads the response slowly,
+both take --delay seconds. Under WSGI a worker thread is held by a slow client for the whole
+request, as in a threaded WSGI server with --workers threads. Under ASGI the handler awaits the
+client, so connections only share the thread of database queries. Both handlers serve the same
+seeded sequence of page requests of a logged in user in one process, the report contains
+throughput, p50/p95/p99 latency from connection to the last byte and the peak number of
+connections served at once.
+"""
+
+
+import argparse
+import asyncio
+import random
+import sys
+from concurrent.futures import ThreadPoolExecutor
+from io import BytesIO
+from threading import Lock
+from time import perf_counter, sleep
+from typing import Callable
+
+from benchmarks.load_test import DEFAULT_PRESET, HOST, MILLISECONDS, PERCENTILES, PRESETS, percentile
+from benchmarks.utils import print_report, setup_django
+
+DEFAULT_CLIENTS = 200
+DEFAULT_WORKERS = 8
+DEFAULT_DELAY = 0.05
+DEFAULT_SEED = 1
+
+
+class InFlight:
+    """Counter of connections which are served at the same time."""
+
+    def __init__(self) -> None:
+        """Create counter."""
+        self.current = 0
+        self.peak = 0
+        self.lock = Lock()
+
+    def enter(self) -> None:
+        """Count started connection."""
+        with self.lock:
+            self.current += 1
+            self.peak = max(self.peak, self.current)
+
+    def leave(self) -> None:
+        """Count finished connection."""
+        with self.lock:
+            self.current -= 1
+
+
+def build_paths(dataset, clients: int, rng: random.Random) -> list[str]:
+    """Return pages requested by clients: catalogs, details and booked tickets.
+
+    Args:
+        dataset: dataset of load test
+        clients: number of clients
+        rng: random generator
+
+    Returns:
+        list[str]: paths
+    """
+    from django.urls import reverse
+
+    builders: list[Callable[[], str]] = [
+        lambda: reverse('films'),
+        lambda: reverse('cinemas'),
+        lambda: reverse('film', kwargs={'pk': rng.choice(dataset.ids['Film'])}),
+        lambda: reverse('cinema', kwargs={'pk': rng.choice(dataset.ids['Cinema'])}),
+        lambda: reverse('tickets'),
+    ]
+    return [rng.choice(builders)() for _ in range(clients)]
+
+
+def get_session_cookie(dataset) -> str:
+    """Log user of dataset in and return cookie header with its session.
+
+    Args:
+        dataset: dataset of load test
+
+    Returns:
+        str: cookie header
+    """
+    from django.conf import settings
+    from django.test import Client
+
+    client = Client()
+    client.force_login(dataset.user)
+    return f'{settings.SESSION_COOKIE_NAME}={client.cookies[settings.SESSION_COOKIE_NAME].value}'
+
+
+def summarize(latencies: list[float], statuses: list[int], elapsed: float, in_flight: InFlight) -> dict:
+    """Return throughput, latency percentiles, errors and peak of connections.
+
+    Args:
+        latencies: latencies of requests
+        statuses: statuses of responses
+        elapsed: duration of run
+        in_flight: counter of connections
+
+    Returns:
+        dict: report of handler
+    """
+    latencies = sorted(latencies)
+    report = {
+        'requests': len(latencies),
+        'errors': sum(status >= 400 for status in statuses),
+        'seconds': round(elapsed, 4),
+        'throughput': round(len(latencies) / elapsed, 1),
+        'peak_connections': in_flight.peak,
+    }
+    for rank in PERCENTILES:
+        report[f'p{rank}_ms'] = round(percentile(latencies, rank) * MILLISECONDS, 2)
+    return report
+
+
+def run_wsgi(paths: list[str], cookie: str, workers: int, delay: float) -> dict:
+    """Serve all clients by WSGI handler from a pool of worker threads.
+
+    Args:
+        paths: requested paths
+        cookie: cookie header of logged in user
+        workers: number of worker threads
+        delay: seconds of sending request and of reading response by client
+
+    Returns:
+        dict: report of handler
+    """
+    from django.core.handlers.wsgi import WSGIHandler
+
+    handler = WSGIHandler()
+    in_flight = InFlight()
+    statuses = []
+    start = perf_counter()
+
+    def serve(path: str) -> float:
+        in_flight.enter()
+        try:
+            environ = {
+                'REQUEST_METHOD': 'GET', 'PATH_INFO': path, 'QUERY_STRING': '', 'SCRIPT_NAME': '',
+                'SERVER_NAME': HOST, 'SERVER_PORT': '80', 'SERVER_PROTOCOL': 'HTTP/1.1', 'REMOTE_ADDR': '127.0.0.1',
+                'HTTP_HOST': HOST, 'HTTP_COOKIE': cookie, 'wsgi.version': (1, 0), 'wsgi.url_scheme': 'http',
+                'wsgi.input': BytesIO(), 'wsgi.errors': sys.stderr, 'wsgi.multithread': True,
+                'wsgi.multiprocess': False, 'wsgi.run_once': False,
+            }
+            sleep(delay)
+            response = handler(environ, lambda status, headers: statuses.append(int(status.split()[0])))
+            try:
+                b''.join(response)
+            finally:
+                response.close()
+            sleep(delay)
+        finally:
+            in_flight.leave()
+        return perf_counter() - start
+
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        latencies = list(executor.map(serve, paths))
+    return summarize(latencies, statuses, perf_counter() - start, in_flight)
+
+
+async def run_asgi(paths: list[str], cookie: str, delay: float) -> dict:
+    """Serve all clients by ASGI handler concurrently.
+
+    Args:
+        paths: requested paths
+        cookie: cookie header of logged in user
+        delay: seconds of sending request and of reading response by client
+
+    Returns:
+        dict: report of handler
+    """
+    from django.core.handlers.asgi import ASGIHandler
+
+    handler = ASGIHandler()
+    in_flight = InFlight()
+    statuses = []
+    start = perf_counter()
+
+    async def serve(path: str) -> float:
+        received = []
+
+        async def receive() -> dict:
+            if received:
+                await asyncio.Future()
+            received.append(True)
+            await asyncio.sleep(delay)
+            return {'type': 'http.request', 'body': b'', 'more_body': False}
+
+        async def send(message: dict) -> None:
+            if message['type'] == 'http.response.start':
+                statuses.append(message['status'])
+            elif not message.get('more_body'):
+                await asyncio.sleep(delay)
+
+        scope = {
+            'type': 'http', 'asgi': {'version': '3.0'}, 'http_version': '1.1', 'method': 'GET', 'scheme': 'http',
+            'path': path, 'raw_path': path.encode(), 'query_string': b'', 'root_path': '',
+            'headers': [(b'host', HOST.encode()), (b'cookie', cookie.encode())],
+            'client': ('127.0.0.1', 0), 'server': (HOST, 80),
+        }
+        in_flight.enter()
+        try:
+            await handler(scope, receive, send)
+        finally:
+            in_flight.leave()
+        return perf_counter() - start
+
+    latencies = await asyncio.gather(*(serve(path) for path in paths))
+    return summarize(latencies, statuses, perf_counter() - start, in_flight)
+
+
+def run(preset_name: str, clients: int, workers: int, delay: float, seed: int) -> dict:
+    """Create dataset and serve the same clients by both handlers.
+
+    Args:
+        preset_name: name of dataset preset
+        clients: number of concurrent clients
+        workers: number of WSGI worker threads
+        delay: seconds of sending request and of reading response by client
+        seed: seed of random choice of pages
+
+    Returns:
+        dict: benchmark report
+    """
+    from benchmarks.load_test import create_dataset, delete_dataset
+
+    delete_dataset()
+    dataset = create_dataset(PRESETS[preset_name])
+    try:
+        paths = build_paths(dataset, clients, random.Random(seed))
+        cookie = get_session_cookie(dataset)
+        return {
+            'preset': preset_name,
+            'clients': clients,
+            'workers': workers,
+            'delay': delay,
+            'wsgi': run_wsgi(paths, cookie, workers, delay),
+            'asgi': asyncio.run(run_asgi(paths, cookie, delay)),
+        }
+    finally:
+        delete_dataset()
+
+
+def main() -> None:
+    """Parse arguments and run benchmark."""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--preset', choices=sorted(PRESETS), default=DEFAULT_PRESET)
+    parser.add_argument('--clients', type=int, default=DEFAULT_CLIENTS)
+    parser.add_argument('--workers', type=int, default=DEFAULT_WORKERS)
+    parser.add_argument('--delay', type=float, default=DEFAULT_DELAY)
+    parser.add_argument('--seed', type=int, default=DEFAULT_SEED)
+    args = parser.parse_args()
+    setup_django()
+    print_report(run(args.preset, args.clients, args.workers, args.delay, args.seed))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,97 @@
+"""Benchmark for authenticated GET throughput with database and signed bearer tokens.
+
+Usage:
+    python -m benchmarks.auth_throughput --requests 500 --url /rest/address/?page_size=1
+
+Both schemes send the same request through the django test client in one process. The report
+contains requests per second and queries per request of each scheme, database tokens cost one
+more query (token joined with user) than signed tokens.
+"""
+
+
+import argparse
+from time import perf_counter
+
+from benchmarks.utils import print_report, setup_django
+
+DEFAULT_REQUESTS = 500
+DEFAULT_URL = '/rest/address/?page_size=1'
+DEFAULT_HOST = 'localhost'
+USERNAME = 'auth_throughput_admin'
+
+
+def measure(client, url: str, requests: int) -> dict:
+    """Send authenticated GET requests and measure them.
+
+    Args:
+        client: client with authorization header
+        url: requested url
+        requests: number of requests
+
+    Returns:
+        dict: throughput and queries per request
+    """
+    from django.db import connection, reset_queries
+    from django.test.utils import CaptureQueriesContext
+
+    reset_queries()  # the log is reset by every request, so it must start empty
+    with CaptureQueriesContext(connection) as captured:
+        response = client.get(url)
+    if response.status_code != 200:
+        raise RuntimeError(f'{url} returned {response.status_code}')
+    start = perf_counter()
+    for _ in range(requests):
+        client.get(url)
+    elapsed = perf_counter() - start
+    return {
+        'seconds': round(elapsed, 4),
+        'requests_per_second': round(requests / elapsed, 1),
+        'queries_per_request': len(captured),
+    }
+
+
+def run(requests: int, url: str, host: str) -> dict:
+    """Run throughput benchmark for both token schemes.
+
+    Args:
+        requests: number of requests per scheme
+        url: requested url
+        host: value of Host header
+
+    Returns:
+        dict: benchmark report
+    """
+    from django.contrib.auth.models import User
+    from django.test import Client
+    from rest_framework.authtoken.models import Token
+
+    from cinephile_server import tokens
+
+    user = User.objects.create_user(username=USERNAME, is_superuser=True)
+    try:
+        schemes = {
+            'database_token': Token.objects.create(user=user).key,
+            'signed_token': tokens.issue(user).token,
+        }
+        report = {'requests': requests, 'url': url}
+        for scheme, token in schemes.items():
+            client = Client(HTTP_HOST=host, HTTP_AUTHORIZATION=f'Bearer {token}')
+            report[scheme] = measure(client, url, requests)
+        return report
+    finally:
+        user.delete()
+
+
+def main() -> None:
+    """Parse arguments and run benchmark."""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--requests', type=int, default=DEFAULT_REQUESTS)
+    parser.add_argument('--url', default=DEFAULT_URL)
+    parser.add_argument('--host', default=DEFAULT_HOST)
+    args = parser.parse_args()
+    setup_django()
+    print_report(run(args.requests, args.url, args.host))
+
+
+if __name__ == '__main__':
+    main()
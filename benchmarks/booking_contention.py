@@ -0,0 +1,141 @@
+"""Benchmark for booking the same tickets from many concurrent threads.
+
+Usage:
+    python -m benchmarks.booking_contention --bookers 16 --tickets 50
+
+Every booker tries to book every ticket in random order. The report contains
+booking throughput, the number of lost races (conflicts) and the number of tickets
+which were reported as won by more than one booker (double bookings, must be zero).
+"""
+
+
+import argparse
+import random
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timezone
+from time import perf_counter
+
+from benchmarks.utils import print_report, setup_django
+
+DEFAULT_BOOKERS = 16
+DEFAULT_TICKETS = 50
+USERNAME_PREFIX = 'contention_booker_'
+FILM_PREFIX = 'contention film '
+CITY_NAME = 'contention city'
+
+
+def create_fixture(bookers: int, tickets: int) -> tuple[list, list]:
+    """Create users and free tickets for benchmark.
+
+    Args:
+        bookers: number of users
+        tickets: number of tickets
+
+    Returns:
+        tuple[list, list]: created users and ticket ids
+    """
+    from django.contrib.auth.models import User
+
+    from cinephile_server.models import Address, Cinema, Film, FilmCinema, Ticket
+
+    address = Address.objects.create(city_name=CITY_NAME, street_name=CITY_NAME, house_number=1)
+    cinema = Cinema.objects.create(name='contention cinema', address=address)
+    film_date = datetime.now(tz=timezone.utc)
+    ticket_ids = []
+    for index in range(tickets):
+        film = Film.objects.create(name=f'{FILM_PREFIX}{index}', description='benchmark', rating=1)
+        film_cinema = FilmCinema.objects.create(film=film, cinema=cinema)
+        ticket_ids.append(Ticket.objects.create(film_date=film_date, place=str(index), film_cinema=film_cinema).id)
+    users = [
+        User.objects.create_user(username=f'{USERNAME_PREFIX}{index}')
+        for index in range(bookers)
+    ]
+    return users, ticket_ids
+
+
+def delete_fixture(users: list) -> None:
+    """Delete objects created for benchmark.
+
+    Args:
+        users: created users
+    """
+    from django.contrib.auth.models import User
+
+    from cinephile_server.models import Address, Film
+
+    Film.objects.filter(name__startswith=FILM_PREFIX).delete()
+    Address.objects.filter(city_name=CITY_NAME).delete()
+    User.objects.filter(id__in=[user.id for user in users]).delete()
+
+
+def run_booker(user, ticket_ids: list) -> list:
+    """Try to book all tickets for one user.
+
+    Args:
+        user: booking user
+        ticket_ids: ids of tickets
+
+    Returns:
+        list: ids of tickets won by user
+    """
+    from django.db import connection
+
+    from cinephile_server import booking
+
+    order = list(ticket_ids)
+    random.shuffle(order)
+    try:
+        return [ticket_id for ticket_id in order if booking.book(ticket_id, user) is None]
+    finally:
+        connection.close()
+
+
+def run(bookers: int, tickets: int) -> dict:
+    """Run contention benchmark.
+
+    Args:
+        bookers: number of concurrent bookers
+        tickets: number of contended tickets
+
+    Returns:
+        dict: benchmark report
+    """
+    from cinephile_server.models import Ticket
+
+    users, ticket_ids = create_fixture(bookers, tickets)
+    try:
+        start = perf_counter()
+        with ThreadPoolExecutor(max_workers=bookers) as executor:
+            won = list(executor.map(run_booker, users, [ticket_ids] * bookers))
+        elapsed = perf_counter() - start
+        wins = Counter(ticket_id for user_wins in won for ticket_id in user_wins)
+        attempts = bookers * tickets
+        booked = Ticket.objects.filter(id__in=ticket_ids, user__isnull=False).count()
+        return {
+            'bookers': bookers,
+            'tickets': tickets,
+            'attempts': attempts,
+            'seconds': round(elapsed, 4),
+            'attempts_per_second': round(attempts / elapsed, 1),
+            'bookings': sum(wins.values()),
+            'conflicts': attempts - sum(wins.values()),
+            'double_bookings': sum(count - 1 for count in wins.values() if count > 1),
+            'booked_in_db': booked,
+        }
+    finally:
+        delete_fixture(users)
+
+
+def main() -> None:
+    """Parse arguments and run benchmark."""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--bookers', type=int, default=DEFAULT_BOOKERS)
+    parser.add_argument('--tickets', type=int, default=DEFAULT_TICKETS)
+    args = parser.parse_args()
+    setup_django()
+    print_report(run(args.bookers, args.tickets))
+
+
+if __name__ == '__main__':
+    main()
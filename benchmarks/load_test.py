@@ -0,0 +1,408 @@
+"""Load test of pages and REST endpoints with dataset presets and comparison of runs.
+
+Usage:
+    python -m benchmarks.load_test run --preset small --concurrency 8 --requests 200 --output base.json
+    python -m benchmarks.load_test compare base.json new.json --threshold 0.1
+
+Run creates a dataset of the preset, sends the same seeded sequence of requests of every scenario
+from concurrent clients of one process and prints throughput and p50/p95/p99 latency as json.
+Pages are requested by a logged in user, so they are rendered and not served from page cache.
+Compare flags scenarios whose throughput dropped or p95 latency grew by more than the threshold
+and exits with status 1 if there are such regressions.
+"""
+
+
+import argparse
+import json
+import random
+import sys
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from datetime import datetime, timedelta, timezone
+from math import ceil
+from pathlib import Path
+from time import perf_counter
+from typing import Callable
+
+from benchmarks.utils import print_report, setup_django
+
+DEFAULT_PRESET = 'small'
+DEFAULT_CONCURRENCY = 8
+DEFAULT_REQUESTS = 200
+DEFAULT_SEED = 1
+DEFAULT_THRESHOLD = 0.1
+HOST = 'localhost'
+BATCH_SIZE = 1000
+FILM_PREFIX = 'load film '
+CINEMA_PREFIX = 'load cinema '
+CITY_NAME = 'load city'
+USERNAME = 'load_test_user'
+SCREENING_CAPACITY = 100
+PERCENTILES = (50, 95, 99)
+MILLISECONDS = 1000
+
+
+@dataclass(frozen=True)
+class Preset:
+    """Size of dataset."""
+
+    films: int
+    cinemas: int
+    cinemas_per_film: int
+    tickets_per_show: int
+    booked_tickets: int
+
+
+PRESETS = {
+    'small': Preset(films=50, cinemas=10, cinemas_per_film=2, tickets_per_show=5, booked_tickets=10),
+    'medium': Preset(films=500, cinemas=50, cinemas_per_film=3, tickets_per_show=10, booked_tickets=50),
+    'large': Preset(films=5000, cinemas=200, cinemas_per_film=4, tickets_per_show=20, booked_tickets=200),
+}
+
+
+@dataclass(frozen=True)
+class Dataset:
+    """Ids of created objects which scenarios request."""
+
+    user: object
+    token: str
+    ids: dict[str, list]
+    free_tickets: list
+
+
+@dataclass(frozen=True)
+class Scenario:
+    """Named sequence of requests."""
+
+    name: str
+    method: str
+    build_urls: Callable[[Dataset, int, random.Random], list[str]]
+
+
+def create_dataset(preset: Preset) -> Dataset:
+    """Create films, cinemas, shows with tickets and screenings and a user with booked tickets.
+
+    Args:
+        preset: size of dataset
+
+    Returns:
+        Dataset: ids of created objects
+    """
+    from django.contrib.auth.models import User
+    from rest_framework.authtoken.models import Token
+
+    from cinephile_server.models import Address, Cinema, Film, FilmCinema, Screening, Ticket
+    from cinephile_server.seats import bitmap_size
+
+    user = User.objects.create_user(username=USERNAME, password=USERNAME, is_superuser=True)
+    address = Address.objects.create(city_name=CITY_NAME, street_name=CITY_NAME, house_number=1)
+    cinemas = Cinema.objects.bulk_create(
+        [Cinema(name=f'{CINEMA_PREFIX}{index}', address=address) for index in range(preset.cinemas)],
+        batch_size=BATCH_SIZE,
+    )
+    films = Film.objects.bulk_create(
+        [Film(name=f'{FILM_PREFIX}{index}', description='benchmark', rating=1) for index in range(preset.films)],
+        batch_size=BATCH_SIZE,
+    )
+    film_cinemas = FilmCinema.objects.bulk_create(
+        [
+            FilmCinema(film=film, cinema=cinemas[(index + shift) % len(cinemas)])
+            for index, film in enumerate(films)
+            for shift in range(min(preset.cinemas_per_film, len(cinemas)))
+        ],
+        batch_size=BATCH_SIZE,
+    )
+    start_time = datetime.now(tz=timezone.utc) + timedelta(days=1)
+    Screening.objects.bulk_create(
+        [
+            Screening(
+                film_cinema=film_cinema, hall='1', start_time=start_time,
+                capacity=SCREENING_CAPACITY, seats=bytes(bitmap_size(SCREENING_CAPACITY)),
+            )
+            for film_cinema in film_cinemas
+        ],
+        batch_size=BATCH_SIZE,
+    )
+    tickets = Ticket.objects.bulk_create(
+        [
+            Ticket(film_date=start_time, place=str(place), film_cinema=film_cinema)
+            for film_cinema in film_cinemas
+            for place in range(preset.tickets_per_show)
+        ],
+        batch_size=BATCH_SIZE,
+    )
+    booked = [ticket.id for ticket in tickets[:preset.booked_tickets]]
+    Ticket.objects.filter(id__in=booked).update(user=user, updated_at=datetime.now(tz=timezone.utc))
+    return Dataset(
+        user=user,
+        token=Token.objects.create(user=user).key,
+        ids={
+            model.__name__: list(model.objects.filter(**lookup).values_list('id', flat=True))
+            for model, lookup in (
+                (Address, {'city_name': CITY_NAME}),
+                (Cinema, {'name__startswith': CINEMA_PREFIX}),
+                (Film, {'name__startswith': FILM_PREFIX}),
+                (FilmCinema, {'film__name__startswith': FILM_PREFIX}),
+                (Screening, {'film_cinema__film__name__startswith': FILM_PREFIX}),
+                (Ticket, {'film_cinema__film__name__startswith': FILM_PREFIX}),
+                (User, {'username': USERNAME}),
+            )
+        },
+        free_tickets=[ticket.id for ticket in tickets[preset.booked_tickets:]],
+    )
+
+
+def delete_dataset() -> None:
+    """Delete objects created for benchmark."""
+    from django.contrib.auth.models import User
+
+    from cinephile_server.models import Address, Film
+
+    Film.objects.filter(name__startswith=FILM_PREFIX).delete()
+    Address.objects.filter(city_name=CITY_NAME).delete()
+    User.objects.filter(username=USERNAME).delete()
+
+
+def fixed(url: str) -> Callable[[Dataset, int, random.Random], list[str]]:
+    """Return builder of requests to one url.
+
+    Args:
+        url: requested url
+
+    Returns:
+        Callable: builder of urls
+    """
+    return lambda dataset, count, rng: [url] * count
+
+
+def detail(route: str, model: str) -> Callable[[Dataset, int, random.Random], list[str]]:
+    """Return builder of requests to details of random objects.
+
+    Args:
+        route: name of detail route
+        model: name of model of objects
+
+    Returns:
+        Callable: builder of urls
+    """
+    from django.urls import reverse
+
+    return lambda dataset, count, rng: [
+        reverse(route, kwargs={'pk': rng.choice(dataset.ids[model])}) for _ in range(count)
+    ]
+
+
+def ticket_action(route: str) -> Callable[[Dataset, int, random.Random], list[str]]:
+    """Return builder of requests which book or cancel distinct free tickets.
+
+    Booking and cancelling use the same tickets in the same order, so cancel returns
+    tickets booked by the previous scenario.
+
+    Args:
+        route: name of book or cancel route
+
+    Returns:
+        Callable: builder of urls
+    """
+    from django.urls import reverse
+
+    return lambda dataset, count, rng: [
+        f'{reverse(route)}?ticket_id={dataset.free_tickets[index % len(dataset.free_tickets)]}'
+        for index in range(count)
+    ]
+
+
+def get_scenarios() -> list[Scenario]:
+    """Return scenarios of pages, ticket actions and every router endpoint.
+
+    Returns:
+        list[Scenario]: scenarios in order of run
+    """
+    from django.urls import reverse
+
+    from cinephile_server.urls import router
+
+    scenarios = [
+        Scenario('main_page', 'get', fixed(reverse('home'))),
+        Scenario('films_page', 'get', fixed(reverse('films'))),
+        Scenario('film_detail_page', 'get', detail('film', 'Film')),
+        Scenario('cinema_detail_page', 'get', detail('cinema', 'Cinema')),
+        Scenario('booked_tickets_page', 'get', fixed(reverse('tickets'))),
+        Scenario('book_ticket', 'post', ticket_action('book_ticket')),
+        Scenario('cancel_ticket', 'post', ticket_action('cancel_ticket')),
+    ]
+    for _, viewset, basename in router.registry:
+        model = viewset.queryset.model.__name__
+        scenarios.append(Scenario(f'rest_{basename}_list', 'get', fixed(reverse(f'{basename}-list'))))
+        scenarios.append(Scenario(f'rest_{basename}_detail', 'get', detail(f'{basename}-detail', model)))
+    return scenarios
+
+
+def percentile(latencies: list[float], rank: int) -> float:
+    """Return nearest-rank percentile.
+
+    Args:
+        latencies: sorted latencies
+        rank: percentile from 1 to 100
+
+    Returns:
+        float: latency of percentile
+    """
+    return latencies[max(ceil(rank / 100 * len(latencies)) - 1, 0)]
+
+
+def run_worker(dataset: Dataset, method: str, urls: list[str]) -> tuple[list[float], int]:
+    """Send requests from one client.
+
+    Args:
+        dataset: dataset with user and token
+        method: http method
+        urls: requested urls
+
+    Returns:
+        tuple[list[float], int]: latencies and number of failed requests
+    """
+    from django.db import connection
+    from django.test import Client
+
+    client = Client(HTTP_HOST=HOST, HTTP_AUTHORIZATION=f'Bearer {dataset.token}')
+    client.force_login(dataset.user)
+    send = getattr(client, method)
+    latencies = []
+    errors = 0
+    try:
+        for url in urls:
+            start = perf_counter()
+            response = send(url)
+            latencies.append(perf_counter() - start)
+            errors += response.status_code >= 400
+    finally:
+        connection.close()
+    return latencies, errors
+
+
+def run_scenario(scenario: Scenario, dataset: Dataset, requests: int, concurrency: int, seed: int) -> dict:
+    """Send requests of scenario from concurrent clients.
+
+    Args:
+        scenario: scenario
+        dataset: dataset
+        requests: number of requests
+        concurrency: number of concurrent clients
+        seed: seed of random choice of objects
+
+    Returns:
+        dict: throughput, latency percentiles and errors
+    """
+    urls = scenario.build_urls(dataset, requests, random.Random(f'{seed}:{scenario.name}'))
+    start = perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as executor:
+        results = list(executor.map(
+            lambda worker: run_worker(dataset, scenario.method, urls[worker::concurrency]), range(concurrency),
+        ))
+    elapsed = perf_counter() - start
+    latencies = sorted(latency for worker_latencies, _ in results for latency in worker_latencies)
+    report = {
+        'requests': len(latencies),
+        'errors': sum(errors for _, errors in results),
+        'seconds': round(elapsed, 4),
+        'throughput': round(len(latencies) / elapsed, 1),
+    }
+    for rank in PERCENTILES:
+        report[f'p{rank}_ms'] = round(percentile(latencies, rank) * MILLISECONDS, 2)
+    return report
+
+
+def run(preset_name: str, concurrency: int, requests: int, seed: int) -> dict:
+    """Create dataset and run all scenarios.
+
+    Args:
+        preset_name: name of dataset preset
+        concurrency: number of concurrent clients
+        requests: number of requests of every scenario
+        seed: seed of random choice of objects
+
+    Returns:
+        dict: benchmark report
+    """
+    preset = PRESETS[preset_name]
+    delete_dataset()
+    dataset = create_dataset(preset)
+    try:
+        return {
+            'preset': preset_name,
+            'dataset': preset.__dict__,
+            'concurrency': concurrency,
+            'requests': requests,
+            'seed': seed,
+            'scenarios': {
+                scenario.name: run_scenario(scenario, dataset, requests, concurrency, seed)
+                for scenario in get_scenarios()
+            },
+        }
+    finally:
+        delete_dataset()
+
+
+def compare(base: dict, new: dict, threshold: float) -> dict:
+    """Compare scenarios of two runs.
+
+    Args:
+        base: report of base run
+        new: report of new run
+        threshold: allowed relative drop of throughput and growth of p95 latency
+
+    Returns:
+        dict: ratios of scenarios and names of regressed scenarios
+    """
+    scenarios = {}
+    regressions = []
+    for name, base_scenario in base['scenarios'].items():
+        new_scenario = new['scenarios'].get(name)
+        if new_scenario is None:
+            continue
+        throughput = new_scenario['throughput'] / base_scenario['throughput']
+        p95 = new_scenario['p95_ms'] / base_scenario['p95_ms'] if base_scenario['p95_ms'] else 1
+        regressed = (
+            throughput < 1 - threshold or p95 > 1 + threshold or new_scenario['errors'] > base_scenario['errors']
+        )
+        scenarios[name] = {'throughput_ratio': round(throughput, 3), 'p95_ratio': round(p95, 3), 'regressed': regressed}
+        if regressed:
+            regressions.append(name)
+    comparable = {key: (base.get(key), new.get(key)) for key in ('preset', 'concurrency', 'requests')}
+    return {
+        'threshold': threshold,
+        'mismatched_settings': {key: values for key, values in comparable.items() if values[0] != values[1]},
+        'scenarios': scenarios,
+        'regressions': regressions,
+    }
+
+
+def main() -> None:
+    """Parse arguments and run or compare benchmarks."""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    commands = parser.add_subparsers(dest='command', required=True)
+    run_parser = commands.add_parser('run')
+    run_parser.add_argument('--preset', choices=sorted(PRESETS), default=DEFAULT_PRESET)
+    run_parser.add_argument('--concurrency', type=int, default=DEFAULT_CONCURRENCY)
+    run_parser.add_argument('--requests', type=int, default=DEFAULT_REQUESTS)
+    run_parser.add_argument('--seed', type=int, default=DEFAULT_SEED)
+    run_parser.add_argument('--output', type=Path)
+    compare_parser = commands.add_parser('compare')
+    compare_parser.add_argument('base', type=Path)
+    compare_parser.add_argument('new', type=Path)
+    compare_parser.add_argument('--threshold', type=float, default=DEFAULT_THRESHOLD)
+    args = parser.parse_args()
+    if args.command == 'compare':
+        report = compare(json.loads(args.base.read_text()), json.loads(args.new.read_text()), args.threshold)
+        print_report(report)
+        sys.exit(1 if report['regressions'] else 0)
+    setup_django()
+    report = run(args.preset, args.concurrency, args.requests, args.seed)
+    if args.output:
+        args.output.write_text(json.dumps(report, indent=2))
+    print_report(report)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,123 @@
+"""Benchmark for latency of ranked film search.
+
+Usage:
+    python -m benchmarks.search_latency --films 100000 --repeats 20
+
+Films with names and descriptions from a small vocabulary are created, then every query is
+searched and the first page of results is fetched repeatedly. The report contains median and
+p95 latency of each query and whether the tsvector index was used.
+"""
+
+
+import argparse
+from random import Random
+from statistics import median, quantiles
+from time import perf_counter
+
+from benchmarks.utils import print_report, setup_django
+
+DEFAULT_FILMS = 100000
+DEFAULT_REPEATS = 20
+BATCH_SIZE = 5000
+PAGE_SIZE = 24
+SEED = 1
+FILM_PREFIX = 'search film '
+WORDS = (
+    'space', 'odyssey', 'matrix', 'hacker', 'river', 'night', 'winter', 'garden', 'detective', 'robot',
+    'ocean', 'mountain', 'empire', 'silent', 'golden', 'shadow', 'city', 'dream', 'storm', 'legend',
+)
+QUERIES = ('odyssey', 'space odyssey', 'silent detective night', 'hackr', 'nothing matches this')
+
+
+def create_fixture(films: int) -> None:
+    """Create films with random words in names and descriptions.
+
+    Args:
+        films: number of films
+    """
+    from cinephile_server.models import Film
+
+    rng = Random(SEED)
+    for start in range(0, films, BATCH_SIZE):
+        Film.objects.bulk_create([
+            Film(
+                name=f'{FILM_PREFIX}{" ".join(rng.sample(WORDS, 2))} {index}',
+                description=' '.join(rng.choices(WORDS, k=12)),
+                rating=1,
+            )
+            for index in range(start, min(start + BATCH_SIZE, films))
+        ])
+
+
+def delete_fixture() -> None:
+    """Delete films created for benchmark."""
+    from cinephile_server.models import Film
+
+    Film.objects.filter(name__startswith=FILM_PREFIX).delete()
+
+
+def measure(query: str, repeats: int) -> dict:
+    """Measure first page of search results.
+
+    Args:
+        query: searched words
+        repeats: number of measured searches
+
+    Returns:
+        dict: latency in milliseconds and number of rows on page
+    """
+    from cinephile_server import search
+    from cinephile_server.models import Film
+    from cinephile_server.pagination import paginate_keyset
+    from cinephile_server.views.pages import FILM_CARD_FIELDS
+
+    queryset = Film.objects.only(*FILM_CARD_FIELDS)
+    latencies, rows = [], 0
+    for _ in range(repeats):
+        start = perf_counter()
+        page = paginate_keyset(search.search(queryset, query), search.SEARCH_ORDERING, None, PAGE_SIZE)
+        latencies.append((perf_counter() - start) * 1000)
+        rows = len(page.rows)
+    return {
+        'rows': rows,
+        'median_ms': round(median(latencies), 2),
+        'p95_ms': round(quantiles(latencies, n=20)[-1], 2) if len(latencies) > 1 else round(latencies[0], 2),
+    }
+
+
+def run(films: int, repeats: int) -> dict:
+    """Run search benchmark.
+
+    Args:
+        films: number of films
+        repeats: number of measured searches of each query
+
+    Returns:
+        dict: benchmark report
+    """
+    from cinephile_server import search
+    from cinephile_server.models import Film
+
+    create_fixture(films)
+    try:
+        return {
+            'films': films,
+            'indexed': search.is_indexed(Film.objects.all()),
+            'queries': {query: measure(query, repeats) for query in QUERIES},
+        }
+    finally:
+        delete_fixture()
+
+
+def main() -> None:
+    """Parse arguments and run benchmark."""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--films', type=int, default=DEFAULT_FILMS)
+    parser.add_argument('--repeats', type=int, default=DEFAULT_REPEATS)
+    args = parser.parse_args()
+    setup_django()
+    print_report(run(args.films, args.repeats))
+
+
+if __name__ == '__main__':
+    main()
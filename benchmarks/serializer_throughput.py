@@ -0,0 +1,143 @@
+"""Benchmark for serializing tickets and films with model and lean read serializers.
+
+Usage:
+    python -m benchmarks.serializer_throughput --rows 10000
+
+Rows are serialized in one batch by the hyperlinked model serializer of the viewset and by
+the lean serializer from values() rows. The report contains seconds and queries of both paths.
+"""
+
+
+import argparse
+from datetime import datetime, timezone
+from time import perf_counter
+
+from benchmarks.utils import print_report, setup_django
+
+DEFAULT_ROWS = 10000
+BATCH_SIZE = 1000
+HOST = 'localhost'
+FILM_PREFIX = 'serializer film '
+CITY_NAME = 'serializer city'
+
+
+def create_fixture(rows: int) -> None:
+    """Create films, each of them shown in one cinema with one ticket.
+
+    Args:
+        rows: number of films and tickets
+    """
+    from cinephile_server.models import Address, Cinema, Film, FilmCinema, Ticket
+
+    address = Address.objects.create(city_name=CITY_NAME, street_name=CITY_NAME, house_number=1)
+    cinema = Cinema.objects.create(name='serializer cinema', address=address)
+    films = Film.objects.bulk_create(
+        [Film(name=f'{FILM_PREFIX}{index}', description='benchmark', rating=1) for index in range(rows)],
+        batch_size=BATCH_SIZE,
+    )
+    film_cinemas = FilmCinema.objects.bulk_create(
+        [FilmCinema(film=film, cinema=cinema) for film in films], batch_size=BATCH_SIZE,
+    )
+    film_date = datetime.now(tz=timezone.utc)
+    Ticket.objects.bulk_create(
+        [Ticket(film_date=film_date, place='1', film_cinema=film_cinema) for film_cinema in film_cinemas],
+        batch_size=BATCH_SIZE,
+    )
+
+
+def delete_fixture() -> None:
+    """Delete objects created for benchmark."""
+    from cinephile_server.models import Address, Film
+
+    Film.objects.filter(name__startswith=FILM_PREFIX).delete()
+    Address.objects.filter(city_name=CITY_NAME).delete()
+
+
+def measure(serialize) -> dict:
+    """Measure one serialization.
+
+    Args:
+        serialize: function which serializes rows
+
+    Returns:
+        dict: seconds, queries and number of serialized rows
+    """
+    from django.db import connection, reset_queries
+    from django.test.utils import CaptureQueriesContext
+
+    reset_queries()
+    with CaptureQueriesContext(connection) as captured:
+        start = perf_counter()
+        serialized = serialize()
+        elapsed = perf_counter() - start
+    return {'seconds': round(elapsed, 4), 'queries': len(captured), 'rows': len(serialized)}
+
+
+def compare(queryset, serializer_class, request) -> dict:
+    """Serialize queryset with both paths.
+
+    Args:
+        queryset: queryset of viewset
+        serializer_class: model serializer of viewset
+        request: request for links
+
+    Returns:
+        dict: report of both paths
+    """
+    from cinephile_server.read_serializers import build_values_serializer
+
+    context = {'request': request}
+    values_serializer = build_values_serializer(serializer_class(context=context))
+    values_queryset = queryset.prefetch_related(None).values(*values_serializer.get_value_names())
+    return {
+        'model_serializer': measure(lambda: serializer_class(queryset, many=True, context=context).data),
+        'lean_serializer': measure(lambda: values_serializer.serialize(list(values_queryset))),
+    }
+
+
+def run(rows: int) -> dict:
+    """Run serializer benchmark.
+
+    Args:
+        rows: number of films and tickets
+
+    Returns:
+        dict: benchmark report
+    """
+    from rest_framework.request import Request
+    from rest_framework.test import APIRequestFactory
+
+    from cinephile_server import serializers
+    from cinephile_server.models import Film, Ticket
+
+    create_fixture(rows)
+    try:
+        request = Request(APIRequestFactory().get('/rest/', HTTP_HOST=HOST))
+        return {
+            'rows': rows,
+            'tickets': compare(
+                Ticket.objects.filter(film_cinema__film__name__startswith=FILM_PREFIX),
+                serializers.TicketSerializer,
+                request,
+            ),
+            'films': compare(
+                Film.objects.filter(name__startswith=FILM_PREFIX).prefetch_related('cinemas'),
+                serializers.FilmSerializer,
+                request,
+            ),
+        }
+    finally:
+        delete_fixture()
+
+
+def main() -> None:
+    """Parse arguments and run benchmark."""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--rows', type=int, default=DEFAULT_ROWS)
+    args = parser.parse_args()
+    setup_django()
+    print_report(run(args.rows))
+
+
+if __name__ == '__main__':
+    main()
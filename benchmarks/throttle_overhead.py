@@ -0,0 +1,104 @@
+"""Benchmark for overhead of token-bucket throttling per request.
+
+Usage:
+    python -m benchmarks.throttle_overhead --requests 100000 --users 1000
+
+Every request takes tokens of the booking scope (user, address and global buckets) from the local
+store and from the cache store of THROTTLE_CACHE_ALIAS, first from a single thread and then with
+the async store method. Users and addresses rotate and buckets are large, so no request is rejected
+and every one pays for a full read and write of its buckets. The report contains microseconds per
+request and requests per second of each store, no request touches the database.
+"""
+
+
+import argparse
+from time import perf_counter
+
+from benchmarks.utils import print_report, setup_django
+
+DEFAULT_REQUESTS = 100_000
+DEFAULT_USERS = 1000
+SCOPE = 'benchmark'
+LARGE_BUCKET = (10 ** 9, 10 ** 6)
+MICROSECONDS = 1_000_000
+
+
+def measure(store, requests: int, users: int) -> dict:
+    """Take tokens of rotating users from store.
+
+    Args:
+        store: store of buckets
+        requests: number of requests
+        users: number of distinct users and addresses
+
+    Returns:
+        dict: overhead per request of sync and async takes
+    """
+    from asgiref.sync import async_to_sync
+
+    from cinephile_server import throttling
+
+    buckets = [
+        throttling.get_buckets(SCOPE, user_id, f'10.0.{user_id // 256}.{user_id % 256}') for user_id in range(users)
+    ]
+
+    start = perf_counter()
+    rejected = sum(1 for index in range(requests) if store.take(buckets[index % users]))
+    sync_elapsed = perf_counter() - start
+
+    async def take_async() -> tuple[int, float]:
+        async_start = perf_counter()
+        async_rejected = 0
+        for index in range(requests):
+            async_rejected += bool(await store.atake(buckets[index % users]))
+        return async_rejected, perf_counter() - async_start
+
+    async_rejected, async_elapsed = async_to_sync(take_async)()
+    return {
+        'microseconds_per_request': round(sync_elapsed / requests * MICROSECONDS, 2),
+        'requests_per_second': round(requests / sync_elapsed, 1),
+        'async_microseconds_per_request': round(async_elapsed / requests * MICROSECONDS, 2),
+        'rejected': rejected + async_rejected,
+    }
+
+
+def run(requests: int, users: int) -> dict:
+    """Measure overhead of both stores.
+
+    Args:
+        requests: number of requests per store
+        users: number of distinct users and addresses
+
+    Returns:
+        dict: benchmark report
+    """
+    from django.conf import settings
+    from django.core.cache import caches
+    from django.test import override_settings
+
+    from cinephile_server import throttling
+
+    buckets = {throttling.USER: LARGE_BUCKET, throttling.IP: LARGE_BUCKET, throttling.GLOBAL: LARGE_BUCKET}
+    stores = {
+        throttling.LOCAL_STORE: throttling.LocalBucketStore(),
+        throttling.CACHE_STORE: throttling.CacheBucketStore(caches[settings.THROTTLE_CACHE_ALIAS]),
+    }
+    report = {'requests': requests, 'users': users, 'cache_backend': settings.CACHES[settings.THROTTLE_CACHE_ALIAS]}
+    with override_settings(THROTTLE_BUCKETS={**settings.THROTTLE_BUCKETS, SCOPE: buckets}):
+        for name, store in stores.items():
+            report[name] = measure(store, requests, users)
+    return report
+
+
+def main() -> None:
+    """Parse arguments and run benchmark."""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--requests', type=int, default=DEFAULT_REQUESTS)
+    parser.add_argument('--users', type=int, default=DEFAULT_USERS)
+    args = parser.parse_args()
+    setup_django()
+    print_report(run(args.requests, args.users))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,27 @@
+"""Module for helper things for benchmarks."""
+
+
+import json
+import os
+import sys
+from pathlib import Path
+
+import django
+
+BASE_DIR = Path(__file__).resolve().parent.parent
+
+
+def setup_django() -> None:
+    """Configure django so benchmarks can use models and the configured database."""
+    sys.path.insert(0, str(BASE_DIR))
+    os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'cinephile.settings')
+    django.setup()
+
+
+def print_report(report: dict) -> None:
+    """Print benchmark report as json.
+
+    Args:
+        report: benchmark results
+    """
+    sys.stdout.write(f'{json.dumps(report, indent=2, default=str)}\n')
@@ -12,5 +12,7 @@ import os
 from django.core.asgi import get_asgi_application
 
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'cinephile.settings')
+# Streams of live ticket changes do not hold a thread under ASGI
+os.environ.setdefault('LIVE_UPDATES_ENABLED', '1')
 
 application = get_asgi_application()
@@ -47,8 +47,10 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    'cinephile_server.metrics.MetricsMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
+    'cinephile_server.throttling.ThrottleMiddleware',
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
     'django.contrib.auth.middleware.AuthenticationMiddleware',
@@ -76,11 +78,21 @@ TEMPLATES = [
 
 REST_FRAMEWORK = {
     'DEFAULT_AUTHENTICATION_CLASSES': [
+        'cinephile_server.auth.SignedTokenAuthentication',
         'rest_framework.authentication.TokenAuthentication',
         'cinephile_server.auth.BearerAuthentication',
     ],
+    'DEFAULT_THROTTLE_CLASSES': ['cinephile_server.throttling.TokenBucketThrottle'],
+    'DEFAULT_PAGINATION_CLASS': 'cinephile_server.pagination.KeysetPagination',
+    'PAGE_SIZE': 50,
 }
 
+# Lifetime in seconds of signed bearer tokens issued by api-signed-token-auth/
+SIGNED_TOKEN_MAX_AGE = 60 * 60
+
+# Upper bound for page_size query parameter of REST list endpoints
+REST_MAX_PAGE_SIZE = 200
+
 WSGI_APPLICATION = 'cinephile.wsgi.application'
 
 
@@ -138,6 +150,87 @@ USE_TZ = True
 
 STATIC_URL = 'static/'
 
+# Content-addressed store of posters and their thumbnails
+IMAGE_STORE_ROOT = BASE_DIR / 'media' / 'posters'
+IMAGE_WORKERS = 2
+# Largest stored poster in bytes, larger inline images are rejected
+IMAGE_MAX_BYTES = 5 * 1024 * 1024
+
+# Cache of pages for anonymous visitors, CACHE_DIR enables file-based cache shared by all processes
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        'LOCATION': 'cinephile',
+    },
+}
+if getenv('CACHE_DIR'):
+    CACHES['default'] = {
+        'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache',
+        'LOCATION': getenv('CACHE_DIR'),
+    }
+PAGE_CACHE_ALIAS = 'default'
+# Lifetime of cached page in seconds, 0 disables page cache
+PAGE_CACHE_TIMEOUT = 300
+
+# Per-view request metrics served at metrics/, snapshots of processes are summed in METRICS_CACHE_ALIAS
+METRICS_ENABLED = True
+METRICS_CACHE_ALIAS = 'default'
+# Seconds between writes of process snapshot to cache and lifetime of snapshot of stopped process
+METRICS_FLUSH_INTERVAL = 5
+METRICS_PROCESS_TIMEOUT = 24 * 60 * 60
+# Adds Server-Timing header with SQL, template and total time to every response
+METRICS_SERVER_TIMING = False
+
+# Live ticket changes of detail pages are streamed only by ASGI servers, WSGI would buffer endless streams,
+# cinephile.asgi enables them, other deployments set LIVE_UPDATES_ENABLED=1
+LIVE_UPDATES_ENABLED = getenv('LIVE_UPDATES_ENABLED') == '1'
+# Events are shared by processes through LIVE_CACHE_ALIAS,
+# which needs atomic incr (memcached, redis) when several processes book tickets
+LIVE_CACHE_ALIAS = 'default'
+# Seconds between polls of the feed of a process, lifetime of published event,
+# duration of one stream before client reconnects and seconds between heartbeats
+LIVE_POLL_INTERVAL = 0.5
+LIVE_EVENT_TIMEOUT = 300
+LIVE_STREAM_TIMEOUT = 300
+LIVE_HEARTBEAT_INTERVAL = 15
+
+# Seconds a user holds tickets while confirming them and number of expired holds released by one update
+TICKET_HOLD_SECONDS = 10 * 60
+TICKET_HOLD_SWEEP_BATCH = 1000
+
+# Responses of writes with Idempotency-Key header are replayed for IDEMPOTENCY_KEY_SECONDS,
+# a running request locks its key for IDEMPOTENCY_LOCK_SECONDS and duplicates wait for it
+# at most IDEMPOTENCY_WAIT_SECONDS, checking every IDEMPOTENCY_POLL_INTERVAL seconds
+IDEMPOTENCY_KEY_SECONDS = 24 * 60 * 60
+IDEMPOTENCY_LOCK_SECONDS = 60
+IDEMPOTENCY_WAIT_SECONDS = 10
+IDEMPOTENCY_POLL_INTERVAL = 0.1
+IDEMPOTENCY_PRUNE_BATCH = 1000
+
+# Token buckets of writes per scope as (capacity, tokens refilled per second) per user, per client address
+# and for all clients. Buckets live in THROTTLE_CACHE_ALIAS shared by processes ('cache') or in process memory
+# ('local'), which is atomic but per process, so it suits single-node deployments
+THROTTLE_ENABLED = True
+THROTTLE_STORE = 'cache'
+THROTTLE_CACHE_ALIAS = 'default'
+# Number of reverse proxies which append client address to X-Forwarded-For, 0 ignores the header
+THROTTLE_PROXIES = 0
+THROTTLE_BUCKETS = {
+    'booking': {'user': (10, 1), 'ip': (30, 5), 'global': (1000, 200)},
+    'auth': {'ip': (10, 0.5), 'global': (300, 50)},
+    'users': {'user': (20, 2), 'ip': (10, 0.5), 'global': (300, 50)},
+}
+# Scopes of views by url name for function views and DRF views without throttles (obtain_auth_token),
+# other DRF views set throttle_scope
+THROTTLE_VIEW_SCOPES = {
+    'book_ticket': 'booking',
+    'cancel_ticket': 'booking',
+    'book_seat': 'booking',
+    'login': 'auth',
+    'api_token_auth': 'auth',
+    'register': 'users',
+}
+
 # Default primary key field type
 # https://docs.djangoproject.com/en/5.0/ref/settings/#default-auto-field
 
@@ -4,7 +4,7 @@
 from django.contrib import admin
 
 from .forms import FilmForm, TicketForm
-from .models import Address, Cinema, Film, FilmCinema, Ticket
+from .models import Address, Cinema, Film, FilmCinema, Screening, Ticket
 
 # inlines
 
@@ -55,3 +55,11 @@ class AddressAdmin(admin.ModelAdmin):
     """Admin for Address model."""
 
     model = Address
+
+
+@admin.register(Screening)
+class ScreeningAdmin(admin.ModelAdmin):
+    """Admin for Screening model."""
+
+    model = Screening
+    readonly_fields = ('seat_map',)
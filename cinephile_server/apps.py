@@ -4,3 +4,6 @@ from django.apps import AppConfig
 class CinephileServerConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'cinephile_server'
+
+    def ready(self):
+        from . import signals  # noqa: F401
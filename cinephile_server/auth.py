@@ -1,8 +1,10 @@
 """Module for mixins with auth."""
 
 
-from rest_framework.authentication import TokenAuthentication
+from rest_framework.authentication import BaseAuthentication, TokenAuthentication, get_authorization_header
+from rest_framework.exceptions import AuthenticationFailed
 
+from . import tokens
 from .permissions import IsSuperUser
 
 
@@ -12,10 +14,56 @@ class BearerAuthentication(TokenAuthentication):
     keyword = 'Bearer'
 
 
+class SignedTokenAuthentication(BaseAuthentication):
+    """Authentication by signed expiring Bearer token which is verified without database access.
+
+    Tokens of database have another format, so they are left to the next authentication class.
+    """
+
+    keyword = 'Bearer'
+
+    def authenticate(self, request) -> tuple[tokens.TokenUser, str] | None:
+        """Authenticate request by signed token.
+
+        Args:
+            request: current request
+
+        Raises:
+            AuthenticationFailed: signed token is invalid, expired or revoked
+
+        Returns:
+            tuple[tokens.TokenUser, str] | None: user and token id or None if there is no signed token
+        """
+        auth = get_authorization_header(request).split()
+        if len(auth) != 2 or auth[0].lower() != self.keyword.lower().encode():
+            return None
+        try:
+            token = auth[1].decode()
+        except UnicodeError:
+            return None
+        if not tokens.looks_signed(token):
+            return None
+        try:
+            return tokens.read(token)
+        except tokens.TokenError as error:
+            raise AuthenticationFailed(str(error))
+
+    def authenticate_header(self, request) -> str:
+        """Return value of WWW-Authenticate header.
+
+        Args:
+            request: current request
+
+        Returns:
+            str: authentication scheme
+        """
+        return self.keyword
+
+
 class LoginRequired:
     """Middleware class that requires authentication for accessing views."""
 
-    authentication_classes = [BearerAuthentication]
+    authentication_classes = [SignedTokenAuthentication, BearerAuthentication]
 
 
 class LoginAdminRequired(LoginRequired):
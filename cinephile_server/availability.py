@@ -0,0 +1,120 @@
+"""Module for counters of free and booked tickets per film cinema and their totals per film and cinema.
+
+Every write which books, cancels, creates or deletes a ticket adds its delta to the counters of
+its film cinema with one update in the transaction of the write. Films and cinemas are not written,
+so bookings of a popular film do not queue on its row: catalog cards sum counters of their film
+cinemas in a subquery of the card query, so they show availability without counting tickets.
+Writes which send no signals (bulk imports, SQL) are repaired by reconcile().
+"""
+
+
+from typing import Iterable, Sequence
+
+from django.db.models import Count, F, Model, OuterRef, QuerySet, Subquery, Sum
+from django.db.models.functions import Coalesce
+from django.utils import timezone
+
+from . import schedule
+from .models import Cinema, Film, FilmCinema, Ticket
+
+FREE = 'free_tickets'
+BOOKED = 'booked_tickets'
+COUNTERS = (FREE, BOOKED)
+TOTAL_FIELDS = {Film: 'film', Cinema: 'cinema'}
+
+
+def __changes(free: int, booked: int) -> dict:
+    return {FREE: F(FREE) + free, BOOKED: F(BOOKED) + booked}
+
+
+def add(free: int, booked: int, **film_cinema_lookup) -> None:
+    """Add deltas to counters of film cinema.
+
+    Args:
+        free: delta of free tickets
+        booked: delta of booked tickets
+        film_cinema_lookup: filter of film cinema, e.g. id=... or ticket__id=...
+    """
+    if free or booked:
+        FilmCinema.objects.filter(**film_cinema_lookup).update(updated_at=timezone.now(), **__changes(free, booked))
+
+
+def add_ticket(film_cinema_id, user_id, sign: int = 1) -> None:
+    """Count ticket in counters of its film cinema or remove it from them.
+
+    Args:
+        film_cinema_id: id of film cinema of ticket
+        user_id: id of user who booked ticket or None for free ticket
+        sign: 1 to count ticket, -1 to remove it
+    """
+    if film_cinema_id is None:
+        return
+    is_booked = user_id is not None
+    add(free=0 if is_booked else sign, booked=sign if is_booked else 0, id=film_cinema_id)
+
+
+def __count_tickets(**conditions) -> Coalesce:
+    tickets = Ticket.objects.filter(film_cinema=OuterRef('pk'), **conditions).order_by().values('film_cinema')
+    return Coalesce(Subquery(tickets.annotate(count=Count('id')).values('count')), 0)
+
+
+def __sum_counter(field: str, counter: str) -> Coalesce:
+    film_cinemas = FilmCinema.objects.filter(**{field: OuterRef('pk')}).order_by().values(field)
+    return Coalesce(Subquery(film_cinemas.annotate(total=Sum(counter)).values('total')), 0)
+
+
+def with_totals(queryset: QuerySet, counters: Sequence[str] = COUNTERS) -> QuerySet:
+    """Annotate films or cinemas with counters summed over their film cinemas.
+
+    The sums are subqueries of the selected rows, so a page of cards costs the same for any size of catalog.
+
+    Args:
+        queryset: films or cinemas
+        counters: names of annotated counters
+
+    Returns:
+        QuerySet: rows with counters
+    """
+    field = TOTAL_FIELDS[queryset.model]
+    return queryset.annotate(**{counter: __sum_counter(field, counter) for counter in counters})
+
+
+def __repair(queryset: QuerySet, actual: dict, repair: bool) -> int:
+    drifted = queryset.annotate(**{f'actual_{name}': value for name, value in actual.items()}).exclude(
+        **{name: F(f'actual_{name}') for name in actual},
+    )
+    ids = list(drifted.values_list('id', flat=True))
+    if repair and ids:
+        queryset.model.objects.filter(id__in=ids).update(updated_at=timezone.now(), **actual)
+    return len(ids)
+
+
+def reconcile(film_cinema_ids: Iterable | None = None, repair: bool = True) -> int:
+    """Compare counters of film cinemas with tickets and repair drifted rows.
+
+    Args:
+        film_cinema_ids: ids of checked film cinemas, all film cinemas without them
+        repair: write actual counters to drifted rows
+
+    Returns:
+        int: number of drifted film cinemas
+    """
+    film_cinemas = FilmCinema.objects.all()
+    if film_cinema_ids is not None:
+        film_cinemas = film_cinemas.filter(id__in=list(film_cinema_ids))
+    return __repair(film_cinemas, {
+        FREE: __count_tickets(user__isnull=True),
+        BOOKED: __count_tickets(user__isnull=False),
+    }, repair)
+
+
+def sync(model: type[Model], ids: list, film_cinema_ids: Iterable = ()) -> None:
+    """Reconcile counters of film cinemas whose tickets or links were changed in bulk.
+
+    Args:
+        model: model of rows
+        ids: ids of rows
+        film_cinema_ids: film cinemas returned by schedule.get_film_cinema_ids before rows changed
+    """
+    if model in {Ticket, FilmCinema}:
+        reconcile({*film_cinema_ids, *schedule.get_film_cinema_ids(model, ids)})
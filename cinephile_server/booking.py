@@ -0,0 +1,224 @@
+"""Module for booking, holding and cancelling tickets.
+
+A user may hold free tickets for TICKET_HOLD_SECONDS while confirming them. Other users can
+neither hold nor book a held ticket until the hold expires, expired holds are ignored by every
+write and cleared in batches by release_expired_holds().
+"""
+
+
+from collections import Counter
+from datetime import datetime, timedelta
+
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.core.exceptions import ValidationError
+from django.db import transaction
+from django.db.models import Q
+from django.utils import timezone
+
+from . import availability, live, seats, signals
+from .tokens import TokenUser
+from .models import Screening, Ticket
+
+TICKET_NOT_FOUND = 'Ticket does not exist'
+TICKET_ALREADY_BOOKED = 'the ticket is already booked'
+TICKET_NOT_BOOKED = 'the ticket is not booked by you'
+SCREENING_NOT_FOUND = 'Screening does not exist'
+SEAT_NOT_AVAILABLE = 'the seat is already booked or does not exist'
+TICKET_HELD = 'the ticket is held by another user'
+TICKET_NOT_HELD = 'the ticket is not held by you or its hold has expired'
+HOLD_FIELDS = ('held_by', 'held_until')
+NO_HOLD = {'held_by': None, 'held_until': None}
+
+
+def __update_ticket(ticket_id, conditions: Q, **changes) -> bool:
+    try:
+        return Ticket.objects.filter(conditions, id=ticket_id).update(updated_at=timezone.now(), **changes) == 1
+    except ValidationError:
+        return False
+
+
+def __failure_reason(ticket_id, reason: str) -> str:
+    try:
+        exists = Ticket.objects.filter(id=ticket_id).exists()
+    except ValidationError:
+        exists = False
+    return reason if exists else TICKET_NOT_FOUND
+
+
+def __booking_failure_reason(ticket_ids: list | set) -> str:
+    try:
+        booked = list(Ticket.objects.filter(id__in=ticket_ids).values_list('user_id', flat=True))
+    except ValidationError:
+        booked = []
+    if len(booked) < len(ticket_ids):
+        return TICKET_NOT_FOUND
+    return TICKET_ALREADY_BOOKED if any(user_id is not None for user_id in booked) else TICKET_HELD
+
+
+def __available_to(user: User | TokenUser, now: datetime) -> Q:
+    return Q(user__isnull=True) & (Q(held_until__isnull=True) | Q(held_until__lte=now) | Q(held_by_id=user.pk))
+
+
+def __release_seat(ticket_id) -> None:
+    screening_seat = Ticket.objects.filter(
+        id=ticket_id, screening__isnull=False,
+    ).values_list('screening_id', 'seat').first()
+    if screening_seat is not None:
+        seats.set_seat(*screening_seat, booked=False)
+        Ticket.objects.filter(id=ticket_id).delete()
+
+
+def book(ticket_id, user: User | TokenUser) -> str | None:
+    """Book ticket for user with one conditional update.
+
+    The ticket is assigned only if nobody has booked it yet and nobody else holds it, so concurrent
+    bookers cannot both win the same ticket. Counters of availability are moved in the same transaction.
+
+    Args:
+        ticket_id: id of ticket
+        user: user who books ticket
+
+    Returns:
+        str | None: error message or None if ticket was booked
+    """
+    with transaction.atomic():
+        if __update_ticket(ticket_id, __available_to(user, timezone.now()), user_id=user.pk, **NO_HOLD):
+            availability.add(free=-1, booked=1, ticket__id=ticket_id)
+            signals.evict_ticket(ticket_id, live.BOOKED)
+            return None
+    return __booking_failure_reason([ticket_id])
+
+
+def cancel(ticket_id, user: User | TokenUser) -> str | None:
+    """Cancel ticket booked by user with one conditional update.
+
+    Args:
+        ticket_id: id of ticket
+        user: user who cancels ticket
+
+    Returns:
+        str | None: error message or None if ticket was cancelled
+    """
+    with transaction.atomic():
+        if not __update_ticket(ticket_id, Q(user_id=user.pk, user__isnull=False), user=None):
+            return __failure_reason(ticket_id, TICKET_NOT_BOOKED)
+        availability.add(free=1, booked=-1, ticket__id=ticket_id)
+        signals.evict_ticket(ticket_id, live.FREE)
+        __release_seat(ticket_id)
+    return None
+
+
+def hold(ticket_ids: list, user: User | TokenUser) -> tuple[str | None, datetime | None]:
+    """Hold free tickets for user until TICKET_HOLD_SECONDS pass with one conditional update.
+
+    Tickets held by user already get a new expiry. Either all tickets are held or none of them.
+
+    Args:
+        ticket_ids: ids of tickets
+        user: user who holds tickets
+
+    Returns:
+        tuple[str | None, datetime | None]: error message or None and expiry of hold
+    """
+    ticket_ids = set(ticket_ids)
+    now = timezone.now()
+    held_until = now + timedelta(seconds=settings.TICKET_HOLD_SECONDS)
+    with transaction.atomic():
+        try:
+            held = Ticket.objects.filter(__available_to(user, now), id__in=ticket_ids).update(
+                updated_at=now, held_by_id=user.pk, held_until=held_until,
+            )
+        except ValidationError:
+            held = 0
+        if held == len(ticket_ids):
+            return None, held_until
+        transaction.set_rollback(True)
+    return __booking_failure_reason(ticket_ids), None
+
+
+def confirm(ticket_ids: list, user: User | TokenUser) -> str | None:
+    """Convert unexpired holds of user into bookings with one conditional update.
+
+    Either all tickets are booked or none of them. Counters of availability are moved in the same transaction.
+
+    Args:
+        ticket_ids: ids of tickets held by user
+        user: user who books tickets
+
+    Returns:
+        str | None: error message or None if tickets were booked
+    """
+    ticket_ids = set(ticket_ids)
+    now = timezone.now()
+    with transaction.atomic():
+        try:
+            booked = Ticket.objects.filter(
+                id__in=ticket_ids, user__isnull=True, held_by_id=user.pk, held_until__gt=now,
+            ).update(updated_at=now, user_id=user.pk, **NO_HOLD)
+        except ValidationError:
+            booked = 0
+        if booked != len(ticket_ids):
+            transaction.set_rollback(True)
+            return TICKET_NOT_HELD
+        film_cinemas = Counter(Ticket.objects.filter(id__in=ticket_ids).values_list('film_cinema_id', flat=True))
+        for film_cinema_id, tickets in film_cinemas.items():
+            availability.add(free=-tickets, booked=tickets, id=film_cinema_id)
+        signals.evict_tickets(ticket_ids, live.BOOKED)
+    return None
+
+
+def release_expired_holds(batch_size: int | None = None) -> int:
+    """Clear expired holds in batches read by the partial index of hold expiry.
+
+    Expired holds do not block anybody, so releasing them only keeps the index small.
+
+    Args:
+        batch_size: number of tickets released by one update, TICKET_HOLD_SWEEP_BATCH by default
+
+    Returns:
+        int: number of released tickets
+    """
+    batch_size = batch_size or settings.TICKET_HOLD_SWEEP_BATCH
+    now = timezone.now()
+    released = 0
+    while True:
+        batch = list(
+            Ticket.objects.filter(held_until__lte=now).order_by('held_until').values_list('id', flat=True)[:batch_size],
+        )
+        if batch:
+            released += Ticket.objects.filter(id__in=batch, held_until__lte=now).update(updated_at=now, **NO_HOLD)
+        if len(batch) < batch_size:
+            return released
+
+
+def book_seat(screening_id, seat: int, user: User | TokenUser) -> str | None:
+    """Book seat of screening for user.
+
+    The seat bit is flipped under the screening row lock and the ticket is created
+    in the same transaction, so a seat can be booked only once.
+
+    Args:
+        screening_id: id of screening
+        seat: seat number, starting from 1
+        user: user who books seat
+
+    Returns:
+        str | None: error message or None if seat was booked
+    """
+    try:
+        screening = Screening.objects.select_related('film_cinema').defer('seats').get(id=screening_id)
+    except (Screening.DoesNotExist, ValidationError):
+        return SCREENING_NOT_FOUND
+    with transaction.atomic():
+        if not seats.set_seat(screening.id, seat, booked=True):
+            return SEAT_NOT_AVAILABLE
+        Ticket.objects.create(
+            film_date=screening.start_time,
+            place=f'{screening.hall}, seat {seat}',
+            film_cinema=screening.film_cinema,
+            screening=screening,
+            seat=seat,
+            user_id=user.pk,
+        )
+    return None
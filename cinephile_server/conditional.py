@@ -0,0 +1,324 @@
+"""Module for conditional GET validators (ETag and Last-Modified)."""
+
+
+from dataclasses import dataclass
+from datetime import datetime
+from functools import wraps
+from hashlib import sha256
+from typing import Awaitable, Callable, Sequence
+
+from asgiref.sync import iscoroutinefunction
+
+from django.core.exceptions import ValidationError
+from django.db.models import Count, F, Func, IntegerField, Max, Model, OuterRef, QuerySet, Subquery
+from django.http import HttpResponseBase
+from django.utils.cache import get_conditional_response
+from django.utils.http import http_date, quote_etag
+from rest_framework.request import Request
+
+SAFE_METHODS = ('GET', 'HEAD')
+VALIDATED_STATUSES = (200, 304)
+
+
+@dataclass(frozen=True)
+class Validators:
+    """Validators of resource representation."""
+
+    etag: str
+    last_modified: datetime | None
+
+    @property
+    def quoted_etag(self) -> str:
+        """Return etag in header format.
+
+        Returns:
+            str: quoted etag
+        """
+        return quote_etag(self.etag)
+
+    @property
+    def timestamp(self) -> int | None:
+        """Return last modification time as unix timestamp.
+
+        Returns:
+            int | None: timestamp or None if nothing was modified
+        """
+        return None if self.last_modified is None else int(self.last_modified.timestamp())
+
+
+def __state_aggregates(relations: Sequence[str]) -> dict:
+    aggregates = {'count': Count('pk', distinct=bool(relations)), 'updated_at': Max('updated_at')}
+    for index, relation in enumerate(relations):
+        aggregates[f'count_{index}'] = Count(relation, distinct=True)
+        aggregates[f'updated_at_{index}'] = Max(f'{relation}__updated_at')
+    return aggregates
+
+
+def get_state(queryset: QuerySet, relations: Sequence[str] = ()) -> tuple:
+    """Return numbers of rows and their last modification times with one aggregate query.
+
+    Numbers of rows are included, so deleted rows change the state too.
+
+    Args:
+        queryset: rows of resource
+        relations: lookups of related rows which are shown with resource
+
+    Returns:
+        tuple: state of rows
+    """
+    return tuple(queryset.order_by().aggregate(**__state_aggregates(relations)).values())
+
+
+def __scalar(rows: QuerySet, value: Func) -> Subquery:
+    # Func is not an aggregate for the ORM, so the subquery has no GROUP BY and returns one value for all rows
+    return Subquery(rows.order_by().annotate(state_value=value).values('state_value'))
+
+
+def __count(lookup: str, distinct: bool = False) -> Func:
+    template = '%(function)s(DISTINCT %(expressions)s)' if distinct else '%(function)s(%(expressions)s)'
+    return Func(F(lookup), function='COUNT', template=template, output_field=IntegerField())
+
+
+def __last_modified(lookup: str) -> Func:
+    return Func(F(lookup), function='MAX')
+
+
+def __row_states(model: type[Model], relations: Sequence[str], shown: dict[str, QuerySet]) -> dict:
+    states = {}
+    row = model.objects.filter(pk=OuterRef('pk'))
+    for index, relation in enumerate(relations):
+        states[f'count_{index}'] = __scalar(row, __count(f'{relation}__pk', distinct=True))
+        states[f'updated_at_{index}'] = __scalar(row, __last_modified(f'{relation}__updated_at'))
+    for name, rows in shown.items():
+        states[f'{name}_count'] = __scalar(rows, __count('pk'))
+        states[f'{name}_updated_at'] = __scalar(rows, __last_modified('updated_at'))
+    return states
+
+
+def __state_rows(queryset: QuerySet, relations: Sequence[str], shown: dict[str, QuerySet]) -> QuerySet:
+    states = __row_states(queryset.model, relations, shown)
+    return queryset.prefetch_related(None).annotate(**states).values_list('pk', 'updated_at', *states)
+
+
+def get_page_state(ordered: QuerySet, page_size: int, relations: Sequence[str] = ()) -> tuple:
+    """Return keys and modification times of rows of one page and their related rows with one query.
+
+    The query reads the page and its lookahead row like the paginator and states of related rows are
+    scalar subqueries of these rows, so it costs the same on every page and for any number of rows.
+    Keys are included, so a row which moves into the page in place of a deleted one changes the state.
+
+    Args:
+        ordered: rows from cursor position in walking order
+        page_size: number of rows on page
+        relations: lookups of related rows which are shown with resource
+
+    Returns:
+        tuple: state of rows
+    """
+    rows = __state_rows(ordered, relations, {})
+    return tuple(row_value for row in rows[:page_size + 1] for row_value in row)
+
+
+async def aget_page_state(ordered: QuerySet, page_size: int, relations: Sequence[str] = ()) -> tuple:
+    """Return state of rows of one page like get_page_state without blocking the event loop.
+
+    Args:
+        ordered: rows from cursor position in walking order
+        page_size: number of rows on page
+        relations: lookups of related rows which are shown with resource
+
+    Returns:
+        tuple: state of rows
+    """
+    rows = __state_rows(ordered, relations, {})
+    return tuple([row_value async for row in rows[:page_size + 1] for row_value in row])
+
+
+async def aget_row_state(queryset: QuerySet, relations: Sequence[str] = (), **shown: QuerySet) -> tuple:
+    """Return state of row, its related rows and other rows shown with it with one query.
+
+    Args:
+        queryset: row of resource, e.g. filtered by primary key
+        relations: lookups of related rows which are shown with resource
+        shown: other rows shown with resource by their names
+
+    Returns:
+        tuple: state of rows, empty if row does not exist
+    """
+    rows = __state_rows(queryset.order_by(), relations, shown)
+    return tuple([row_value async for row in rows for row_value in row])
+
+
+def make_validators(states: Sequence[tuple], *variants) -> Validators:
+    """Build validators from states of rows.
+
+    Args:
+        states: states returned by get_state, get_page_state or aget_row_state
+        variants: other values which change representation, e.g. current user
+
+    Returns:
+        Validators: etag and last modification time
+    """
+    digest = sha256(repr((tuple(states), variants)).encode()).hexdigest()
+    modified = [state_value for state in states for state_value in state if isinstance(state_value, datetime)]
+    return Validators(digest, max(modified, default=None))
+
+
+def __get_not_modified(request, validators: Validators) -> HttpResponseBase | None:
+    return get_conditional_response(request, etag=validators.quoted_etag, last_modified=validators.timestamp)
+
+
+def __set_validators(response: HttpResponseBase, validators: Validators) -> HttpResponseBase:
+    if response.status_code in VALIDATED_STATUSES:
+        response.headers.setdefault('ETag', validators.quoted_etag)
+        if validators.timestamp is not None:
+            response.headers.setdefault('Last-Modified', http_date(validators.timestamp))
+    return response
+
+
+def respond_conditionally(request, validators: Validators, get_response: Callable[[], HttpResponseBase]):
+    """Return 304 if client has actual representation, otherwise build response.
+
+    Args:
+        request: current request
+        validators: validators of resource
+        get_response: builds full response
+
+    Returns:
+        HttpResponseBase: not modified or full response with validators
+    """
+    response = __get_not_modified(request, validators)
+    if response is None:
+        response = get_response()
+    return __set_validators(response, validators)
+
+
+async def arespond_conditionally(
+    request, validators: Validators, get_response: Callable[[], Awaitable[HttpResponseBase]],
+) -> HttpResponseBase:
+    """Return 304 if client has actual representation, otherwise await response.
+
+    Args:
+        request: current request
+        validators: validators of resource
+        get_response: builds full response asynchronously
+
+    Returns:
+        HttpResponseBase: not modified or full response with validators
+    """
+    response = __get_not_modified(request, validators)
+    if response is None:
+        response = await get_response()
+    return __set_validators(response, validators)
+
+
+def conditional(get_validators: Callable[..., Validators]) -> Callable:
+    """Make view answer 304 to GET requests with actual validators without rendering.
+
+    Async views need async get_validators.
+
+    Args:
+        get_validators: returns validators for view arguments
+
+    Returns:
+        Callable: view decorator
+    """
+    def decorator(view: Callable) -> Callable:
+        if iscoroutinefunction(view):
+            @wraps(view)
+            async def async_wrapper(request, *args, **kwargs):
+                if request.method not in SAFE_METHODS:
+                    return await view(request, *args, **kwargs)
+                return await arespond_conditionally(
+                    request,
+                    await get_validators(request, *args, **kwargs),
+                    lambda: view(request, *args, **kwargs),
+                )
+            return async_wrapper
+
+        @wraps(view)
+        def wrapper(request, *args, **kwargs):
+            if request.method not in SAFE_METHODS:
+                return view(request, *args, **kwargs)
+            return respond_conditionally(
+                request,
+                get_validators(request, *args, **kwargs),
+                lambda: view(request, *args, **kwargs),
+            )
+        return wrapper
+    return decorator
+
+
+class ConditionalGetMixin:
+    """Viewset mixin which validates list and retrieve responses before serializing them."""
+
+    validator_relations: Sequence[str] = ()
+
+    def get_validators(self, request: Request, queryset: QuerySet) -> Validators:
+        """Return validators of rows shown by response.
+
+        Args:
+            request: current request
+            queryset: rows of response
+
+        Returns:
+            Validators: validators of response
+        """
+        return make_validators([get_state(queryset, self.validator_relations)], request.accepted_media_type)
+
+    def get_list_validators(self, request: Request, queryset: QuerySet) -> Validators:
+        """Return validators of requested page or of whole list if it is not paginated by cursor.
+
+        Args:
+            request: current request
+            queryset: filtered rows of list
+
+        Returns:
+            Validators: validators of response
+        """
+        paginator = self.paginator
+        if not hasattr(paginator, 'get_page_queryset'):
+            return self.get_validators(request, queryset)
+        ordered, page_size = paginator.get_page_queryset(queryset, request, self)
+        state = get_page_state(ordered, page_size, self.validator_relations)
+        cursor = request.query_params.get(paginator.cursor_query_param)
+        return make_validators([state], request.accepted_media_type, cursor, page_size)
+
+    def list(self, request: Request, *args, **kwargs):
+        """Return list or 304 if it was not changed.
+
+        Args:
+            request: current request
+            args: positional arguments of view
+            kwargs: keyword arguments of view
+
+        Returns:
+            Response: list of objects
+        """
+        validators = self.get_list_validators(request, self.filter_queryset(self.get_queryset()))
+        return respond_conditionally(request, validators, lambda: super(ConditionalGetMixin, self).list(
+            request, *args, **kwargs,
+        ))
+
+    def retrieve(self, request: Request, *args, **kwargs):
+        """Return object or 304 if it was not changed.
+
+        Args:
+            request: current request
+            args: positional arguments of view
+            kwargs: keyword arguments of view
+
+        Returns:
+            Response: object
+        """
+        lookup_url_kwarg = self.lookup_url_kwarg or self.lookup_field
+        try:
+            queryset = self.filter_queryset(self.get_queryset()).filter(
+                **{self.lookup_field: kwargs[lookup_url_kwarg]},
+            )
+            validators = self.get_validators(request, queryset)
+        except (TypeError, ValueError, ValidationError):
+            return super().retrieve(request, *args, **kwargs)
+        return respond_conditionally(request, validators, lambda: super(ConditionalGetMixin, self).retrieve(
+            request, *args, **kwargs,
+        ))
@@ -0,0 +1,116 @@
+"""Module for filtering and ordering of REST lists by query parameters.
+
+Every filter parameter and ordering field is backed by an index (migrations 0005 and 0009),
+so lists are read by index scans and keyset pages cost the same for any combination.
+"""
+
+
+from typing import Any, Callable
+
+from django.db.models import Q, QuerySet
+from rest_framework.filters import BaseFilterBackend, OrderingFilter
+from rest_framework.request import Request
+from rest_framework.serializers import Serializer
+
+Lookup = str | Callable[[Any], Q]
+
+
+class QueryParamsSerializer(Serializer):
+    """Serializer of query parameters which filter rows, lookups map parameters to field lookups or filters."""
+
+    lookups: dict[str, Lookup] = {}
+
+    def filter(self, queryset: QuerySet) -> QuerySet:
+        """Filter rows by validated parameters, parameters without value are skipped.
+
+        Args:
+            queryset: filtered rows
+
+        Returns:
+            QuerySet: rows matching all parameters
+        """
+        for name, param_value in self.validated_data.items():
+            lookup = self.lookups.get(name)
+            if lookup is None or param_value is None:
+                continue
+            queryset = queryset.filter(lookup(param_value) if callable(lookup) else Q(**{lookup: param_value}))
+        return queryset
+
+
+class QueryParamsFilter(BaseFilterBackend):
+    """Filter backend which filters list rows by parameters of view.filter_serializer_class."""
+
+    def filter_queryset(self, request: Request, queryset: QuerySet, view) -> QuerySet:
+        """Return list rows matching query parameters.
+
+        Args:
+            request: request with query parameters
+            queryset: rows of view
+            view: filtered view
+
+        Returns:
+            QuerySet: matching rows, other actions than list are not filtered
+        """
+        serializer_class = getattr(view, 'filter_serializer_class', None)
+        if serializer_class is None or getattr(view, 'action', None) != 'list':
+            return queryset
+        params = serializer_class(data=request.query_params)
+        params.is_valid(raise_exception=True)
+        return params.filter(queryset)
+
+    def get_schema_operation_parameters(self, view) -> list[dict]:
+        """Return schema of filter parameters.
+
+        Args:
+            view: filtered view
+
+        Returns:
+            list[dict]: parameters of operation
+        """
+        serializer_class = getattr(view, 'filter_serializer_class', None)
+        if serializer_class is None:
+            return []
+        return [
+            {'name': name, 'required': False, 'in': 'query', 'schema': {'type': 'string'}}
+            for name in serializer_class.lookups
+        ]
+
+
+class KeysetOrderingFilter(OrderingFilter):
+    """Ordering by one whitelisted field of view.ordering_fields, the paginator orders rows by it.
+
+    Primary key is the tie breaker in the same direction, so the whole key is read from one index.
+    """
+
+    def get_ordering(self, request: Request, queryset: QuerySet, view) -> tuple[str, ...] | None:
+        """Return ordering key for keyset paginator.
+
+        Args:
+            request: request with optional ordering parameter
+            queryset: rows of view
+            view: ordered view
+
+        Returns:
+            tuple[str, ...] | None: ordering key or None if ordering is not requested or not allowed
+        """
+        param = request.query_params.get(self.ordering_param)
+        if not param:
+            return None
+        fields = self.remove_invalid_fields(queryset, [param.split(',')[0].strip()], view, request)
+        if not fields:
+            return None
+        pk_name = queryset.model._meta.pk.name
+        return (fields[0], f'-{pk_name}' if fields[0].startswith('-') else pk_name)
+
+    def filter_queryset(self, request: Request, queryset: QuerySet, view) -> QuerySet:
+        """Return rows as they are, they are ordered by the paginator.
+
+        Args:
+            request: current request
+            queryset: rows of view
+            view: ordered view
+
+        Returns:
+            QuerySet: the same rows
+        """
+        return queryset
@@ -7,7 +7,7 @@ from django import forms
 from django.contrib.auth.forms import UserCreationForm
 from django.contrib.auth.models import User
 
-from .models import Film, Ticket
+from .models import ADDRESS_NAME_LEN, Film, Ticket
 
 FIRST_NAME_MAX_LENGTH = 100
 LAST_NAME_MAX_LENGTH = 100
@@ -43,6 +43,13 @@ class TicketForm(forms.ModelForm):
         fields = '__all__'
 
 
+class ScheduleForm(forms.Form):
+    """Form for city and day of schedule."""
+
+    city = forms.CharField(max_length=ADDRESS_NAME_LEN)
+    day = forms.DateField(widget=forms.DateInput(attrs={'type': 'date'}))
+
+
 class RegistrationForm(UserCreationForm):
     """Form for registration."""
 
@@ -0,0 +1,249 @@
+"""Module for replaying responses of writes retried with the same Idempotency-Key header.
+
+The first request with a key inserts a row keyed by digest of user, key, method and path. The row
+is the lock of the request: concurrent duplicates wait until the response is stored in it and
+replay it without running the view. A stored response is replayed for IDEMPOTENCY_KEY_SECONDS,
+expired rows are taken over by new requests and deleted in bulk by prune_expired().
+Server errors and exceptions release the key, so the retry runs the view again.
+"""
+
+
+import asyncio
+from datetime import timedelta
+from functools import wraps
+from hashlib import sha256
+from time import monotonic, sleep
+from typing import Awaitable, Callable
+
+from asgiref.sync import iscoroutinefunction, sync_to_async
+from django.conf import settings
+from django.db import IntegrityError, transaction
+from django.http import HttpRequest, HttpResponse, HttpResponseBadRequest
+from django.http.response import HttpResponseBase
+from django.template.response import SimpleTemplateResponse
+from django.utils import timezone
+
+from .models import IdempotencyKey
+
+HEADER = 'Idempotency-Key'
+REPLAYED_HEADER = 'Idempotent-Replayed'
+MAX_KEY_LENGTH = 255
+KEY_TOO_LONG = f'{HEADER} is longer than {MAX_KEY_LENGTH} characters'
+KEY_REUSED = f'{HEADER} was used for another request'
+KEY_IN_PROGRESS = f'request with this {HEADER} is still in progress'
+UNPROCESSABLE = 422
+CONFLICT = 409
+SERVER_ERROR = 500
+CLAIMED = True
+
+
+def __hash(*parts) -> str:
+    return sha256(repr(parts).encode()).hexdigest()
+
+
+def __claim(digest: str, fingerprint: str) -> bool | HttpResponse | None:
+    now = timezone.now()
+    lock_until = now + timedelta(seconds=settings.IDEMPOTENCY_LOCK_SECONDS)
+    try:
+        with transaction.atomic():
+            IdempotencyKey.objects.create(digest=digest, fingerprint=fingerprint, expires_at=lock_until)
+        return CLAIMED
+    except IntegrityError:
+        pass
+    if IdempotencyKey.objects.filter(digest=digest, expires_at__lte=now).update(
+        fingerprint=fingerprint, status_code=None, content=b'', content_type='', location='', expires_at=lock_until,
+    ):
+        return CLAIMED
+    stored = IdempotencyKey.objects.filter(digest=digest).values_list(
+        'fingerprint', 'status_code', 'content', 'content_type', 'location',
+    ).first()
+    if stored is None:
+        return None
+    stored_fingerprint, status_code, content, content_type, location = stored
+    if stored_fingerprint != fingerprint:
+        return HttpResponse(KEY_REUSED, status=UNPROCESSABLE)
+    if status_code is None:
+        return None
+    response = HttpResponse(bytes(content), status=status_code, content_type=content_type or None)
+    if location:
+        response['Location'] = location
+    response[REPLAYED_HEADER] = 'true'
+    return response
+
+
+def __release(digest: str) -> None:
+    IdempotencyKey.objects.filter(digest=digest, status_code__isnull=True).delete()
+
+
+def __store(digest: str, response: HttpResponseBase) -> None:
+    IdempotencyKey.objects.filter(digest=digest).update(
+        status_code=response.status_code,
+        content=response.content,
+        content_type=response.get('Content-Type', ''),
+        location=response.get('Location', ''),
+        expires_at=timezone.now() + timedelta(seconds=settings.IDEMPOTENCY_KEY_SECONDS),
+    )
+
+
+def __store_when_rendered(digest: str, response: HttpResponseBase) -> None:
+    if response.streaming or response.status_code >= SERVER_ERROR:
+        __release(digest)
+    elif isinstance(response, SimpleTemplateResponse) and not response.is_rendered:
+        response.add_post_render_callback(lambda rendered: __store(digest, rendered))
+    else:
+        __store(digest, response)
+
+
+def __identify(request: HttpRequest, user_id, key: str) -> tuple[str, str]:
+    return __hash(user_id, key, request.method, request.path), __hash(request.get_full_path(), request.body)
+
+
+def respond_once(request: HttpRequest, user_id, get_response: Callable[[], HttpResponseBase]) -> HttpResponseBase:
+    """Return response of the first request with the same Idempotency-Key or run view and store its response.
+
+    Args:
+        request: django or DRF request
+        user_id: id of user who sent request, None for anonymous user
+        get_response: runs view
+
+    Returns:
+        HttpResponseBase: response of view, stored response or error of key
+    """
+    key = request.headers.get(HEADER)
+    if key is None:
+        return get_response()
+    if len(key) > MAX_KEY_LENGTH:
+        return HttpResponseBadRequest(KEY_TOO_LONG)
+    digest, fingerprint = __identify(request, user_id, key)
+    deadline = monotonic() + settings.IDEMPOTENCY_WAIT_SECONDS
+    while (claim := __claim(digest, fingerprint)) is None:
+        if monotonic() >= deadline:
+            return HttpResponse(KEY_IN_PROGRESS, status=CONFLICT)
+        sleep(settings.IDEMPOTENCY_POLL_INTERVAL)
+    if claim is not CLAIMED:
+        return claim
+    try:
+        response = get_response()
+    except BaseException:
+        __release(digest)
+        raise
+    __store_when_rendered(digest, response)
+    return response
+
+
+async def arespond_once(
+    request: HttpRequest, user_id, get_response: Callable[[], Awaitable[HttpResponseBase]],
+) -> HttpResponseBase:
+    """Async variant of respond_once, duplicates wait without holding a thread.
+
+    Args:
+        request: django request
+        user_id: id of user who sent request, None for anonymous user
+        get_response: returns awaitable response of view
+
+    Returns:
+        HttpResponseBase: response of view, stored response or error of key
+    """
+    key = request.headers.get(HEADER)
+    if key is None:
+        return await get_response()
+    if len(key) > MAX_KEY_LENGTH:
+        return HttpResponseBadRequest(KEY_TOO_LONG)
+    digest, fingerprint = __identify(request, user_id, key)
+    deadline = monotonic() + settings.IDEMPOTENCY_WAIT_SECONDS
+    while (claim := await sync_to_async(__claim)(digest, fingerprint)) is None:
+        if monotonic() >= deadline:
+            return HttpResponse(KEY_IN_PROGRESS, status=CONFLICT)
+        await asyncio.sleep(settings.IDEMPOTENCY_POLL_INTERVAL)
+    if claim is not CLAIMED:
+        return claim
+    try:
+        response = await get_response()
+    except BaseException:
+        await sync_to_async(__release)(digest)
+        raise
+    await sync_to_async(__store_when_rendered)(digest, response)
+    return response
+
+
+def idempotent(view: Callable) -> Callable:
+    """Make POST requests of view with Idempotency-Key header run once per user and key.
+
+    Args:
+        view: sync or async view
+
+    Returns:
+        Callable: view which replays stored responses
+    """
+    if iscoroutinefunction(view):
+        @wraps(view)
+        async def async_wrapper(request, *args, **kwargs):
+            if request.method != 'POST' or HEADER not in request.headers:
+                return await view(request, *args, **kwargs)
+            user = await request.auser()
+            return await arespond_once(request, user.pk, lambda: view(request, *args, **kwargs))
+        return async_wrapper
+
+    @wraps(view)
+    def wrapper(request, *args, **kwargs):
+        if request.method != 'POST' or HEADER not in request.headers:
+            return view(request, *args, **kwargs)
+        return respond_once(request, request.user.pk, lambda: view(request, *args, **kwargs))
+    return wrapper
+
+
+def prune_expired(batch_size: int | None = None) -> int:
+    """Delete expired keys in batches read by the index of expiry.
+
+    Args:
+        batch_size: number of keys deleted by one statement, IDEMPOTENCY_PRUNE_BATCH by default
+
+    Returns:
+        int: number of deleted keys
+    """
+    batch_size = batch_size or settings.IDEMPOTENCY_PRUNE_BATCH
+    now = timezone.now()
+    deleted = 0
+    while True:
+        batch = list(IdempotencyKey.objects.filter(expires_at__lte=now).values_list('digest', flat=True)[:batch_size])
+        if batch:
+            deleted += IdempotencyKey.objects.filter(digest__in=batch, expires_at__lte=now).delete()[0]
+        if len(batch) < batch_size:
+            return deleted
+
+
+class IdempotentMixin:
+    """Viewset mixin which runs create and update requests with Idempotency-Key header once and replays them.
+
+    Validation errors are raised before a response is stored, so they release the key.
+    """
+
+    def create(self, request, *args, **kwargs):
+        """Create object once per Idempotency-Key.
+
+        Args:
+            request: current request
+            args: positional arguments of view
+            kwargs: keyword arguments of view
+
+        Returns:
+            Response: created object or stored response
+        """
+        return respond_once(request, request.user.pk, lambda: super(IdempotentMixin, self).create(
+            request, *args, **kwargs,
+        ))
+
+    def update(self, request, *args, **kwargs):
+        """Update object once per Idempotency-Key, partial updates run through it too.
+
+        Args:
+            request: current request
+            args: positional arguments of view
+            kwargs: keyword arguments of view
+
+        Returns:
+            Response: updated object or stored response
+        """
+        return respond_once(request, request.user.pk, lambda: super(IdempotentMixin, self).update(
+            request, *args, **kwargs,
+        ))
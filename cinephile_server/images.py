@@ -0,0 +1,220 @@
+"""Module for content-addressed poster store with thumbnails.
+
+Images are validated before they are stored: they must not exceed IMAGE_MAX_BYTES, must start with the
+signature of their content type and, with Pillow, must be readable images of that format.
+"""
+
+
+import os
+import re
+from base64 import b64decode
+from binascii import Error as BinasciiError
+from concurrent.futures import Future, ThreadPoolExecutor
+from hashlib import sha256
+from io import BytesIO
+from pathlib import Path
+from tempfile import NamedTemporaryFile
+
+from django.conf import settings
+
+try:
+    from PIL import Image
+except ImportError:  # thumbnails are optional, the original image is served without Pillow
+    Image = None
+
+DATA_URI = re.compile(r'^data:(?P<content_type>image/[\w.+-]+)(;[\w-]+=[^;,]*)*;base64,(?P<data>.*)$', re.S)
+REFERENCE = re.compile(r'^(?P<digest>[0-9a-f]{64})\.(?P<extension>[a-z]+)$')
+EXTENSIONS = {
+    'image/png': 'png',
+    'image/jpeg': 'jpg',
+    'image/gif': 'gif',
+    'image/webp': 'webp',
+}
+CONTENT_TYPES = {extension: content_type for content_type, extension in EXTENSIONS.items()}
+SIGNATURES = {
+    'image/png': re.compile(rb'\x89PNG\r\n\x1a\n'),
+    'image/jpeg': re.compile(rb'\xff\xd8\xff'),
+    'image/gif': re.compile(rb'GIF8[79]a'),
+    'image/webp': re.compile(rb'RIFF.{4}WEBP', re.S),
+}
+FORMATS = {
+    'image/png': 'PNG',
+    'image/jpeg': 'JPEG',
+    'image/gif': 'GIF',
+    'image/webp': 'WEBP',
+}
+ORIGINAL = 'original'
+THUMBNAIL_SIZES = {
+    'card': (400, 600),
+    'detail': (800, 1200),
+}
+THUMBNAIL_EXTENSION = 'webp'
+REFERENCE_MAX_LENGTH = 72
+
+__executor = ThreadPoolExecutor(max_workers=settings.IMAGE_WORKERS, thread_name_prefix='thumbnails')
+
+
+class InvalidImageError(ValueError):
+    """Image which is not stored."""
+
+
+def get_root() -> Path:
+    """Return directory of image store.
+
+    Returns:
+        Path: root directory
+    """
+    return Path(settings.IMAGE_STORE_ROOT)
+
+
+def parse_data_uri(value: str | None) -> tuple[bytes, str] | None:
+    """Decode base64 image data uri.
+
+    Args:
+        value: value of url_image field
+
+    Returns:
+        tuple[bytes, str] | None: image bytes and content type or None if value is not a supported data uri
+    """
+    if not value or not value.startswith('data:'):
+        return None
+    match = DATA_URI.match(value.strip())
+    if match is None or match.group('content_type') not in EXTENSIONS:
+        return None
+    try:
+        return b64decode(match.group('data'), validate=False), match.group('content_type')
+    except (BinasciiError, ValueError):
+        return None
+
+
+def is_reference(reference: str) -> bool:
+    """Check that string is a valid image reference.
+
+    Args:
+        reference: image reference
+
+    Returns:
+        bool: True if reference is valid
+    """
+    match = REFERENCE.match(reference)
+    return match is not None and match.group('extension') in CONTENT_TYPES
+
+
+def get_path(reference: str, size: str = ORIGINAL) -> Path:
+    """Return path of original image or its thumbnail.
+
+    Args:
+        reference: image reference
+        size: ORIGINAL or one of THUMBNAIL_SIZES
+
+    Returns:
+        Path: path of image file
+    """
+    digest = REFERENCE.match(reference).group('digest')
+    directory = get_root() / digest[:2]
+    if size == ORIGINAL:
+        return directory / reference
+    return directory / f'{digest}.{size}.{THUMBNAIL_EXTENSION}'
+
+
+def get_content_type(path: Path) -> str:
+    """Return content type of stored image.
+
+    Args:
+        path: path of image file
+
+    Returns:
+        str: content type
+    """
+    return CONTENT_TYPES.get(path.suffix.lstrip('.'), 'application/octet-stream')
+
+
+def __write_atomically(path: Path, write) -> None:
+    path.parent.mkdir(parents=True, exist_ok=True)
+    with NamedTemporaryFile(dir=path.parent, delete=False) as temporary:
+        write(temporary)
+    os.replace(temporary.name, path)
+
+
+def generate_thumbnails(reference: str) -> None:
+    """Generate missing thumbnails of image, does nothing without Pillow.
+
+    Args:
+        reference: image reference
+    """
+    if Image is None:
+        return
+    with Image.open(get_path(reference)) as original:
+        for size, dimensions in THUMBNAIL_SIZES.items():
+            path = get_path(reference, size)
+            if path.exists():
+                continue
+            thumbnail = original.copy()
+            thumbnail.thumbnail(dimensions)
+            __write_atomically(path, lambda target: thumbnail.save(target, format=THUMBNAIL_EXTENSION))
+
+
+def __is_readable(data: bytes, content_type: str) -> bool:
+    try:
+        with Image.open(BytesIO(data), formats=(FORMATS[content_type],)) as image:
+            image.verify()
+    except (OSError, SyntaxError, ValueError, Image.DecompressionBombError):
+        return False
+    return True
+
+
+def validate(data: bytes, content_type: str) -> None:
+    """Check that image may be stored.
+
+    Args:
+        data: image bytes
+        content_type: image content type
+
+    Raises:
+        InvalidImageError: image is too large, is not of its content type or is not readable
+    """
+    if len(data) > settings.IMAGE_MAX_BYTES:
+        raise InvalidImageError(f'Image is larger than {settings.IMAGE_MAX_BYTES} bytes')
+    if not SIGNATURES[content_type].match(data):
+        raise InvalidImageError(f'Image is not {content_type}')
+    if Image is not None and not __is_readable(data, content_type):
+        raise InvalidImageError(f'Image is not a readable {content_type}')
+
+
+def store(data: bytes, content_type: str) -> tuple[str, Future]:
+    """Store image by hash of its content and schedule thumbnail generation, new images are validated first.
+
+    Args:
+        data: image bytes
+        content_type: image content type
+
+    Raises:
+        InvalidImageError: image is not stored yet and is not valid
+
+    Returns:
+        tuple[str, Future]: image reference and future of thumbnail generation
+    """
+    reference = f'{sha256(data).hexdigest()}.{EXTENSIONS[content_type]}'
+    path = get_path(reference)
+    if not path.exists():
+        validate(data, content_type)
+        __write_atomically(path, lambda target: target.write(data))
+    return reference, __executor.submit(generate_thumbnails, reference)
+
+
+def get_image_path(reference: str, size: str) -> Path | None:
+    """Return path of thumbnail or of original image if thumbnail is not ready.
+
+    Args:
+        reference: image reference
+        size: ORIGINAL or one of THUMBNAIL_SIZES
+
+    Returns:
+        Path | None: existing image path or None
+    """
+    if not is_reference(reference) or (size != ORIGINAL and size not in THUMBNAIL_SIZES):
+        return None
+    for path in (get_path(reference, size), get_path(reference)):
+        if path.exists():
+            return path
+    return None
@@ -0,0 +1,276 @@
+"""Module for live ticket changes pushed to detail pages with Server-Sent Events.
+
+Writes publish events after commit: a sequence number in cache is incremented and the event is
+stored under its number for LIVE_EVENT_TIMEOUT seconds. Every process runs one feed task which
+polls the sequence and fans new events out to in-memory queues of subscribers of a film or a
+cinema, so polling costs the same for one and for thousands of subscribers. Reconnecting clients
+send the id of the last event and get missed events from cache. Several processes need a cache
+with atomic incr (e.g. memcached or redis) to publish without losing events.
+"""
+
+
+import asyncio
+import json
+from dataclasses import dataclass, field
+from time import monotonic
+from typing import AsyncIterator
+
+from django.conf import settings
+from django.core.cache import BaseCache, caches
+from django.db import transaction
+
+KEY_PREFIX = 'live'
+SEQUENCE_KEY = f'{KEY_PREFIX}:sequence'
+FILM = 'film'
+CINEMA = 'cinema'
+KINDS = (FILM, CINEMA)
+BOOKED = 'booked'
+FREE = 'free'
+DELETED = 'deleted'
+QUEUE_SIZE = 100
+GAP_POLLS = 10
+RETRY_MILLISECONDS = 3000
+HEARTBEAT = ': ping\n\n'
+CONTENT_TYPE = 'text/event-stream'
+
+
+def get_cache() -> BaseCache:
+    """Return cache of published events.
+
+    Returns:
+        BaseCache: cache backend
+    """
+    return caches[settings.LIVE_CACHE_ALIAS]
+
+
+def event_key(number: int) -> str:
+    """Return cache key of published event.
+
+    Args:
+        number: sequence number of event
+
+    Returns:
+        str: cache key
+    """
+    return f'{KEY_PREFIX}:event:{number}'
+
+
+def __store(event: dict) -> None:
+    cache = get_cache()
+    cache.add(SEQUENCE_KEY, 0, None)
+    number = cache.incr(SEQUENCE_KEY)
+    cache.set(event_key(number), event, settings.LIVE_EVENT_TIMEOUT)
+
+
+def publish(ticket_id, film_id, cinema_id, state: str, screening_id=None, seat: int | None = None) -> None:
+    """Publish change of ticket to subscribers of its film and cinema after the current transaction is committed.
+
+    Args:
+        ticket_id: id of ticket
+        film_id: id of film of ticket
+        cinema_id: id of cinema of ticket
+        state: "booked", "free" or "deleted"
+        screening_id: id of screening of seat ticket
+        seat: seat number of seat ticket
+    """
+    event = {
+        'ticket': str(ticket_id), FILM: str(film_id), CINEMA: str(cinema_id), 'state': state,
+        'screening': None if screening_id is None else str(screening_id), 'seat': seat,
+    }
+    transaction.on_commit(lambda: __store(event))
+
+
+def format_event(number: int, event: dict) -> str:
+    """Return event in Server-Sent Events format.
+
+    Args:
+        number: sequence number of event
+        event: published event
+
+    Returns:
+        str: event message
+    """
+    return f'id: {number}\nevent: ticket\ndata: {json.dumps(event)}\n\n'
+
+
+@dataclass(eq=False)
+class Subscription:
+    """Queue of events of one film or cinema for one client."""
+
+    kind: str
+    object_id: str
+    queue: asyncio.Queue = field(default_factory=lambda: asyncio.Queue(QUEUE_SIZE))
+    overflowed: bool = False
+
+
+class Feed:
+    """Poller of published events which fans them out to subscriptions of one event loop."""
+
+    def __init__(self, loop: asyncio.AbstractEventLoop) -> None:
+        """Create feed.
+
+        Args:
+            loop: event loop of subscribers
+        """
+        self.loop = loop
+        self.subscriptions: dict[tuple[str, str], set[Subscription]] = {}
+        self.task: asyncio.Task | None = None
+        self.last = 0
+        self.stuck_polls = 0
+
+    def subscribe(self, kind: str, object_id) -> Subscription:
+        """Subscribe to events of film or cinema and start polling if it is the first subscription.
+
+        Args:
+            kind: "film" or "cinema"
+            object_id: id of film or cinema
+
+        Returns:
+            Subscription: subscription with queue of events
+        """
+        subscription = Subscription(kind, str(object_id))
+        self.subscriptions.setdefault((subscription.kind, subscription.object_id), set()).add(subscription)
+        if self.task is None or self.task.done():
+            self.task = self.loop.create_task(self.run())
+        return subscription
+
+    def unsubscribe(self, subscription: Subscription) -> None:
+        """Remove subscription, polling stops with the last one.
+
+        Args:
+            subscription: subscription
+        """
+        key = (subscription.kind, subscription.object_id)
+        subscribers = self.subscriptions.get(key, set())
+        subscribers.discard(subscription)
+        if not subscribers:
+            self.subscriptions.pop(key, None)
+
+    async def run(self) -> None:
+        """Poll sequence of events while there are subscriptions."""
+        self.last = await get_cache().aget(SEQUENCE_KEY, 0)
+        self.stuck_polls = 0
+        while self.subscriptions:
+            await asyncio.sleep(settings.LIVE_POLL_INTERVAL)
+            await self.poll()
+
+    async def poll(self) -> None:
+        """Dispatch events published since the last poll.
+
+        An event whose number was taken but which is not stored yet is waited for at most GAP_POLLS polls.
+        """
+        cache = get_cache()
+        newest = await cache.aget(SEQUENCE_KEY, 0)
+        if newest < self.last:
+            self.last = newest
+        self.last = max(self.last, newest - QUEUE_SIZE)
+        numbers = range(self.last + 1, newest + 1)
+        events = await cache.aget_many([event_key(number) for number in numbers])
+        for number in numbers:
+            event = events.get(event_key(number))
+            if event is None and self.stuck_polls < GAP_POLLS:
+                self.stuck_polls += 1
+                return
+            self.stuck_polls = 0
+            self.last = number
+            if event is not None:
+                self.dispatch(number, event)
+
+    def dispatch(self, number: int, event: dict) -> None:
+        """Put event to queues of subscribers of its film and cinema.
+
+        A subscriber whose queue is full is dropped, its client reconnects and reads missed events from cache.
+
+        Args:
+            number: sequence number of event
+            event: published event
+        """
+        for kind in KINDS:
+            for subscription in list(self.subscriptions.get((kind, event[kind]), ())):
+                try:
+                    subscription.queue.put_nowait((number, event))
+                except asyncio.QueueFull:
+                    subscription.overflowed = True
+                    self.unsubscribe(subscription)
+
+
+__feeds: dict[asyncio.AbstractEventLoop, Feed] = {}
+
+
+def get_feed() -> Feed:
+    """Return feed of running event loop, there is one per process under ASGI.
+
+    Returns:
+        Feed: feed
+    """
+    loop = asyncio.get_running_loop()
+    for stale_loop in [stale_loop for stale_loop in __feeds if stale_loop.is_closed()]:
+        del __feeds[stale_loop]
+    if loop not in __feeds:
+        __feeds[loop] = Feed(loop)
+    return __feeds[loop]
+
+
+async def get_missed(kind: str, object_id, after: int) -> list[tuple[int, dict]]:
+    """Return events of film or cinema published after event number which are still in cache.
+
+    Args:
+        kind: "film" or "cinema"
+        object_id: id of film or cinema
+        after: number of the last event received by client
+
+    Returns:
+        list[tuple[int, dict]]: numbers and events
+    """
+    cache = get_cache()
+    newest = await cache.aget(SEQUENCE_KEY, 0)
+    numbers = range(max(after, newest - QUEUE_SIZE) + 1, newest + 1)
+    events = await cache.aget_many([event_key(number) for number in numbers])
+    return [
+        (number, events[event_key(number)]) for number in numbers
+        if events.get(event_key(number), {}).get(kind) == str(object_id)
+    ]
+
+
+async def __follow(subscription: Subscription, sent: int) -> AsyncIterator[str]:
+    deadline = monotonic() + settings.LIVE_STREAM_TIMEOUT
+    while not subscription.overflowed:
+        remaining = deadline - monotonic()
+        if remaining <= 0:
+            return
+        try:
+            number, event = await asyncio.wait_for(
+                subscription.queue.get(), min(settings.LIVE_HEARTBEAT_INTERVAL, remaining),
+            )
+        except asyncio.TimeoutError:
+            yield HEARTBEAT
+            continue
+        if number > sent:
+            yield format_event(number, event)
+            sent = number
+
+
+async def stream(kind: str, object_id, last_event_id: int | None) -> AsyncIterator[str]:
+    """Yield events of film or cinema until LIVE_STREAM_TIMEOUT, then the client reconnects.
+
+    Args:
+        kind: "film" or "cinema"
+        object_id: id of film or cinema
+        last_event_id: number of the last event received before reconnection
+
+    Yields:
+        str: messages of Server-Sent Events
+    """
+    feed = get_feed()
+    subscription = feed.subscribe(kind, object_id)
+    try:
+        yield f'retry: {RETRY_MILLISECONDS}\n\n'
+        sent = 0
+        if last_event_id is not None:
+            for number, event in await get_missed(kind, object_id, last_event_id):
+                yield format_event(number, event)
+                sent = number
+        async for message in __follow(subscription, sent):
+            yield message
+    finally:
+        feed.unsubscribe(subscription)
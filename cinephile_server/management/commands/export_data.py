@@ -0,0 +1,53 @@
+"""Module for command which exports catalog rows as CSV or NDJSON."""
+
+
+import sys
+from time import perf_counter
+
+from django.core.management.base import BaseCommand, CommandError, CommandParser
+
+from cinephile_server import transfer
+
+STDOUT = '-'
+
+
+class Command(BaseCommand):
+    """Stream all rows of one model to a file or stdout."""
+
+    help = 'Export addresses, cinemas, films, film cinemas or tickets as CSV or NDJSON.'
+
+    def add_arguments(self, parser: CommandParser) -> None:
+        """Add command arguments.
+
+        Args:
+            parser: argument parser
+        """
+        parser.add_argument('model', choices=sorted(transfer.MODELS))
+        parser.add_argument('output', help=f'File path, "{STDOUT}" writes to stdout.')
+        parser.add_argument('--format', choices=sorted(set(transfer.FORMATS.values())))
+        parser.add_argument('--chunk-size', type=int, default=transfer.DEFAULT_CHUNK_SIZE)
+
+    def handle(self, *args, **options) -> None:
+        """Export rows.
+
+        Args:
+            args: positional arguments
+            options: command options
+
+        Raises:
+            CommandError: format is unknown
+        """
+        output = options['output']
+        file_format = options['format'] or transfer.get_format(output)
+        if file_format is None:
+            raise CommandError('Use --format for output without .csv, .ndjson or .jsonl extension')
+        model = transfer.MODELS[options['model']]
+        start = perf_counter()
+        if output == STDOUT:
+            written = transfer.export_rows(model, sys.stdout, file_format, options['chunk_size'])
+        else:
+            with open(output, 'w', encoding='utf-8', newline='') as stream:
+                written = transfer.export_rows(model, stream, file_format, options['chunk_size'])
+        elapsed = perf_counter() - start
+        speed = written / elapsed if elapsed else 0
+        self.stderr.write(f'{model.__name__}: {written} rows in {elapsed:.2f}s ({speed:.0f} rows/s)')
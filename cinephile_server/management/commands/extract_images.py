@@ -0,0 +1,78 @@
+"""Module for command which moves inline images to the image store."""
+
+
+from concurrent.futures import Future, wait
+from time import perf_counter
+
+from django.core.management.base import BaseCommand, CommandParser
+from django.db.models import Model
+from django.utils import timezone
+
+from cinephile_server import images, page_cache, signals
+from cinephile_server.models import Cinema, Film
+
+DEFAULT_CHUNK_SIZE = 100
+
+
+class Command(BaseCommand):
+    """Extract data uri images from url_image fields into the content-addressed image store."""
+
+    help = 'Move inline data uri posters of films and cinemas to the image store and generate thumbnails.'
+
+    def add_arguments(self, parser: CommandParser) -> None:
+        """Add command arguments.
+
+        Args:
+            parser: argument parser
+        """
+        parser.add_argument('--chunk-size', type=int, default=DEFAULT_CHUNK_SIZE)
+        parser.add_argument('--dry-run', action='store_true', help='Only count inline images.')
+
+    def extract(self, model: type[Model], options: dict, futures: list[Future]) -> list:
+        """Store valid inline images of rows and replace them with references, invalid images are kept inline.
+
+        Args:
+            model: Film or Cinema
+            options: command options
+            futures: futures of thumbnail generation, new futures are appended
+
+        Returns:
+            list: ids of rows with valid inline images
+        """
+        extracted_ids = []
+        inline_rows = model.objects.filter(url_image__startswith='data:').only('id', 'url_image')
+        for row in inline_rows.iterator(chunk_size=options['chunk_size']):
+            inline_image = images.parse_data_uri(row.url_image)
+            if inline_image is None:
+                continue
+            try:
+                images.validate(*inline_image)
+            except images.InvalidImageError as error:
+                self.stderr.write(f'{model.__name__} {row.id}: {error}')
+                continue
+            extracted_ids.append(row.id)
+            if options['dry_run']:
+                continue
+            reference, future = images.store(*inline_image)
+            futures.append(future)
+            model.objects.filter(id=row.id).update(poster=reference, url_image=None, updated_at=timezone.now())
+        return extracted_ids
+
+    def handle(self, *args, **options) -> None:
+        """Extract images of all models and evict pages which show them.
+
+        Args:
+            args: positional arguments
+            options: command options
+        """
+        start = perf_counter()
+        futures = []
+        for model in (Film, Cinema):
+            extracted_ids = self.extract(model, options, futures)
+            if extracted_ids and not options['dry_run']:
+                page_cache.invalidate(signals.get_rows_tags(model, extracted_ids))
+            self.stdout.write(f'{model.__name__}: {len(extracted_ids)} inline images')
+        failed = [future for future in wait(futures).done if future.exception() is not None]
+        for future in failed:
+            self.stderr.write(f'Thumbnail generation failed: {future.exception()}')
+        self.stdout.write(self.style.SUCCESS(f'Done in {perf_counter() - start:.2f}s'))
@@ -0,0 +1,392 @@
+"""Module for command which generates a large seeded catalog and ticket history."""
+
+
+import random
+from dataclasses import dataclass
+from datetime import datetime, timedelta
+from decimal import Decimal
+from itertools import islice
+from time import perf_counter
+from typing import Iterable, Iterator
+from uuid import UUID
+
+from django.contrib.auth.hashers import make_password
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand, CommandError, CommandParser
+from django.db import connection, models, transaction
+from django.db.backends.postgresql.psycopg_any import is_psycopg3
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+
+from cinephile_server import availability, page_cache, schedule
+from cinephile_server.models import Address, Cinema, Film, FilmCinema, Ticket
+
+DEFAULT_ADDRESSES = 10000
+DEFAULT_CINEMAS = 10000
+DEFAULT_FILMS = 20000
+DEFAULT_CINEMAS_PER_FILM = 5
+DEFAULT_USERS = 10000
+DEFAULT_TICKETS = 1000000
+DEFAULT_BOOKING_RATIO = 0.3
+DEFAULT_DAYS = 365
+DEFAULT_SEED = 1
+DEFAULT_CHUNK_SIZE = 5000
+MAX_PLACE = 300
+MAX_HOUSE_NUMBER = 200
+RATING_TENTHS = (10, 50)
+CITIES = ('Moscow', 'Kazan', 'Sochi', 'Omsk', 'Tver', 'Perm', 'Samara', 'Tula', 'Vologda', 'Pskov')
+STREETS = ('Lenina', 'Mira', 'Sadovaya', 'Tverskaya', 'Lesnaya', 'Shkolnaya', 'Sovetskaya', 'Naberezhnaya')
+TITLE_WORDS = (
+    'night', 'river', 'silent', 'last', 'city', 'winter', 'dream', 'storm', 'lost', 'road',
+    'golden', 'shadow', 'north', 'summer', 'glass', 'fire', 'iron', 'hidden', 'star', 'garden',
+)
+CINEMA_WORDS = ('Cinema', 'Kino', 'Film Club', 'Theatre', 'Screen')
+# COPY does not apply field defaults, counters are filled by reconcile after tickets are inserted
+EMPTY_COUNTERS = {availability.FREE: 0, availability.BOOKED: 0}
+
+
+@dataclass(frozen=True)
+class Counts:
+    """Numbers of generated rows."""
+
+    addresses: int
+    cinemas: int
+    films: int
+    cinemas_per_film: int
+    users: int
+    tickets: int
+
+
+def __uuid(rng: random.Random) -> UUID:
+    return UUID(int=rng.getrandbits(128), version=4)
+
+
+def __title(rng: random.Random, index: int) -> str:
+    return f'{" ".join(rng.sample(TITLE_WORDS, 2)).capitalize()} {index}'
+
+
+def generate_addresses(rng: random.Random, count: int, now: datetime) -> Iterator[dict]:
+    """Generate address rows.
+
+    Args:
+        rng: seeded random generator
+        count: number of rows
+        now: modification time of rows
+
+    Yields:
+        dict: values of address by attribute name
+    """
+    for _ in range(count):
+        yield {
+            'id': __uuid(rng),
+            'updated_at': now,
+            'city_name': rng.choice(CITIES),
+            'street_name': rng.choice(STREETS),
+            'house_number': rng.randint(1, MAX_HOUSE_NUMBER),
+            'apartment_number': None,
+            'body': None,
+        }
+
+
+def generate_cinemas(rng: random.Random, count: int, address_ids: list[UUID], now: datetime) -> Iterator[dict]:
+    """Generate cinema rows.
+
+    Args:
+        rng: seeded random generator
+        count: number of rows
+        address_ids: ids of generated addresses
+        now: modification time of rows
+
+    Yields:
+        dict: values of cinema by attribute name
+    """
+    for index in range(count):
+        yield {
+            'id': __uuid(rng),
+            'updated_at': now,
+            'url_image': None,
+            'poster': None,
+            'name': f'{rng.choice(CINEMA_WORDS)} {index}',
+            'address_id': rng.choice(address_ids),
+        }
+
+
+def generate_films(rng: random.Random, count: int, now: datetime) -> Iterator[dict]:
+    """Generate film rows.
+
+    Args:
+        rng: seeded random generator
+        count: number of rows
+        now: modification time of rows
+
+    Yields:
+        dict: values of film by attribute name
+    """
+    for index in range(count):
+        yield {
+            'id': __uuid(rng),
+            'updated_at': now,
+            'url_image': None,
+            'poster': None,
+            'name': __title(rng, index),
+            'description': f'Generated film {index}',
+            'rating': Decimal(rng.randint(*RATING_TENTHS)) / 10,
+        }
+
+
+def generate_film_cinemas(
+    rng: random.Random, film_ids: list[UUID], cinema_ids: list[UUID], cinemas_per_film: int, now: datetime,
+) -> Iterator[dict]:
+    """Generate shows of every film in random distinct cinemas, 1 to 2 * cinemas_per_film - 1 per film.
+
+    Args:
+        rng: seeded random generator
+        film_ids: ids of generated films
+        cinema_ids: ids of generated cinemas
+        cinemas_per_film: average number of cinemas of film
+        now: modification time of rows
+
+    Yields:
+        dict: values of film cinema by attribute name
+    """
+    max_fan_out = min(2 * cinemas_per_film - 1, len(cinema_ids))
+    if max_fan_out < 1:
+        return
+    for film_id in film_ids:
+        for cinema_id in rng.sample(cinema_ids, rng.randint(1, max_fan_out)):
+            yield {
+                'id': __uuid(rng), 'updated_at': now, 'cinema_id': cinema_id, 'film_id': film_id, **EMPTY_COUNTERS,
+            }
+
+
+def generate_tickets(
+    rng: random.Random, count: int, film_cinema_ids: list[UUID], user_ids: list[int],
+    booking_ratio: float, period: tuple[datetime, datetime],
+) -> Iterator[dict]:
+    """Generate tickets of random shows, booking_ratio of them are booked by random users.
+
+    Args:
+        rng: seeded random generator
+        count: number of rows
+        film_cinema_ids: ids of generated shows
+        user_ids: ids of generated users
+        booking_ratio: share of booked tickets
+        period: first and last date of tickets
+
+    Yields:
+        dict: values of ticket by attribute name
+    """
+    start, end = period
+    seconds = int((end - start).total_seconds())
+    for _ in range(count):
+        film_date = start + timedelta(seconds=rng.randint(0, seconds))
+        yield {
+            'id': __uuid(rng),
+            'updated_at': film_date,
+            'film_date': film_date,
+            'place': str(rng.randint(1, MAX_PLACE)),
+            'film_cinema_id': rng.choice(film_cinema_ids),
+            'screening_id': None,
+            'seat': None,
+            'user_id': rng.choice(user_ids) if user_ids and rng.random() < booking_ratio else None,
+        }
+
+
+def __copy(model: type[models.Model], rows: list[dict]) -> None:
+    quote = connection.ops.quote_name
+    columns = list(rows[0])
+    names = ', '.join(quote(column) for column in columns)
+    with connection.cursor() as cursor:
+        with cursor.cursor.copy(f'COPY {quote(model._meta.db_table)} ({names}) FROM STDIN') as copy:
+            for row in rows:
+                copy.write_row([row[column] for column in columns])
+
+
+def insert(model: type[models.Model], rows: Iterable[dict], chunk_size: int, use_copy: bool) -> int:
+    """Insert rows chunk by chunk, every chunk is committed separately.
+
+    Args:
+        model: model of rows
+        rows: values of rows by attribute name
+        chunk_size: number of rows in chunk
+        use_copy: use COPY instead of INSERT, it needs PostgreSQL with psycopg 3
+
+    Returns:
+        int: number of inserted rows
+    """
+    inserted = 0
+    iterator = iter(rows)
+    chunk = list(islice(iterator, chunk_size))
+    while chunk:
+        with transaction.atomic():
+            if use_copy:
+                __copy(model, chunk)
+            else:
+                model.objects.bulk_create([model(**row) for row in chunk], batch_size=chunk_size)
+        inserted += len(chunk)
+        chunk = list(islice(iterator, chunk_size))
+    return inserted
+
+
+def collect_ids(rows: Iterable[dict], ids: list) -> Iterator[dict]:
+    """Pass rows through and remember their ids.
+
+    Args:
+        rows: generated rows
+        ids: list which receives ids
+
+    Yields:
+        dict: the same rows
+    """
+    for row in rows:
+        ids.append(row['id'])
+        yield row
+
+
+class Command(BaseCommand):
+    """Generate deterministic catalog, users and ticket history for load and scale testing."""
+
+    help = 'Generate a seeded catalog of addresses, cinemas, films and shows, users and a ticket history.'
+
+    def add_arguments(self, parser: CommandParser) -> None:
+        """Add command arguments.
+
+        Args:
+            parser: argument parser
+        """
+        parser.add_argument('--addresses', type=int, default=DEFAULT_ADDRESSES)
+        parser.add_argument('--cinemas', type=int, default=DEFAULT_CINEMAS)
+        parser.add_argument('--films', type=int, default=DEFAULT_FILMS)
+        parser.add_argument('--cinemas-per-film', type=int, default=DEFAULT_CINEMAS_PER_FILM)
+        parser.add_argument('--users', type=int, default=DEFAULT_USERS)
+        parser.add_argument('--tickets', type=int, default=DEFAULT_TICKETS)
+        parser.add_argument('--booking-ratio', type=float, default=DEFAULT_BOOKING_RATIO)
+        parser.add_argument('--start', help=f'First ticket date, {DEFAULT_DAYS} days before --end by default.')
+        parser.add_argument('--end', help='Last ticket date, now by default.')
+        parser.add_argument('--seed', type=int, default=DEFAULT_SEED)
+        parser.add_argument('--chunk-size', type=int, default=DEFAULT_CHUNK_SIZE)
+        parser.add_argument('--no-copy', action='store_true', help='Use bulk INSERT on PostgreSQL too.')
+
+    def get_period(self, options: dict) -> tuple[datetime, datetime]:
+        """Parse date range of tickets.
+
+        Args:
+            options: command options
+
+        Raises:
+            CommandError: date is invalid or range is empty
+
+        Returns:
+            tuple[datetime, datetime]: first and last date
+        """
+        dates = []
+        for name in ('start', 'end'):
+            parsed = parse_datetime(options[name]) if options[name] else None
+            if options[name] and parsed is None:
+                raise CommandError(f'Invalid --{name} date: {options[name]}')
+            if parsed is not None and timezone.is_naive(parsed):
+                parsed = timezone.make_aware(parsed)
+            dates.append(parsed)
+        start, end = dates
+        end = end or timezone.now()
+        start = start or end - timedelta(days=DEFAULT_DAYS)
+        if start > end:
+            raise CommandError('--start must be before --end')
+        return start, end
+
+    def get_counts(self, options: dict) -> Counts:
+        """Check row counts.
+
+        Args:
+            options: command options
+
+        Raises:
+            CommandError: counts are inconsistent
+
+        Returns:
+            Counts: numbers of generated rows
+        """
+        counts = Counts(
+            addresses=options['addresses'], cinemas=options['cinemas'], films=options['films'],
+            cinemas_per_film=options['cinemas_per_film'], users=options['users'], tickets=options['tickets'],
+        )
+        if min(counts.__dict__.values()) < 0:
+            raise CommandError('Row counts must not be negative')
+        if counts.cinemas and not counts.addresses:
+            raise CommandError('Cinemas need at least one address')
+        if counts.tickets and not (counts.films and counts.cinemas and counts.cinemas_per_film):
+            raise CommandError('Tickets need films shown in cinemas')
+        if not 0 <= options['booking_ratio'] <= 1:
+            raise CommandError('--booking-ratio must be between 0 and 1')
+        return counts
+
+    def report(self, name: str, rows: int, start: float) -> None:
+        """Write number of rows and speed of step.
+
+        Args:
+            name: name of generated rows
+            rows: number of rows
+            start: start time of step
+        """
+        elapsed = perf_counter() - start
+        speed = rows / elapsed if elapsed else 0
+        self.stdout.write(f'{name}: {rows} rows in {elapsed:.2f}s ({speed:.0f} rows/s)')
+
+    def handle(self, *args, **options) -> None:
+        """Generate rows of all models.
+
+        Args:
+            args: positional arguments
+            options: command options
+        """
+        counts = self.get_counts(options)
+        period = self.get_period(options)
+        rng = random.Random(options['seed'])
+        chunk_size = options['chunk_size']
+        use_copy = connection.vendor == 'postgresql' and is_psycopg3 and not options['no_copy']
+        now = timezone.now()
+        total_start = perf_counter()
+        total = 0
+        address_ids, cinema_ids, film_ids, film_cinema_ids = [], [], [], []
+        steps = (
+            (Address, lambda: collect_ids(generate_addresses(rng, counts.addresses, now), address_ids)),
+            (Cinema, lambda: collect_ids(generate_cinemas(rng, counts.cinemas, address_ids, now), cinema_ids)),
+            (Film, lambda: collect_ids(generate_films(rng, counts.films, now), film_ids)),
+            (FilmCinema, lambda: collect_ids(
+                generate_film_cinemas(rng, film_ids, cinema_ids, counts.cinemas_per_film, now), film_cinema_ids,
+            )),
+        )
+        for model, rows in steps:
+            start = perf_counter()
+            inserted = insert(model, rows(), chunk_size, use_copy)
+            self.report(model.__name__, inserted, start)
+            total += inserted
+        start = perf_counter()
+        password = make_password(None)
+        users = User.objects.bulk_create(
+            [
+                User(username=f'generated_{options["seed"]}_{index}', password=password)
+                for index in range(counts.users)
+            ],
+            batch_size=chunk_size,
+        )
+        user_ids = list(User.objects.filter(
+            username__startswith=f'generated_{options["seed"]}_',
+        ).order_by('id').values_list('id', flat=True))
+        self.report(User.__name__, len(users), start)
+        start = perf_counter()
+        inserted = insert(
+            Ticket,
+            generate_tickets(rng, counts.tickets, film_cinema_ids, user_ids, options['booking_ratio'], period),
+            chunk_size,
+            use_copy,
+        )
+        self.report(Ticket.__name__, inserted, start)
+        total += inserted + len(users)
+        start = perf_counter()
+        self.report('ScheduleEntry', schedule.rebuild(batch_size=chunk_size), start)
+        start = perf_counter()
+        self.report('Availability', availability.reconcile(), start)
+        page_cache.invalidate((page_cache.FILMS_TAG, page_cache.CINEMAS_TAG))
+        self.report('Total', total, total_start)
+        self.stdout.write(self.style.SUCCESS(f'Done with {"COPY" if use_copy else "bulk INSERT"}'))
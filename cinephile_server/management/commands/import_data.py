@@ -0,0 +1,90 @@
+"""Module for command which imports catalog rows from CSV or NDJSON."""
+
+
+import json
+import os
+from pathlib import Path
+
+from django.core.management.base import BaseCommand, CommandError, CommandParser
+
+from cinephile_server import transfer
+
+
+class Command(BaseCommand):
+    """Import rows of one model in validated batches and resume after failures."""
+
+    help = (
+        'Import addresses, cinemas, films, film cinemas or tickets from CSV or NDJSON. Rows are upserted by id, '
+        'invalid rows are written to the rejects file and an interrupted import continues from its checkpoint.'
+    )
+
+    def add_arguments(self, parser: CommandParser) -> None:
+        """Add command arguments.
+
+        Args:
+            parser: argument parser
+        """
+        parser.add_argument('model', choices=sorted(transfer.MODELS))
+        parser.add_argument('input')
+        parser.add_argument('--format', choices=sorted(set(transfer.FORMATS.values())))
+        parser.add_argument('--batch-size', type=int, default=transfer.DEFAULT_BATCH_SIZE)
+        parser.add_argument('--checkpoint', help='Progress file, <input>.checkpoint by default.')
+        parser.add_argument('--rejects', help='NDJSON file with rejected rows, <input>.rejects.ndjson by default.')
+        parser.add_argument('--restart', action='store_true', help='Ignore checkpoint of previous run.')
+
+    def read_checkpoint(self, path: Path, restart: bool) -> int:
+        """Return number of rows processed by previous run.
+
+        Args:
+            path: checkpoint file
+            restart: ignore checkpoint
+
+        Returns:
+            int: number of processed rows
+        """
+        if restart or not path.exists():
+            return 0
+        return json.loads(path.read_text())['rows']
+
+    def handle(self, *args, **options) -> None:
+        """Import rows.
+
+        Args:
+            args: positional arguments
+            options: command options
+
+        Raises:
+            CommandError: format is unknown
+        """
+        source = options['input']
+        file_format = options['format'] or transfer.get_format(source)
+        if file_format is None:
+            raise CommandError('Use --format for input without .csv, .ndjson or .jsonl extension')
+        checkpoint = Path(options['checkpoint'] or f'{source}.checkpoint')
+        skip = self.read_checkpoint(checkpoint, options['restart'])
+        if skip:
+            self.stdout.write(f'Resuming after {skip} rows')
+        importer = transfer.Importer(transfer.MODELS[options['model']], options['batch_size'])
+        rejects_path = options['rejects'] or f'{source}.rejects.ndjson'
+        with open(source, encoding='utf-8', newline='') as stream, open(
+            rejects_path, 'a' if skip else 'w', encoding='utf-8',
+        ) as rejects:
+
+            def on_batch(processed: int, rejections: list[transfer.Rejection]) -> None:
+                for rejection in rejections:
+                    rejects.write(f'{json.dumps(rejection.__dict__, default=str)}\n')
+                rejects.flush()
+                temporary = checkpoint.with_name(f'{checkpoint.name}.tmp')
+                temporary.write_text(json.dumps({'rows': processed}))
+                os.replace(temporary, checkpoint)
+
+            result = importer.run(transfer.read_rows(stream, file_format), skip, on_batch)
+        checkpoint.unlink(missing_ok=True)
+        self.stdout.write(
+            f'{importer.model.__name__}: {result.read} rows read, {result.imported} imported, '
+            f'{result.rejected} rejected, {result.skipped} skipped in {result.seconds:.2f}s '
+            f'({result.rows_per_second:.0f} rows/s)',
+        )
+        if result.rejected:
+            self.stdout.write(self.style.WARNING(f'Rejected rows are written to {rejects_path}'))
+        self.stdout.write(self.style.SUCCESS('Done'))
@@ -0,0 +1,33 @@
+"""Module for command which deletes expired idempotency keys."""
+
+
+from time import perf_counter
+
+from django.core.management.base import BaseCommand, CommandParser
+
+from cinephile_server import idempotency
+
+
+class Command(BaseCommand):
+    """Delete expired idempotency keys in batches, run it periodically, e.g. from cron."""
+
+    help = 'Delete expired idempotency keys in batches.'
+
+    def add_arguments(self, parser: CommandParser) -> None:
+        """Add command arguments.
+
+        Args:
+            parser: argument parser
+        """
+        parser.add_argument('--batch-size', type=int, help='keys deleted by one statement, IDEMPOTENCY_PRUNE_BATCH')
+
+    def handle(self, *args, **options) -> None:
+        """Delete expired keys.
+
+        Args:
+            args: positional arguments
+            options: command options
+        """
+        start = perf_counter()
+        deleted = idempotency.prune_expired(options['batch_size'])
+        self.stdout.write(self.style.SUCCESS(f'deleted {deleted} keys in {perf_counter() - start:.2f}s'))
@@ -0,0 +1,33 @@
+"""Module for command which rebuilds the schedule read model."""
+
+
+from time import perf_counter
+
+from django.core.management.base import BaseCommand, CommandParser
+
+from cinephile_server import schedule
+
+
+class Command(BaseCommand):
+    """Rebuild schedule entries from tickets."""
+
+    help = 'Rebuild schedule of films shown in cities by days, e.g. after migration or bulk changes of tickets.'
+
+    def add_arguments(self, parser: CommandParser) -> None:
+        """Add command arguments.
+
+        Args:
+            parser: argument parser
+        """
+        parser.add_argument('--batch-size', type=int, default=schedule.DEFAULT_BATCH_SIZE)
+
+    def handle(self, *args, **options) -> None:
+        """Rebuild all entries.
+
+        Args:
+            args: positional arguments
+            options: command options
+        """
+        start = perf_counter()
+        entries = schedule.rebuild(batch_size=options['batch_size'])
+        self.stdout.write(self.style.SUCCESS(f'{entries} schedule entries in {perf_counter() - start:.2f}s'))
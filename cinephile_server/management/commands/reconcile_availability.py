@@ -0,0 +1,36 @@
+"""Module for command which reconciles counters of free and booked tickets."""
+
+
+from time import perf_counter
+
+from django.core.management.base import BaseCommand, CommandParser
+
+from cinephile_server import availability
+
+
+class Command(BaseCommand):
+    """Compare counters of availability with tickets and repair drifted rows."""
+
+    help = 'Reconcile free and booked ticket counters of film cinemas with tickets.'
+
+    def add_arguments(self, parser: CommandParser) -> None:
+        """Add command arguments.
+
+        Args:
+            parser: argument parser
+        """
+        parser.add_argument('--dry-run', action='store_true', help='report drifted rows without repairing them')
+
+    def handle(self, *args, **options) -> None:
+        """Reconcile all counters.
+
+        Args:
+            args: positional arguments
+            options: command options
+        """
+        start = perf_counter()
+        drifted = availability.reconcile(repair=not options['dry_run'])
+        action = 'found' if options['dry_run'] else 'repaired'
+        self.stdout.write(self.style.SUCCESS(
+            f'{action} drift in {drifted} film cinemas in {perf_counter() - start:.2f}s',
+        ))
@@ -0,0 +1,33 @@
+"""Module for command which releases expired holds of tickets."""
+
+
+from time import perf_counter
+
+from django.core.management.base import BaseCommand, CommandParser
+
+from cinephile_server import booking
+
+
+class Command(BaseCommand):
+    """Clear expired holds in batches, run it periodically, e.g. from cron."""
+
+    help = 'Release expired ticket holds in batches.'
+
+    def add_arguments(self, parser: CommandParser) -> None:
+        """Add command arguments.
+
+        Args:
+            parser: argument parser
+        """
+        parser.add_argument('--batch-size', type=int, help='tickets released by one update, TICKET_HOLD_SWEEP_BATCH')
+
+    def handle(self, *args, **options) -> None:
+        """Release expired holds.
+
+        Args:
+            args: positional arguments
+            options: command options
+        """
+        start = perf_counter()
+        released = booking.release_expired_holds(options['batch_size'])
+        self.stdout.write(self.style.SUCCESS(f'released {released} holds in {perf_counter() - start:.2f}s'))
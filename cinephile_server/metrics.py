@@ -0,0 +1,427 @@
+"""Module for per-request metrics of views in Prometheus text format.
+
+The middleware records latency, SQL queries and time, template render time and response size
+per resolved url name. Every process keeps cumulative aggregates in memory and writes a snapshot
+of them to cache at most once per METRICS_FLUSH_INTERVAL seconds, the metrics endpoint sums
+snapshots of all processes, so a cache shared by workers (e.g. CACHE_DIR) gives totals of all of them.
+"""
+
+
+from bisect import bisect_left
+from contextlib import contextmanager
+from contextvars import ContextVar
+from copy import deepcopy
+from dataclasses import dataclass, field
+from os import getpid
+from socket import gethostname
+from threading import Lock
+from time import monotonic, perf_counter
+from typing import Awaitable, Callable, Iterator
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+from django.core.cache import BaseCache, caches
+from django.core.handlers.wsgi import WSGIRequest
+from django.db import connections
+from django.db.backends.signals import connection_created
+from django.dispatch import receiver
+from django.http import HttpResponse
+
+KEY_PREFIX = 'metrics'
+PROCESSES_KEY = f'{KEY_PREFIX}:processes'
+UNRESOLVED_VIEW = 'unresolved'
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10)
+CONTENT_TYPE = 'text/plain; version=0.0.4; charset=utf-8'
+MILLISECONDS = 1000
+
+__current: ContextVar['RequestMeasure | None'] = ContextVar('request_measure', default=None)
+__aggregates: dict[tuple[str, str], 'ViewStats'] = {}
+__aggregates_lock = Lock()
+__flushed_at = [0.0]
+
+
+@dataclass
+class RequestMeasure:
+    """Measurements of one request."""
+
+    queries: int = 0
+    sql_seconds: float = 0
+    template_seconds: float = 0
+
+
+@dataclass
+class ViewStats:
+    """Cumulative measurements of requests to one view with one method."""
+
+    buckets: list[int] = field(default_factory=lambda: [0] * (len(LATENCY_BUCKETS) + 1))
+    requests: int = 0
+    seconds: float = 0
+    queries: int = 0
+    sql_seconds: float = 0
+    template_seconds: float = 0
+    response_bytes: int = 0
+    statuses: dict[int, int] = field(default_factory=dict)
+
+    def add(self, seconds: float, measure: RequestMeasure, status: int, response_bytes: int) -> None:
+        """Add measurements of request.
+
+        Args:
+            seconds: request latency
+            measure: measurements of request
+            status: status code of response
+            response_bytes: size of response body
+        """
+        self.buckets[bisect_left(LATENCY_BUCKETS, seconds)] += 1
+        self.requests += 1
+        self.seconds += seconds
+        self.queries += measure.queries
+        self.sql_seconds += measure.sql_seconds
+        self.template_seconds += measure.template_seconds
+        self.response_bytes += response_bytes
+        self.statuses[status] = self.statuses.get(status, 0) + 1
+
+    def merge(self, other: 'ViewStats') -> None:
+        """Add measurements of another process.
+
+        Args:
+            other: stats of the same view in another process
+        """
+        self.buckets = [own + added for own, added in zip(self.buckets, other.buckets)]
+        self.requests += other.requests
+        self.seconds += other.seconds
+        self.queries += other.queries
+        self.sql_seconds += other.sql_seconds
+        self.template_seconds += other.template_seconds
+        self.response_bytes += other.response_bytes
+        for status, count in other.statuses.items():
+            self.statuses[status] = self.statuses.get(status, 0) + count
+
+
+def get_cache() -> BaseCache:
+    """Return cache which keeps snapshots of processes.
+
+    Returns:
+        BaseCache: cache backend
+    """
+    return caches[settings.METRICS_CACHE_ALIAS]
+
+
+def get_process_key() -> str:
+    """Return cache key of snapshot of current process, it is computed after fork of workers.
+
+    Returns:
+        str: cache key
+    """
+    return f'{KEY_PREFIX}:process:{gethostname()}:{getpid()}'
+
+
+@contextmanager
+def template_timer() -> Iterator[None]:
+    """Add time of rendering templates inside the block to current request."""
+    measure = __current.get()
+    if measure is None:
+        yield
+        return
+    start = perf_counter()
+    try:
+        yield
+    finally:
+        measure.template_seconds += perf_counter() - start
+
+
+def __count_query(execute_query, sql, params, many, context):
+    measure = __current.get()
+    if measure is None:
+        return execute_query(sql, params, many, context)
+    start = perf_counter()
+    try:
+        return execute_query(sql, params, many, context)
+    finally:
+        measure.queries += 1
+        measure.sql_seconds += perf_counter() - start
+
+
+def count_queries(connection) -> None:
+    """Add counter of queries of current request to connection once.
+
+    The counter reads the request from a context variable, which async views pass to the threads
+    running their queries, so queries of sync and async views are counted alike.
+
+    Args:
+        connection: database connection wrapper
+    """
+    if __count_query not in connection.execute_wrappers:
+        connection.execute_wrappers.insert(0, __count_query)
+
+
+@receiver(connection_created)
+def count_connection_queries(sender, connection, **kwargs) -> None:
+    """Count queries of connections opened by threads of async views.
+
+    Args:
+        sender: database wrapper class
+        connection: opened connection wrapper
+        kwargs: signal arguments
+    """
+    count_queries(connection)
+
+
+def __get_response_bytes(response: HttpResponse) -> int:
+    if response.has_header('Content-Length'):
+        return int(response['Content-Length'])
+    if response.streaming:
+        return 0
+    return len(response.content)
+
+
+def record(view: str, method: str, seconds: float, measure: RequestMeasure, response: HttpResponse) -> None:
+    """Add measurements of request to aggregates of process.
+
+    Args:
+        view: url name of view
+        method: http method
+        seconds: request latency
+        measure: measurements of request
+        response: response of view
+    """
+    response_bytes = __get_response_bytes(response)
+    with __aggregates_lock:
+        stats = __aggregates.get((view, method))
+        if stats is None:
+            stats = ViewStats()
+            __aggregates[(view, method)] = stats
+        stats.add(seconds, measure, response.status_code, response_bytes)
+
+
+def flush(force: bool = False) -> None:
+    """Write snapshot of process aggregates to cache if flush interval has passed.
+
+    Args:
+        force: write snapshot regardless of interval
+    """
+    now = monotonic()
+    if not force and now - __flushed_at[0] < settings.METRICS_FLUSH_INTERVAL:
+        return
+    __flushed_at[0] = now
+    with __aggregates_lock:
+        snapshot = deepcopy(__aggregates)
+    cache = get_cache()
+    process_key = get_process_key()
+    cache.set(process_key, snapshot, settings.METRICS_PROCESS_TIMEOUT)
+    processes = cache.get(PROCESSES_KEY, set())
+    if process_key not in processes:
+        cache.set(PROCESSES_KEY, processes | {process_key}, None)
+
+
+def collect() -> dict[tuple[str, str], ViewStats]:
+    """Sum snapshots of all processes.
+
+    Returns:
+        dict[tuple[str, str], ViewStats]: stats by view and method
+    """
+    flush(force=True)
+    cache = get_cache()
+    processes = cache.get(PROCESSES_KEY, set())
+    snapshots = cache.get_many(processes)
+    if len(snapshots) != len(processes):
+        cache.set(PROCESSES_KEY, set(snapshots), None)
+    totals: dict[tuple[str, str], ViewStats] = {}
+    for snapshot in snapshots.values():
+        for key, stats in snapshot.items():
+            totals.setdefault(key, ViewStats()).merge(stats)
+    return totals
+
+
+def reset() -> None:
+    """Forget aggregates of current process and snapshots in cache."""
+    with __aggregates_lock:
+        __aggregates.clear()
+    cache = get_cache()
+    cache.delete_many([*cache.get(PROCESSES_KEY, set()), PROCESSES_KEY])
+    __flushed_at[0] = 0.0
+
+
+def __escape(label: str) -> str:
+    return label.replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+def __labels(view: str, method: str, **extra) -> str:
+    labels = {'view': view, 'method': method, **extra}
+    return ','.join(f'{name}="{__escape(str(label))}"' for name, label in labels.items())
+
+
+def __header(lines: list[str], name: str, metric_type: str, description: str) -> None:
+    lines.append(f'# HELP {name} {description}')
+    lines.append(f'# TYPE {name} {metric_type}')
+
+
+def render(totals: dict[tuple[str, str], ViewStats]) -> str:
+    """Render stats in Prometheus text exposition format.
+
+    Args:
+        totals: stats by view and method
+
+    Returns:
+        str: metrics text
+    """
+    keys = sorted(totals)
+    lines = []
+    name = 'cinephile_request_duration_seconds'
+    __header(lines, name, 'histogram', 'Latency of requests by url name.')
+    for view, method in keys:
+        stats = totals[(view, method)]
+        cumulative = 0
+        for bound, count in zip((*LATENCY_BUCKETS, '+Inf'), stats.buckets):
+            cumulative += count
+            lines.append(f'{name}_bucket{{{__labels(view, method, le=bound)}}} {cumulative}')
+        lines.append(f'{name}_sum{{{__labels(view, method)}}} {stats.seconds}')
+        lines.append(f'{name}_count{{{__labels(view, method)}}} {stats.requests}')
+    counters = (
+        ('cinephile_request_queries_total', 'SQL queries sent by requests.', 'queries'),
+        ('cinephile_request_sql_seconds_total', 'Time spent in SQL queries.', 'sql_seconds'),
+        ('cinephile_request_template_seconds_total', 'Time spent rendering templates.', 'template_seconds'),
+        ('cinephile_response_bytes_total', 'Size of response bodies.', 'response_bytes'),
+    )
+    for name, description, attribute in counters:
+        __header(lines, name, 'counter', description)
+        for view, method in keys:
+            lines.append(f'{name}{{{__labels(view, method)}}} {getattr(totals[(view, method)], attribute)}')
+    name = 'cinephile_responses_total'
+    __header(lines, name, 'counter', 'Responses by status code.')
+    for view, method in keys:
+        for status, count in sorted(totals[(view, method)].statuses.items()):
+            lines.append(f'{name}{{{__labels(view, method, status=status)}}} {count}')
+    return '\n'.join(lines) + '\n'
+
+
+def __server_timing(seconds: float, measure: RequestMeasure) -> str:
+    return ', '.join((
+        f'db;dur={measure.sql_seconds * MILLISECONDS:.2f};desc="{measure.queries} queries"',
+        f'tpl;dur={measure.template_seconds * MILLISECONDS:.2f}',
+        f'total;dur={seconds * MILLISECONDS:.2f}',
+    ))
+
+
+def time_template_response(response: HttpResponse) -> HttpResponse:
+    """Add render time of template response to current request.
+
+    Args:
+        response: response which is rendered right after template response middleware
+
+    Returns:
+        HttpResponse: the same response
+    """
+    measure = __current.get()
+    if measure is not None:
+        start = perf_counter()
+
+        def stop(rendered: HttpResponse) -> None:
+            measure.template_seconds += perf_counter() - start
+
+        response.add_post_render_callback(stop)
+    return response
+
+
+def __finish(request: WSGIRequest, response: HttpResponse, measure: RequestMeasure, start: float) -> HttpResponse:
+    seconds = perf_counter() - start
+    resolver_match = request.resolver_match
+    record(resolver_match.view_name if resolver_match else UNRESOLVED_VIEW, request.method, seconds, measure, response)
+    flush()
+    if settings.METRICS_SERVER_TIMING:
+        response['Server-Timing'] = __server_timing(seconds, measure)
+    return response
+
+
+def measure_request(request: WSGIRequest, get_response: Callable) -> HttpResponse:
+    """Measure request and add it to aggregates.
+
+    Args:
+        request: django request
+        get_response: next handler
+
+    Returns:
+        HttpResponse: response with optional Server-Timing header
+    """
+    measure = RequestMeasure()
+    token = __current.set(measure)
+    start = perf_counter()
+    try:
+        for connection in connections.all():
+            count_queries(connection)
+        response = get_response(request)
+    finally:
+        __current.reset(token)
+    return __finish(request, response, measure, start)
+
+
+async def ameasure_request(request: WSGIRequest, get_response: Callable[..., Awaitable]) -> HttpResponse:
+    """Measure request served by async handler and add it to aggregates.
+
+    Args:
+        request: django request
+        get_response: next async handler
+
+    Returns:
+        HttpResponse: response with optional Server-Timing header
+    """
+    measure = RequestMeasure()
+    token = __current.set(measure)
+    start = perf_counter()
+    try:
+        response = await get_response(request)
+    finally:
+        __current.reset(token)
+    return __finish(request, response, measure, start)
+
+
+class MetricsMiddleware:
+    """Middleware which measures every request, it must be the first middleware.
+
+    It supports both handlers, so ASGI requests reach async views without a thread per request.
+    """
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response: Callable) -> None:
+        """Create middleware.
+
+        Args:
+            get_response: next handler
+        """
+        self.get_response = get_response
+        self.is_async = iscoroutinefunction(get_response)
+        if self.is_async:
+            markcoroutinefunction(self)
+
+    def __call__(self, request: WSGIRequest) -> HttpResponse | Awaitable[HttpResponse]:
+        """Measure request if metrics are enabled.
+
+        Args:
+            request: django request
+
+        Returns:
+            HttpResponse | Awaitable[HttpResponse]: response of view, awaitable under async handler
+        """
+        if self.is_async:
+            return self.__acall(request)
+        if not settings.METRICS_ENABLED:
+            return self.get_response(request)
+        return measure_request(request, self.get_response)
+
+    async def __acall(self, request: WSGIRequest) -> HttpResponse:
+        if not settings.METRICS_ENABLED:
+            return await self.get_response(request)
+        return await ameasure_request(request, self.get_response)
+
+    def process_template_response(self, request: WSGIRequest, response: HttpResponse) -> HttpResponse:
+        """Measure rendering of template response.
+
+        Args:
+            request: django request
+            response: template response
+
+        Returns:
+            HttpResponse: the same response
+        """
+        return time_template_response(response)
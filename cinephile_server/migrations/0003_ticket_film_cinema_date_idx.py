@@ -0,0 +1,19 @@
+# Generated by Django 5.0.14 on 2026-10-18 13:48
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('cinephile_server', '0002_remove_ticket_time_ticket_film_date'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='ticket',
+            index=models.Index(fields=['film_cinema', 'film_date'], name='ticket_film_cinema_date_idx'),
+        ),
+    ]
@@ -0,0 +1,62 @@
+# Generated by Django 5.0.14 on 2026-10-18 13:50
+
+import uuid
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+import cinephile_server.models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('cinephile_server', '0003_ticket_film_cinema_date_idx'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='ticket',
+            name='seat',
+            field=models.IntegerField(blank=True, editable=False, null=True, validators=[cinephile_server.models.check_positive]),
+        ),
+        migrations.AlterField(
+            model_name='ticket',
+            name='film_cinema',
+            field=models.ForeignKey(blank=True, on_delete=django.db.models.deletion.CASCADE, to='cinephile_server.filmcinema'),
+        ),
+        # AlterField cannot introspect constraints of the quoted schema-qualified table, so it keeps the unique one
+        migrations.RunSQL(
+            'ALTER TABLE "api_data"."ticket" DROP CONSTRAINT IF EXISTS ticket_film_cinema_id_key',
+            'ALTER TABLE "api_data"."ticket" ADD CONSTRAINT ticket_film_cinema_id_key UNIQUE (film_cinema_id)',
+        ),
+        migrations.CreateModel(
+            name='Screening',
+            fields=[
+                ('id', models.UUIDField(blank=True, default=uuid.uuid4, editable=False, primary_key=True, serialize=False)),
+                ('hall', models.TextField(max_length=80)),
+                ('start_time', models.DateTimeField()),
+                ('capacity', models.IntegerField(validators=[cinephile_server.models.check_positive])),
+                ('seats', models.BinaryField(default=bytes)),
+                ('film_cinema', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to='cinephile_server.filmcinema', verbose_name='film cinema')),
+            ],
+            options={
+                'db_table': '"api_data"."screening"',
+            },
+        ),
+        migrations.AddField(
+            model_name='ticket',
+            name='screening',
+            field=models.ForeignKey(blank=True, editable=False, null=True, on_delete=django.db.models.deletion.CASCADE, to='cinephile_server.screening'),
+        ),
+        migrations.AddConstraint(
+            model_name='ticket',
+            constraint=models.UniqueConstraint(fields=('screening', 'seat'), name='ticket_screening_seat_unique'),
+        ),
+        migrations.AddIndex(
+            model_name='screening',
+            index=models.Index(fields=['film_cinema', 'start_time'], name='screening_film_cinema_time_idx'),
+        ),
+    ]
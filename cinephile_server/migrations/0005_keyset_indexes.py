@@ -0,0 +1,35 @@
+# Generated by Django 5.0.14 on 2026-10-18 13:54
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('cinephile_server', '0004_screening'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='address',
+            index=models.Index(fields=['city_name', 'id'], name='address_city_name_id_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='cinema',
+            index=models.Index(fields=['name', 'id'], name='cinema_name_id_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='film',
+            index=models.Index(fields=['name', 'id'], name='film_name_id_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='screening',
+            index=models.Index(fields=['start_time', 'id'], name='screening_start_time_id_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='ticket',
+            index=models.Index(fields=['film_date', 'id'], name='ticket_film_date_id_idx'),
+        ),
+    ]
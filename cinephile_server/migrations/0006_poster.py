@@ -0,0 +1,23 @@
+# Generated by Django 5.0.14 on 2026-10-18 13:57
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('cinephile_server', '0005_keyset_indexes'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='cinema',
+            name='poster',
+            field=models.CharField(blank=True, editable=False, max_length=72, null=True),
+        ),
+        migrations.AddField(
+            model_name='film',
+            name='poster',
+            field=models.CharField(blank=True, editable=False, max_length=72, null=True),
+        ),
+    ]
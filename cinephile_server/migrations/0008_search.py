@@ -0,0 +1,46 @@
+from django.db import migrations
+
+SEARCHED_COLUMNS = {
+    'Film': "setweight(to_tsvector('english'::regconfig, name), 'A') || "
+            "setweight(to_tsvector('english'::regconfig, description), 'B')",
+    'Cinema': "setweight(to_tsvector('english'::regconfig, name), 'A')",
+}
+
+
+def get_table(apps, model_name):
+    db_table = apps.get_model('cinephile_server', model_name)._meta.db_table
+    schema, _, name = db_table.rpartition('.')
+    return db_table, f'{schema}.' if schema else '', name.strip('"')
+
+
+def create_search_indexes(apps, schema_editor):
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+    schema_editor.execute('CREATE EXTENSION IF NOT EXISTS pg_trgm')
+    for model_name, vector in SEARCHED_COLUMNS.items():
+        db_table, _, name = get_table(apps, model_name)
+        schema_editor.execute(
+            f'ALTER TABLE {db_table} ADD COLUMN search_vector tsvector GENERATED ALWAYS AS ({vector}) STORED',
+        )
+        schema_editor.execute(f'CREATE INDEX {name}_search_vector_idx ON {db_table} USING gin (search_vector)')
+        schema_editor.execute(f'CREATE INDEX {name}_name_trgm_idx ON {db_table} USING gin (name gin_trgm_ops)')
+
+
+def drop_search_indexes(apps, schema_editor):
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+    for model_name in SEARCHED_COLUMNS:
+        db_table, schema, name = get_table(apps, model_name)
+        schema_editor.execute(f'DROP INDEX IF EXISTS {schema}{name}_name_trgm_idx')
+        schema_editor.execute(f'ALTER TABLE {db_table} DROP COLUMN IF EXISTS search_vector')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('cinephile_server', '0007_updated_at'),
+    ]
+
+    operations = [
+        migrations.RunPython(create_search_indexes, drop_search_indexes),
+    ]
@@ -0,0 +1,43 @@
+# Generated by Django 5.0.14 on 2026-10-18 16:05
+
+import django.db.models.expressions
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('cinephile_server', '0008_search'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='film',
+            index=models.Index(fields=['rating', 'id'], name='film_rating_id_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='ticket',
+            index=models.Index(
+                django.db.models.expressions.OrderBy(
+                    django.db.models.expressions.F('film_date'), descending=True, nulls_last=True,
+                ),
+                django.db.models.expressions.OrderBy(django.db.models.expressions.F('id'), descending=True),
+                name='ticket_film_date_desc_id_idx',
+            ),
+        ),
+        migrations.AddIndex(
+            model_name='ticket',
+            index=models.Index(
+                condition=models.Q(('user__isnull', True)), fields=['film_date', 'id'], name='ticket_free_film_date_idx',
+            ),
+        ),
+        migrations.AddIndex(
+            model_name='ticket',
+            index=models.Index(
+                condition=models.Q(('user__isnull', False)), fields=['film_date', 'id'],
+                name='ticket_booked_film_date_idx',
+            ),
+        ),
+    ]
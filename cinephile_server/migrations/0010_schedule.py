@@ -0,0 +1,37 @@
+# Generated by Django 5.0.14 on 2026-10-18 16:40
+
+import uuid
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('cinephile_server', '0009_filter_indexes'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ScheduleEntry',
+            fields=[
+                ('id', models.UUIDField(blank=True, default=uuid.uuid4, editable=False, primary_key=True, serialize=False)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('city_name', models.TextField(max_length=256)),
+                ('day', models.DateField()),
+                ('film_name', models.TextField(max_length=80)),
+                ('cinema_name', models.TextField(max_length=80)),
+                ('first_show', models.DateTimeField()),
+                ('tickets', models.IntegerField()),
+                ('cinema', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to='cinephile_server.cinema', verbose_name='cinema')),
+                ('film', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to='cinephile_server.film', verbose_name='film')),
+                ('film_cinema', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to='cinephile_server.filmcinema', verbose_name='film cinema')),
+            ],
+            options={
+                'db_table': '"api_data"."schedule"',
+                'indexes': [models.Index(fields=['city_name', 'day', 'first_show', 'id'], name='schedule_city_day_idx')],
+                'constraints': [models.UniqueConstraint(fields=('film_cinema', 'day'), name='schedule_film_cinema_day_unique')],
+            },
+        ),
+    ]
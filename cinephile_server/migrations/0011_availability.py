@@ -0,0 +1,44 @@
+# Generated by Django 5.0.14 on 2026-10-18 17:20
+
+from django.db import migrations, models
+from django.db.models import Count, OuterRef, Subquery, Sum
+from django.db.models.functions import Coalesce
+
+COUNTERS = ('free_tickets', 'booked_tickets')
+
+
+def count_tickets(apps, schema_editor):
+    ticket_model = apps.get_model('cinephile_server', 'Ticket')
+    film_cinema_model = apps.get_model('cinephile_server', 'FilmCinema')
+
+    def tickets(is_free):
+        counted = ticket_model.objects.filter(film_cinema=OuterRef('pk'), user__isnull=is_free).order_by()
+        return Coalesce(Subquery(counted.values('film_cinema').annotate(count=Count('id')).values('count')), 0)
+
+    film_cinema_model.objects.update(free_tickets=tickets(True), booked_tickets=tickets(False))
+    for model_name, field in (('Film', 'film'), ('Cinema', 'cinema')):
+        film_cinemas = film_cinema_model.objects.filter(**{field: OuterRef('pk')}).order_by().values(field)
+        apps.get_model('cinephile_server', model_name).objects.update(**{
+            counter: Coalesce(Subquery(film_cinemas.annotate(total=Sum(counter)).values('total')), 0)
+            for counter in COUNTERS
+        })
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('cinephile_server', '0010_schedule'),
+    ]
+
+    operations = [
+        *(
+            migrations.AddField(
+                model_name=model_name,
+                name=counter,
+                field=models.IntegerField(default=0, editable=False),
+            )
+            for model_name in ('cinema', 'film', 'filmcinema')
+            for counter in COUNTERS
+        ),
+        migrations.RunPython(count_tickets, migrations.RunPython.noop),
+    ]
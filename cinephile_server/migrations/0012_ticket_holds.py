@@ -0,0 +1,35 @@
+# Generated by Django 5.0.14 on 2026-10-18 19:05
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ('cinephile_server', '0011_availability'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='ticket',
+            name='held_by',
+            field=models.ForeignKey(
+                blank=True, editable=False, null=True, on_delete=django.db.models.deletion.SET_NULL,
+                related_name='held_tickets', to=settings.AUTH_USER_MODEL,
+            ),
+        ),
+        migrations.AddField(
+            model_name='ticket',
+            name='held_until',
+            field=models.DateTimeField(blank=True, editable=False, null=True),
+        ),
+        migrations.AddIndex(
+            model_name='ticket',
+            index=models.Index(
+                condition=models.Q(('held_until__isnull', False)), fields=['held_until'], name='ticket_held_until_idx',
+            ),
+        ),
+    ]
@@ -0,0 +1,29 @@
+# Generated by Django 5.0.14 on 2026-10-18 21:05
+
+from django.db import migrations
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('cinephile_server', '0013_idempotency_key'),
+    ]
+
+    operations = [
+        migrations.RemoveField(
+            model_name='cinema',
+            name='booked_tickets',
+        ),
+        migrations.RemoveField(
+            model_name='cinema',
+            name='free_tickets',
+        ),
+        migrations.RemoveField(
+            model_name='film',
+            name='booked_tickets',
+        ),
+        migrations.RemoveField(
+            model_name='film',
+            name='free_tickets',
+        ),
+    ]
@@ -0,0 +1,24 @@
+# Generated by Django 5.0.14 on 2026-10-18 17:19
+
+import cinephile_server.models
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('cinephile_server', '0014_totals_from_film_cinemas'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='cinema',
+            name='url_image',
+            field=models.TextField(default=None, max_length=190000, null=True, validators=[cinephile_server.models.check_url_image]),
+        ),
+        migrations.AlterField(
+            model_name='film',
+            name='url_image',
+            field=models.TextField(default=None, max_length=190000, null=True, validators=[cinephile_server.models.check_url_image]),
+        ),
+    ]
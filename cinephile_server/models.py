@@ -7,6 +7,10 @@ from uuid import uuid4
 from django.contrib.auth.models import User
 from django.core.exceptions import ValidationError
 from django.db import models
+from django.urls import reverse
+
+from . import images
+from .seats import SeatMap, bitmap_size, resize
 
 
 class UUIDMixin(models.Model):
@@ -18,18 +22,121 @@ class UUIDMixin(models.Model):
         abstract = True
 
 
+class TimestampMixin(models.Model):
+    """Class which adds modification time field."""
+
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        abstract = True
+
+
+class AvailabilityMixin(models.Model):
+    """Class which adds counters of free and booked tickets, they are maintained by cinephile_server.availability."""
+
+    free_tickets = models.IntegerField(default=0, editable=False)
+    booked_tickets = models.IntegerField(default=0, editable=False)
+
+    def save(self, *args, **kwargs) -> None:
+        """Save row without overwriting counters changed concurrently.
+
+        Args:
+            args: positional arguments of Model.save
+            kwargs: keyword arguments of Model.save
+        """
+        if not self._state.adding and kwargs.get('update_fields') is None:
+            kwargs['update_fields'] = [
+                field.name for field in self._meta.concrete_fields
+                if not field.primary_key and field.name not in {'free_tickets', 'booked_tickets'}
+            ]
+        super().save(*args, **kwargs)
+
+    class Meta:
+        abstract = True
+
+
 MAX_URL_LENGTH = 190000
 TICKET_MAX_LENGTH = 256
 CINEMA_NAME_MAX_LENGTH = 80
 FILM_NAME_MAX_LENGTH = 80
 DESCRIPTION_MAX_LENGTH = 1024
 ADDRESS_MAX_LENGTH = 1024
+HALL_NAME_MAX_LENGTH = 80
+DIGEST_LENGTH = 64
 
 
-class UrlMixin(models.Model):
-    """Class which adds url field."""
+def check_url_image(url_image: str):
+    """Check that inline data uri image can be moved to the image store.
+
+    Args:
+        url_image (str): image url or data uri
+
+    Raises:
+        ValidationError: django error
+    """
+    inline_image = images.parse_data_uri(url_image)
+    if inline_image is None:
+        return
+    try:
+        images.validate(*inline_image)
+    except images.InvalidImageError as error:
+        raise ValidationError(str(error), params={'content_type': inline_image[1]})
 
-    url_image = models.TextField(max_length=MAX_URL_LENGTH, null=True, default=None)
+
+class UrlMixin(models.Model):
+    """Class which adds image url field and reference to the stored poster."""
+
+    url_image = models.TextField(max_length=MAX_URL_LENGTH, null=True, default=None, validators=[check_url_image])
+    poster = models.CharField(max_length=images.REFERENCE_MAX_LENGTH, null=True, blank=True, editable=False)
+
+    def save(self, *args, **kwargs) -> None:
+        """Move inline data uri image to the image store before saving.
+
+        Args:
+            args: positional arguments of Model.save
+            kwargs: keyword arguments of Model.save
+
+        Raises:
+            InvalidImageError: inline image was not validated by check_url_image and is not valid
+        """
+        inline_image = images.parse_data_uri(self.url_image)
+        if inline_image is not None:
+            self.poster, _ = images.store(*inline_image)
+            self.url_image = None
+            if kwargs.get('update_fields') is not None:
+                kwargs['update_fields'] = {*kwargs['update_fields'], 'poster', 'url_image'}
+        super().save(*args, **kwargs)
+
+    def get_image_url(self, size: str) -> str | None:
+        """Return url of stored poster or external image url.
+
+        Args:
+            size: size of poster
+
+        Returns:
+            str | None: image url
+        """
+        if self.poster:
+            return reverse('poster', kwargs={'size': size, 'reference': self.poster})
+        return self.url_image
+
+    @property
+    def card_image_url(self) -> str | None:
+        """Return image url for catalog card.
+
+        Returns:
+            str | None: image url
+        """
+        return self.get_image_url('card')
+
+    @property
+    def detail_image_url(self) -> str | None:
+        """Return image url for detail page.
+
+        Returns:
+            str | None: image url
+        """
+        return self.get_image_url('detail')
 
     class Meta:
         abstract = True
@@ -129,7 +236,7 @@ def check_created(dt: datetime) -> None:
 ADDRESS_NAME_LEN = 256
 
 
-class Address(UUIDMixin):
+class Address(UUIDMixin, TimestampMixin):
     """Model for address."""
 
     city_name = models.TextField(max_length=ADDRESS_NAME_LEN, null=False, blank=False)
@@ -143,9 +250,12 @@ class Address(UUIDMixin):
 
     class Meta:
         db_table = '"api_data"."address"'
+        indexes = (
+            models.Index(fields=('city_name', 'id'), name='address_city_name_id_idx'),
+        )
 
 
-class Cinema(UUIDMixin, UrlMixin):
+class Cinema(UUIDMixin, UrlMixin, TimestampMixin):
     """Module for cinema."""
 
     name = models.TextField(max_length=CINEMA_NAME_MAX_LENGTH, null=False, blank=False)
@@ -157,9 +267,12 @@ class Cinema(UUIDMixin, UrlMixin):
 
     class Meta:
         db_table = '"api_data"."cinema"'
+        indexes = (
+            models.Index(fields=('name', 'id'), name='cinema_name_id_idx'),
+        )
 
 
-class Film(UUIDMixin, UrlMixin):
+class Film(UUIDMixin, UrlMixin, TimestampMixin):
     """Module for film."""
 
     name = models.TextField(max_length=FILM_NAME_MAX_LENGTH, null=False, blank=False)
@@ -173,9 +286,13 @@ class Film(UUIDMixin, UrlMixin):
 
     class Meta:
         db_table = '"api_data"."film"'
+        indexes = (
+            models.Index(fields=('name', 'id'), name='film_name_id_idx'),
+            models.Index(fields=('rating', 'id'), name='film_rating_id_idx'),
+        )
 
 
-class FilmCinema(UUIDMixin):
+class FilmCinema(UUIDMixin, TimestampMixin, AvailabilityMixin):
     """Module for film with cinema."""
 
     cinema = models.ForeignKey(Cinema, verbose_name='cinema', on_delete=models.CASCADE)
@@ -189,18 +306,145 @@ class FilmCinema(UUIDMixin):
         unique_together = (('cinema', 'film'),)
 
 
-class Ticket(UUIDMixin):
+class Screening(UUIDMixin, TimestampMixin):
+    """Model for screening of film in cinema hall."""
+
+    film_cinema = models.ForeignKey(FilmCinema, verbose_name='film cinema', on_delete=models.CASCADE)
+    hall = models.TextField(max_length=HALL_NAME_MAX_LENGTH, null=False, blank=False)
+    start_time = models.DateTimeField(null=False, blank=False)
+    capacity = models.IntegerField(null=False, blank=False, validators=[check_positive])
+    seats = models.BinaryField(editable=False, default=bytes)
+
+    def save(self, *args, **kwargs) -> None:
+        """Save screening without overwriting seats booked concurrently.
+
+        Args:
+            args: positional arguments of Model.save
+            kwargs: keyword arguments of Model.save
+        """
+        if self._state.adding:
+            self.seats = bytes(bitmap_size(self.capacity))
+            super().save(*args, **kwargs)
+            return
+        if kwargs.get('update_fields') is None:
+            kwargs['update_fields'] = [
+                field.name for field in self._meta.concrete_fields
+                if not field.primary_key and field.name != 'seats'
+            ]
+        super().save(*args, **kwargs)
+        resize(self.id, self.capacity)
+
+    @property
+    def seat_map(self) -> SeatMap:
+        """Return seat map of screening.
+
+        Returns:
+            SeatMap: seats of screening
+        """
+        return SeatMap(self.seats, self.capacity)
+
+    def __str__(self) -> str:
+        return f'hall={self.hall} start_time={self.start_time} filmcinema={self.film_cinema}'
+
+    class Meta:
+        db_table = '"api_data"."screening"'
+        indexes = (
+            models.Index(fields=('film_cinema', 'start_time'), name='screening_film_cinema_time_idx'),
+            models.Index(fields=('start_time', 'id'), name='screening_start_time_id_idx'),
+        )
+
+
+class Ticket(UUIDMixin, TimestampMixin):
     """Model for ticket."""
 
     film_date = models.DateTimeField(null=True, blank=True, default=get_datetime, validators=[check_created])
     place = models.TextField(max_length=TICKET_MAX_LENGTH, null=False, blank=False)
 
-    film_cinema = models.OneToOneField(FilmCinema, on_delete=models.CASCADE, blank=True)
+    film_cinema = models.ForeignKey(FilmCinema, on_delete=models.CASCADE, blank=True)
+    screening = models.ForeignKey(Screening, on_delete=models.CASCADE, null=True, blank=True, editable=False)
+    seat = models.IntegerField(null=True, blank=True, editable=False, validators=[check_positive])
 
     user = models.ForeignKey(User, on_delete=models.SET_NULL, null=True, blank=True)
+    held_by = models.ForeignKey(
+        User, on_delete=models.SET_NULL, null=True, blank=True, editable=False, related_name='held_tickets',
+    )
+    held_until = models.DateTimeField(null=True, blank=True, editable=False)
 
     def __str__(self) -> str:
         return f'place={self.place} filmcinema={self.film_cinema}'
 
     class Meta:
         db_table = '"api_data"."ticket"'
+        indexes = (
+            models.Index(fields=('film_cinema', 'film_date'), name='ticket_film_cinema_date_idx'),
+            models.Index(fields=('film_date', 'id'), name='ticket_film_date_id_idx'),
+            models.Index(
+                models.F('film_date').desc(nulls_last=True), models.F('id').desc(),
+                name='ticket_film_date_desc_id_idx',
+            ),
+            models.Index(
+                fields=('film_date', 'id'), condition=models.Q(user__isnull=True), name='ticket_free_film_date_idx',
+            ),
+            models.Index(
+                fields=('film_date', 'id'), condition=models.Q(user__isnull=False), name='ticket_booked_film_date_idx',
+            ),
+            models.Index(
+                fields=('held_until',), condition=models.Q(held_until__isnull=False), name='ticket_held_until_idx',
+            ),
+        )
+        constraints = (
+            models.UniqueConstraint(fields=('screening', 'seat'), name='ticket_screening_seat_unique'),
+        )
+
+
+class ScheduleEntry(UUIDMixin, TimestampMixin):
+    """Model for denormalized schedule row: film shown in cinema of city on day.
+
+    Rows are maintained from signals of tickets and renamed rows, see cinephile_server.schedule.
+    """
+
+    city_name = models.TextField(max_length=ADDRESS_NAME_LEN, null=False, blank=False)
+    day = models.DateField(null=False, blank=False)
+    film_cinema = models.ForeignKey(FilmCinema, verbose_name='film cinema', on_delete=models.CASCADE)
+    film = models.ForeignKey(Film, verbose_name='film', on_delete=models.CASCADE)
+    cinema = models.ForeignKey(Cinema, verbose_name='cinema', on_delete=models.CASCADE)
+    film_name = models.TextField(max_length=FILM_NAME_MAX_LENGTH, null=False, blank=False)
+    cinema_name = models.TextField(max_length=CINEMA_NAME_MAX_LENGTH, null=False, blank=False)
+    first_show = models.DateTimeField(null=False, blank=False)
+    tickets = models.IntegerField(null=False, blank=False)
+
+    def __str__(self) -> str:
+        return f'city={self.city_name} day={self.day} filmcinema={self.film_cinema_id}'
+
+    class Meta:
+        db_table = '"api_data"."schedule"'
+        indexes = (
+            models.Index(fields=('city_name', 'day', 'first_show', 'id'), name='schedule_city_day_idx'),
+        )
+        constraints = (
+            models.UniqueConstraint(fields=('film_cinema', 'day'), name='schedule_film_cinema_day_unique'),
+        )
+
+
+class IdempotencyKey(models.Model):
+    """Model for first response to request with Idempotency-Key header, see cinephile_server.idempotency.
+
+    Row without status code is the lock of a request which is still running.
+    """
+
+    digest = models.CharField(primary_key=True, max_length=DIGEST_LENGTH)
+    fingerprint = models.CharField(max_length=DIGEST_LENGTH)
+    status_code = models.SmallIntegerField(null=True)
+    content = models.BinaryField(default=b'')
+    content_type = models.TextField(default='')
+    location = models.TextField(default='')
+    expires_at = models.DateTimeField()
+
+    def __str__(self) -> str:
+        return f'digest={self.digest} status={self.status_code} expires_at={self.expires_at}'
+
+    class Meta:
+        db_table = '"api_data"."idempotency_key"'
+        indexes = (
+            models.Index(fields=('expires_at',), name='idempotency_key_expires_idx'),
+        )
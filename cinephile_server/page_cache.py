@@ -0,0 +1,248 @@
+"""Module for cache of anonymous pages with tag based invalidation.
+
+Every cached page depends on tags, e.g. "film:<id>" for film detail page. A tag has a random
+version stored in cache and the page key contains versions of its tags, so invalidation of a tag
+replaces its version and makes all pages which depend on it unreachable. Pages whose rows change
+too often for tags, e.g. availability of catalog cards, are keyed by the state of their rows instead.
+It needs only get, add and set operations, so it works with any cache backend, including
+local-memory and file-based ones.
+"""
+
+
+from functools import wraps
+from hashlib import sha256
+from typing import Callable, Iterable, Sequence
+from uuid import uuid4
+
+from asgiref.sync import iscoroutinefunction
+from django.conf import settings
+from django.core.cache import BaseCache, caches
+from django.core.handlers.wsgi import WSGIRequest
+from django.db import transaction
+from django.http import HttpResponse
+from django.middleware.csrf import get_token
+
+KEY_PREFIX = 'page'
+SAFE_METHODS = ('GET', 'HEAD')
+FILMS_TAG = 'films'
+CINEMAS_TAG = 'cinemas'
+CSRF_PLACEHOLDER = 'csrf-token-placeholder'
+SHARED_RENDER_ATTRIBUTE = 'renders_shared_page'
+STATE_ATTRIBUTE = 'page_state'
+
+
+def get_cache() -> BaseCache:
+    """Return cache of pages.
+
+    Returns:
+        BaseCache: cache backend
+    """
+    return caches[settings.PAGE_CACHE_ALIAS]
+
+
+def film_tag(film_id) -> str:
+    """Return tag of pages which show film.
+
+    Args:
+        film_id: id of film
+
+    Returns:
+        str: tag
+    """
+    return f'film:{film_id}'
+
+
+def cinema_tag(cinema_id) -> str:
+    """Return tag of pages which show cinema.
+
+    Args:
+        cinema_id: id of cinema
+
+    Returns:
+        str: tag
+    """
+    return f'cinema:{cinema_id}'
+
+
+def __tag_key(tag: str) -> str:
+    return f'{KEY_PREFIX}:tag:{tag}'
+
+
+def get_versions(tags: Sequence[str]) -> list[str]:
+    """Return current versions of tags, creating missing ones.
+
+    Args:
+        tags: tags of page
+
+    Returns:
+        list[str]: versions of tags
+    """
+    cache = get_cache()
+    keys = [__tag_key(tag) for tag in tags]
+    versions = cache.get_many(keys)
+    missing = [key for key in keys if key not in versions]
+    for key in missing:
+        cache.add(key, uuid4().hex, None)
+    if missing:
+        versions.update(cache.get_many(missing))
+    return [versions.get(key, '') for key in keys]
+
+
+async def aget_versions(tags: Sequence[str]) -> list[str]:
+    """Return current versions of tags like get_versions with async cache operations.
+
+    Args:
+        tags: tags of page
+
+    Returns:
+        list[str]: versions of tags
+    """
+    cache = get_cache()
+    keys = [__tag_key(tag) for tag in tags]
+    versions = await cache.aget_many(keys)
+    missing = [key for key in keys if key not in versions]
+    for key in missing:
+        await cache.aadd(key, uuid4().hex, None)
+    if missing:
+        versions.update(await cache.aget_many(missing))
+    return [versions.get(key, '') for key in keys]
+
+
+def invalidate(tags: Iterable[str]) -> None:
+    """Evict all pages which depend on tags after the current transaction is committed.
+
+    Evicting earlier would let a concurrent request cache the page with not yet committed data.
+
+    Args:
+        tags: changed tags
+    """
+    versions = {__tag_key(tag): uuid4().hex for tag in set(tags)}
+    if versions:
+        transaction.on_commit(lambda: get_cache().set_many(versions, None))
+
+
+def set_state(request: WSGIRequest, state: tuple) -> None:
+    """Make cache key of page depend on state of its rows, so the page is rendered again when they change.
+
+    Args:
+        request: request of page
+        state: state of rows shown by page, e.g. from conditional.aget_page_state
+    """
+    setattr(request, STATE_ATTRIBUTE, state)
+
+
+def __page_key(request: WSGIRequest, versions: list[str]) -> str:
+    key_parts = (request.get_full_path(), versions, getattr(request, STATE_ATTRIBUTE, None))
+    digest = sha256(repr(key_parts).encode()).hexdigest()
+    return f'{KEY_PREFIX}:{digest}'
+
+
+def get_page_key(request: WSGIRequest, tags: Sequence[str]) -> str:
+    """Return cache key of page for current versions of its tags.
+
+    Args:
+        request: request of page
+        tags: tags of page
+
+    Returns:
+        str: cache key
+    """
+    return __page_key(request, get_versions(tags))
+
+
+async def aget_page_key(request: WSGIRequest, tags: Sequence[str]) -> str:
+    """Return cache key of page like get_page_key with async cache operations.
+
+    Args:
+        request: request of page
+        tags: tags of page
+
+    Returns:
+        str: cache key
+    """
+    return __page_key(request, await aget_versions(tags))
+
+
+def is_shared(request: WSGIRequest) -> bool:
+    """Check that page is rendered for all anonymous visitors, so it must not contain per-user data.
+
+    Args:
+        request: request of page
+
+    Returns:
+        bool: True if page is rendered for cache
+    """
+    return getattr(request, SHARED_RENDER_ATTRIBUTE, False)
+
+
+def __is_cacheable(request: WSGIRequest, user=None) -> bool:
+    user = request.user if user is None else user
+    return bool(settings.PAGE_CACHE_TIMEOUT) and request.method in SAFE_METHODS and not user.is_authenticated
+
+
+def __should_cache(response: HttpResponse) -> bool:
+    return response.status_code == HttpResponse.status_code and not response.streaming
+
+
+def __personalize(request: WSGIRequest, content: bytes, content_type: str) -> HttpResponse:
+    if CSRF_PLACEHOLDER.encode() in content:
+        content = content.replace(CSRF_PLACEHOLDER.encode(), get_token(request).encode())
+    return HttpResponse(content, content_type=content_type)
+
+
+def __serve(view: Callable, get_tags: Callable[..., Sequence[str]], request: WSGIRequest, *args, **kwargs):
+    if not __is_cacheable(request):
+        return view(request, *args, **kwargs)
+    cache = get_cache()
+    key = get_page_key(request, get_tags(*args, **kwargs))
+    cached = cache.get(key)
+    if cached is None:
+        setattr(request, SHARED_RENDER_ATTRIBUTE, True)
+        response = view(request, *args, **kwargs)
+        if not __should_cache(response):
+            return response
+        cached = (response.content, response['Content-Type'])
+        cache.set(key, cached, settings.PAGE_CACHE_TIMEOUT)
+    return __personalize(request, *cached)
+
+
+async def __aserve(view: Callable, get_tags: Callable[..., Sequence[str]], request: WSGIRequest, *args, **kwargs):
+    if not __is_cacheable(request, await request.auser()):
+        return await view(request, *args, **kwargs)
+    cache = get_cache()
+    key = await aget_page_key(request, get_tags(*args, **kwargs))
+    cached = await cache.aget(key)
+    if cached is None:
+        setattr(request, SHARED_RENDER_ATTRIBUTE, True)
+        response = await view(request, *args, **kwargs)
+        if not __should_cache(response):
+            return response
+        cached = (response.content, response['Content-Type'])
+        await cache.aset(key, cached, settings.PAGE_CACHE_TIMEOUT)
+    return __personalize(request, *cached)
+
+
+def cached_page(get_tags: Callable[..., Sequence[str]]) -> Callable:
+    """Cache page for anonymous visitors until one of its tags is invalidated.
+
+    The page is rendered with a placeholder instead of csrf token and the placeholder is replaced
+    with token of visitor on every response. Async views are served with async cache operations.
+
+    Args:
+        get_tags: returns tags of page for view arguments
+
+    Returns:
+        Callable: view decorator
+    """
+    def decorator(view: Callable) -> Callable:
+        if iscoroutinefunction(view):
+            @wraps(view)
+            async def async_wrapper(request: WSGIRequest, *args, **kwargs):
+                return await __aserve(view, get_tags, request, *args, **kwargs)
+            return async_wrapper
+
+        @wraps(view)
+        def wrapper(request: WSGIRequest, *args, **kwargs):
+            return __serve(view, get_tags, request, *args, **kwargs)
+        return wrapper
+    return decorator
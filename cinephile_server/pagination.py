@@ -0,0 +1,418 @@
+"""Module for keyset (cursor) pagination."""
+
+
+import json
+from base64 import urlsafe_b64decode, urlsafe_b64encode
+from binascii import Error as BinasciiError
+from dataclasses import dataclass
+from datetime import datetime
+from typing import Any, Sequence
+
+from django.conf import settings
+from django.core.exceptions import FieldDoesNotExist
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db.models import F, Model, Q, QuerySet
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import BasePagination
+from rest_framework.response import Response
+from rest_framework.settings import api_settings
+from rest_framework.utils.urls import replace_query_param
+
+DEFAULT_PAGE_SIZE = 50
+DEFAULT_MAX_PAGE_SIZE = 200
+INVALID_CURSOR = 'Invalid cursor'
+
+
+class CursorEncoder(DjangoJSONEncoder):
+    """Json encoder which keeps microseconds of datetimes, so cursor keys stay exact."""
+
+    def default(self, o: Any) -> Any:
+        """Encode value which is not supported by json.
+
+        Args:
+            o: value to encode
+
+        Returns:
+            Any: json compatible value
+        """
+        if isinstance(o, datetime):
+            return o.isoformat()
+        return super().default(o)
+
+
+@dataclass(frozen=True)
+class Position:
+    """Position of cursor: key of the boundary row and walking direction."""
+
+    values: tuple
+    reverse: bool = False
+
+
+@dataclass(frozen=True)
+class KeysetPage:
+    """Page of rows with cursors of neighbour pages."""
+
+    rows: list
+    next_cursor: str | None
+    previous_cursor: str | None
+
+
+def encode_cursor(position: Position) -> str:
+    """Encode position to opaque cursor.
+
+    Args:
+        position: cursor position
+
+    Returns:
+        str: cursor
+    """
+    payload = json.dumps([position.values, position.reverse], cls=CursorEncoder, separators=(',', ':'))
+    return urlsafe_b64encode(payload.encode()).decode()
+
+
+def decode_cursor(cursor: str, key_length: int) -> Position:
+    """Decode cursor to position.
+
+    Args:
+        cursor: cursor from request
+        key_length: number of fields in ordering key
+
+    Raises:
+        NotFound: cursor is invalid
+
+    Returns:
+        Position: cursor position
+    """
+    try:
+        key_values, reverse = json.loads(urlsafe_b64decode(cursor.encode()))
+    except (BinasciiError, TypeError, ValueError):
+        raise NotFound(INVALID_CURSOR)
+    if not isinstance(key_values, list) or len(key_values) != key_length:
+        raise NotFound(INVALID_CURSOR)
+    return Position(tuple(key_values), bool(reverse))
+
+
+def normalize_ordering(model: type[Model], ordering: Sequence[str]) -> tuple[str, ...]:
+    """Return ordering with primary key as the last tie breaker.
+
+    Args:
+        model: model of queryset
+        ordering: field names, "-" prefix means descending order
+
+    Returns:
+        tuple[str, ...]: unique ordering key
+    """
+    pk_name = model._meta.pk.name
+    fields = tuple(field.replace('pk', pk_name) if field.lstrip('-') == 'pk' else field for field in ordering)
+    if pk_name not in {field.lstrip('-') for field in fields}:
+        fields = (*fields, pk_name)
+    return fields
+
+
+def __get_attname(model: type[Model], name: str) -> str:
+    try:
+        return model._meta.get_field(name).attname
+    except FieldDoesNotExist:
+        return name
+
+
+def __is_nullable(model: type[Model], name: str) -> bool:
+    try:
+        return model._meta.get_field(name).null
+    except FieldDoesNotExist:
+        return False
+
+
+def __after(model: type[Model], field: str, key_value: Any, reverse: bool) -> Q | None:
+    name = field.lstrip('-')
+    lookup = 'gt' if field.startswith('-') == reverse else 'lt'
+    if reverse:
+        if key_value is None:
+            return Q(**{f'{name}__isnull': False})
+        return Q(**{f'{name}__{lookup}': key_value})
+    if key_value is None:
+        return None
+    after = Q(**{f'{name}__{lookup}': key_value})
+    return after | Q(**{f'{name}__isnull': True}) if __is_nullable(model, name) else after
+
+
+def __equal(field: str, key_value: Any) -> Q:
+    name = field.lstrip('-')
+    if key_value is None:
+        return Q(**{f'{name}__isnull': True})
+    return Q(**{name: key_value})
+
+
+def keyset_filter(model: type[Model], ordering: Sequence[str], position: Position) -> Q:
+    """Build filter selecting rows after (or before, if reversed) the cursor position.
+
+    Rows are ordered lexicographically by ordering fields with nulls last, so the filter is
+    an OR of "equal prefix and strictly following next field" terms.
+
+    Args:
+        model: model of queryset
+        ordering: unique ordering key
+        position: cursor position
+
+    Returns:
+        Q: filter for queryset
+    """
+    condition = Q(pk__in=[])
+    prefix = Q()
+    for field, key_value in zip(ordering, position.values):
+        after = __after(model, field, key_value, position.reverse)
+        if after is not None:
+            condition |= prefix & after
+        prefix &= __equal(field, key_value)
+    return condition
+
+
+def order_expressions(ordering: Sequence[str], reverse: bool = False, model: type[Model] | None = None) -> list:
+    """Return order by expressions with nulls placed last.
+
+    Nulls placement is omitted for not nullable fields of model, so descending keys are read
+    by backward scans of ascending indexes.
+
+    Args:
+        ordering: unique ordering key
+        reverse: walk in reversed order
+        model: model of queryset, all fields are treated as nullable without it
+
+    Returns:
+        list: expressions for order_by
+    """
+    nulls = {'nulls_first': True} if reverse else {'nulls_last': True}
+    expressions = []
+    for field in ordering:
+        name = field.lstrip('-')
+        expression = F(name)
+        field_nulls = nulls if model is None or __is_nullable(model, name) else {}
+        if field.startswith('-') == reverse:
+            expressions.append(expression.asc(**field_nulls))
+        else:
+            expressions.append(expression.desc(**field_nulls))
+    return expressions
+
+
+def row_key(model: type[Model], row: Any, ordering: Sequence[str]) -> tuple:
+    """Return ordering key of row which can be model instance or values() dict.
+
+    Ordering may contain annotations of queryset, e.g. search rank.
+
+    Args:
+        model: model of queryset
+        row: row of queryset
+        ordering: unique ordering key
+
+    Returns:
+        tuple: key values
+    """
+    key_values = []
+    for field in ordering:
+        name = field.lstrip('-')
+        attname = __get_attname(model, name)
+        if isinstance(row, dict):
+            key_values.append(row[name] if name in row else row[attname])
+        else:
+            key_values.append(getattr(row, attname))
+    return tuple(key_values)
+
+
+def keyset_queryset(queryset: QuerySet, ordering: Sequence[str], cursor: str | None) -> tuple:
+    """Return rows from cursor position in walking order, a page is their first page size + 1 rows.
+
+    Args:
+        queryset: queryset to paginate
+        ordering: field names of ordering key
+        cursor: cursor of requested page or None for the first page
+
+    Returns:
+        tuple: ordered queryset, unique ordering key and cursor position
+    """
+    model = queryset.model
+    ordering = normalize_ordering(model, ordering)
+    position = decode_cursor(cursor, len(ordering)) if cursor else None
+    reverse = bool(position and position.reverse)
+    if position:
+        queryset = queryset.filter(keyset_filter(model, ordering, position))
+    return queryset.order_by(*order_expressions(ordering, reverse, model)), ordering, position
+
+
+def __page_query(queryset: QuerySet, ordering: Sequence[str], cursor: str | None, page_size: int) -> tuple:
+    ordered, ordering, position = keyset_queryset(queryset, ordering, cursor)
+    return ordered[:page_size + 1], ordering, position
+
+
+def __make_page(
+    model: type[Model], rows: list, ordering: Sequence[str], position: Position | None, page_size: int,
+) -> KeysetPage:
+    reverse = bool(position and position.reverse)
+    has_more = len(rows) > page_size
+    rows = rows[:page_size]
+    if reverse:
+        rows.reverse()
+    if not rows:
+        return KeysetPage(rows, None, None)
+    has_next = reverse or has_more
+    has_previous = has_more if reverse else position is not None
+    next_cursor = encode_cursor(Position(row_key(model, rows[-1], ordering))) if has_next else None
+    previous_cursor = encode_cursor(Position(row_key(model, rows[0], ordering), reverse=True)) if has_previous else None
+    return KeysetPage(rows, next_cursor, previous_cursor)
+
+
+def paginate_keyset(queryset: QuerySet, ordering: Sequence[str], cursor: str | None, page_size: int) -> KeysetPage:
+    """Return one page of queryset without OFFSET, so every page costs the same.
+
+    Args:
+        queryset: queryset to paginate
+        ordering: field names of ordering key
+        cursor: cursor of requested page or None for the first page
+        page_size: number of rows on page
+
+    Returns:
+        KeysetPage: page with cursors
+    """
+    page_queryset, ordering, position = __page_query(queryset, ordering, cursor, page_size)
+    return __make_page(queryset.model, list(page_queryset), ordering, position, page_size)
+
+
+async def apaginate_keyset(
+    queryset: QuerySet, ordering: Sequence[str], cursor: str | None, page_size: int,
+) -> KeysetPage:
+    """Return one page of queryset like paginate_keyset, rows are fetched by async iteration.
+
+    Args:
+        queryset: queryset to paginate
+        ordering: field names of ordering key
+        cursor: cursor of requested page or None for the first page
+        page_size: number of rows on page
+
+    Returns:
+        KeysetPage: page with cursors
+    """
+    page_queryset, ordering, position = __page_query(queryset, ordering, cursor, page_size)
+    rows = [row async for row in page_queryset]
+    return __make_page(queryset.model, rows, ordering, position, page_size)
+
+
+class KeysetPagination(BasePagination):
+    """Cursor pagination by unique ordering key, the ordering is taken from the view."""
+
+    cursor_query_param = 'cursor'
+    page_size_query_param = 'page_size'
+    page_size = api_settings.PAGE_SIZE or DEFAULT_PAGE_SIZE
+    max_page_size = getattr(settings, 'REST_MAX_PAGE_SIZE', DEFAULT_MAX_PAGE_SIZE)
+    ordering = ('pk',)
+
+    def paginate_queryset(self, queryset: QuerySet, request, view=None) -> list:
+        """Return rows of requested page.
+
+        Args:
+            queryset: queryset to paginate
+            request: request with cursor
+            view: view which is paginated
+
+        Returns:
+            list: rows of page
+        """
+        self.request = request
+        page = paginate_keyset(
+            queryset,
+            self.get_ordering(request, queryset, view),
+            request.query_params.get(self.cursor_query_param),
+            self.get_page_size(request),
+        )
+        self.page = page
+        return page.rows
+
+    def get_page_queryset(self, queryset: QuerySet, request, view=None) -> tuple[QuerySet, int]:
+        """Return rows of requested page in walking order without slicing them, e.g. for validators of page.
+
+        Args:
+            queryset: queryset to paginate
+            request: request with cursor
+            view: view which is paginated
+
+        Returns:
+            tuple[QuerySet, int]: ordered rows from cursor and page size
+        """
+        ordered, _, _ = keyset_queryset(
+            queryset, self.get_ordering(request, queryset, view), request.query_params.get(self.cursor_query_param),
+        )
+        return ordered, self.get_page_size(request)
+
+    def get_ordering(self, request, queryset: QuerySet, view) -> Sequence[str]:
+        """Return ordering of ordering filter, view or paginator.
+
+        Args:
+            request: current request
+            queryset: queryset to paginate
+            view: view which is paginated
+
+        Returns:
+            Sequence[str]: field names of ordering key
+        """
+        for filter_backend in getattr(view, 'filter_backends', ()):
+            if hasattr(filter_backend, 'get_ordering'):
+                ordering = filter_backend().get_ordering(request, queryset, view)
+                if ordering:
+                    return ordering
+        return getattr(view, 'ordering', None) or self.ordering
+
+    def get_page_size(self, request) -> int:
+        """Return requested page size limited by max page size.
+
+        Args:
+            request: current request
+
+        Returns:
+            int: page size
+        """
+        requested = request.query_params.get(self.page_size_query_param, '')
+        if requested.isdigit() and int(requested) > 0:
+            return min(int(requested), self.max_page_size)
+        return self.page_size
+
+    def get_page_link(self, cursor: str | None) -> str | None:
+        """Return link to page with cursor.
+
+        Args:
+            cursor: cursor of page
+
+        Returns:
+            str | None: absolute url of page
+        """
+        if cursor is None:
+            return None
+        return replace_query_param(self.request.build_absolute_uri(), self.cursor_query_param, cursor)
+
+    def get_paginated_response(self, data) -> Response:
+        """Return response with page links and results.
+
+        Args:
+            data: serialized rows
+
+        Returns:
+            Response: paginated response
+        """
+        return Response({
+            'next': self.get_page_link(self.page.next_cursor),
+            'previous': self.get_page_link(self.page.previous_cursor),
+            'results': data,
+        })
+
+    def get_paginated_response_schema(self, schema: dict) -> dict:
+        """Return schema of paginated response.
+
+        Args:
+            schema: schema of results
+
+        Returns:
+            dict: schema of response
+        """
+        link = {'type': 'string', 'nullable': True, 'format': 'uri'}
+        return {
+            'type': 'object',
+            'required': ['results'],
+            'properties': {'next': link, 'previous': link, 'results': schema},
+        }
@@ -40,3 +40,20 @@ class IsSuperUser(permissions.BasePermission):
             bool: True if the user is a superuser, False otherwise.
         """
         return request.user.is_superuser
+
+
+class IsSuperUserOrReadOnly(IsSuperUser):
+    """Permission class that allows safe methods to everyone and other methods to superusers only."""
+
+    def has_permission(self, request: WSGIRequest, view) -> bool:
+        """
+        Determine if the request is safe or the user is a superuser.
+
+        Args:
+            request: The Django request object containing information about the incoming HTTP request.
+            view: The view which is being accessed.
+
+        Returns:
+            bool: True if the method is safe or the user is a superuser, False otherwise.
+        """
+        return request.method in permissions.SAFE_METHODS or super().has_permission(request, view)
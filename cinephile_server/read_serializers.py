@@ -0,0 +1,256 @@
+"""Module for lean read-only serializers built from values() rows.
+
+A lean serializer mirrors fields of a hyperlinked model serializer, but reads plain values()
+rows and builds links from url templates reversed once per response instead of once per row.
+Many-to-many links of a whole page are loaded with one query.
+"""
+
+
+from collections import defaultdict
+from dataclasses import dataclass
+from typing import Any, Callable, Iterable
+
+from django.core.exceptions import ValidationError
+from django.db.models import Model, QuerySet
+from django.http import Http404
+from rest_framework.fields import Field
+from rest_framework.relations import HyperlinkedIdentityField, HyperlinkedRelatedField, ManyRelatedField
+from rest_framework.request import Request
+from rest_framework.response import Response
+from rest_framework.reverse import reverse
+from rest_framework.serializers import ModelSerializer
+
+from .pagination import normalize_ordering
+
+PK_PLACEHOLDER = 'lean-pk-placeholder'
+SAFE_METHODS = ('GET', 'HEAD')
+
+
+@dataclass(frozen=True)
+class Column:
+    """Output field which is read from one column of values() row."""
+
+    name: str
+    source: str
+    represent: Callable[[Any], Any]
+
+
+@dataclass(frozen=True)
+class ManyColumn:
+    """Output field with links to rows related through many-to-many table."""
+
+    name: str
+    through: type[Model]
+    own_column: str
+    related_column: str
+    represent: Callable[[Any], Any]
+
+
+def __url_template(field: HyperlinkedRelatedField, context: dict) -> Callable[[Any], str | None]:
+    template = reverse(
+        field.view_name,
+        kwargs={field.lookup_url_kwarg: PK_PLACEHOLDER},
+        request=context['request'],
+        format=context.get('format'),
+    )
+    return lambda pk: None if pk is None else template.replace(PK_PLACEHOLDER, str(pk))
+
+
+def __represent(field: Field) -> Callable[[Any], Any]:
+    return lambda field_value: None if field_value is None else field.to_representation(field_value)
+
+
+def __build_column(model: type[Model], name: str, field: Field, context: dict) -> Column | ManyColumn | None:
+    pk_column = model._meta.pk.attname
+    if isinstance(field, HyperlinkedIdentityField):
+        return Column(name, pk_column, __url_template(field, context)) if field.lookup_field == 'pk' else None
+    if isinstance(field, ManyRelatedField):
+        model_field = model._meta.get_field(field.source)
+        through = model_field.remote_field.through._meta
+        return ManyColumn(
+            name,
+            through.model,
+            through.get_field(model_field.m2m_field_name()).attname,
+            through.get_field(model_field.m2m_reverse_field_name()).attname,
+            __url_template(field.child_relation, context),
+        )
+    if isinstance(field, HyperlinkedRelatedField):
+        if field.lookup_field != 'pk':
+            return None
+        return Column(name, model._meta.get_field(field.source).attname, __url_template(field, context))
+    if field.source in __column_names(model):
+        return Column(name, field.source, __represent(field))
+    return None
+
+
+def __column_names(model: type[Model]) -> set[str]:
+    return {model_field.name for model_field in model._meta.concrete_fields if not model_field.is_relation}
+
+
+class ValuesSerializer:
+    """Read-only serializer of values() rows with the same output as model serializer."""
+
+    def __init__(self, model: type[Model], columns: list) -> None:
+        """Create serializer.
+
+        Args:
+            model: serialized model
+            columns: output fields in order of model serializer
+        """
+        self.model = model
+        self.columns = columns
+
+    def get_value_names(self, ordering: Iterable[str] = ()) -> list[str]:
+        """Return names of columns which must be selected by values().
+
+        Args:
+            ordering: fields of ordering key which paginator reads from rows
+
+        Returns:
+            list[str]: names for values()
+        """
+        names = [self.model._meta.pk.attname]
+        names.extend(column.source for column in self.columns if isinstance(column, Column))
+        names.extend(field.lstrip('-') for field in normalize_ordering(self.model, ordering))
+        return list(dict.fromkeys(names))
+
+    def __load_many(self, pks: list) -> dict[str, dict]:
+        links = {}
+        for column in self.columns:
+            if isinstance(column, ManyColumn):
+                related = defaultdict(list)
+                through_rows = column.through.objects.filter(**{f'{column.own_column}__in': pks}).values_list(
+                    column.own_column, column.related_column,
+                ).order_by(column.through._meta.pk.attname)
+                for own_pk, related_pk in through_rows:
+                    related[own_pk].append(column.represent(related_pk))
+                links[column.name] = related
+        return links
+
+    def serialize(self, rows: list[dict]) -> list[dict]:
+        """Serialize values() rows.
+
+        Args:
+            rows: rows selected with get_value_names
+
+        Returns:
+            list[dict]: serialized rows
+        """
+        pk_column = self.model._meta.pk.attname
+        links = self.__load_many([row[pk_column] for row in rows])
+        serialized = []
+        for row in rows:
+            serialized.append({
+                column.name: (
+                    links[column.name].get(row[pk_column], [])
+                    if isinstance(column, ManyColumn) else column.represent(row[column.source])
+                )
+                for column in self.columns
+            })
+        return serialized
+
+
+def build_values_serializer(serializer: ModelSerializer) -> ValuesSerializer | None:
+    """Build lean serializer from fields of model serializer.
+
+    Args:
+        serializer: model serializer with request in context
+
+    Returns:
+        ValuesSerializer | None: lean serializer or None if some field cannot be read from values() row
+    """
+    model = serializer.Meta.model
+    columns = []
+    for name, field in serializer.fields.items():
+        if field.write_only:
+            continue
+        column = __build_column(model, name, field, serializer.context)
+        if column is None:
+            return None
+        columns.append(column)
+    return ValuesSerializer(model, columns)
+
+
+class LeanReadMixin:
+    """Viewset mixin which serves list and retrieve from values() rows with a lean serializer.
+
+    Viewsets whose serializer has fields which cannot be read from values() rows keep the model serializer.
+    """
+
+    def get_values_serializer(self) -> ValuesSerializer | None:
+        """Return lean serializer for safe requests.
+
+        Returns:
+            ValuesSerializer | None: lean serializer or None if the model serializer must be used
+        """
+        if self.request.method not in SAFE_METHODS:
+            return None
+        serializer = self.get_serializer()
+        if not isinstance(serializer, ModelSerializer):
+            return None
+        return build_values_serializer(serializer)
+
+    def get_values_queryset(self, values_serializer: ValuesSerializer, queryset: QuerySet) -> QuerySet:
+        """Return values() queryset with columns of lean serializer and ordering key.
+
+        Args:
+            values_serializer: lean serializer
+            queryset: filtered queryset of view
+
+        Returns:
+            QuerySet: values() queryset
+        """
+        ordering = ()
+        if self.paginator is not None and hasattr(self.paginator, 'get_ordering'):
+            ordering = self.paginator.get_ordering(self.request, queryset, self)
+        return queryset.prefetch_related(None).values(*values_serializer.get_value_names(ordering))
+
+    def list(self, request: Request, *args, **kwargs) -> Response:
+        """Return list of rows serialized by lean serializer.
+
+        Args:
+            request: current request
+            args: positional arguments of view
+            kwargs: keyword arguments of view
+
+        Returns:
+            Response: list of objects
+        """
+        values_serializer = self.get_values_serializer()
+        if values_serializer is None:
+            return super().list(request, *args, **kwargs)
+        rows = self.get_values_queryset(values_serializer, self.filter_queryset(self.get_queryset()))
+        page = self.paginate_queryset(rows)
+        if page is not None:
+            return self.get_paginated_response(values_serializer.serialize(page))
+        return Response(values_serializer.serialize(list(rows)))
+
+    def retrieve(self, request: Request, *args, **kwargs) -> Response:
+        """Return row serialized by lean serializer.
+
+        Args:
+            request: current request
+            args: positional arguments of view
+            kwargs: keyword arguments of view
+
+        Raises:
+            Http404: object does not exist
+
+        Returns:
+            Response: object
+        """
+        values_serializer = self.get_values_serializer()
+        if values_serializer is None:
+            return super().retrieve(request, *args, **kwargs)
+        lookup_url_kwarg = self.lookup_url_kwarg or self.lookup_field
+        queryset = self.filter_queryset(self.get_queryset())
+        try:
+            row = self.get_values_queryset(values_serializer, queryset).filter(
+                **{self.lookup_field: kwargs[lookup_url_kwarg]},
+            ).first()
+        except (TypeError, ValueError, ValidationError):
+            row = None
+        if row is None:
+            raise Http404
+        self.check_object_permissions(request, row)
+        return Response(values_serializer.serialize([row])[0])
@@ -0,0 +1,169 @@
+"""Module for the schedule read model: which films are shown in cinemas of a city on a day.
+
+A schedule entry is one film in one cinema on one day with the time of the first show and
+number of tickets. Entries are keyed by (film cinema, day) and recomputed from tickets of
+that key when a ticket changes, so each key costs one aggregate over the ticket index and
+one upsert. Names of films, cinemas and cities are copied into entries and updated when they
+are renamed. Bulk changes, which send no signals, are synced with sync() or rebuilt with rebuild().
+"""
+
+
+from datetime import date, datetime, time, timedelta
+from typing import Iterable, Iterator
+
+from django.db import transaction
+from django.db.models import Count, F, Min, Model, OuterRef, QuerySet, Subquery
+from django.db.models.functions import TruncDate
+from django.utils import timezone
+
+from .models import Address, Cinema, Film, FilmCinema, ScheduleEntry, Ticket
+
+DEFAULT_BATCH_SIZE = 1000
+ORDERING = ('first_show', 'id')
+DATA_FIELDS = ('city_name', 'film_id', 'cinema_id', 'film_name', 'cinema_name', 'first_show', 'tickets')
+
+
+def get_day(film_date: datetime) -> date:
+    """Return day of film date in current time zone.
+
+    Args:
+        film_date: time of show
+
+    Returns:
+        date: day of schedule
+    """
+    return timezone.localtime(film_date).date()
+
+
+def get_entries(city_name: str, day: date) -> QuerySet[ScheduleEntry]:
+    """Return entries of city on day, they are read by one range scan of the schedule index.
+
+    Args:
+        city_name: name of city
+        day: day of schedule
+
+    Returns:
+        QuerySet[ScheduleEntry]: entries ordered by first show
+    """
+    return ScheduleEntry.objects.filter(city_name=city_name, day=day).order_by(*ORDERING)
+
+
+def __day_range(day: date) -> tuple[datetime, datetime]:
+    start = timezone.make_aware(datetime.combine(day, time.min))
+    return start, start + timedelta(days=1)
+
+
+def __aggregate(tickets: QuerySet[Ticket]) -> Iterator[ScheduleEntry]:
+    rows = tickets.filter(film_date__isnull=False).values(
+        'film_cinema_id',
+        day=TruncDate('film_date'),
+        film_id=F('film_cinema__film_id'),
+        cinema_id=F('film_cinema__cinema_id'),
+        film_name=F('film_cinema__film__name'),
+        cinema_name=F('film_cinema__cinema__name'),
+        city_name=F('film_cinema__cinema__address__city_name'),
+    ).annotate(first_show=Min('film_date'), tickets=Count('id')).order_by()
+    for row in rows.iterator(chunk_size=DEFAULT_BATCH_SIZE):
+        yield ScheduleEntry(**row)
+
+
+def __upsert(entries: list[ScheduleEntry]) -> None:
+    ScheduleEntry.objects.bulk_create(
+        entries,
+        update_conflicts=True,
+        unique_fields=['film_cinema', 'day'],
+        update_fields=[*DATA_FIELDS, 'updated_at'],
+    )
+
+
+def refresh(shows: Iterable[tuple | None]) -> None:
+    """Recompute entries of film cinemas on days of shows.
+
+    Args:
+        shows: pairs of film cinema id and film date, None and shows without date are skipped
+    """
+    keys = {(film_cinema_id, get_day(film_date)) for film_cinema_id, film_date in filter(None, shows) if film_date}
+    for film_cinema_id, day in keys:
+        start, end = __day_range(day)
+        entries = list(__aggregate(
+            Ticket.objects.filter(film_cinema_id=film_cinema_id, film_date__gte=start, film_date__lt=end),
+        ))
+        if entries:
+            __upsert(entries)
+        else:
+            ScheduleEntry.objects.filter(film_cinema_id=film_cinema_id, day=day).delete()
+
+
+def rebuild(film_cinema_ids: Iterable | None = None, batch_size: int = DEFAULT_BATCH_SIZE) -> int:
+    """Rebuild entries from tickets in one transaction.
+
+    Args:
+        film_cinema_ids: ids of rebuilt film cinemas, all entries are rebuilt without them
+        batch_size: number of entries inserted by one query
+
+    Returns:
+        int: number of entries
+    """
+    entries = ScheduleEntry.objects.all()
+    tickets = Ticket.objects.all()
+    if film_cinema_ids is not None:
+        film_cinema_ids = list(film_cinema_ids)
+        entries = entries.filter(film_cinema_id__in=film_cinema_ids)
+        tickets = tickets.filter(film_cinema_id__in=film_cinema_ids)
+    created = 0
+    batch = []
+    with transaction.atomic():
+        entries.delete()
+        for entry in __aggregate(tickets):
+            batch.append(entry)
+            if len(batch) == batch_size:
+                created += len(ScheduleEntry.objects.bulk_create(batch))
+                batch = []
+        created += len(ScheduleEntry.objects.bulk_create(batch))
+    return created
+
+
+def get_film_cinema_ids(model: type[Model], ids: list) -> set:
+    """Return film cinemas whose entries depend on rows, call it before rows change to keep old links.
+
+    Args:
+        model: model of rows
+        ids: ids of rows
+
+    Returns:
+        set: ids of film cinemas, empty for models which are synced by names
+    """
+    if model is Ticket:
+        return set(Ticket.objects.filter(id__in=ids).values_list('film_cinema_id', flat=True))
+    if model is FilmCinema:
+        return set(ids)
+    return set()
+
+
+def sync(model: type[Model], ids: list, film_cinema_ids: Iterable = ()) -> None:
+    """Update entries which show rows changed in bulk or renamed.
+
+    Args:
+        model: model of rows
+        ids: ids of rows
+        film_cinema_ids: film cinemas returned by get_film_cinema_ids before rows changed
+    """
+    if model is Film:
+        ScheduleEntry.objects.filter(film_id__in=ids).update(
+            film_name=Subquery(Film.objects.filter(id=OuterRef('film_id')).values('name')[:1]),
+            updated_at=timezone.now(),
+        )
+    elif model is Cinema:
+        cinemas = Cinema.objects.filter(id=OuterRef('cinema_id'))
+        ScheduleEntry.objects.filter(cinema_id__in=ids).update(
+            cinema_name=Subquery(cinemas.values('name')[:1]),
+            city_name=Subquery(cinemas.values('address__city_name')[:1]),
+            updated_at=timezone.now(),
+        )
+    elif model is Address:
+        ScheduleEntry.objects.filter(cinema__address_id__in=ids).update(
+            city_name=Subquery(Address.objects.filter(cinema=OuterRef('cinema_id')).values('city_name')[:1]),
+            updated_at=timezone.now(),
+        )
+    elif model in {Ticket, FilmCinema}:
+        rebuild({*film_cinema_ids, *get_film_cinema_ids(model, ids)})
@@ -0,0 +1,171 @@
+"""Module for ranked full-text search over films and cinemas.
+
+On PostgreSQL searched tables have a generated tsvector column with a GIN index (migration 0008),
+so a query is matched with the index and ranked by ts_rank_cd. Names are also indexed by trigrams,
+so words with typos still find rows by word similarity. Other databases (e.g. SQLite of test runs)
+match every word of query case-insensitively in searched fields and rank rows by field weights.
+"""
+
+
+from functools import reduce
+from operator import add, or_
+
+from django.db import connections
+from django.db.models import BooleanField, Case, FloatField, Model, Q, QuerySet, Value, When
+from django.db.models.expressions import RawSQL
+from rest_framework.filters import BaseFilterBackend
+from rest_framework.request import Request
+
+from .models import Cinema, Film
+
+SEARCH_PARAM = 'search'
+PAGE_SEARCH_PARAM = 'q'
+SEARCH_CONFIG = 'english'
+VECTOR_COLUMN = 'search_vector'
+RANK = 'search_rank'
+SEARCH_ORDERING = (f'-{RANK}', 'id')
+MAX_QUERY_LENGTH = 100
+MAX_QUERY_WORDS = 8
+FIELD_WEIGHTS = {'A': 1.0, 'B': 0.4}
+SEARCH_FIELDS = {
+    Film: (('name', 'A'), ('description', 'B')),
+    Cinema: (('name', 'A'),),
+}
+TRIGRAM_FIELD = 'name'
+
+
+def get_query(params, name: str = SEARCH_PARAM) -> str:
+    """Return normalized search query of request parameters.
+
+    Args:
+        params: query parameters
+        name: name of query parameter
+
+    Returns:
+        str: query without extra spaces, empty if nothing is searched
+    """
+    query = params.get(name) or ''
+    return ' '.join(query[:MAX_QUERY_LENGTH].split())
+
+
+def is_indexed(queryset: QuerySet) -> bool:
+    """Check that rows of queryset are searched with the tsvector column.
+
+    Args:
+        queryset: searched rows
+
+    Returns:
+        bool: True on PostgreSQL
+    """
+    return connections[queryset.db].vendor == 'postgresql'
+
+
+def __indexed_search(queryset: QuerySet, query: str) -> QuerySet:
+    quote_name = connections[queryset.db].ops.quote_name
+    table = quote_name(queryset.model._meta.db_table)
+    vector = f'{table}.{quote_name(VECTOR_COLUMN)}'
+    trigram_field = f'{table}.{quote_name(TRIGRAM_FIELD)}'
+    ts_query = 'websearch_to_tsquery(%s::regconfig, %s)'
+    # the query is bound as a parameter, only quoted names of table and columns are formatted into sql
+    matched = RawSQL(  # noqa: S611
+        f'({vector} @@ {ts_query} OR %s <%% {trigram_field})',
+        (SEARCH_CONFIG, query, query),
+        output_field=BooleanField(),
+    )
+    rank = RawSQL(  # noqa: S611
+        f'ts_rank_cd({vector}, {ts_query}) + word_similarity(%s, {trigram_field})',
+        (SEARCH_CONFIG, query, query),
+        output_field=FloatField(),
+    )
+    return queryset.filter(matched).annotate(**{RANK: rank})
+
+
+def __portable_search(queryset: QuerySet, query: str) -> QuerySet:
+    fields = SEARCH_FIELDS[queryset.model]
+    words = query.split()[:MAX_QUERY_WORDS]
+    for word in words:
+        queryset = queryset.filter(reduce(or_, (Q(**{f'{name}__icontains': word}) for name, _ in fields)))
+    rank = reduce(add, (
+        Case(When(**{f'{name}__icontains': word}, then=Value(FIELD_WEIGHTS[weight])), default=Value(0.0))
+        for word in words for name, weight in fields
+    ))
+    return queryset.annotate(**{RANK: rank})
+
+
+def search(queryset: QuerySet, query: str) -> QuerySet:
+    """Filter rows matching query and annotate them with RANK, higher rank is more relevant.
+
+    Args:
+        queryset: films or cinemas
+        query: normalized non-empty query
+
+    Returns:
+        QuerySet: matching rows, they are ordered by SEARCH_ORDERING by paginators
+    """
+    if is_indexed(queryset):
+        return __indexed_search(queryset, query)
+    return __portable_search(queryset, query)
+
+
+def is_searchable(model: type[Model]) -> bool:
+    """Check that model has searched fields.
+
+    Args:
+        model: model of queryset
+
+    Returns:
+        bool: True for films and cinemas
+    """
+    return model in SEARCH_FIELDS
+
+
+class FullTextSearchFilter(BaseFilterBackend):
+    """Filter backend which searches rows by "search" parameter and orders them by rank."""
+
+    def filter_queryset(self, request: Request, queryset: QuerySet, view) -> QuerySet:
+        """Return rows matching search query.
+
+        Args:
+            request: request with optional search query
+            queryset: rows of view
+            view: filtered view
+
+        Returns:
+            QuerySet: matching rows or all rows if nothing is searched
+        """
+        query = get_query(request.query_params)
+        if not query or not is_searchable(queryset.model):
+            return queryset
+        return search(queryset, query)
+
+    def get_ordering(self, request: Request, queryset: QuerySet, view) -> tuple[str, ...] | None:
+        """Return ordering by rank for keyset paginator.
+
+        Args:
+            request: request with optional search query
+            queryset: rows of view
+            view: filtered view
+
+        Returns:
+            tuple[str, ...] | None: ordering key or None if nothing is searched
+        """
+        if not get_query(request.query_params) or not is_searchable(queryset.model):
+            return None
+        return SEARCH_ORDERING
+
+    def get_schema_operation_parameters(self, view) -> list[dict]:
+        """Return schema of search parameter.
+
+        Args:
+            view: filtered view
+
+        Returns:
+            list[dict]: parameters of operation
+        """
+        return [{
+            'name': SEARCH_PARAM,
+            'required': False,
+            'in': 'query',
+            'description': 'Words of name or description, results are ordered by relevance.',
+            'schema': {'type': 'string'},
+        }]
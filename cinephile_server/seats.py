@@ -0,0 +1,177 @@
+"""Module for seat availability bitmaps of screenings."""
+
+
+from dataclasses import dataclass
+from typing import Iterator
+
+from django.db import transaction
+from django.utils import timezone
+
+BITS_IN_BYTE = 8
+
+
+def bitmap_size(capacity: int) -> int:
+    """Return number of bytes needed to store seats of hall.
+
+    Args:
+        capacity: number of seats
+
+    Returns:
+        int: bitmap size in bytes
+    """
+    return (capacity + BITS_IN_BYTE - 1) // BITS_IN_BYTE
+
+
+def resize_bitmap(bitmap: bytes, capacity: int) -> bytes:
+    """Resize bitmap to capacity, keeping states of remaining seats.
+
+    Args:
+        bitmap: current bitmap
+        capacity: new number of seats
+
+    Returns:
+        bytes: resized bitmap
+    """
+    size = bitmap_size(capacity)
+    resized = bytearray(bytes(bitmap)[:size].ljust(size, b'\0'))
+    extra_bits = size * BITS_IN_BYTE - capacity
+    if resized and extra_bits:
+        resized[-1] &= (1 << (BITS_IN_BYTE - extra_bits)) - 1
+    return bytes(resized)
+
+
+@dataclass(frozen=True)
+class Seat:
+    """Seat of hall."""
+
+    number: int
+    booked: bool
+
+
+class SeatMap:
+    """Read-only view of screening seats, one bit per seat, set bit means booked seat."""
+
+    def __init__(self, bitmap: bytes, capacity: int) -> None:
+        """Create seat map.
+
+        Args:
+            bitmap: seat bitmap
+            capacity: number of seats
+        """
+        self.bitmap = bytes(bitmap)
+        self.capacity = capacity
+
+    def __iter__(self) -> Iterator[Seat]:
+        """Iterate over seats.
+
+        Yields:
+            Seat: seat with its number and state
+        """
+        for number in range(1, self.capacity + 1):
+            yield Seat(number, self.is_booked(number))
+
+    def __str__(self) -> str:
+        return ''.join('1' if seat.booked else '0' for seat in self)
+
+    def is_valid(self, number: int) -> bool:
+        """Check that seat exists in hall.
+
+        Args:
+            number: seat number, starting from 1
+
+        Returns:
+            bool: True if seat exists
+        """
+        return 1 <= number <= self.capacity
+
+    def is_booked(self, number: int) -> bool:
+        """Check that seat is booked.
+
+        Args:
+            number: seat number, starting from 1
+
+        Returns:
+            bool: True if seat is booked
+        """
+        index, bit = divmod(number - 1, BITS_IN_BYTE)
+        return bool(index < len(self.bitmap) and self.bitmap[index] & (1 << bit))
+
+    def with_seat(self, number: int, booked: bool) -> bytes:
+        """Return bitmap with changed seat state.
+
+        Args:
+            number: seat number, starting from 1
+            booked: new state of seat
+
+        Returns:
+            bytes: changed bitmap
+        """
+        changed = bytearray(resize_bitmap(self.bitmap, self.capacity))
+        index, bit = divmod(number - 1, BITS_IN_BYTE)
+        if booked:
+            changed[index] |= 1 << bit
+        else:
+            changed[index] &= ~(1 << bit)
+        return bytes(changed)
+
+    @property
+    def booked_count(self) -> int:
+        """Return number of booked seats.
+
+        Returns:
+            int: booked seats
+        """
+        return sum(bin(byte).count('1') for byte in self.bitmap)
+
+    @property
+    def free_count(self) -> int:
+        """Return number of free seats.
+
+        Returns:
+            int: free seats
+        """
+        return self.capacity - self.booked_count
+
+
+def set_seat(screening_id, number: int, booked: bool) -> bool:
+    """Flip seat of screening under row lock.
+
+    Args:
+        screening_id: id of screening
+        number: seat number, starting from 1
+        booked: new state of seat
+
+    Returns:
+        bool: True if seat exists and had the opposite state
+    """
+    from .models import Screening
+
+    with transaction.atomic():
+        row = Screening.objects.select_for_update().filter(id=screening_id).values_list('seats', 'capacity').first()
+        if row is None:
+            return False
+        seat_map = SeatMap(*row)
+        if not seat_map.is_valid(number) or seat_map.is_booked(number) == booked:
+            return False
+        Screening.objects.filter(id=screening_id).update(
+            seats=seat_map.with_seat(number, booked), updated_at=timezone.now(),
+        )
+    return True
+
+
+def resize(screening_id, capacity: int) -> None:
+    """Resize bitmap of screening under row lock.
+
+    Args:
+        screening_id: id of screening
+        capacity: new number of seats
+    """
+    from .models import Screening
+
+    with transaction.atomic():
+        bitmap = Screening.objects.select_for_update().filter(id=screening_id).values_list('seats', flat=True).first()
+        if bitmap is None:
+            return
+        resized = resize_bitmap(bitmap, capacity)
+        if resized != bytes(bitmap):
+            Screening.objects.filter(id=screening_id).update(seats=resized, updated_at=timezone.now())
@@ -2,12 +2,19 @@
 
 
 from django.contrib.auth.models import User
+from django.db.models import Q
 from rest_framework.authtoken.models import Token
-from rest_framework.serializers import HyperlinkedModelSerializer
+from rest_framework.serializers import (
+    BooleanField, CharField, ChoiceField, DateField, DateTimeField, DecimalField, HyperlinkedModelSerializer,
+    IntegerField, ListField, Serializer, SerializerMethodField, UUIDField,
+)
 
-from .models import Address, Cinema, Film, FilmCinema, Ticket
+from . import transfer
+from .filters import QueryParamsSerializer
+from .models import Address, Cinema, Film, FilmCinema, ScheduleEntry, Screening, Ticket
 
 ALL = '__all__'
+MAX_HELD_TICKETS = 20
 
 
 class UserSerializer(HyperlinkedModelSerializer):
@@ -64,6 +71,96 @@ class TicketSerializer(HyperlinkedModelSerializer):
         fields = ALL
 
 
+class ScreeningSerializer(HyperlinkedModelSerializer):
+    """Serializer for the Screening model with its seat map."""
+
+    seat_map = SerializerMethodField()
+    free_seats = SerializerMethodField()
+
+    class Meta:
+        """Settings for screening serializer."""
+
+        model = Screening
+        fields = ('url', 'film_cinema', 'hall', 'start_time', 'capacity', 'seat_map', 'free_seats')
+
+    def get_seat_map(self, screening: Screening) -> str:
+        """Return seat map as string with one character per seat, 1 means booked seat.
+
+        Args:
+            screening: serialized screening
+
+        Returns:
+            str: seat map
+        """
+        return str(screening.seat_map)
+
+    def get_free_seats(self, screening: Screening) -> int:
+        """Return number of free seats.
+
+        Args:
+            screening: serialized screening
+
+        Returns:
+            int: free seats
+        """
+        return screening.seat_map.free_count
+
+
+class SeatSerializer(Serializer):
+    """Serializer for the seat which user books."""
+
+    seat = IntegerField(min_value=1)
+
+
+class TicketIdsSerializer(Serializer):
+    """Serializer for tickets which user holds or confirms."""
+
+    tickets = ListField(child=UUIDField(), min_length=1, max_length=MAX_HELD_TICKETS)
+
+
+class FilmFilterSerializer(QueryParamsSerializer):
+    """Serializer for query parameters which filter films."""
+
+    rating_min = DecimalField(max_digits=2, decimal_places=1, required=False)
+    rating_max = DecimalField(max_digits=2, decimal_places=1, required=False)
+    cinema = UUIDField(required=False)
+
+    lookups = {'rating_min': 'rating__gte', 'rating_max': 'rating__lte', 'cinema': 'cinemas'}
+
+
+class CinemaFilterSerializer(QueryParamsSerializer):
+    """Serializer for query parameters which filter cinemas."""
+
+    city = CharField(required=False)
+    film = UUIDField(required=False)
+
+    lookups = {'city': 'address__city_name', 'film': 'films'}
+
+
+class TicketFilterSerializer(QueryParamsSerializer):
+    """Serializer for query parameters which filter tickets, date_to is exclusive."""
+
+    date_from = DateTimeField(required=False)
+    date_to = DateTimeField(required=False)
+    film = UUIDField(required=False)
+    cinema = UUIDField(required=False)
+    booked = BooleanField(required=False, allow_null=True, default=None)
+
+    lookups = {
+        'date_from': 'film_date__gte',
+        'date_to': 'film_date__lt',
+        'film': 'film_cinema__film',
+        'cinema': 'film_cinema__cinema',
+        'booked': lambda booked: Q(user__isnull=not booked),
+    }
+
+
+class TicketExportSerializer(TicketFilterSerializer):
+    """Serializer for query parameters of ticket export."""
+
+    output = ChoiceField(choices=(transfer.NDJSON, transfer.CSV), default=transfer.NDJSON)
+
+
 class FilmCinemaSerializer(HyperlinkedModelSerializer):
     """Serializer for the FilmCinema model."""
 
@@ -82,3 +179,22 @@ class AddressSerializer(HyperlinkedModelSerializer):
 
         model = Address
         fields = ALL
+
+
+class ScheduleEntrySerializer(HyperlinkedModelSerializer):
+    """Serializer for the ScheduleEntry model."""
+
+    class Meta:
+        """Settings for schedule entry serializer."""
+
+        model = ScheduleEntry
+        fields = ALL
+
+
+class ScheduleFilterSerializer(QueryParamsSerializer):
+    """Serializer for query parameters of schedule, both of them are required to read one index range."""
+
+    city = CharField()
+    day = DateField()
+
+    lookups = {'city': 'city_name', 'day': 'day'}
@@ -0,0 +1,302 @@
+"""Module for signal receivers which evict cached pages, update the schedule and counters and publish ticket changes."""
+
+
+from django.db.models.signals import m2m_changed, post_delete, post_save, pre_save
+from django.dispatch import receiver
+
+from . import availability, live, page_cache, schedule
+from .models import Address, Cinema, Film, FilmCinema, Screening, Ticket
+
+
+def __pair_tags(pairs) -> set[str]:
+    tags = set()
+    for film_id, cinema_id in pairs:
+        tags.update((page_cache.film_tag(film_id), page_cache.cinema_tag(cinema_id)))
+    return tags
+
+
+def __film_cinema_tags(**lookup) -> set[str]:
+    return __pair_tags(FilmCinema.objects.filter(**lookup).values_list('film_id', 'cinema_id'))
+
+
+def get_film_tags(film_id) -> set[str]:
+    """Return tags of pages which show film: catalog, its page and pages of its cinemas.
+
+    Args:
+        film_id: id of film
+
+    Returns:
+        set[str]: tags
+    """
+    return {page_cache.FILMS_TAG, page_cache.film_tag(film_id), *__film_cinema_tags(film_id=film_id)}
+
+
+def get_cinema_tags(cinema_id) -> set[str]:
+    """Return tags of pages which show cinema: catalog, its page and pages of its films.
+
+    Args:
+        cinema_id: id of cinema
+
+    Returns:
+        set[str]: tags
+    """
+    return {page_cache.CINEMAS_TAG, page_cache.cinema_tag(cinema_id), *__film_cinema_tags(cinema_id=cinema_id)}
+
+
+def get_address_tags(address_id) -> set[str]:
+    """Return tags of pages which show address of cinemas.
+
+    Args:
+        address_id: id of address
+
+    Returns:
+        set[str]: tags
+    """
+    tags = {page_cache.CINEMAS_TAG, *__film_cinema_tags(cinema__address_id=address_id)}
+    tags.update(
+        page_cache.cinema_tag(cinema_id)
+        for cinema_id in Cinema.objects.filter(address_id=address_id).values_list('id', flat=True)
+    )
+    return tags
+
+
+def get_film_cinema_tags(film_cinema_id) -> set[str]:
+    """Return tags of pages which show tickets or screenings of film in cinema.
+
+    Args:
+        film_cinema_id: id of film in cinema
+
+    Returns:
+        set[str]: tags
+    """
+    return __film_cinema_tags(id=film_cinema_id)
+
+
+def get_rows_tags(model: type, ids: list) -> set[str]:
+    """Return tags of pages which show rows changed in bulk, which sends no signals.
+
+    Args:
+        model: model of rows
+        ids: ids of rows
+
+    Returns:
+        set[str]: tags
+    """
+    if model is Film:
+        return {page_cache.FILMS_TAG, *map(page_cache.film_tag, ids), *__film_cinema_tags(film_id__in=ids)}
+    if model is Cinema:
+        return {page_cache.CINEMAS_TAG, *map(page_cache.cinema_tag, ids), *__film_cinema_tags(cinema_id__in=ids)}
+    if model is Address:
+        cinema_ids = Cinema.objects.filter(address_id__in=ids).values_list('id', flat=True)
+        return {page_cache.CINEMAS_TAG, *map(page_cache.cinema_tag, cinema_ids), *__film_cinema_tags(
+            cinema__address_id__in=ids,
+        )}
+    if model is FilmCinema:
+        return __film_cinema_tags(id__in=ids)
+    return __film_cinema_tags(**{f'{model._meta.model_name}__id__in': ids})
+
+
+def evict_tickets(ticket_ids, state: str) -> None:
+    """Evict pages which show tickets changed by queryset update, which sends no signals, and publish their changes.
+
+    Args:
+        ticket_ids: ids of tickets
+        state: live state of tickets, "booked" or "free"
+    """
+    shows = list(Ticket.objects.filter(id__in=ticket_ids, film_cinema__isnull=False).values_list(
+        'id', 'film_cinema__film_id', 'film_cinema__cinema_id', 'screening_id', 'seat',
+    ))
+    page_cache.invalidate(__pair_tags((film_id, cinema_id) for _, film_id, cinema_id, _, _ in shows))
+    for ticket_id, film_id, cinema_id, screening_id, seat in shows:
+        live.publish(ticket_id, film_id, cinema_id, state, screening_id, seat)
+
+
+def evict_ticket(ticket_id, state: str) -> None:
+    """Evict pages which show ticket changed by queryset update, which sends no signals, and publish its change.
+
+    Args:
+        ticket_id: id of ticket
+        state: live state of ticket, "booked" or "free"
+    """
+    evict_tickets([ticket_id], state)
+
+
+@receiver((post_save, post_delete), sender=Film)
+def evict_film(sender, instance: Film, **kwargs) -> None:
+    """Evict pages of changed film.
+
+    Args:
+        sender: model class
+        instance: changed film
+        kwargs: signal arguments
+    """
+    page_cache.invalidate(get_film_tags(instance.id))
+
+
+@receiver((post_save, post_delete), sender=Cinema)
+def evict_cinema(sender, instance: Cinema, **kwargs) -> None:
+    """Evict pages of changed cinema.
+
+    Args:
+        sender: model class
+        instance: changed cinema
+        kwargs: signal arguments
+    """
+    page_cache.invalidate(get_cinema_tags(instance.id))
+
+
+@receiver((post_save, post_delete), sender=Address)
+def evict_address(sender, instance: Address, **kwargs) -> None:
+    """Evict pages of cinemas with changed address.
+
+    Args:
+        sender: model class
+        instance: changed address
+        kwargs: signal arguments
+    """
+    page_cache.invalidate(get_address_tags(instance.id))
+
+
+@receiver((post_save, post_delete), sender=FilmCinema)
+def evict_film_cinema(sender, instance: FilmCinema, **kwargs) -> None:
+    """Evict pages of film and cinema which were linked or unlinked.
+
+    Args:
+        sender: model class
+        instance: changed link
+        kwargs: signal arguments
+    """
+    page_cache.invalidate((page_cache.film_tag(instance.film_id), page_cache.cinema_tag(instance.cinema_id)))
+
+
+@receiver((post_save, post_delete), sender=Ticket)
+@receiver((post_save, post_delete), sender=Screening)
+def evict_show(sender, instance: Ticket | Screening, **kwargs) -> None:
+    """Evict pages which show changed ticket or screening and publish change of ticket.
+
+    Args:
+        sender: model class
+        instance: changed ticket or screening
+        kwargs: signal arguments
+    """
+    pairs = list(FilmCinema.objects.filter(id=instance.film_cinema_id).values_list('film_id', 'cinema_id'))
+    page_cache.invalidate(__pair_tags(pairs))
+    if sender is Ticket:
+        if kwargs['signal'] is post_delete:
+            state = live.DELETED
+        else:
+            state = live.FREE if instance.user_id is None else live.BOOKED
+        for film_id, cinema_id in pairs:
+            live.publish(instance.id, film_id, cinema_id, state, instance.screening_id, instance.seat)
+
+
+@receiver(m2m_changed, sender=FilmCinema)
+def evict_linked(sender, instance: Film | Cinema, action: str, pk_set: set | None, **kwargs) -> None:
+    """Evict pages of films and cinemas linked or unlinked through related managers.
+
+    Args:
+        sender: through model
+        instance: film or cinema whose manager was used
+        action: kind of change
+        pk_set: ids of linked rows, None for clear
+        kwargs: signal arguments
+    """
+    is_cinema = isinstance(instance, Cinema)
+    if action == 'pre_clear':
+        lookup = 'cinema_id' if is_cinema else 'film_id'
+        page_cache.invalidate(__film_cinema_tags(**{lookup: instance.id}))
+    elif action in {'post_add', 'post_remove'}:
+        own_tag, other_tag = (
+            (page_cache.cinema_tag, page_cache.film_tag) if is_cinema else (page_cache.film_tag, page_cache.cinema_tag)
+        )
+        page_cache.invalidate({own_tag(instance.id), *(other_tag(pk) for pk in pk_set)})
+
+
+@receiver(pre_save, sender=Ticket)
+def remember_show(sender, instance: Ticket, **kwargs) -> None:
+    """Remember film cinema, date and user of updated ticket, so its old schedule entry and counters are updated.
+
+    Args:
+        sender: model class
+        instance: saved ticket
+        kwargs: signal arguments
+    """
+    if not instance._state.adding:
+        previous = Ticket.objects.filter(id=instance.id).values_list('film_cinema_id', 'film_date', 'user_id').first()
+        if previous is not None:
+            film_cinema_id, film_date, user_id = previous
+            instance.previous_show = (film_cinema_id, film_date)
+            instance.previous_booking = (film_cinema_id, user_id)
+
+
+@receiver((post_save, post_delete), sender=Ticket)
+def update_schedule_show(sender, instance: Ticket, **kwargs) -> None:
+    """Recompute schedule entries of changed ticket.
+
+    Args:
+        sender: model class
+        instance: changed ticket
+        kwargs: signal arguments
+    """
+    schedule.refresh(((instance.film_cinema_id, instance.film_date), getattr(instance, 'previous_show', None)))
+
+
+@receiver(post_save, sender=Film)
+@receiver(post_save, sender=Cinema)
+@receiver(post_save, sender=Address)
+def update_schedule_names(sender, instance: Film | Cinema | Address, created: bool, **kwargs) -> None:
+    """Copy names of changed film, cinema or city to schedule entries.
+
+    Args:
+        sender: model class
+        instance: changed row
+        created: row was inserted, it has no entries yet
+        kwargs: signal arguments
+    """
+    if not created:
+        schedule.sync(sender, [instance.id])
+
+
+@receiver(post_save, sender=FilmCinema)
+def update_schedule_film_cinema(sender, instance: FilmCinema, created: bool, **kwargs) -> None:
+    """Rebuild schedule entries of film cinema linked to another film or cinema.
+
+    Args:
+        sender: model class
+        instance: changed link
+        created: link was inserted, it has no entries yet
+        kwargs: signal arguments
+    """
+    if not created:
+        schedule.sync(sender, [instance.id])
+
+
+@receiver(post_save, sender=Ticket)
+def count_ticket(sender, instance: Ticket, created: bool, **kwargs) -> None:
+    """Update counters of film cinema of created, moved, booked or cancelled ticket.
+
+    Args:
+        sender: model class
+        instance: changed ticket
+        created: ticket was inserted
+        kwargs: signal arguments
+    """
+    previous = None if created else getattr(instance, 'previous_booking', None)
+    current = (instance.film_cinema_id, instance.user_id)
+    if previous is not None:
+        if (previous[0], previous[1] is None) == (current[0], current[1] is None):
+            return
+        availability.add_ticket(*previous, sign=-1)
+    availability.add_ticket(*current)
+
+
+@receiver(post_delete, sender=Ticket)
+def uncount_ticket(sender, instance: Ticket, **kwargs) -> None:
+    """Remove deleted ticket from counters of its film cinema.
+
+    Args:
+        sender: model class
+        instance: deleted ticket
+        kwargs: signal arguments
+    """
+    availability.add_ticket(instance.film_cinema_id, instance.user_id, sign=-1)
@@ -4,9 +4,12 @@
 INDEX = 'index'
 FILMS = 'films'
 CINEMAS = 'cinemas'
+FILM_CARDS = 'film_cards'
+CINEMA_CARDS = 'cinema_cards'
 FILM_DETAILS = 'film_detail'
 CINEMA_DETAILS = 'cinema_detail'
 BOOKED_TICKETS = 'booked_tickets'
+SCHEDULE = 'schedule'
 PROFILE = 'profile'
 REGISTER = 'registration/register'
 LOGIN = 'registration/login'
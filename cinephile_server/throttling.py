@@ -0,0 +1,377 @@
+"""Module for token-bucket rate limits of booking, authentication and user endpoints.
+
+THROTTLE_BUCKETS gives every scope buckets per user, per client address and a global one as
+(capacity, tokens refilled per second). A bucket is stored as the time at which it is full again
+(generic cell rate algorithm, equivalent to a token bucket), so taking a token is one read and one
+write of a float per bucket. A request takes a token from every bucket of its scope or from none of them.
+TokenBucketThrottle limits DRF views by their throttle_scope, ThrottleMiddleware limits function views
+by url name from THROTTLE_VIEW_SCOPES. Only writes are limited, reads are served by caches. Both identify
+clients by get_client_ident, which trusts X-Forwarded-For only behind THROTTLE_PROXIES reverse proxies.
+
+The local store is atomic for threads of one process, so it suits single-node deployments. The cache
+store shares buckets between processes through THROTTLE_CACHE_ALIAS, concurrent requests of different
+processes may both take the last token of a bucket, which lets a burst exceed capacity slightly.
+"""
+
+
+from dataclasses import dataclass
+from math import ceil
+from threading import Lock
+from time import time
+from typing import Awaitable, Callable
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction, sync_to_async
+from django.conf import settings
+from django.contrib.auth import SESSION_KEY
+from django.core.cache import BaseCache, caches
+from django.core.handlers.wsgi import WSGIRequest
+from django.http import HttpResponse
+from django.urls import Resolver404, resolve
+from rest_framework.permissions import SAFE_METHODS
+from rest_framework.throttling import BaseThrottle
+
+KEY_PREFIX = 'throttle'
+USER = 'user'
+IP = 'ip'
+GLOBAL = 'global'
+LOCAL_STORE = 'local'
+CACHE_STORE = 'cache'
+MAX_LOCAL_BUCKETS = 100_000
+TOO_MANY_REQUESTS = 429
+THROTTLED = 'Too many requests, try again later'
+
+
+@dataclass(frozen=True)
+class Bucket:
+    """Token bucket of one scope and client."""
+
+    key: str
+    capacity: float
+    rate: float
+
+    @property
+    def interval(self) -> float:
+        """Return seconds in which one token is refilled.
+
+        Returns:
+            float: seconds per token
+        """
+        return 1 / self.rate
+
+
+def take_tokens(full_at: dict[str, float], buckets: list[Bucket], now: float) -> tuple[float, dict[str, float]]:
+    """Take a token from every bucket or from none of them.
+
+    Args:
+        full_at: stored times at which buckets are full again, missing buckets are full
+        buckets: buckets of request
+        now: current time in seconds
+
+    Returns:
+        tuple[float, dict[str, float]]: seconds until request is allowed (0 if it is) and new times
+            of buckets, which are empty for rejected request
+    """
+    retry_after = 0.0
+    updated = {}
+    for bucket in buckets:
+        bucket_full_at = max(full_at.get(bucket.key) or now, now) + bucket.interval
+        retry_after = max(retry_after, bucket_full_at - bucket.capacity * bucket.interval - now)
+        updated[bucket.key] = bucket_full_at
+    if retry_after > 0:
+        return retry_after, {}
+    return 0.0, updated
+
+
+class LocalBucketStore:
+    """Buckets of one process in a dict, a lock makes taking tokens atomic."""
+
+    def __init__(self) -> None:
+        """Create empty store."""
+        self.full_at: dict[str, float] = {}
+        self.lock = Lock()
+
+    def take(self, buckets: list[Bucket]) -> float:
+        """Take a token from every bucket.
+
+        Args:
+            buckets: buckets of request
+
+        Returns:
+            float: seconds until request is allowed, 0 if it is allowed
+        """
+        now = time()
+        with self.lock:
+            retry_after, updated = take_tokens(self.full_at, buckets, now)
+            self.full_at.update(updated)
+            if len(self.full_at) > MAX_LOCAL_BUCKETS:
+                self.full_at = {key: full_at for key, full_at in self.full_at.items() if full_at > now}
+        return retry_after
+
+    async def atake(self, buckets: list[Bucket]) -> float:
+        """Take a token from every bucket, it does no I/O, so it runs in the event loop.
+
+        Args:
+            buckets: buckets of request
+
+        Returns:
+            float: seconds until request is allowed, 0 if it is allowed
+        """
+        return self.take(buckets)
+
+    def clear(self) -> None:
+        """Fill all buckets."""
+        with self.lock:
+            self.full_at.clear()
+
+
+class CacheBucketStore:
+    """Buckets shared by processes through cache, a full bucket expires from cache."""
+
+    def __init__(self, cache: BaseCache) -> None:
+        """Create store.
+
+        Args:
+            cache: cache of buckets
+        """
+        self.cache = cache
+
+    def take(self, buckets: list[Bucket]) -> float:
+        """Take a token from every bucket with one read and one write of cache.
+
+        Args:
+            buckets: buckets of request
+
+        Returns:
+            float: seconds until request is allowed, 0 if it is allowed
+        """
+        now = time()
+        retry_after, updated = take_tokens(self.cache.get_many([bucket.key for bucket in buckets]), buckets, now)
+        if updated:
+            self.cache.set_many(updated, timeout=ceil(max(updated.values()) - now))
+        return retry_after
+
+    async def atake(self, buckets: list[Bucket]) -> float:
+        """Take a token from every bucket with async cache operations.
+
+        Args:
+            buckets: buckets of request
+
+        Returns:
+            float: seconds until request is allowed, 0 if it is allowed
+        """
+        now = time()
+        full_at = await self.cache.aget_many([bucket.key for bucket in buckets])
+        retry_after, updated = take_tokens(full_at, buckets, now)
+        if updated:
+            await self.cache.aset_many(updated, timeout=ceil(max(updated.values()) - now))
+        return retry_after
+
+
+__local_store = LocalBucketStore()
+
+
+def get_store() -> LocalBucketStore | CacheBucketStore:
+    """Return store of buckets selected by THROTTLE_STORE.
+
+    Returns:
+        LocalBucketStore | CacheBucketStore: store of buckets
+    """
+    if settings.THROTTLE_STORE == LOCAL_STORE:
+        return __local_store
+    return CacheBucketStore(caches[settings.THROTTLE_CACHE_ALIAS])
+
+
+def get_buckets(scope: str, user_id, ident: str | None) -> list[Bucket]:
+    """Return configured buckets of scope for client.
+
+    Args:
+        scope: key of THROTTLE_BUCKETS
+        user_id: id of user, None for anonymous user, who has no user bucket
+        ident: address of client
+
+    Returns:
+        list[Bucket]: buckets of request
+    """
+    idents = {USER: user_id, IP: ident, GLOBAL: GLOBAL}
+    return [
+        Bucket(f'{KEY_PREFIX}:{scope}:{kind}:{idents[kind]}', capacity, rate)
+        for kind, (capacity, rate) in settings.THROTTLE_BUCKETS[scope].items()
+        if idents.get(kind) is not None
+    ]
+
+
+def take(scope: str, user_id, ident: str | None) -> float:
+    """Take tokens of request from buckets of scope.
+
+    Args:
+        scope: key of THROTTLE_BUCKETS
+        user_id: id of user, None for anonymous user
+        ident: address of client
+
+    Returns:
+        float: seconds until request is allowed, 0 if it is allowed
+    """
+    return get_store().take(get_buckets(scope, user_id, ident))
+
+
+async def atake(scope: str, user_id, ident: str | None) -> float:
+    """Async variant of take.
+
+    Args:
+        scope: key of THROTTLE_BUCKETS
+        user_id: id of user, None for anonymous user
+        ident: address of client
+
+    Returns:
+        float: seconds until request is allowed, 0 if it is allowed
+    """
+    return await get_store().atake(get_buckets(scope, user_id, ident))
+
+
+def get_view_scope(request: WSGIRequest) -> str | None:
+    """Return scope of function view which is requested by a write.
+
+    Args:
+        request: django request
+
+    Returns:
+        str | None: scope or None if request is not limited
+    """
+    if not settings.THROTTLE_ENABLED or request.method in SAFE_METHODS:
+        return None
+    try:
+        view_name = resolve(request.path_info).view_name
+    except Resolver404:
+        return None
+    scope = settings.THROTTLE_VIEW_SCOPES.get(view_name)
+    return scope if scope in settings.THROTTLE_BUCKETS else None
+
+
+def get_client_ident(request) -> str | None:
+    """Return address of client of bucket per address.
+
+    Every reverse proxy appends address of its peer to X-Forwarded-For, so the address appended by the
+    outermost of THROTTLE_PROXIES proxies is the client, addresses before it may be sent by the client.
+    Without proxies the header is ignored and the address of the peer is used.
+
+    Args:
+        request: django or DRF request
+
+    Returns:
+        str | None: address of client
+    """
+    forwarded_for = request.META.get('HTTP_X_FORWARDED_FOR')
+    if not settings.THROTTLE_PROXIES or not forwarded_for:
+        return request.META.get('REMOTE_ADDR')
+    addresses = [address.strip() for address in forwarded_for.split(',')]
+    return addresses[-min(settings.THROTTLE_PROXIES, len(addresses))]
+
+
+def get_session_user_id(request: WSGIRequest):
+    """Return id of user logged in session, the session is loaded once and reused by authentication.
+
+    Args:
+        request: django request
+
+    Returns:
+        id of user or None for request without session
+    """
+    if settings.SESSION_COOKIE_NAME not in request.COOKIES:
+        return None
+    return request.session.get(SESSION_KEY)
+
+
+def too_many_requests(retry_after: float) -> HttpResponse:
+    """Return response of throttled request.
+
+    Args:
+        retry_after: seconds until request is allowed
+
+    Returns:
+        HttpResponse: 429 response with Retry-After header
+    """
+    response = HttpResponse(THROTTLED, status=TOO_MANY_REQUESTS)
+    response['Retry-After'] = str(ceil(retry_after))
+    return response
+
+
+class TokenBucketThrottle(BaseThrottle):
+    """DRF throttle which limits writes to views with throttle_scope from THROTTLE_BUCKETS."""
+
+    def __init__(self) -> None:
+        """Create throttle of one request."""
+        self.retry_after = None
+
+    def allow_request(self, request, view) -> bool:
+        """Take tokens of request.
+
+        Args:
+            request: DRF request
+            view: requested view
+
+        Returns:
+            bool: True if request is allowed
+        """
+        scope = getattr(view, 'throttle_scope', None)
+        if not settings.THROTTLE_ENABLED or request.method in SAFE_METHODS or scope not in settings.THROTTLE_BUCKETS:
+            return True
+        self.retry_after = take(scope, request.user.pk, get_client_ident(request))
+        return not self.retry_after
+
+    def wait(self) -> float | None:
+        """Return seconds until request is allowed, DRF sends them in Retry-After header.
+
+        Returns:
+            float | None: seconds to wait
+        """
+        return self.retry_after
+
+
+class ThrottleMiddleware:
+    """Middleware which limits writes to function views by THROTTLE_VIEW_SCOPES, it must follow SessionMiddleware.
+
+    It supports both handlers, so ASGI requests reach async views without a thread per request.
+    """
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response: Callable) -> None:
+        """Create middleware.
+
+        Args:
+            get_response: next handler
+        """
+        self.get_response = get_response
+        self.is_async = iscoroutinefunction(get_response)
+        if self.is_async:
+            markcoroutinefunction(self)
+
+    def __call__(self, request: WSGIRequest) -> HttpResponse | Awaitable[HttpResponse]:
+        """Reject request to limited view if its buckets are empty.
+
+        Args:
+            request: django request
+
+        Returns:
+            HttpResponse | Awaitable[HttpResponse]: response of view or 429, awaitable under async handler
+        """
+        if self.is_async:
+            return self.__acall(request)
+        scope = get_view_scope(request)
+        if scope is None:
+            return self.get_response(request)
+        retry_after = take(scope, get_session_user_id(request), get_client_ident(request))
+        if retry_after:
+            return too_many_requests(retry_after)
+        return self.get_response(request)
+
+    async def __acall(self, request: WSGIRequest) -> HttpResponse:
+        scope = get_view_scope(request)
+        if scope is None:
+            return await self.get_response(request)
+        user_id = await sync_to_async(get_session_user_id)(request)
+        retry_after = await atake(scope, user_id, get_client_ident(request))
+        if retry_after:
+            return too_many_requests(retry_after)
+        return await self.get_response(request)
@@ -0,0 +1,152 @@
+"""Module for signed expiring bearer tokens which are verified without database access."""
+
+
+from dataclasses import dataclass
+from secrets import token_hex
+from threading import Lock
+from time import time
+
+from django.conf import settings
+from django.core import signing
+
+SALT = 'cinephile_server.tokens'
+SEPARATOR = ':'
+TOKEN_ID_BYTES = 8
+EXPIRED_MESSAGE = 'Token has expired'
+INVALID_MESSAGE = 'Invalid token'
+REVOKED_MESSAGE = 'Token has been revoked'
+
+__revoked: dict[str, float] = {}
+__revoked_lock = Lock()
+
+
+class TokenError(Exception):
+    """Signed token is invalid, expired or revoked."""
+
+
+@dataclass(frozen=True)
+class TokenUser:
+    """User restored from signed token, it is never loaded from database."""
+
+    id: int
+    is_superuser: bool
+    is_active = True
+    is_authenticated = True
+    is_anonymous = False
+
+    def __str__(self) -> str:
+        return f'user {self.id}'
+
+    @property
+    def pk(self) -> int:
+        """Return primary key of user.
+
+        Returns:
+            int: user id
+        """
+        return self.id
+
+    @property
+    def is_staff(self) -> bool:
+        """Return staff flag, only superusers get staff rights from token.
+
+        Returns:
+            bool: True for superuser
+        """
+        return self.is_superuser
+
+
+@dataclass(frozen=True)
+class SignedToken:
+    """Issued token with its id and expiration time."""
+
+    token: str
+    token_id: str
+    expires_at: float
+
+
+def get_max_age() -> int:
+    """Return lifetime of token in seconds.
+
+    Returns:
+        int: token lifetime
+    """
+    return settings.SIGNED_TOKEN_MAX_AGE
+
+
+def looks_signed(token: str) -> bool:
+    """Check that token has format of signed token, database tokens are plain hex strings.
+
+    Args:
+        token: bearer token
+
+    Returns:
+        bool: True if token may be signed token
+    """
+    return SEPARATOR in token
+
+
+def issue(user) -> SignedToken:
+    """Issue signed token with user id and superuser flag.
+
+    Args:
+        user: user who gets token
+
+    Returns:
+        SignedToken: issued token
+    """
+    token_id = token_hex(TOKEN_ID_BYTES)
+    token = signing.dumps([user.pk, bool(user.is_superuser), token_id], salt=SALT)
+    return SignedToken(token, token_id, time() + get_max_age())
+
+
+def __prune_revoked(now: float) -> None:
+    for token_id in [token_id for token_id, expires_at in __revoked.items() if expires_at <= now]:
+        __revoked.pop(token_id)
+
+
+def revoke(token_id: str) -> None:
+    """Revoke token in memory of this process for the longest token lifetime.
+
+    Args:
+        token_id: id of token
+    """
+    now = time()
+    with __revoked_lock:
+        __prune_revoked(now)
+        __revoked[token_id] = now + get_max_age()
+
+
+def is_revoked(token_id: str) -> bool:
+    """Check that token was revoked.
+
+    Args:
+        token_id: id of token
+
+    Returns:
+        bool: True if token is revoked
+    """
+    return token_id in __revoked
+
+
+def read(token: str) -> tuple[TokenUser, str]:
+    """Verify token signature, age and revocation without database access.
+
+    Args:
+        token: bearer token
+
+    Raises:
+        TokenError: token is invalid, expired or revoked
+
+    Returns:
+        tuple[TokenUser, str]: user and token id
+    """
+    try:
+        user_id, is_superuser, token_id = signing.loads(token, salt=SALT, max_age=get_max_age())
+    except signing.SignatureExpired:
+        raise TokenError(EXPIRED_MESSAGE)
+    except (signing.BadSignature, TypeError, ValueError):
+        raise TokenError(INVALID_MESSAGE)
+    if is_revoked(token_id):
+        raise TokenError(REVOKED_MESSAGE)
+    return TokenUser(user_id, is_superuser), token_id
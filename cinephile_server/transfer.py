@@ -0,0 +1,449 @@
+"""Module for streaming import and export of catalog rows as CSV and NDJSON.
+
+Rows are read and written one by one, so memory depends on batch size only. Imported batches are
+validated column by column with validators of model fields once per distinct value, rows which
+reference missing objects are rejected with one query per foreign key and batch, and valid rows
+are upserted by id.
+"""
+
+
+import csv
+import json
+from collections import defaultdict
+from dataclasses import dataclass, field
+from datetime import date, datetime
+from decimal import Decimal
+from itertools import islice
+from time import perf_counter
+from typing import Any, Callable, Iterable, Iterator, TextIO
+from uuid import UUID, uuid4
+
+from django.core.exceptions import ValidationError
+from django.db import IntegrityError, models, transaction
+
+from . import availability, booking, images, page_cache, schedule, signals
+from .models import Address, Cinema, Film, FilmCinema, Ticket
+
+CSV = 'csv'
+NDJSON = 'ndjson'
+FORMATS = {'.csv': CSV, '.ndjson': NDJSON, '.jsonl': NDJSON}
+MODELS = {'address': Address, 'cinema': Cinema, 'film': Film, 'film_cinema': FilmCinema, 'ticket': Ticket}
+DEFAULT_BATCH_SIZE = 1000
+DEFAULT_CHUNK_SIZE = 2000
+CONTENT_TYPES = {CSV: 'text/csv; charset=utf-8', NDJSON: 'application/x-ndjson'}
+PARSE_ERROR = '__error__'
+SET_ON_IMPORT = ('updated_at',)
+
+
+@dataclass
+class ImportResult:
+    """Numbers of imported rows."""
+
+    read: int = 0
+    imported: int = 0
+    rejected: int = 0
+    skipped: int = 0
+    seconds: float = 0
+
+    @property
+    def rows_per_second(self) -> float:
+        """Return throughput of import.
+
+        Returns:
+            float: read rows per second
+        """
+        return self.read / self.seconds if self.seconds else 0
+
+
+@dataclass
+class Rejection:
+    """Row which was not imported."""
+
+    row: int
+    errors: list[str]
+    values: dict = field(default_factory=dict)
+
+
+def get_format(path: str) -> str | None:
+    """Return format of file by its extension.
+
+    Args:
+        path: file path
+
+    Returns:
+        str | None: "csv", "ndjson" or None for unknown extension
+    """
+    for extension, file_format in FORMATS.items():
+        if path.lower().endswith(extension):
+            return file_format
+    return None
+
+
+def get_fields(model: type[models.Model]) -> list[models.Field]:
+    """Return exported fields of model, counters of availability and holds of tickets are not transferred.
+
+    Args:
+        model: model of rows
+
+    Returns:
+        list[models.Field]: concrete fields
+    """
+    skipped = {*availability.COUNTERS, *booking.HOLD_FIELDS}
+    return [model_field for model_field in model._meta.concrete_fields if model_field.name not in skipped]
+
+
+def encode(field_value: Any) -> Any:
+    """Return json compatible value.
+
+    Args:
+        field_value: value of field
+
+    Returns:
+        Any: string, number or None
+    """
+    if isinstance(field_value, (datetime, date)):
+        return field_value.isoformat()
+    if isinstance(field_value, (UUID, Decimal)):
+        return str(field_value)
+    return field_value
+
+
+def encode_row(instance: models.Model) -> dict:
+    """Return exported values of instance.
+
+    Args:
+        instance: model instance
+
+    Returns:
+        dict: json compatible values by attribute name
+    """
+    return {
+        model_field.attname: encode(getattr(instance, model_field.attname))
+        for model_field in get_fields(type(instance))
+    }
+
+
+class LineBuffer:
+    """File-like object whose write returns the written line, so csv writer formats single rows."""
+
+    def write(self, line: str) -> str:
+        """Return line instead of writing it.
+
+        Args:
+            line: formatted csv row
+
+        Returns:
+            str: the same line
+        """
+        return line
+
+
+def iter_export(queryset: models.QuerySet, file_format: str, chunk_size: int = DEFAULT_CHUNK_SIZE) -> Iterator[str]:
+    """Yield exported lines of rows ordered by id, csv starts with header line.
+
+    Rows are fetched in chunks with a server-side cursor where the database supports it.
+
+    Args:
+        queryset: exported rows
+        file_format: "csv" or "ndjson"
+        chunk_size: number of rows fetched from database at once
+
+    Yields:
+        str: line with newline
+    """
+    names = [model_field.attname for model_field in get_fields(queryset.model)]
+    rows = queryset.order_by('pk').values_list(*names).iterator(chunk_size=chunk_size)
+    if file_format == CSV:
+        writer = csv.writer(LineBuffer())
+        yield writer.writerow(names)
+        for row in rows:
+            yield writer.writerow(['' if row_value is None else encode(row_value) for row_value in row])
+        return
+    for row in rows:
+        yield f'{json.dumps(dict(zip(names, map(encode, row))))}\n'
+
+
+def export_rows(model: type[models.Model], stream: TextIO, file_format: str, chunk_size: int) -> int:
+    """Write all rows of model ordered by id.
+
+    Args:
+        model: model of rows
+        stream: output text stream
+        file_format: "csv" or "ndjson"
+        chunk_size: number of rows fetched from database at once
+
+    Returns:
+        int: number of written rows
+    """
+    lines = 0
+    for line in iter_export(model.objects.all(), file_format, chunk_size):
+        stream.write(line)
+        lines += 1
+    return lines - 1 if file_format == CSV else lines
+
+
+def read_rows(stream: TextIO, file_format: str) -> Iterator[dict]:
+    """Read rows one by one, a row which is not valid json contains only PARSE_ERROR.
+
+    Args:
+        stream: input text stream
+        file_format: "csv" or "ndjson"
+
+    Yields:
+        dict: values by column name
+    """
+    if file_format == CSV:
+        yield from csv.DictReader(stream)
+        return
+    for line in stream:
+        if not line.strip():
+            continue
+        try:
+            row = json.loads(line)
+        except ValueError as error:
+            yield {PARSE_ERROR: f'invalid json: {error}'}
+            continue
+        yield row if isinstance(row, dict) else {PARSE_ERROR: 'row is not an object'}
+
+
+class Importer:
+    """Importer of rows of one model in validated batches."""
+
+    def __init__(self, model: type[models.Model], batch_size: int = DEFAULT_BATCH_SIZE) -> None:
+        """Create importer.
+
+        Args:
+            model: model of rows
+            batch_size: number of rows validated and saved at once
+        """
+        self.model = model
+        self.batch_size = batch_size
+        fields = get_fields(model)
+        self.columns = {model_field.attname: model_field for model_field in fields}
+        self.columns.update({model_field.name: model_field for model_field in fields})
+        self.required = [
+            model_field for model_field in fields
+            if not model_field.null and not model_field.has_default() and not model_field.primary_key
+            and model_field.attname not in SET_ON_IMPORT
+        ]
+        self.validated = [model_field for model_field in fields if model_field.validators]
+        self.foreign_keys = [model_field for model_field in fields if model_field.is_relation]
+        self.update_fields = [model_field.name for model_field in fields if not model_field.primary_key]
+
+    def convert_column(self, column: str, raw_value: Any) -> tuple[str | None, Any, list[str]]:
+        """Convert raw string of one column to python value.
+
+        Args:
+            column: column name
+            raw_value: raw value
+
+        Returns:
+            tuple[str | None, Any, list[str]]: attribute name or None if column is not set, value and errors
+        """
+        model_field = self.columns.get(column)
+        if model_field is None:
+            return None, None, [f'{column}: unknown column']
+        if model_field.attname in SET_ON_IMPORT:
+            return None, None, []
+        if raw_value in ('', None):
+            return model_field.attname, None, []
+        try:
+            return model_field.attname, model_field.to_python(raw_value), []
+        except ValidationError as error:
+            return None, None, [f'{model_field.name}: {message}' for message in error.messages]
+
+    def convert(self, raw: dict) -> tuple[dict, list[str]]:
+        """Convert raw strings of row to python values.
+
+        Args:
+            raw: values by column name
+
+        Returns:
+            tuple[dict, list[str]]: values by attribute name and errors
+        """
+        if PARSE_ERROR in raw:
+            return {}, [raw[PARSE_ERROR]]
+        row_values = {}
+        errors = []
+        for column, raw_value in raw.items():
+            attname, field_value, column_errors = self.convert_column(column, raw_value)
+            errors.extend(column_errors)
+            if attname is not None:
+                row_values[attname] = field_value
+        errors.extend(
+            f'{model_field.name}: value is required' for model_field in self.required
+            if row_values.get(model_field.attname) is None
+        )
+        if row_values.get('id') is None:
+            row_values['id'] = uuid4()
+        return row_values, errors
+
+    def run_validators(self, rows: list[dict], errors: list[list[str]]) -> None:
+        """Run field validators column by column once per distinct value of rows without errors.
+
+        Columns of a batch repeat few values (ratings, cities, posters), so validators of a column
+        run a handful of times per batch instead of once per row.
+
+        Args:
+            rows: converted rows
+            errors: errors of rows, new errors are appended
+        """
+        for model_field in self.validated:
+            errors_by_value = defaultdict(list)
+            for row_values, row_errors in zip(rows, errors):
+                field_value = row_values.get(model_field.attname)
+                if not row_errors and field_value is not None:
+                    errors_by_value[field_value].append(row_errors)
+            for field_value, value_errors in errors_by_value.items():
+                try:
+                    model_field.run_validators(field_value)
+                except ValidationError as error:
+                    messages = [f'{model_field.name}: {message}' for message in error.messages]
+                    for row_errors in value_errors:
+                        row_errors.extend(messages)
+
+    def check_references(self, rows: list[dict], errors: list[list[str]]) -> None:
+        """Check that referenced objects exist with one query per foreign key.
+
+        Args:
+            rows: converted rows
+            errors: errors of rows, new errors are appended
+        """
+        for model_field in self.foreign_keys:
+            referenced = {
+                row_values[model_field.attname] for row_values, row_errors in zip(rows, errors)
+                if not row_errors and row_values.get(model_field.attname) is not None
+            }
+            existing = set(
+                model_field.related_model.objects.filter(pk__in=referenced).values_list('pk', flat=True),
+            )
+            for row_values, row_errors in zip(rows, errors):
+                if row_values.get(model_field.attname) in referenced - existing:
+                    row_errors.append(f'{model_field.name}: object does not exist')
+
+    def validate(self, rows: list[dict], errors: list[list[str]]) -> None:
+        """Run field validators column by column and check that referenced objects exist.
+
+        Args:
+            rows: converted rows
+            errors: errors of rows, new errors are appended
+        """
+        self.run_validators(rows, errors)
+        self.check_references(rows, errors)
+
+    def build(self, row_values: dict) -> models.Model:
+        """Build model instance, inline images are moved to the image store here because bulk upsert skips save.
+
+        Inline images were validated by the url_image validator, the store writes every distinct image once.
+
+        Args:
+            row_values: converted row
+
+        Returns:
+            models.Model: unsaved instance
+        """
+        instance = self.model(**row_values)
+        inline_image = images.parse_data_uri(getattr(instance, 'url_image', None))
+        if inline_image is not None:
+            instance.poster, _ = images.store(*inline_image)
+            instance.url_image = None
+        return instance
+
+    def upsert(self, instances: list[models.Model]) -> None:
+        """Insert instances or update rows with the same ids, evict pages and sync schedule entries and counters.
+
+        Args:
+            instances: built instances
+        """
+        ids = [instance.id for instance in instances]
+        with transaction.atomic():
+            film_cinema_ids = schedule.get_film_cinema_ids(self.model, ids)
+            self.model.objects.bulk_create(
+                instances, update_conflicts=True, unique_fields=['id'], update_fields=self.update_fields,
+            )
+            schedule.sync(self.model, ids, film_cinema_ids)
+            availability.sync(self.model, ids, film_cinema_ids)
+            page_cache.invalidate(signals.get_rows_tags(self.model, ids))
+
+    def save(self, rows: list[dict], first_row: int) -> tuple[int, list[Rejection]]:
+        """Save valid rows of batch, the batch is retried row by row if it breaks a constraint.
+
+        Args:
+            rows: converted rows
+            first_row: number of the first row of batch
+
+        Returns:
+            tuple[int, list[Rejection]]: number of saved rows and rejected rows
+        """
+        instances = [self.build(row_values) for row_values in rows]
+        if not instances:
+            return 0, []
+        try:
+            self.upsert(instances)
+        except IntegrityError:
+            saved = 0
+            rejections = []
+            for number, instance in enumerate(instances, start=first_row):
+                try:
+                    self.upsert([instance])
+                except IntegrityError as error:
+                    rejections.append(Rejection(number, [str(error).strip()]))
+                else:
+                    saved += 1
+            return saved, rejections
+        return len(instances), []
+
+    def import_batch(self, raw_rows: list[dict], first_row: int) -> tuple[int, list[Rejection]]:
+        """Convert, validate and save batch.
+
+        Args:
+            raw_rows: rows as read from file
+            first_row: number of the first row of batch
+
+        Returns:
+            tuple[int, list[Rejection]]: number of saved rows and rejected rows
+        """
+        converted = [self.convert(raw) for raw in raw_rows]
+        rows = [row_values for row_values, _ in converted]
+        errors = [row_errors for _, row_errors in converted]
+        self.validate(rows, errors)
+        rejections = [
+            Rejection(number, row_errors, raw)
+            for number, (raw, row_errors) in enumerate(zip(raw_rows, errors), start=first_row) if row_errors
+        ]
+        valid = [row_values for row_values, row_errors in zip(rows, errors) if not row_errors]
+        saved, failed = self.save(valid, first_row)
+        return saved, rejections + failed
+
+    def run(
+        self, raw_rows: Iterable[dict], skip: int = 0,
+        on_batch: Callable[[int, list[Rejection]], None] | None = None,
+    ) -> ImportResult:
+        """Import rows in batches.
+
+        Args:
+            raw_rows: rows as read from file
+            skip: number of rows imported by previous run
+            on_batch: called with number of processed rows and rejections after every saved batch
+
+        Returns:
+            ImportResult: numbers of rows
+        """
+        start = perf_counter()
+        result = ImportResult(skipped=skip)
+        iterator = iter(raw_rows)
+        for _ in islice(iterator, skip):
+            continue
+        processed = skip
+        batch = list(islice(iterator, self.batch_size))
+        while batch:
+            saved, rejections = self.import_batch(batch, processed + 1)
+            processed += len(batch)
+            result.read += len(batch)
+            result.imported += saved
+            result.rejected += len(rejections)
+            if on_batch is not None:
+                on_batch(processed, rejections)
+            batch = list(islice(iterator, self.batch_size))
+        result.seconds = perf_counter() - start
+        return result
@@ -5,8 +5,12 @@ from django.contrib.auth import views as auth_views
 from django.urls import include, path
 from rest_framework.routers import DefaultRouter
 
+import cinephile_server.views.images as image
+import cinephile_server.views.live as live
+import cinephile_server.views.metrics as metric
 import cinephile_server.views.pages as page
 import cinephile_server.views.queries as query
+import cinephile_server.views.tokens as token
 import cinephile_server.views.viewsets as viewset
 
 router = DefaultRouter()
@@ -14,22 +18,34 @@ router.register(r'cinema', viewset.CinemaViewSet, 'cinema')
 router.register(r'film', viewset.FilmViewSet, 'film')
 router.register(r'film_cinema', viewset.FilmCinemaViewSet, 'filmcinema')
 router.register(r'ticket', viewset.TicketViewSet, 'ticket')
+router.register(r'screening', viewset.ScreeningViewSet, 'screening')
 router.register(r'address', viewset.AddressViewSet, 'address')
 router.register(r'user', viewset.UserViewSet, 'user')
+router.register(r'schedule', viewset.ScheduleViewSet, 'scheduleentry')
 
 urlpatterns = [
     path('rest/', include(router.urls)),
-    path('', page.main_page),
+    path('api-signed-token-auth/', token.SignedTokenView.as_view(), name='signed_token'),
+    path('api-signed-token-revoke/', token.RevokeSignedTokenView.as_view(), name='revoke_signed_token'),
+    path('', page.main_page, name='home'),
     path('accounts/', include('django.contrib.auth.urls')),
     path('accounts/profile/', page.profile_page, name='profile'),
     path('accounts/register/', page.register_page, name='register'),
-    path('films/', page.films_page),
-    path('cinemas/', page.cinemas_page),
+    path('films/', page.films_page, name='films'),
+    path('films/more/', page.films_fragment, name='films_more'),
+    path('cinemas/', page.cinemas_page, name='cinemas'),
+    path('cinemas/more/', page.cinemas_fragment, name='cinemas_more'),
     path('films/<uuid:pk>/', page.film_detail_page, name='film'),
     path('cinemas/<uuid:pk>/', page.cinema_detail_page, name='cinema'),
+    path('films/<uuid:pk>/live', live.film_live, name='film_live'),
+    path('cinemas/<uuid:pk>/live', live.cinema_live, name='cinema_live'),
     path('book_tickets/', query.book_ticket, name='book_ticket'),
     path('cancel_ticket/', query.cancel_ticket, name='cancel_ticket'),
+    path('book_seat/', query.book_seat, name='book_seat'),
     path('tickets/', page.booked_tickets_page, name='tickets'),
+    path('schedule/', page.schedule_page, name='schedule'),
+    path('posters/<str:size>/<str:reference>', image.poster, name='poster'),
+    path('metrics', metric.MetricsView.as_view(), name='metrics'),
     path('login/', auth_views.LoginView.as_view(), name='login'),
     path('logout/', auth_views.LogoutView.as_view(next_page='home'), name='logout'),
 ]
@@ -0,0 +1,48 @@
+"""Module for serving stored posters."""
+
+
+from django.core.handlers.wsgi import WSGIRequest
+from django.http import FileResponse, Http404
+from django.utils.cache import patch_cache_control
+from django.views.decorators.http import etag, require_safe
+
+from cinephile_server import images
+
+IMMUTABLE_MAX_AGE = 365 * 24 * 60 * 60
+PENDING_THUMBNAIL_MAX_AGE = 60
+
+
+def __poster_etag(request: WSGIRequest, size: str, reference: str) -> str | None:
+    path = images.get_image_path(reference, size)
+    return None if path is None else path.name
+
+
+@require_safe
+@etag(__poster_etag)
+def poster(request: WSGIRequest, size: str, reference: str) -> FileResponse:
+    """Return stored poster or its thumbnail with long-lived cache headers.
+
+    Posters are addressed by hash of their content, so a url never changes its content and
+    browsers may cache it forever. While a thumbnail is not generated yet the original image
+    is returned with a short cache lifetime.
+
+    Args:
+        request (WSGIRequest): django request
+        size (str): "original" or thumbnail size
+        reference (str): poster reference
+
+    Raises:
+        Http404: poster does not exist
+
+    Returns:
+        FileResponse: image
+    """
+    path = images.get_image_path(reference, size)
+    if path is None:
+        raise Http404('Poster does not exist')
+    response = FileResponse(path.open('rb'), content_type=images.get_content_type(path))
+    if size != images.ORIGINAL and path == images.get_path(reference):
+        patch_cache_control(response, public=True, max_age=PENDING_THUMBNAIL_MAX_AGE)
+    else:
+        patch_cache_control(response, public=True, max_age=IMMUTABLE_MAX_AGE, immutable=True)
+    return response
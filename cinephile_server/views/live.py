@@ -0,0 +1,66 @@
+"""Module for Server-Sent Events streams of live ticket changes of films and cinemas."""
+
+
+from uuid import UUID
+
+from django.conf import settings
+from django.core.handlers.wsgi import WSGIRequest
+from django.http import Http404, StreamingHttpResponse
+from django.views.decorators.http import require_safe
+
+from cinephile_server import live
+from cinephile_server.models import Cinema, Film
+
+
+def __get_last_event_id(request: WSGIRequest) -> int | None:
+    try:
+        return int(request.headers['Last-Event-ID'])
+    except (KeyError, ValueError):
+        return None
+
+
+async def __astream_response(request: WSGIRequest, model: type[Film | Cinema], kind: str, pk: UUID):
+    if not settings.LIVE_UPDATES_ENABLED:
+        raise Http404('Live updates are disabled')
+    if not await model.objects.filter(id=pk).aexists():
+        raise Http404(f'{model.__name__} does not exist')
+    response = StreamingHttpResponse(
+        live.stream(kind, pk, __get_last_event_id(request)), content_type=live.CONTENT_TYPE,
+    )
+    response['Cache-Control'] = 'no-cache'
+    response['X-Accel-Buffering'] = 'no'
+    return response
+
+
+@require_safe
+async def film_live(request: WSGIRequest, pk: UUID) -> StreamingHttpResponse:
+    """Return stream of booked, cancelled and deleted tickets of film.
+
+    Args:
+        request (WSGIRequest): django request with optional Last-Event-ID header
+        pk (UUID): film id
+
+    Raises:
+        Http404: film does not exist or live updates are disabled
+
+    Returns:
+        StreamingHttpResponse: event stream
+    """
+    return await __astream_response(request, Film, live.FILM, pk)
+
+
+@require_safe
+async def cinema_live(request: WSGIRequest, pk: UUID) -> StreamingHttpResponse:
+    """Return stream of booked, cancelled and deleted tickets of cinema.
+
+    Args:
+        request (WSGIRequest): django request with optional Last-Event-ID header
+        pk (UUID): cinema id
+
+    Raises:
+        Http404: cinema does not exist or live updates are disabled
+
+    Returns:
+        StreamingHttpResponse: event stream
+    """
+    return await __astream_response(request, Cinema, live.CINEMA, pk)
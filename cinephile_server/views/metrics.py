@@ -0,0 +1,24 @@
+"""Module for endpoint with request metrics."""
+
+
+from django.http import HttpResponse
+from rest_framework.request import Request
+from rest_framework.views import APIView
+
+from cinephile_server import metrics
+from cinephile_server.auth import LoginAdminRequired
+
+
+class MetricsView(LoginAdminRequired, APIView):
+    """Metrics of all processes in Prometheus text format, scrapers use a superuser token."""
+
+    def get(self, request: Request) -> HttpResponse:
+        """Return metrics.
+
+        Args:
+            request: request of superuser
+
+        Returns:
+            HttpResponse: metrics text
+        """
+        return HttpResponse(metrics.render(metrics.collect()), content_type=metrics.CONTENT_TYPE)
@@ -3,43 +3,152 @@
 
 from uuid import UUID
 
-from django.contrib.auth.models import User
+from django.conf import settings
+from django.contrib.auth.models import AnonymousUser, User
 from django.core.handlers.wsgi import WSGIRequest
-from django.db.models import Prefetch
+from django.db.models import Prefetch, QuerySet
+from django.http import Http404
 from django.shortcuts import HttpResponse, redirect, render
+from rest_framework.exceptions import NotFound
 
 import cinephile_server.template_names as template
-from cinephile_server.forms import RegistrationForm
-from cinephile_server.models import Cinema, Film, Ticket
+from cinephile_server import availability, metrics, page_cache, schedule, search
+from cinephile_server.conditional import Validators, aget_page_state, aget_row_state, conditional, make_validators
+from cinephile_server.forms import RegistrationForm, ScheduleForm
+from cinephile_server.models import Cinema, Film, Screening, Ticket
+from cinephile_server.pagination import KeysetPage, apaginate_keyset, keyset_queryset
+
+FILM_CINEMA_LOOKUPS = {
+    Film: 'film_cinema__film_id',
+    Cinema: 'film_cinema__cinema_id',
+}
+CATALOG_PAGE_SIZE = 24
+CATALOG_ORDERING = ('name', 'id')
+SCHEDULE_PAGE_SIZE = 50
+FILM_CARD_FIELDS = ('id', 'name', 'description', 'url_image', 'poster')
+CINEMA_CARD_FIELDS = (
+    'id', 'name', 'url_image', 'poster', 'address__city_name', 'address__street_name', 'address__house_number',
+)
+DETAIL_RELATIONS = {
+    Film: ('filmcinema', 'filmcinema__cinema', 'filmcinema__cinema__address'),
+    Cinema: ('address', 'filmcinema', 'filmcinema__film'),
+}
+
+
+async def __aget_user(request: WSGIRequest) -> User | AnonymousUser:
+    request.user = await request.auser()
+    return request.user
 
 
 def __generate_html_page(request, template_name, context=None, extension='html') -> HttpResponse:
     if context is None:
         context = {}
-    return render(request, f'{template_name}.{extension}', context)
+    if page_cache.is_shared(request):
+        context = {**context, 'csrf_token': page_cache.CSRF_PLACEHOLDER}
+    with metrics.template_timer():
+        return render(request, f'{template_name}.{extension}', context)
 
 
-def __get_tickets_by_film_cinema(model: Film | Cinema) -> list[Ticket]:
-    film_cinemas = model.filmcinema_set.all()
-    all_tickets = Ticket.objects.prefetch_related(
-        Prefetch('film_cinema', queryset=film_cinemas, to_attr='film_cinemas'),
-    )
-    tickets = []
-    for ticket in all_tickets:
-        ids = (ticket.film_cinema.film.id, ticket.film_cinema.cinema.id)
-        if model.id in ids:
-            tickets.append(ticket)
-    return tickets
+def __get_tickets_by_film_cinema(model: type[Film | Cinema], pk) -> QuerySet[Ticket]:
+    lookup = FILM_CINEMA_LOOKUPS[model]
+    return Ticket.objects.filter(screening__isnull=True, **{lookup: pk}).select_related(
+        'film_cinema__film', 'film_cinema__cinema',
+    ).order_by('film_date', 'id')
+
+
+def __get_screenings(model: type[Film | Cinema], pk) -> QuerySet[Screening]:
+    lookup = FILM_CINEMA_LOOKUPS[model]
+    return Screening.objects.filter(**{lookup: pk}).select_related(
+        'film_cinema__film', 'film_cinema__cinema',
+    ).order_by('start_time', 'id')
+
+
+def __search_catalog(queryset: QuerySet, query: str) -> tuple[QuerySet, tuple]:
+    if query:
+        return search.search(queryset, query), search.SEARCH_ORDERING
+    return queryset, CATALOG_ORDERING
+
+
+async def __aget_catalog_page(request: WSGIRequest, queryset: QuerySet, query: str) -> KeysetPage:
+    queryset, ordering = __search_catalog(queryset, query)
+    try:
+        return await apaginate_keyset(queryset, ordering, request.GET.get('cursor'), CATALOG_PAGE_SIZE)
+    except NotFound as error:
+        raise Http404(error.detail)
+
+
+async def __agenerate_catalog_page(
+    request: WSGIRequest, template_name: str, queryset: QuerySet, rows_name: str,
+) -> HttpResponse:
+    query = search.get_query(request.GET, search.PAGE_SEARCH_PARAM)
+    page = await __aget_catalog_page(request, queryset, query)
+    context = {rows_name: page.rows, 'next_cursor': page.next_cursor, 'query': query}
+    return __generate_html_page(request, template_name, context)
+
+
+async def __agenerate_films_page(request: WSGIRequest, template_name: str) -> HttpResponse:
+    films = availability.with_totals(Film.objects.only(*FILM_CARD_FIELDS), (availability.FREE,))
+    return await __agenerate_catalog_page(request, template_name, films, template.FILMS)
+
+
+async def __agenerate_cinemas_page(request: WSGIRequest, template_name: str) -> HttpResponse:
+    cinemas = Cinema.objects.select_related('address').only(*CINEMA_CARD_FIELDS)
+    cinemas = availability.with_totals(cinemas, (availability.FREE,))
+    return await __agenerate_catalog_page(request, template_name, cinemas, template.CINEMAS)
+
+
+async def __aget_shows(model: type[Film | Cinema], pk) -> dict:
+    return {
+        'tickets': [ticket async for ticket in __get_tickets_by_film_cinema(model, pk)],
+        'screenings': [screening async for screening in __get_screenings(model, pk)],
+        'live_updates': settings.LIVE_UPDATES_ENABLED,
+    }
+
+
+async def __page_validators(request: WSGIRequest, *states: tuple) -> Validators:
+    user = await __aget_user(request)
+    return make_validators(states, user.pk, request.COOKIES.get(settings.CSRF_COOKIE_NAME))
+
+
+async def __catalog_validators(request: WSGIRequest, queryset: QuerySet, relations: tuple = ()) -> Validators:
+    queryset, ordering = __search_catalog(queryset, search.get_query(request.GET, search.PAGE_SEARCH_PARAM))
+    try:
+        ordered, _, _ = keyset_queryset(queryset, ordering, request.GET.get('cursor'))
+    except NotFound as error:
+        raise Http404(error.detail)
+    state = await aget_page_state(ordered, CATALOG_PAGE_SIZE, relations)
+    page_cache.set_state(request, state)
+    return await __page_validators(request, state)
+
+
+async def __films_validators(request: WSGIRequest) -> Validators:
+    return await __catalog_validators(request, Film.objects.all(), ('filmcinema',))
+
+
+async def __cinemas_validators(request: WSGIRequest) -> Validators:
+    return await __catalog_validators(request, Cinema.objects.all(), ('address', 'filmcinema'))
+
 
+async def __detail_validators(request: WSGIRequest, model: type[Film | Cinema], pk) -> Validators:
+    return await __page_validators(request, await aget_row_state(
+        model.objects.filter(id=pk),
+        DETAIL_RELATIONS[model],
+        tickets=__get_tickets_by_film_cinema(model, pk),
+        screenings=__get_screenings(model, pk),
+    ))
 
-def __generate_detail_page(request, model, pk) -> HttpResponse:
-    got_model = model.objects.get(id=pk)
-    tickets = __get_tickets_by_film_cinema(got_model)
-    return __generate_html_page(request, template.FILM_DETAILS, {'film': got_model, 'tickets': tickets})
+
+async def __film_detail_validators(request: WSGIRequest, pk) -> Validators:
+    return await __detail_validators(request, Film, pk)
+
+
+async def __cinema_detail_validators(request: WSGIRequest, pk) -> Validators:
+    return await __detail_validators(request, Cinema, pk)
 
 # pages
 
 
+@page_cache.cached_page(lambda: ())
 def main_page(request) -> HttpResponse:
     """Return main page.
 
@@ -52,8 +161,10 @@ def main_page(request) -> HttpResponse:
     return __generate_html_page(request, template.INDEX)
 
 
-def films_page(request: WSGIRequest) -> HttpResponse:
-    """Return films page.
+@conditional(__films_validators)
+@page_cache.cached_page(lambda: (page_cache.FILMS_TAG,))
+async def films_page(request: WSGIRequest) -> HttpResponse:
+    """Return films page with the first batch of film cards, cards are searched by "q" parameter.
 
     Args:
         request (WSGIRequest): django request
@@ -61,11 +172,27 @@ def films_page(request: WSGIRequest) -> HttpResponse:
     Returns:
         HttpResponse: films page
     """
-    return __generate_html_page(request, template.FILMS, {template.FILMS: Film.objects.all()})
+    return await __agenerate_films_page(request, template.FILMS)
+
+
+@conditional(__films_validators)
+@page_cache.cached_page(lambda: (page_cache.FILMS_TAG,))
+async def films_fragment(request: WSGIRequest) -> HttpResponse:
+    """Return html fragment with the next batch of film cards.
+
+    Args:
+        request (WSGIRequest): django request with cursor and search query
+
+    Returns:
+        HttpResponse: film cards
+    """
+    return await __agenerate_films_page(request, template.FILM_CARDS)
 
 
-def cinemas_page(request: WSGIRequest) -> HttpResponse:
-    """Return cinemas page.
+@conditional(__cinemas_validators)
+@page_cache.cached_page(lambda: (page_cache.CINEMAS_TAG,))
+async def cinemas_page(request: WSGIRequest) -> HttpResponse:
+    """Return cinemas page with the first batch of cinema cards, cards are searched by "q" parameter.
 
     Args:
         request (WSGIRequest): django request
@@ -73,10 +200,26 @@ def cinemas_page(request: WSGIRequest) -> HttpResponse:
     Returns:
         HttpResponse: cinemas page
     """
-    return __generate_html_page(request, template.CINEMAS, {template.CINEMAS: Cinema.objects.all()})
+    return await __agenerate_cinemas_page(request, template.CINEMAS)
+
+
+@conditional(__cinemas_validators)
+@page_cache.cached_page(lambda: (page_cache.CINEMAS_TAG,))
+async def cinemas_fragment(request: WSGIRequest) -> HttpResponse:
+    """Return html fragment with the next batch of cinema cards.
+
+    Args:
+        request (WSGIRequest): django request with cursor and search query
+
+    Returns:
+        HttpResponse: cinema cards
+    """
+    return await __agenerate_cinemas_page(request, template.CINEMA_CARDS)
 
 
-def film_detail_page(request: WSGIRequest, pk) -> HttpResponse:
+@conditional(__film_detail_validators)
+@page_cache.cached_page(lambda pk: (page_cache.film_tag(pk),))
+async def film_detail_page(request: WSGIRequest, pk) -> HttpResponse:
     """Return film detail page.
 
     Args:
@@ -86,10 +229,16 @@ def film_detail_page(request: WSGIRequest, pk) -> HttpResponse:
     Returns:
         HttpResponse: film detail page
     """
-    return __generate_detail_page(request, Film, pk)
+    film = await Film.objects.prefetch_related(
+        Prefetch('cinemas', queryset=Cinema.objects.select_related('address')),
+    ).aget(id=pk)
+    context = {'film': film, **await __aget_shows(Film, pk)}
+    return __generate_html_page(request, template.FILM_DETAILS, context)
 
 
-def cinema_detail_page(request: WSGIRequest, pk: UUID) -> HttpResponse:
+@conditional(__cinema_detail_validators)
+@page_cache.cached_page(lambda pk: (page_cache.cinema_tag(pk),))
+async def cinema_detail_page(request: WSGIRequest, pk: UUID) -> HttpResponse:
     """Return cinema detail page.
 
     Args:
@@ -99,12 +248,12 @@ def cinema_detail_page(request: WSGIRequest, pk: UUID) -> HttpResponse:
     Returns:
         HttpResponse: cinema detail page
     """
-    cinema = Cinema.objects.get(id=pk)
-    tickets = __get_tickets_by_film_cinema(cinema)
-    return __generate_html_page(request, template.CINEMA_DETAILS, {'cinema': cinema, 'tickets': tickets})
+    cinema = await Cinema.objects.select_related('address').prefetch_related('films').aget(id=pk)
+    context = {'cinema': cinema, **await __aget_shows(Cinema, pk)}
+    return __generate_html_page(request, template.CINEMA_DETAILS, context)
 
 
-def booked_tickets_page(request: WSGIRequest):
+async def booked_tickets_page(request: WSGIRequest):
     """
     Display a page showing all booked tickets for the currently authenticated user.
 
@@ -119,13 +268,35 @@ def booked_tickets_page(request: WSGIRequest):
         HttpResponse: Generates and returns an HTML page displaying the user's booked tickets or redirects to the
                       profile page if the user is not authenticated.
     """
-    if request.user.is_authenticated:
-        user = request.user
-        tickets = Ticket.objects.filter(user=user)
-        return __generate_html_page(request, template.BOOKED_TICKETS, {'tickets': tickets})
+    user = await __aget_user(request)
+    if user.is_authenticated:
+        tickets = Ticket.objects.filter(user=user).select_related('film_cinema__film', 'film_cinema__cinema')
+        context = {'tickets': [ticket async for ticket in tickets]}
+        return __generate_html_page(request, template.BOOKED_TICKETS, context)
     return redirect(template.PROFILE)
 
 
+async def schedule_page(request: WSGIRequest) -> HttpResponse:
+    """Return films shown in cinemas of city on day, entries are read from the schedule by one query.
+
+    Args:
+        request (WSGIRequest): django request with city, day and cursor
+
+    Returns:
+        HttpResponse: schedule page
+    """
+    form = ScheduleForm(request.GET or None)
+    context = {'form': form, 'entries': [], 'next_cursor': None}
+    if form.is_valid():
+        entries = schedule.get_entries(form.cleaned_data['city'], form.cleaned_data['day'])
+        try:
+            page = await apaginate_keyset(entries, schedule.ORDERING, request.GET.get('cursor'), SCHEDULE_PAGE_SIZE)
+        except NotFound as error:
+            raise Http404(error.detail)
+        context.update(entries=page.rows, next_cursor=page.next_cursor)
+    return __generate_html_page(request, template.SCHEDULE, context)
+
+
 def profile_page(request: WSGIRequest) -> HttpResponse:
     """Return profile page.
 
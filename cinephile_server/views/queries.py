@@ -1,41 +1,70 @@
-"""Module for views with http methods."""
+"""Module for views with http methods.
 
+Booking writes run in transactions, which Django supports only in sync code, so async views
+await them in the thread of the database connection.
+"""
 
+
+from asgiref.sync import sync_to_async
 from django.core.handlers.wsgi import WSGIRequest
 from django.shortcuts import HttpResponse, HttpResponseRedirect, redirect
 
 import cinephile_server.template_names as template
-from cinephile_server.models import Ticket
+from cinephile_server import booking
+from cinephile_server.idempotency import idempotent
 
 from .pages import booked_tickets_page
 
 
-def __set_ticket_user(ticket_id, user, cancel_ticket=False):
-    try:
-        ticket = Ticket.objects.get(id=ticket_id)
-    except Ticket.DoesNotExist:
-        return 'Ticket does not exist'
-
-    if not cancel_ticket and ticket.user:
-        return 'the ticket is already booked'
-
-    ticket.user = None if cancel_ticket else user
-    ticket.save()
+async def __set_ticket_user(ticket_id, user, cancel_ticket=False) -> str | None:
+    if cancel_ticket:
+        return await sync_to_async(booking.cancel)(ticket_id, user)
+    return await sync_to_async(booking.book)(ticket_id, user)
 
 
-def __set_ticket_state(request: WSGIRequest, cancel_ticket=False) -> HttpResponse | HttpResponseRedirect:
+async def __set_ticket_state(request: WSGIRequest, cancel_ticket=False) -> HttpResponse | HttpResponseRedirect:
     if request.method == 'POST':
-        if request.user.is_authenticated:
-            set_ticket_result = __set_ticket_user(request.GET.get('ticket_id'), request.user, cancel_ticket)
+        user = await request.auser()
+        if user.is_authenticated:
+            set_ticket_result = await __set_ticket_user(request.GET.get('ticket_id'), user, cancel_ticket)
             if isinstance(set_ticket_result, str):
                 return HttpResponse(set_ticket_result)
         else:
             return redirect(template.LOGIN)
-        return booked_tickets_page(request)
+        return await booked_tickets_page(request)
     return HttpResponse('Something went wrong...')
 
 
-def book_ticket(request: WSGIRequest) -> HttpResponse | HttpResponseRedirect:
+async def book_seat(request: WSGIRequest) -> HttpResponse | HttpResponseRedirect:
+    """
+    Book a seat of a screening for a user if they are authenticated.
+
+    The screening is identified by a screening ID passed via GET parameters and the seat number is taken
+    from the submitted form. Unauthenticated users are redirected to the login page. After successfully
+    booking a seat, the booked tickets page is returned.
+
+    Parameters:
+        request (WSGIRequest): The Django HttpRequest object containing details about the incoming HTTP request.
+
+    Returns:
+        HttpResponse: The booked tickets page upon successful booking or an error message if something goes wrong.
+    """
+    if request.method != 'POST':
+        return HttpResponse('Something went wrong...')
+    user = await request.auser()
+    if not user.is_authenticated:
+        return redirect(template.LOGIN)
+    seat = request.POST.get('seat', '')
+    if not seat.isdigit():
+        return HttpResponse(booking.SEAT_NOT_AVAILABLE)
+    book_result = await sync_to_async(booking.book_seat)(request.GET.get('screening_id'), int(seat), user)
+    if isinstance(book_result, str):
+        return HttpResponse(book_result)
+    return await booked_tickets_page(request)
+
+
+@idempotent
+async def book_ticket(request: WSGIRequest) -> HttpResponse | HttpResponseRedirect:
     """
     Books a ticket for a user if they are authenticated.
 
@@ -51,10 +80,11 @@ def book_ticket(request: WSGIRequest) -> HttpResponse | HttpResponseRedirect:
         HttpResponse: Redirects to the booked tickets page upon successful booking or returns a generic error message
                      if something goes wrong.
     """
-    return __set_ticket_state(request)
+    return await __set_ticket_state(request)
 
 
-def cancel_ticket(request: WSGIRequest) -> HttpResponse | HttpResponseRedirect:
+@idempotent
+async def cancel_ticket(request: WSGIRequest) -> HttpResponse | HttpResponseRedirect:
     """
     Cancel a ticket for a user if they are authenticated.
 
@@ -71,4 +101,4 @@ def cancel_ticket(request: WSGIRequest) -> HttpResponse | HttpResponseRedirect:
         HttpResponse: Redirects to the page showing cancelled tickets upon successful cancellation or returns
                      a generic error message if something goes wrong.
     """
-    return __set_ticket_state(request, cancel_ticket=True)
+    return await __set_ticket_state(request, cancel_ticket=True)
@@ -0,0 +1,56 @@
+"""Module for views which issue and revoke signed tokens."""
+
+
+from rest_framework import status
+from rest_framework.authtoken.views import ObtainAuthToken
+from rest_framework.permissions import IsAuthenticated
+from rest_framework.request import Request
+from rest_framework.response import Response
+from rest_framework.views import APIView
+
+from cinephile_server import tokens
+from cinephile_server.auth import SignedTokenAuthentication
+from cinephile_server.throttling import TokenBucketThrottle
+
+
+class SignedTokenView(ObtainAuthToken):
+    """Issue signed expiring token for username and password."""
+
+    authentication_classes = []
+    throttle_classes = [TokenBucketThrottle]
+    throttle_scope = 'auth'
+
+    def post(self, request: Request, *args, **kwargs) -> Response:
+        """Check credentials and issue token.
+
+        Args:
+            request: request with username and password
+            args: positional arguments of view
+            kwargs: keyword arguments of view
+
+        Returns:
+            Response: token and its lifetime in seconds
+        """
+        serializer = self.get_serializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        signed_token = tokens.issue(serializer.validated_data['user'])
+        return Response({'token': signed_token.token, 'expires_in': tokens.get_max_age()})
+
+
+class RevokeSignedTokenView(APIView):
+    """Revoke signed token which authenticates request."""
+
+    authentication_classes = [SignedTokenAuthentication]
+    permission_classes = [IsAuthenticated]
+
+    def post(self, request: Request) -> Response:
+        """Revoke current token.
+
+        Args:
+            request: request authenticated by signed token
+
+        Returns:
+            Response: empty response
+        """
+        tokens.revoke(request.auth)
+        return Response(status=status.HTTP_204_NO_CONTENT)
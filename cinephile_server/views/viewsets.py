@@ -2,50 +2,197 @@
 
 
 from django.contrib.auth.models import User
-from rest_framework.viewsets import ModelViewSet
+from django.http import StreamingHttpResponse
+from rest_framework import status
+from rest_framework.decorators import action
+from rest_framework.permissions import IsAuthenticated
+from rest_framework.request import Request
+from rest_framework.response import Response
+from rest_framework.viewsets import ModelViewSet, ReadOnlyModelViewSet
 
 import cinephile_server.serializers as serializers
+from cinephile_server import booking, schedule, transfer
 from cinephile_server.auth import LoginAdminRequired, LoginRequired
-from cinephile_server.models import Address, Cinema, Film, FilmCinema, Ticket
+from cinephile_server.conditional import ConditionalGetMixin
+from cinephile_server.filters import KeysetOrderingFilter, QueryParamsFilter
+from cinephile_server.idempotency import IdempotentMixin
+from cinephile_server.models import Address, Cinema, Film, FilmCinema, ScheduleEntry, Screening, Ticket
+from cinephile_server.permissions import IsSuperUser, IsSuperUserOrReadOnly
+from cinephile_server.read_serializers import LeanReadMixin
+from cinephile_server.search import FullTextSearchFilter
 
 
-class UserViewSet(ModelViewSet):
+class UserViewSet(IdempotentMixin, LeanReadMixin, ModelViewSet):
     """ViewSet for users."""
 
     queryset = User.objects.all()
     serializer_class = serializers.UserSerializer
+    ordering = ('username', 'id')
+    throttle_scope = 'users'
 
 
-class CinemaViewSet(LoginAdminRequired, ModelViewSet):
-    """ViewSet for cinemas."""
+class CinemaViewSet(LoginAdminRequired, ConditionalGetMixin, IdempotentMixin, LeanReadMixin, ModelViewSet):
+    """ViewSet for cinemas, list is searched by "search" parameter and filtered by city and film."""
 
-    queryset = Cinema.objects.all()
+    queryset = Cinema.objects.prefetch_related('films')
     serializer_class = serializers.CinemaSerializer
+    ordering = ('name', 'id')
+    ordering_fields = ('name',)
+    filter_backends = [KeysetOrderingFilter, FullTextSearchFilter, QueryParamsFilter]
+    filter_serializer_class = serializers.CinemaFilterSerializer
+    validator_relations = ('filmcinema',)
 
 
-class FilmViewSet(LoginAdminRequired, ModelViewSet):
-    """ViewSet for films."""
+class FilmViewSet(LoginAdminRequired, ConditionalGetMixin, IdempotentMixin, LeanReadMixin, ModelViewSet):
+    """ViewSet for films, list is searched by "search" parameter and filtered by rating and cinema."""
 
-    queryset = Film.objects.all()
+    queryset = Film.objects.prefetch_related('cinemas')
     serializer_class = serializers.FilmSerializer
+    ordering = ('name', 'id')
+    ordering_fields = ('name', 'rating')
+    filter_backends = [KeysetOrderingFilter, FullTextSearchFilter, QueryParamsFilter]
+    filter_serializer_class = serializers.FilmFilterSerializer
+    validator_relations = ('filmcinema',)
 
 
-class FilmCinemaViewSet(LoginAdminRequired, ModelViewSet):
+class FilmCinemaViewSet(LoginAdminRequired, ConditionalGetMixin, IdempotentMixin, LeanReadMixin, ModelViewSet):
     """ViewSet for films and cinemas."""
 
     queryset = FilmCinema.objects.all()
     serializer_class = serializers.FilmCinemaSerializer
+    ordering = ('id',)
 
 
-class TicketViewSet(LoginRequired, ModelViewSet):
-    """ViewSet for tickets."""
+class TicketViewSet(LoginRequired, ConditionalGetMixin, IdempotentMixin, LeanReadMixin, ModelViewSet):
+    """ViewSet for tickets, list is filtered by film date, film, cinema and booked state."""
 
     queryset = Ticket.objects.all()
     serializer_class = serializers.TicketSerializer
-
-
-class AddressViewSet(LoginAdminRequired, ModelViewSet):
+    ordering = ('film_date', 'id')
+    ordering_fields = ('film_date',)
+    filter_backends = [KeysetOrderingFilter, QueryParamsFilter]
+    filter_serializer_class = serializers.TicketFilterSerializer
+    throttle_scope = None
+
+    @action(
+        detail=False, methods=['get'],
+        serializer_class=serializers.TicketExportSerializer, permission_classes=[IsSuperUser],
+    )
+    def export(self, request: Request) -> StreamingHttpResponse:
+        """Stream tickets as NDJSON or CSV, rows are read from database in chunks while response is sent.
+
+        Args:
+            request: request with output format and filters of list
+
+        Returns:
+            StreamingHttpResponse: exported tickets
+        """
+        params = self.get_serializer(data=request.query_params)
+        params.is_valid(raise_exception=True)
+        output = params.validated_data['output']
+        response = StreamingHttpResponse(
+            transfer.iter_export(params.filter(Ticket.objects.all()), output),
+            content_type=transfer.CONTENT_TYPES[output],
+        )
+        response['Content-Disposition'] = f'attachment; filename="tickets.{output}"'
+        return response
+
+    @action(
+        detail=False, methods=['post'],
+        serializer_class=serializers.TicketIdsSerializer, permission_classes=[IsAuthenticated],
+        throttle_scope='booking',
+    )
+    def hold(self, request: Request) -> Response:
+        """Hold free tickets for current user while they are confirmed.
+
+        Args:
+            request: request with ids of tickets
+
+        Returns:
+            Response: expiry of hold or error message
+        """
+        ids_serializer = self.get_serializer(data=request.data)
+        ids_serializer.is_valid(raise_exception=True)
+        ticket_ids = ids_serializer.validated_data['tickets']
+        hold_result, held_until = booking.hold(ticket_ids, request.user)
+        if hold_result == booking.TICKET_NOT_FOUND:
+            return Response({'detail': hold_result}, status=status.HTTP_404_NOT_FOUND)
+        if hold_result:
+            return Response({'detail': hold_result}, status=status.HTTP_409_CONFLICT)
+        return Response({'tickets': ticket_ids, 'held_until': held_until})
+
+    @action(
+        detail=False, methods=['post'],
+        serializer_class=serializers.TicketIdsSerializer, permission_classes=[IsAuthenticated],
+        throttle_scope='booking',
+    )
+    def confirm(self, request: Request) -> Response:
+        """Book tickets held by current user.
+
+        Args:
+            request: request with ids of held tickets
+
+        Returns:
+            Response: booked tickets or error message
+        """
+        ids_serializer = self.get_serializer(data=request.data)
+        ids_serializer.is_valid(raise_exception=True)
+        ticket_ids = ids_serializer.validated_data['tickets']
+        confirm_result = booking.confirm(ticket_ids, request.user)
+        if confirm_result:
+            return Response({'detail': confirm_result}, status=status.HTTP_409_CONFLICT)
+        tickets = Ticket.objects.filter(id__in=ticket_ids).order_by(*self.ordering)
+        return Response(serializers.TicketSerializer(tickets, many=True, context={'request': request}).data)
+
+
+class ScreeningViewSet(LoginRequired, ConditionalGetMixin, IdempotentMixin, LeanReadMixin, ModelViewSet):
+    """ViewSet for screenings with seat maps."""
+
+    queryset = Screening.objects.all()
+    serializer_class = serializers.ScreeningSerializer
+    ordering = ('start_time', 'id')
+    permission_classes = [IsSuperUserOrReadOnly]
+    throttle_scope = None
+
+    @action(
+        detail=True, methods=['post'],
+        serializer_class=serializers.SeatSerializer, permission_classes=[IsAuthenticated],
+        throttle_scope='booking',
+    )
+    def book(self, request: Request, pk=None) -> Response:
+        """Book seat of screening for current user.
+
+        Args:
+            request: request with seat number
+            pk: screening id
+
+        Returns:
+            Response: updated screening or error message
+        """
+        seat_serializer = self.get_serializer(data=request.data)
+        seat_serializer.is_valid(raise_exception=True)
+        book_result = booking.book_seat(pk, seat_serializer.validated_data['seat'], request.user)
+        if book_result == booking.SCREENING_NOT_FOUND:
+            return Response({'detail': book_result}, status=status.HTTP_404_NOT_FOUND)
+        if book_result:
+            return Response({'detail': book_result}, status=status.HTTP_409_CONFLICT)
+        screening = Screening.objects.get(id=pk)
+        return Response(serializers.ScreeningSerializer(screening, context={'request': request}).data)
+
+
+class AddressViewSet(LoginAdminRequired, ConditionalGetMixin, IdempotentMixin, LeanReadMixin, ModelViewSet):
     """ViewSet for addresses."""
 
     queryset = Address.objects.all()
     serializer_class = serializers.AddressSerializer
+    ordering = ('city_name', 'id')
+
+
+class ScheduleViewSet(LoginRequired, ConditionalGetMixin, LeanReadMixin, ReadOnlyModelViewSet):
+    """ViewSet for schedule entries, list needs "city" and "day" parameters."""
+
+    queryset = ScheduleEntry.objects.all()
+    serializer_class = serializers.ScheduleEntrySerializer
+    ordering = schedule.ORDERING
+    filter_backends = [QueryParamsFilter]
+    filter_serializer_class = serializers.ScheduleFilterSerializer
@@ -3,6 +3,10 @@
 
 TEST_URL = 'test_url'
 TEST_URL_IMAGE = 'https://upload.wikimedia.org/wikipedia/ru/9/9d/Matrix-DVD.jpg'
+TEST_PNG_BASE64 = (
+    'iVBORw0KGgoAAAANSUhEUgAAAAQAAAAGCAIAAABrW6giAAAAFElEQVR4nGM8wcXFAANMDEiAHA4ARDAA6Jdd5hgAAAAASUVORK5CYII='
+)
+TEST_DATA_URI = f'data:image/png;base64,{TEST_PNG_BASE64}'
 test_address_attrs = {
     'city_name': 'some_city_name',
     'street_name': 'some_street_name',
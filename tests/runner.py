@@ -4,6 +4,7 @@
 from types import MethodType
 from typing import Any
 
+from django.conf import settings
 from django.db import connections
 from django.db.backends.base.base import BaseDatabaseWrapper
 from django.test.runner import DiscoverRunner
@@ -28,3 +29,8 @@ class PostgresSchemaRunner(DiscoverRunner):
             connection = connections[conn_name]
             connection.prepare_database = MethodType(prepare_db, connection)
         return super().setup_databases(**kwargs)
+
+    def setup_test_environment(self, **kwargs: Any) -> None:
+        """Set up test environment, throttling is disabled because tests send many writes from one address."""
+        super().setup_test_environment(**kwargs)
+        settings.THROTTLE_ENABLED = False
@@ -1,18 +1,41 @@
 """Module for testing api."""
 
 
-from datetime import datetime, timezone
+import json
+from datetime import datetime, timedelta, timezone
+from decimal import Decimal
+from uuid import uuid4
 
 from django.contrib.auth.models import User
-from django.test import TestCase
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import connection
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
 from rest_framework import status
 from rest_framework.authtoken.models import Token
-from rest_framework.test import APIClient
+from rest_framework.request import Request
+from rest_framework.test import APIClient, APIRequestFactory
 
-from cinephile_server.models import Address, Cinema, Film, FilmCinema, Ticket
+from cinephile_server import booking, serializers, tokens
+from cinephile_server.models import Address, Cinema, Film, FilmCinema, Screening, Ticket
+from cinephile_server.pagination import order_expressions
+from cinephile_server.read_serializers import build_values_serializer
 from tests.data import test_address_attrs, test_film_attrs
 from tests.utils import WithAuthTest, create_hyperlink, make_simple_test
 
+PAGINATED_FILMS = 30
+PAGE_SIZE = 10
+EXPORT_DAYS = 4
+SEARCHED_FILMS = 15
+FILTERED_RATINGS = (1, 2, 3, 4, 5)
+LEAN_ENDPOINTS = (
+    ('/rest/ticket/', serializers.TicketSerializer, ('film_date', 'id')),
+    ('/rest/film/', serializers.FilmSerializer, ('name', 'id')),
+    ('/rest/cinema/', serializers.CinemaSerializer, ('name', 'id')),
+    ('/rest/film_cinema/', serializers.FilmCinemaSerializer, ('id',)),
+    ('/rest/address/', serializers.AddressSerializer, ('city_name', 'id')),
+)
+
 FilmViewSetTest = make_simple_test(Film, '/rest/film/', test_film_attrs)
 AddressViewSetTest = make_simple_test(Address, '/rest/address/', test_address_attrs)
 
@@ -201,3 +224,572 @@ class TicketTest(WithAuthTest):
             put_status=status.HTTP_200_OK,
             delete_status=status.HTTP_204_NO_CONTENT,
         )
+
+
+class ScreeningTest(WithAuthTest):
+    """Class for testing screening seat maps."""
+
+    def setUp(self):
+        """Set up screening for tests."""
+        super().setUp()
+        film = Film.objects.create(**test_film_attrs)
+        address = Address.objects.create(**test_address_attrs)
+        cinema = Cinema.objects.create(name='test', address=address)
+        film_cinema = FilmCinema.objects.create(film=film, cinema=cinema)
+        self.screening = Screening.objects.create(
+            film_cinema=film_cinema, hall='Hall 1', start_time=datetime.now(tz=timezone.utc), capacity=4,
+        )
+        self.url = f'/rest/screening/{self.screening.id}/'
+
+    def test_seat_map(self):
+        """Test user reads seat map and books seat."""
+        self.client.force_authenticate(user=self.user, token=self.user_token)
+        response = self.client.get(self.url)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data['seat_map'], '0000')
+
+        response = self.client.post(f'{self.url}book/', {'seat': 2})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data['seat_map'], '0100')
+        self.assertEqual(response.data['free_seats'], 3)
+
+        response = self.client.post(f'{self.url}book/', {'seat': 2})
+        self.assertEqual(response.status_code, status.HTTP_409_CONFLICT)
+
+    def test_manage_user(self):
+        """Test user cannot change screening."""
+        self.client.force_authenticate(user=self.user, token=self.user_token)
+        response = self.client.delete(self.url)
+        self.assertEqual(response.status_code, status.HTTP_403_FORBIDDEN)
+
+    def test_manage_superuser(self):
+        """Test superuser changes screening."""
+        self.client.force_authenticate(user=self.superuser, token=self.superuser_token)
+        response = self.client.patch(self.url, {'capacity': 10})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data['seat_map'], '0' * 10)
+
+
+class KeysetPaginationTest(WithAuthTest):
+    """Class for testing keyset pagination of list endpoints."""
+
+    def setUp(self):
+        """Set up films with repeated names."""
+        super().setUp()
+        self.client.force_authenticate(user=self.superuser, token=self.superuser_token)
+        for index in range(PAGINATED_FILMS):
+            Film.objects.create(**{**test_film_attrs, 'name': f'film {index % 3}'})
+
+    def walk(self, url: str, link: str) -> tuple[list, list]:
+        """Walk pages following link.
+
+        Args:
+            url: url of first page
+            link: name of link to follow
+
+        Returns:
+            tuple[list, list]: ids of rows and sql of page queries
+        """
+        ids, queries = [], []
+        while url:
+            with CaptureQueriesContext(connection) as captured:
+                response = self.client.get(url)
+            self.assertEqual(response.status_code, status.HTTP_200_OK)
+            queries.append([query['sql'] for query in captured])
+            ids.extend(row['url'] for row in response.data['results'])
+            url = response.data[link]
+        return ids, queries
+
+    def test_walk_forward_and_back(self):
+        """Test all rows are visited once in both directions."""
+        ids, queries = self.walk(f'/rest/film/?page_size={PAGE_SIZE}', 'next')
+        self.assertEqual(len(ids), PAGINATED_FILMS)
+        self.assertEqual(len(set(ids)), PAGINATED_FILMS)
+        self.assertEqual(len(queries), 3)
+        self.assertEqual(len(queries[0]), len(queries[-1]))
+        self.assertFalse(any('OFFSET' in sql for page in queries for sql in page))
+
+        last_page = self.client.get(f'/rest/film/?page_size={PAGE_SIZE}')
+        while last_page.data['next']:
+            last_page = self.client.get(last_page.data['next'])
+        back_ids, _ = self.walk(last_page.data['previous'], 'previous')
+        self.assertEqual(len(back_ids), PAGINATED_FILMS - len(last_page.data['results']))
+
+    def test_ordering(self):
+        """Test rows are ordered by name."""
+        response = self.client.get(f'/rest/film/?page_size={PAGINATED_FILMS}')
+        names = [row['name'] for row in response.data['results']]
+        self.assertEqual(names, sorted(names))
+
+    def test_page_size_cap(self):
+        """Test page size cannot be bigger than maximum."""
+        for index in range(PAGINATED_FILMS, 250):
+            Film.objects.create(**{**test_film_attrs, 'name': f'film {index}'})
+        response = self.client.get('/rest/film/?page_size=100000')
+        self.assertEqual(len(response.data['results']), 200)
+
+    def test_invalid_cursor(self):
+        """Test invalid cursor."""
+        response = self.client.get('/rest/film/?cursor=broken')
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+
+    def test_nullable_ordering(self):
+        """Test tickets without date or with close dates are not lost."""
+        film_cinema = FilmCinema.objects.create(
+            film=Film.objects.first(),
+            cinema=Cinema.objects.create(name='test', address=Address.objects.create(**test_address_attrs)),
+        )
+        now = datetime.now(tz=timezone.utc).replace(microsecond=0)
+        for index in range(PAGE_SIZE + 1):
+            film_date = None if index % 2 else now + timedelta(microseconds=index)
+            Ticket.objects.create(film_date=film_date, place=str(index), film_cinema=film_cinema)
+        ids, _ = self.walk('/rest/ticket/?page_size=3', 'next')
+        self.assertEqual(len(set(ids)), PAGE_SIZE + 1)
+
+
+class SearchTest(WithAuthTest):
+    """Class for testing ranked search of films and cinemas."""
+
+    def setUp(self):
+        """Set up films which match query by name or by description, films and cinemas are read by superusers."""
+        super().setUp()
+        self.client.force_authenticate(user=self.superuser, token=self.superuser_token)
+        for index in range(SEARCHED_FILMS):
+            Film.objects.create(**{**test_film_attrs, 'name': f'space odyssey {index}'})
+        Film.objects.create(**{**test_film_attrs, 'name': 'solaris', 'description': 'odyssey in space'})
+        Film.objects.create(**{**test_film_attrs, 'name': 'unrelated'})
+        address = Address.objects.create(**test_address_attrs)
+        Cinema.objects.create(name='space cinema', address=address)
+        Cinema.objects.create(name='another cinema', address=address)
+
+    def test_ranked_pages(self):
+        """Test results are paginated by rank with name matches first."""
+        names, url = [], f'/rest/film/?search=space+odyssey&page_size={PAGE_SIZE}'
+        while url:
+            response = self.client.get(url)
+            self.assertEqual(response.status_code, status.HTTP_200_OK)
+            names.extend(row['name'] for row in response.data['results'])
+            url = response.data['next']
+        self.assertEqual(len(names), SEARCHED_FILMS + 1)
+        self.assertEqual(len(set(names)), SEARCHED_FILMS + 1)
+        self.assertEqual(names[-1], 'solaris')
+
+    def test_cinemas(self):
+        """Test cinemas are searched by name."""
+        response = self.client.get('/rest/cinema/?search=space')
+        self.assertEqual([row['name'] for row in response.data['results']], ['space cinema'])
+
+    def test_empty_query(self):
+        """Test blank query returns all rows in default order."""
+        response = self.client.get('/rest/film/?search=++')
+        self.assertEqual(len(response.data['results']), SEARCHED_FILMS + 2)
+
+
+class FilterTest(WithAuthTest):
+    """Class for testing filters and ordering of list endpoints."""
+
+    def setUp(self):
+        """Set up films with different ratings shown in cinemas of two cities with tickets."""
+        super().setUp()
+        self.client.force_authenticate(user=self.superuser, token=self.superuser_token)
+        self.films = [
+            Film.objects.create(**{**test_film_attrs, 'name': f'film {rating}', 'rating': rating})
+            for rating in FILTERED_RATINGS
+        ]
+        self.cinemas = [
+            Cinema.objects.create(
+                name=f'cinema {city}', address=Address.objects.create(**{**test_address_attrs, 'city_name': city}),
+            )
+            for city in ('alpha', 'beta')
+        ]
+        self.day = datetime(2030, 1, 1, tzinfo=timezone.utc)
+        for index, film in enumerate(self.films):
+            film_cinema = FilmCinema.objects.create(film=film, cinema=self.cinemas[index % 2])
+            Ticket.objects.create(place='1', film_cinema=film_cinema, film_date=self.day + timedelta(days=index))
+            Ticket.objects.create(
+                place='2', film_cinema=film_cinema, film_date=self.day + timedelta(days=index), user=self.user,
+            )
+
+    def get_rows(self, url: str, **params) -> list[dict]:
+        """Return all rows of list following next links.
+
+        Args:
+            url: url of list
+            params: query parameters
+
+        Returns:
+            list[dict]: rows of all pages
+        """
+        rows = []
+        response = self.client.get(url, {**params, 'page_size': 2})
+        while True:
+            self.assertEqual(response.status_code, status.HTTP_200_OK)
+            rows.extend(response.data['results'])
+            if not response.data['next']:
+                return rows
+            response = self.client.get(response.data['next'])
+
+    def test_films(self):
+        """Test films are filtered by rating range and cinema."""
+        rows = self.get_rows('/rest/film/', rating_min='2', rating_max='4')
+        self.assertEqual(sorted(Decimal(row['rating']) for row in rows), [2, 3, 4])
+        rows = self.get_rows('/rest/film/', cinema=self.cinemas[1].id)
+        self.assertEqual([row['name'] for row in rows], ['film 2', 'film 4'])
+
+    def test_film_ordering(self):
+        """Test films are paginated in whitelisted descending order."""
+        rows = self.get_rows('/rest/film/', ordering='-rating')
+        self.assertEqual([Decimal(row['rating']) for row in rows], sorted(FILTERED_RATINGS, reverse=True))
+        rows = self.get_rows('/rest/film/', ordering='description')
+        self.assertEqual([row['name'] for row in rows], sorted(film.name for film in self.films))
+
+    def test_cinemas(self):
+        """Test cinemas are filtered by city and film."""
+        rows = self.get_rows('/rest/cinema/', city='beta')
+        self.assertEqual([row['name'] for row in rows], ['cinema beta'])
+        rows = self.get_rows('/rest/cinema/', film=self.films[0].id)
+        self.assertEqual([row['name'] for row in rows], ['cinema alpha'])
+
+    def test_tickets(self):
+        """Test tickets are filtered by date range, booked state, film and cinema."""
+        date_to = self.day + timedelta(days=2)
+        rows = self.get_rows('/rest/ticket/', date_from=self.day.isoformat(), date_to=date_to.isoformat())
+        self.assertEqual(len(rows), 4)
+        self.assertEqual(len(self.get_rows('/rest/ticket/', booked='false')), len(FILTERED_RATINGS))
+        rows = self.get_rows('/rest/ticket/', booked='true', film=self.films[0].id, ordering='-film_date')
+        self.assertEqual([row['place'] for row in rows], ['2'])
+        rows = self.get_rows('/rest/ticket/', cinema=self.cinemas[0].id, ordering='-film_date')
+        self.assertEqual(len(rows), 6)
+        dates = [row['film_date'] for row in rows]
+        self.assertEqual(dates, sorted(dates, reverse=True))
+
+    def test_invalid_params(self):
+        """Test malformed filter values are rejected."""
+        for url, params in (
+            ('/rest/film/', {'rating_min': 'high'}),
+            ('/rest/cinema/', {'film': 'broken'}),
+            ('/rest/ticket/', {'date_from': 'yesterday'}),
+        ):
+            response = self.client.get(url, params)
+            self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+
+class ConditionalGetTest(WithAuthTest):
+    """Class for testing ETag and Last-Modified of rest resources."""
+
+    def setUp(self):
+        """Set up film."""
+        super().setUp()
+        self.client.force_authenticate(user=self.superuser, token=self.superuser_token)
+        self.film = Film.objects.create(**test_film_attrs)
+
+    def check_not_modified(self, url: str) -> str:
+        """Check resource is not serialized again for actual etag.
+
+        Args:
+            url: url of resource
+
+        Returns:
+            str: etag of resource
+        """
+        response = self.client.get(url)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertIn('updated_at', str(response.content))
+        etag = response['ETag']
+        with CaptureQueriesContext(connection) as captured:
+            response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, status.HTTP_304_NOT_MODIFIED)
+        self.assertEqual(len(captured), 1)
+        last_modified = self.client.get(url)['Last-Modified']
+        response = self.client.get(url, HTTP_IF_MODIFIED_SINCE=last_modified)
+        self.assertEqual(response.status_code, status.HTTP_304_NOT_MODIFIED)
+        return etag
+
+    def test_detail(self):
+        """Test detail resource changes etag after update."""
+        url = f'/rest/film/{self.film.id}/'
+        etag = self.check_not_modified(url)
+        self.film.rating = 4
+        self.film.save()
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertNotEqual(response['ETag'], etag)
+
+    def test_list(self):
+        """Test list changes etag after related rows are added or rows are deleted."""
+        url = '/rest/film/'
+        etag = self.check_not_modified(url)
+        cinema = Cinema.objects.create(name='cinema', address=Address.objects.create(**test_address_attrs))
+        FilmCinema.objects.create(film=self.film, cinema=cinema)
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        etag = response['ETag']
+        Film.objects.create(**test_film_attrs)
+        Film.objects.filter(id=self.film.id).delete()
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+    def test_page_of_list(self):
+        """Test page is validated by its own rows and cursor with a query bounded by page size."""
+        film_ids = sorted([self.film.id, *(Film.objects.create(**test_film_attrs).id for _ in range(2))])
+        first = self.client.get('/rest/film/?page_size=1')
+        next_url = first.data['next']
+        etag = self.check_not_modified(next_url)
+        self.assertNotEqual(etag, first['ETag'])
+        with CaptureQueriesContext(connection) as captured:
+            self.client.get(next_url, HTTP_IF_NONE_MATCH=etag)
+        self.assertIn('LIMIT 2', captured[0]['sql'])
+        Film.objects.filter(id=film_ids[1]).delete()
+        response = self.client.get(next_url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+    def test_booking_changes_etag(self):
+        """Test booking ticket changes etag of ticket."""
+        self.client.force_authenticate(user=self.user, token=self.user_token)
+        cinema = Cinema.objects.create(name='cinema', address=Address.objects.create(**test_address_attrs))
+        ticket = Ticket.objects.create(place='1', film_cinema=FilmCinema.objects.create(film=self.film, cinema=cinema))
+        url = f'/rest/ticket/{ticket.id}/'
+        etag = self.check_not_modified(url)
+        booking.book(ticket.id, self.user)
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+    def test_missing_object(self):
+        """Test missing and malformed ids are not found."""
+        for film_id in (uuid4(), 'broken'):
+            response = self.client.get(f'/rest/film/{film_id}/')
+            self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+
+
+class SignedTokenTest(WithAuthTest):
+    """Class for testing signed bearer tokens."""
+
+    def setUp(self):
+        """Set up screening."""
+        super().setUp()
+        cinema = Cinema.objects.create(name='cinema', address=Address.objects.create(**test_address_attrs))
+        film_cinema = FilmCinema.objects.create(film=Film.objects.create(**test_film_attrs), cinema=cinema)
+        self.screening = Screening.objects.create(
+            film_cinema=film_cinema, hall='Hall 1', start_time=datetime.now(tz=timezone.utc), capacity=4,
+        )
+        self.url = f'/rest/screening/{self.screening.id}/'
+
+    def get_signed_token(self, username: str, password: str) -> str:
+        """Obtain signed token by credentials.
+
+        Args:
+            username: name of user
+            password: password of user
+
+        Returns:
+            str: signed token
+        """
+        response = self.client.post('/api-signed-token-auth/', {'username': username, 'password': password})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        return response.data['token']
+
+    def get_with_token(self, token: str) -> tuple:
+        """Get screening with bearer token.
+
+        Args:
+            token: bearer token
+
+        Returns:
+            tuple: response and sql of queries
+        """
+        self.client.credentials(HTTP_AUTHORIZATION=f'Bearer {token}')
+        with CaptureQueriesContext(connection) as captured:
+            response = self.client.get(self.url)
+        return response, [query['sql'] for query in captured]
+
+    def test_no_database_access(self):
+        """Test signed token is verified without token and user queries."""
+        signed_response, signed_queries = self.get_with_token(self.get_signed_token('testuser2', 'testpassword'))
+        self.assertEqual(signed_response.status_code, status.HTTP_200_OK)
+        self.assertFalse([sql for sql in signed_queries if 'authtoken_token' in sql or 'auth_user' in sql])
+        db_response, db_queries = self.get_with_token(self.user_token)
+        self.assertEqual(db_response.status_code, status.HTTP_200_OK)
+        self.assertEqual(len(db_queries), len(signed_queries) + 1)
+
+    def test_superuser_flag(self):
+        """Test signed token of superuser passes admin permission and of user does not."""
+        self.superuser.set_password('superuser')
+        self.superuser.save()
+        for username, password, expected_status in (
+            ('superuser', 'superuser', status.HTTP_201_CREATED),
+            ('testuser2', 'testpassword', status.HTTP_403_FORBIDDEN),
+        ):
+            self.client.credentials(HTTP_AUTHORIZATION=f'Bearer {self.get_signed_token(username, password)}')
+            response = self.client.post('/rest/address/', test_address_attrs)
+            self.assertEqual(response.status_code, expected_status)
+
+    def test_book_seat(self):
+        """Test user of signed token books seat."""
+        self.client.credentials(HTTP_AUTHORIZATION=f'Bearer {self.get_signed_token("testuser2", "testpassword")}')
+        response = self.client.post(f'{self.url}book/', {'seat': 1})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertTrue(Ticket.objects.filter(screening=self.screening, seat=1, user=self.user).exists())
+
+    def test_rejected_tokens(self):
+        """Test tampered, expired and revoked tokens are rejected."""
+        token = self.get_signed_token('testuser2', 'testpassword')
+        response, _ = self.get_with_token(f'{token[:-1]}{"A" if token[-1] != "A" else "B"}')
+        self.assertEqual(response.status_code, status.HTTP_401_UNAUTHORIZED)
+        with override_settings(SIGNED_TOKEN_MAX_AGE=-1):
+            response, _ = self.get_with_token(token)
+        self.assertEqual(response.status_code, status.HTTP_401_UNAUTHORIZED)
+        self.assertEqual(str(response.data['detail']), tokens.EXPIRED_MESSAGE)
+        response = self.client.post('/api-signed-token-revoke/')
+        self.assertEqual(response.status_code, status.HTTP_204_NO_CONTENT)
+        response, _ = self.get_with_token(token)
+        self.assertEqual(response.status_code, status.HTTP_401_UNAUTHORIZED)
+        self.assertEqual(str(response.data['detail']), tokens.REVOKED_MESSAGE)
+
+
+class LeanSerializerTest(WithAuthTest):
+    """Class for testing lean read serializers."""
+
+    def setUp(self):
+        """Set up film in two cinemas with free and booked tickets."""
+        super().setUp()
+        self.client.force_authenticate(user=self.superuser, token=self.superuser_token)
+        address = Address.objects.create(**test_address_attrs)
+        self.film = Film.objects.create(**test_film_attrs)
+        for name in ('first', 'second'):
+            cinema = Cinema.objects.create(name=name, address=address)
+            film_cinema = FilmCinema.objects.create(film=self.film, cinema=cinema)
+            Ticket.objects.create(place='1', film_cinema=film_cinema)
+            Ticket.objects.create(place='2', film_cinema=film_cinema, user=self.user, film_date=None)
+
+    def model_serialize(self, url: str, serializer_class, ordering: tuple) -> list:
+        """Serialize rows with model serializer.
+
+        Args:
+            url: url of request
+            serializer_class: model serializer
+            ordering: ordering of endpoint
+
+        Returns:
+            list: serialized rows
+        """
+        request = Request(APIRequestFactory().get(url))
+        rows = serializer_class.Meta.model.objects.order_by(*order_expressions(ordering))
+        return json_compatible(serializer_class(rows, many=True, context={'request': request}).data)
+
+    def test_same_output(self):
+        """Test lean list and retrieve return the same data as model serializers."""
+        for url, serializer_class, ordering in LEAN_ENDPOINTS:
+            response = self.client.get(url)
+            self.assertEqual(response.status_code, status.HTTP_200_OK)
+            expected = self.model_serialize(url, serializer_class, ordering)
+            self.assertEqual(json_compatible(response.data['results']), expected)
+            first = response.data['results'][0]
+            response = self.client.get(first['url'])
+            self.assertEqual(json_compatible(response.data), json_compatible(first))
+
+    def test_flat_query_count(self):
+        """Test list query count does not depend on number of rows and their relations."""
+        counts = []
+        for _ in range(2):
+            with CaptureQueriesContext(connection) as captured:
+                self.assertEqual(self.client.get('/rest/film/').status_code, status.HTTP_200_OK)
+            counts.append(len(captured))
+            cinema = Cinema.objects.create(name='other', address=Address.objects.first())
+            for _ in range(PAGE_SIZE):
+                FilmCinema.objects.create(film=Film.objects.create(**test_film_attrs), cinema=cinema)
+        self.assertEqual(counts[0], counts[1])
+
+    def test_unsupported_fields(self):
+        """Test serializer with method fields keeps model serializer."""
+        request = Request(APIRequestFactory().get('/rest/screening/'))
+        self.assertIsNone(build_values_serializer(serializers.ScreeningSerializer(context={'request': request})))
+
+    def test_missing_object(self):
+        """Test missing and malformed ids are not found."""
+        for ticket_id in (uuid4(), 'broken'):
+            response = self.client.get(f'/rest/ticket/{ticket_id}/')
+            self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+
+
+def json_compatible(serialized):
+    """Return serialized data as plain json with sorted link lists.
+
+    Args:
+        serialized: serialized data
+
+    Returns:
+        serialized data without serializer specific containers
+    """
+    data = json.loads(json.dumps(serialized, cls=DjangoJSONEncoder))
+    rows = data if isinstance(data, list) else [data]
+    for row in rows:
+        for field, field_value in row.items():
+            if isinstance(field_value, list):
+                row[field] = sorted(field_value)
+    return data
+
+
+class TicketExportTest(WithAuthTest):
+    """Test for streaming ticket export."""
+
+    def setUp(self):
+        """Set up tickets of two cinemas, booked and free, on different dates."""
+        super().setUp()
+        address = Address.objects.create(**test_address_attrs)
+        film = Film.objects.create(**test_film_attrs)
+        self.cinemas = [Cinema.objects.create(name=f'cinema {index}', address=address) for index in range(2)]
+        self.day = datetime(2024, 1, 1, tzinfo=timezone.utc)
+        for cinema in self.cinemas:
+            film_cinema = FilmCinema.objects.create(film=film, cinema=cinema)
+            for day in range(EXPORT_DAYS):
+                Ticket.objects.create(
+                    place=str(day), film_cinema=film_cinema, film_date=self.day + timedelta(days=day),
+                    user=self.user if day % 2 else None,
+                )
+        self.client.force_authenticate(user=self.superuser, token=self.superuser_token)
+
+    def export(self, **params) -> list[dict]:
+        """Export tickets as ndjson.
+
+        Args:
+            params: query parameters
+
+        Returns:
+            list[dict]: exported rows
+        """
+        response = self.client.get('/rest/ticket/export/', params)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertTrue(response.streaming)
+        self.assertEqual(response['Content-Type'], 'application/x-ndjson')
+        return [json.loads(line) for line in b''.join(response.streaming_content).splitlines()]
+
+    def test_ndjson(self):
+        """Test all tickets are exported ordered by id."""
+        rows = self.export()
+        ids = sorted(str(pk) for pk in Ticket.objects.values_list('id', flat=True))
+        self.assertEqual([row['id'] for row in rows], ids)
+
+    def test_csv(self):
+        """Test csv export starts with header."""
+        response = self.client.get('/rest/ticket/export/', {'output': 'csv'})
+        lines = b''.join(response.streaming_content).decode().splitlines()
+        self.assertTrue(lines[0].startswith('id,updated_at,film_date'))
+        self.assertEqual(len(lines), Ticket.objects.count() + 1)
+
+    def test_filters(self):
+        """Test filters by dates, cinema and booked state."""
+        date_to = self.day + timedelta(days=2)
+        self.assertEqual(len(self.export(date_from=self.day.isoformat(), date_to=date_to.isoformat())), 4)
+        cinema_rows = self.export(cinema=self.cinemas[0].id)
+        film_cinema = FilmCinema.objects.get(cinema=self.cinemas[0])
+        self.assertEqual({row['film_cinema_id'] for row in cinema_rows}, {str(film_cinema.id)})
+        self.assertTrue(all(row['user_id'] == self.user.id for row in self.export(booked='true')))
+        self.assertTrue(all(row['user_id'] is None for row in self.export(booked='false')))
+        response = self.client.get('/rest/ticket/export/', {'date_from': 'yesterday'})
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_admin_only(self):
+        """Test users cannot export tickets."""
+        self.client.force_authenticate(user=self.user, token=self.user_token)
+        response = self.client.get('/rest/ticket/export/')
+        self.assertEqual(response.status_code, status.HTTP_403_FORBIDDEN)
@@ -0,0 +1,159 @@
+"""Module for testing counters of free and booked tickets."""
+
+
+from datetime import datetime, timedelta, timezone
+from io import StringIO
+
+from django.contrib.auth.models import User
+from django.core.management import call_command
+from django.db import connection
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.test.client import Client as TestClient
+from rest_framework import status
+
+from cinephile_server import availability, booking, page_cache
+from cinephile_server.models import Address, Cinema, Film, FilmCinema, Screening, Ticket
+from tests.data import test_address_attrs, test_film_attrs
+
+SHOW_TIME = datetime(2030, 1, 1, 18, 30, tzinfo=timezone.utc)
+
+
+class AvailabilityTest(TestCase):
+    """Test for counters maintained by bookings and ticket writes."""
+
+    def setUp(self) -> None:
+        """Set up film shown in two cinemas with free tickets."""
+        self.user = User.objects.create_user(username='user', password='user')
+        address = Address.objects.create(**test_address_attrs)
+        self.cinema = Cinema.objects.create(name='cinema', address=address)
+        self.other_cinema = Cinema.objects.create(name='other cinema', address=address)
+        self.film = Film.objects.create(**test_film_attrs)
+        self.film_cinema = FilmCinema.objects.create(film=self.film, cinema=self.cinema)
+        self.other_film_cinema = FilmCinema.objects.create(film=self.film, cinema=self.other_cinema)
+        self.tickets = [
+            Ticket.objects.create(place=str(place), film_cinema=self.film_cinema, film_date=SHOW_TIME)
+            for place in range(3)
+        ]
+        Ticket.objects.create(place='1', film_cinema=self.other_film_cinema, film_date=SHOW_TIME, user=self.user)
+
+    def get_counters(self, row: Film | Cinema | FilmCinema) -> tuple[int, int]:
+        """Return stored free and booked tickets of film cinema or their totals of film or cinema.
+
+        Args:
+            row: film, cinema or film cinema
+
+        Returns:
+            tuple[int, int]: free and booked tickets
+        """
+        rows = type(row).objects.all()
+        if not isinstance(row, FilmCinema):
+            rows = availability.with_totals(rows)
+        return rows.values_list(*availability.COUNTERS).get(id=row.id)
+
+    def test_created_tickets(self):
+        """Test created tickets are counted in film cinema, film and cinema."""
+        self.assertEqual(self.get_counters(self.film_cinema), (3, 0))
+        self.assertEqual(self.get_counters(self.cinema), (3, 0))
+        self.assertEqual(self.get_counters(self.other_cinema), (0, 1))
+        self.assertEqual(self.get_counters(self.film), (3, 1))
+
+    def test_book_and_cancel(self):
+        """Test booking and cancelling move ticket between counters."""
+        self.assertIsNone(booking.book(self.tickets[0].id, self.user))
+        self.assertEqual(self.get_counters(self.film_cinema), (2, 1))
+        self.assertEqual(self.get_counters(self.film), (2, 2))
+        self.assertIsNotNone(booking.book(self.tickets[0].id, self.user))
+        self.assertEqual(self.get_counters(self.cinema), (2, 1))
+        self.assertIsNone(booking.cancel(self.tickets[0].id, self.user))
+        self.assertEqual(self.get_counters(self.cinema), (3, 0))
+        self.assertEqual(self.get_counters(self.film), (3, 1))
+
+    def test_book_seat(self):
+        """Test booked seat of screening is counted as booked ticket and released on cancel."""
+        screening = Screening.objects.create(
+            film_cinema=self.film_cinema, start_time=SHOW_TIME, hall='Hall 1', capacity=10,
+        )
+        self.assertIsNone(booking.book_seat(screening.id, 1, self.user))
+        self.assertEqual(self.get_counters(self.cinema), (3, 1))
+        ticket = Ticket.objects.get(screening=screening)
+        self.assertIsNone(booking.cancel(ticket.id, self.user))
+        self.assertEqual(self.get_counters(self.cinema), (3, 0))
+
+    def test_saved_and_deleted_tickets(self):
+        """Test tickets saved and deleted through models, as in admin and REST, update counters."""
+        ticket = self.tickets[0]
+        ticket.user = self.user
+        ticket.save()
+        self.assertEqual(self.get_counters(self.film_cinema), (2, 1))
+        ticket.film_cinema = self.other_film_cinema
+        ticket.save()
+        self.assertEqual(self.get_counters(self.film_cinema), (2, 0))
+        self.assertEqual(self.get_counters(self.other_cinema), (0, 2))
+        ticket.delete()
+        self.assertEqual(self.get_counters(self.other_cinema), (0, 1))
+        self.assertEqual(self.get_counters(self.film), (2, 1))
+
+    def test_relinked_film_cinema(self):
+        """Test counters move with film cinema linked to another cinema."""
+        new_cinema = Cinema.objects.create(name='new cinema', address=self.cinema.address)
+        self.film_cinema.cinema = new_cinema
+        self.film_cinema.save()
+        self.assertEqual(self.get_counters(self.cinema), (0, 0))
+        self.assertEqual(self.get_counters(new_cinema), (3, 0))
+        self.assertEqual(self.get_counters(self.film), (3, 1))
+
+    def test_counters_change_modification_time(self):
+        """Test booking changes modification time of film cinema, so validators of its REST resource change."""
+        updated_at = FilmCinema.objects.get(id=self.film_cinema.id).updated_at
+        booking.book(self.tickets[0].id, self.user)
+        self.assertGreater(FilmCinema.objects.get(id=self.film_cinema.id).updated_at, updated_at)
+
+    def test_saved_row_keeps_counters(self):
+        """Test saving stale instance does not overwrite counters."""
+        booking.book(self.tickets[0].id, self.user)
+        self.film_cinema.save()
+        self.assertEqual(self.get_counters(self.film), (2, 2))
+
+    def test_booking_writes_only_film_cinema(self):
+        """Test booking does not write film and cinema rows and does not evict catalog pages of other rows."""
+        versions = page_cache.get_versions((page_cache.FILMS_TAG, page_cache.CINEMAS_TAG))
+        with CaptureQueriesContext(connection) as queries, self.captureOnCommitCallbacks(execute=True):
+            self.assertIsNone(booking.book(self.tickets[0].id, self.user))
+        updated_tables = {query['sql'].split()[1] for query in queries if query['sql'].startswith('UPDATE')}
+        self.assertEqual(updated_tables, {'"api_data"."ticket"', '"api_data"."film_to_cinema"'})
+        self.assertEqual(page_cache.get_versions((page_cache.FILMS_TAG, page_cache.CINEMAS_TAG)), versions)
+
+    def test_cached_cards_follow_their_rows(self):
+        """Test cached catalog page is rendered again when availability of its cards changes."""
+        client = TestClient()
+        self.assertContains(client.get('/films/'), '3 seats left')
+        booking.book(self.tickets[0].id, self.user)
+        self.assertContains(client.get('/films/'), '2 seats left')
+
+    def test_reconcile(self):
+        """Test reconcile finds and repairs counters changed without signals."""
+        self.assertEqual(availability.reconcile(), 0)
+        Ticket.objects.filter(id=self.tickets[0].id).update(user=self.user)
+        Ticket.objects.filter(id=self.tickets[1].id).update(film_cinema=self.other_film_cinema)
+        Ticket.objects.bulk_create([
+            Ticket(place='2', film_cinema=self.other_film_cinema, film_date=SHOW_TIME + timedelta(hours=1)),
+        ])
+        output = StringIO()
+        call_command('reconcile_availability', '--dry-run', stdout=output)
+        self.assertIn('found drift in 2 film cinemas', output.getvalue())
+        self.assertEqual(self.get_counters(self.film_cinema), (3, 0))
+        self.assertEqual(availability.reconcile([self.film_cinema.id]), 1)
+        self.assertEqual(self.get_counters(self.cinema), (1, 1))
+        self.assertEqual(availability.reconcile(), 1)
+        self.assertEqual(self.get_counters(self.film), (3, 2))
+        self.assertEqual(availability.reconcile(), 0)
+
+    @override_settings(PAGE_CACHE_TIMEOUT=0)
+    def test_cards(self):
+        """Test catalog cards show free tickets."""
+        response = TestClient().get('/cinemas/')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertContains(response, '3 seats left')
+        self.assertContains(response, '0 seats left')
+        self.assertContains(TestClient().get('/films/'), '3 seats left')
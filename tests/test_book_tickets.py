@@ -1,16 +1,38 @@
 """Module for test booking tickets."""
 
 
-from datetime import datetime, timezone
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta, timezone
 
 from django.contrib.auth.models import User
-from django.test import TestCase
+from django.db import connection
+from django.test import TestCase, TransactionTestCase
 from django.test import client as test_client
+from django.urls import reverse
 from rest_framework import status
+from rest_framework.test import APIClient
 
-from cinephile_server.models import Address, Cinema, Film, FilmCinema, Ticket
+from cinephile_server import availability, booking
+from cinephile_server.models import Address, Cinema, Film, FilmCinema, Screening, Ticket
 from tests.data import test_address_attrs
 
+CONCURRENT_BOOKERS = 8
+HALL_CAPACITY = 500
+
+
+def create_ticket() -> Ticket:
+    """Create free ticket.
+
+    Returns:
+        Ticket: created ticket
+    """
+    address = Address.objects.create(**test_address_attrs)
+    cinema = Cinema.objects.create(name='Test Cinema', address=address)
+    film = Film.objects.create(name='Test Film', description='A great film.', rating=1)
+    film_cinema = FilmCinema.objects.create(cinema=cinema, film=film)
+    film_date = datetime.now(tz=timezone.utc)
+    return Ticket.objects.create(film_date=film_date, place='Seat 1', film_cinema=film_cinema)
+
 
 class BookTicketTest(TestCase):
     """Test for booking ticket."""
@@ -46,3 +68,212 @@ class BookTicketTest(TestCase):
         response = self.client.get(self.book_ticket_url)
         self.assertEqual(response.status_code, status.HTTP_200_OK)
         self.assertIn('Something went wrong...', response.content.decode())
+
+
+class BookingTest(TestCase):
+    """Test for conditional booking and cancelling."""
+
+    def setUp(self) -> None:
+        """Set up things for tests."""
+        self.user = User.objects.create_user(username='user', password='user')
+        self.other_user = User.objects.create_user(username='other', password='other')
+        self.ticket = create_ticket()
+
+    def test_book_free_ticket(self):
+        """Test booking free ticket."""
+        self.assertIsNone(booking.book(self.ticket.id, self.user))
+        self.ticket.refresh_from_db()
+        self.assertEqual(self.ticket.user, self.user)
+
+    def test_book_booked_ticket(self):
+        """Test booking ticket which is booked by somebody else."""
+        booking.book(self.ticket.id, self.user)
+        self.assertEqual(booking.book(self.ticket.id, self.other_user), booking.TICKET_ALREADY_BOOKED)
+        self.ticket.refresh_from_db()
+        self.assertEqual(self.ticket.user, self.user)
+
+    def test_book_missing_ticket(self):
+        """Test booking ticket which does not exist."""
+        self.assertEqual(booking.book('not-uuid', self.user), booking.TICKET_NOT_FOUND)
+        self.assertEqual(booking.book(None, self.user), booking.TICKET_NOT_FOUND)
+
+    def test_cancel_own_ticket(self):
+        """Test cancelling own ticket."""
+        booking.book(self.ticket.id, self.user)
+        self.assertIsNone(booking.cancel(self.ticket.id, self.user))
+        self.ticket.refresh_from_db()
+        self.assertIsNone(self.ticket.user)
+
+    def test_cancel_foreign_ticket(self):
+        """Test cancelling ticket which is booked by somebody else."""
+        booking.book(self.ticket.id, self.user)
+        self.assertEqual(booking.cancel(self.ticket.id, self.other_user), booking.TICKET_NOT_BOOKED)
+        self.ticket.refresh_from_db()
+        self.assertEqual(self.ticket.user, self.user)
+
+
+class HoldTest(TestCase):
+    """Test for holds of tickets which are confirmed or expire."""
+
+    def setUp(self) -> None:
+        """Set up two free tickets of one film cinema."""
+        self.user = User.objects.create_user(username='user', password='user')
+        self.other_user = User.objects.create_user(username='other', password='other')
+        self.ticket = create_ticket()
+        self.other_ticket = Ticket.objects.create(place='Seat 2', film_cinema=self.ticket.film_cinema)
+        self.ids = [self.ticket.id, self.other_ticket.id]
+
+    def expire(self) -> None:
+        """Move expiry of all holds to the past."""
+        Ticket.objects.filter(held_until__isnull=False).update(
+            held_until=datetime.now(tz=timezone.utc) - timedelta(seconds=1),
+        )
+
+    def test_hold_blocks_other_users(self):
+        """Test held ticket can be booked only by its holder until the hold expires."""
+        hold_result, held_until = booking.hold(self.ids, self.user)
+        self.assertIsNone(hold_result)
+        self.assertGreater(held_until, datetime.now(tz=timezone.utc))
+        self.assertEqual(booking.hold([self.ticket.id], self.other_user), (booking.TICKET_HELD, None))
+        self.assertEqual(booking.book(self.ticket.id, self.other_user), booking.TICKET_HELD)
+        self.assertEqual(booking.hold(self.ids, self.user)[0], None)
+        self.expire()
+        self.assertIsNone(booking.book(self.ticket.id, self.other_user))
+        self.ticket.refresh_from_db()
+        self.assertEqual((self.ticket.user, self.ticket.held_by, self.ticket.held_until), (self.other_user, None, None))
+
+    def test_hold_is_all_or_nothing(self):
+        """Test no ticket is held when one of them is booked or missing."""
+        booking.book(self.other_ticket.id, self.other_user)
+        self.assertEqual(booking.hold(self.ids, self.user), (booking.TICKET_ALREADY_BOOKED, None))
+        self.assertEqual(booking.hold(['not-uuid'], self.user), (booking.TICKET_NOT_FOUND, None))
+        self.assertFalse(Ticket.objects.filter(held_by=self.user).exists())
+
+    def test_confirm(self):
+        """Test confirm books all held tickets and moves counters."""
+        self.assertEqual(booking.confirm(self.ids, self.user), booking.TICKET_NOT_HELD)
+        booking.hold(self.ids, self.user)
+        self.assertEqual(booking.confirm(self.ids, self.other_user), booking.TICKET_NOT_HELD)
+        self.assertIsNone(booking.confirm(self.ids, self.user))
+        self.assertEqual(Ticket.objects.filter(user=self.user, held_by__isnull=True).count(), 2)
+        counters = FilmCinema.objects.values_list(*availability.COUNTERS).get(id=self.ticket.film_cinema_id)
+        self.assertEqual(counters, (0, 2))
+
+    def test_confirm_expired_hold(self):
+        """Test expired hold is not confirmed."""
+        booking.hold(self.ids, self.user)
+        self.expire()
+        self.assertEqual(booking.confirm(self.ids, self.user), booking.TICKET_NOT_HELD)
+        self.assertFalse(Ticket.objects.filter(user=self.user).exists())
+
+    def test_release_expired_holds(self):
+        """Test sweeper releases only expired holds in batches."""
+        booking.hold(self.ids, self.user)
+        self.expire()
+        third_ticket = Ticket.objects.create(place='Seat 3', film_cinema=self.ticket.film_cinema)
+        booking.hold([third_ticket.id], self.other_user)
+        self.assertEqual(booking.release_expired_holds(batch_size=1), 2)
+        self.assertEqual(list(Ticket.objects.filter(held_by__isnull=False).values_list('id', flat=True)), [
+            third_ticket.id,
+        ])
+
+    def test_rest_hold_and_confirm(self):
+        """Test tickets are held and confirmed through REST."""
+        client = APIClient()
+        client.force_authenticate(self.user)
+        data = {'tickets': [str(ticket_id) for ticket_id in self.ids]}
+        response = client.post(reverse('ticket-hold'), data, format='json')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        other_client = APIClient()
+        other_client.force_authenticate(self.other_user)
+        response = other_client.post(reverse('ticket-hold'), data, format='json')
+        self.assertEqual(response.status_code, status.HTTP_409_CONFLICT)
+        response = client.post(reverse('ticket-confirm'), data, format='json')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(len(response.data), 2)
+        response = client.post(reverse('ticket-confirm'), {'tickets': []}, format='json')
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+
+class ConcurrentBookingTest(TransactionTestCase):
+    """Test for booking one ticket from many threads, they need committed rows, so it is not a TestCase."""
+
+    def _fixture_teardown(self) -> None:
+        """Delete rows in dependency order, flush skips api_data tables and cannot truncate users they reference."""
+        Address.objects.all().delete()
+        Film.objects.all().delete()
+        User.objects.all().delete()
+
+    def test_only_one_booker_wins(self):
+        """Test that exactly one of concurrent bookers gets the ticket."""
+        ticket = create_ticket()
+        users = [
+            User.objects.create_user(username=f'user{index}', password='user')
+            for index in range(CONCURRENT_BOOKERS)
+        ]
+
+        def book(user: User) -> str | None:
+            try:
+                return booking.book(ticket.id, user)
+            finally:
+                connection.close()
+
+        with ThreadPoolExecutor(max_workers=CONCURRENT_BOOKERS) as executor:
+            results = list(executor.map(book, users))
+
+        self.assertEqual(results.count(None), 1)
+        ticket.refresh_from_db()
+        self.assertEqual(ticket.user, users[results.index(None)])
+
+
+class SeatBookingTest(TestCase):
+    """Test for booking seats of screening."""
+
+    def setUp(self) -> None:
+        """Set up things for tests."""
+        self.client = test_client.Client()
+        self.user = User.objects.create_user(username='user', password='user')
+        self.client.force_login(self.user)
+        film_cinema = create_ticket().film_cinema
+        self.screening = Screening.objects.create(
+            film_cinema=film_cinema, hall='Hall 1', start_time=datetime.now(tz=timezone.utc), capacity=HALL_CAPACITY,
+        )
+        self.book_seat_url = f'/book_seat/?screening_id={self.screening.id}'
+
+    def test_book_seat(self):
+        """Test booking seat flips its bit and creates ticket."""
+        response = self.client.post(self.book_seat_url, {'seat': 42})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.screening.refresh_from_db()
+        self.assertTrue(self.screening.seat_map.is_booked(42))
+        self.assertEqual(self.screening.seat_map.free_count, HALL_CAPACITY - 1)
+        self.assertTrue(Ticket.objects.filter(screening=self.screening, seat=42, user=self.user).exists())
+
+    def test_book_booked_seat(self):
+        """Test booking seat twice."""
+        self.assertIsNone(booking.book_seat(self.screening.id, 1, self.user))
+        self.assertEqual(booking.book_seat(self.screening.id, 1, self.user), booking.SEAT_NOT_AVAILABLE)
+        self.assertEqual(booking.book_seat(self.screening.id, HALL_CAPACITY + 1, self.user), booking.SEAT_NOT_AVAILABLE)
+
+    def test_cancel_seat(self):
+        """Test cancelling seat ticket releases seat."""
+        booking.book_seat(self.screening.id, 7, self.user)
+        ticket = Ticket.objects.get(screening=self.screening, seat=7)
+        self.assertIsNone(booking.cancel(ticket.id, self.user))
+        self.screening.refresh_from_db()
+        self.assertFalse(self.screening.seat_map.is_booked(7))
+        self.assertIsNone(booking.book_seat(self.screening.id, 7, self.user))
+
+    def test_seat_map_is_one_row(self):
+        """Test reading seat map of full hall costs one query."""
+        with self.assertNumQueries(1):
+            seat_map = Screening.objects.get(id=self.screening.id).seat_map
+            self.assertEqual(len(list(seat_map)), HALL_CAPACITY)
+
+    def test_save_keeps_booked_seats(self):
+        """Test that saving stale screening does not overwrite booked seats."""
+        booking.book_seat(self.screening.id, 3, self.user)
+        self.screening.hall = 'Hall 2'
+        self.screening.save()
+        self.screening.refresh_from_db()
+        self.assertTrue(self.screening.seat_map.is_booked(3))
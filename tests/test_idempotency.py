@@ -0,0 +1,109 @@
+"""Module for testing replay of writes retried with Idempotency-Key header."""
+
+
+from datetime import datetime, timedelta, timezone
+
+from django.contrib.auth.models import User
+from django.test import TestCase, override_settings
+from django.test.client import Client as TestClient
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from cinephile_server import idempotency
+from cinephile_server.models import Address, Cinema, Film, FilmCinema, IdempotencyKey, Ticket
+from tests.data import test_address_attrs, test_film_attrs
+
+KEY = 'retry-key'
+
+
+class IdempotencyTest(TestCase):
+    """Test for keys of booking views and REST writes."""
+
+    def setUp(self) -> None:
+        """Set up two free tickets and logged in clients of user and superuser."""
+        self.user = User.objects.create_user(username='user', password='user')
+        film_cinema = FilmCinema.objects.create(
+            film=Film.objects.create(**test_film_attrs),
+            cinema=Cinema.objects.create(name='cinema', address=Address.objects.create(**test_address_attrs)),
+        )
+        self.ticket = Ticket.objects.create(place='1', film_cinema=film_cinema)
+        self.other_ticket = Ticket.objects.create(place='2', film_cinema=film_cinema)
+        self.client = TestClient()
+        self.client.force_login(self.user)
+        self.api_client = APIClient()
+        self.api_client.force_authenticate(User.objects.create_superuser(username='admin', password='admin'))
+
+    def book(self, ticket: Ticket, key: str | None = KEY, client: TestClient | None = None):
+        """Post booking of ticket.
+
+        Args:
+            ticket: booked ticket
+            key: idempotency key or None to send no key
+            client: client of user, the client of setUp by default
+
+        Returns:
+            HttpResponse: response
+        """
+        headers = {} if key is None else {idempotency.HEADER: key}
+        return (client or self.client).post(f'/book_tickets/?ticket_id={ticket.id}', headers=headers)
+
+    def test_retried_booking_is_replayed(self):
+        """Test retry gets the first response and does not book again."""
+        first = self.book(self.ticket)
+        self.assertEqual(first.status_code, status.HTTP_200_OK)
+        retry = self.book(self.ticket)
+        self.assertEqual((retry.status_code, retry.content), (first.status_code, first.content))
+        self.assertEqual(retry[idempotency.REPLAYED_HEADER], 'true')
+        self.assertContains(self.book(self.ticket, key=None), 'the ticket is already booked')
+        self.assertEqual(IdempotencyKey.objects.count(), 1)
+
+    def test_key_is_scoped_by_user_and_request(self):
+        """Test key is not shared by users and cannot be reused for another request."""
+        self.book(self.ticket)
+        response = self.book(self.other_ticket)
+        self.assertEqual(response.status_code, idempotency.UNPROCESSABLE)
+        self.assertFalse(Ticket.objects.filter(id=self.other_ticket.id, user__isnull=False).exists())
+        other_client = TestClient()
+        other_client.force_login(User.objects.create_user(username='other', password='other'))
+        self.assertNotIn(idempotency.REPLAYED_HEADER, self.book(self.other_ticket, client=other_client))
+        self.assertEqual(self.book(self.ticket, key='k' * (idempotency.MAX_KEY_LENGTH + 1)).status_code, 400)
+
+    @override_settings(IDEMPOTENCY_WAIT_SECONDS=0)
+    def test_duplicate_of_running_request(self):
+        """Test duplicate of request which is still running is not run and gets conflict."""
+        self.book(self.ticket)
+        IdempotencyKey.objects.update(status_code=None)
+        response = self.book(self.ticket)
+        self.assertEqual(response.status_code, idempotency.CONFLICT)
+        self.assertContains(response, idempotency.KEY_IN_PROGRESS, status_code=idempotency.CONFLICT)
+
+    def test_expired_key_runs_again(self):
+        """Test request with expired key runs the view and stores the new response."""
+        self.book(self.ticket)
+        IdempotencyKey.objects.update(expires_at=datetime.now(tz=timezone.utc) - timedelta(seconds=1))
+        response = self.book(self.ticket)
+        self.assertNotIn(idempotency.REPLAYED_HEADER, response)
+        self.assertContains(response, 'the ticket is already booked')
+
+    def test_rest_create_is_replayed(self):
+        """Test retried REST create makes one row and validation errors release the key."""
+        headers = {idempotency.HEADER: KEY}
+        response = self.api_client.post('/rest/address/', {'city_name': 'city'}, format='json', headers=headers)
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertFalse(IdempotencyKey.objects.exists())
+        first = self.api_client.post('/rest/address/', test_address_attrs, format='json', headers=headers)
+        self.assertEqual(first.status_code, status.HTTP_201_CREATED)
+        retry = self.api_client.post('/rest/address/', test_address_attrs, format='json', headers=headers)
+        self.assertEqual((retry.status_code, retry.content), (first.status_code, first.content))
+        self.assertEqual(retry[idempotency.REPLAYED_HEADER], 'true')
+        self.assertEqual(Address.objects.count(), 2)
+
+    def test_prune_expired(self):
+        """Test expired keys are deleted in batches and live keys are kept."""
+        start = datetime.now(tz=timezone.utc) - timedelta(hours=2, minutes=30)
+        IdempotencyKey.objects.bulk_create([
+            IdempotencyKey(digest=str(index), fingerprint='', expires_at=start + timedelta(hours=index))
+            for index in range(5)
+        ])
+        self.assertEqual(idempotency.prune_expired(batch_size=2), 3)
+        self.assertEqual(sorted(IdempotencyKey.objects.values_list('digest', flat=True)), ['3', '4'])
@@ -0,0 +1,117 @@
+"""Module for testing poster store."""
+
+
+from base64 import b64decode
+from hashlib import sha256
+from io import StringIO
+from tempfile import TemporaryDirectory
+from unittest import skipIf
+
+from django.core.exceptions import ValidationError
+from django.core.management import call_command
+from django.test import TestCase, override_settings
+from django.test.client import Client as TestClient
+from rest_framework import status
+
+from cinephile_server import images, page_cache
+from cinephile_server.models import Film
+from tests.data import TEST_DATA_URI, TEST_PNG_BASE64, TEST_URL_IMAGE, test_film_attrs
+
+TEST_REFERENCE = f'{sha256(b64decode(TEST_PNG_BASE64)).hexdigest()}.png'
+
+
+class ImageStoreTest(TestCase):
+    """Test for storing and serving posters."""
+
+    def setUp(self) -> None:
+        """Use temporary image store."""
+        self.directory = TemporaryDirectory()
+        settings_override = override_settings(IMAGE_STORE_ROOT=self.directory.name)
+        settings_override.enable()
+        self.addCleanup(settings_override.disable)
+        self.addCleanup(self.directory.cleanup)
+        self.client = TestClient()
+
+    def test_save_extracts_data_uri(self):
+        """Test that data uri is moved to store on save."""
+        film = Film.objects.create(**{**test_film_attrs, 'url_image': TEST_DATA_URI})
+        film.refresh_from_db()
+        self.assertIsNone(film.url_image)
+        self.assertEqual(film.poster, TEST_REFERENCE)
+        self.assertTrue(images.get_path(film.poster).exists())
+        self.assertEqual(film.card_image_url, f'/posters/card/{TEST_REFERENCE}')
+
+    def test_external_url_is_kept(self):
+        """Test that external image url is not touched."""
+        film = Film.objects.create(**{**test_film_attrs, 'url_image': TEST_URL_IMAGE})
+        self.assertIsNone(film.poster)
+        self.assertEqual(film.card_image_url, TEST_URL_IMAGE)
+
+    def test_serve_poster(self):
+        """Test poster is served with cache headers and etag."""
+        reference, future = images.store(b64decode(TEST_PNG_BASE64), 'image/png')
+        future.result()
+        response = self.client.get(f'/posters/original/{reference}')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response['Content-Type'], 'image/png')
+        self.assertIn('immutable', response['Cache-Control'])
+        response = self.client.get(f'/posters/original/{reference}', HTTP_IF_NONE_MATCH=response['ETag'])
+        self.assertEqual(response.status_code, status.HTTP_304_NOT_MODIFIED)
+
+    @skipIf(images.Image is None, 'Pillow is not installed')
+    def test_thumbnails(self):
+        """Test thumbnails are generated and served."""
+        reference, future = images.store(b64decode(TEST_PNG_BASE64), 'image/png')
+        future.result()
+        response = self.client.get(f'/posters/card/{reference}')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response['Content-Type'], 'image/webp')
+
+    def test_missing_poster(self):
+        """Test unknown poster and size."""
+        self.assertEqual(self.client.get(f'/posters/card/{TEST_REFERENCE}').status_code, status.HTTP_404_NOT_FOUND)
+        self.assertEqual(self.client.get('/posters/card/../settings.py').status_code, status.HTTP_404_NOT_FOUND)
+        images.store(b64decode(TEST_PNG_BASE64), 'image/png')[1].result()
+        self.assertEqual(self.client.get(f'/posters/huge/{TEST_REFERENCE}').status_code, status.HTTP_404_NOT_FOUND)
+
+    def test_extract_command(self):
+        """Test command extracts inline images written bypassing save."""
+        film = Film.objects.create(**test_film_attrs)
+        Film.objects.filter(id=film.id).update(url_image=TEST_DATA_URI)
+        call_command('extract_images', stdout=StringIO())
+        film.refresh_from_db()
+        self.assertIsNone(film.url_image)
+        self.assertEqual(film.poster, TEST_REFERENCE)
+
+    @override_settings(IMAGE_MAX_BYTES=1024)
+    def test_invalid_images_are_not_stored(self):
+        """Test images larger than limit, of other content type or unreadable are rejected."""
+        data = b64decode(TEST_PNG_BASE64)
+        invalid_images = [(data * 20, 'image/png'), (data, 'image/jpeg')]
+        if images.Image is not None:
+            invalid_images.append((data[:16] + bytes(32), 'image/png'))
+        for invalid_image in invalid_images:
+            with self.subTest(content_type=invalid_image[1], size=len(invalid_image[0])):
+                with self.assertRaises(images.InvalidImageError):
+                    images.store(*invalid_image)
+        self.assertFalse(any(images.get_root().iterdir()))
+        film = Film(**{**test_film_attrs, 'url_image': 'data:image/jpeg;base64,' + TEST_PNG_BASE64})
+        with self.assertRaises(ValidationError):
+            film.full_clean()
+
+    def test_extract_command_evicts_pages(self):
+        """Test command keeps invalid images inline and evicts cached pages of extracted ones."""
+        page_cache.get_cache().clear()
+        film = Film.objects.create(**test_film_attrs)
+        invalid_film = Film.objects.create(**{**test_film_attrs, 'name': 'invalid'})
+        self.assertNotContains(self.client.get(f'/films/{film.id}/'), TEST_REFERENCE)
+        Film.objects.filter(id=film.id).update(url_image=TEST_DATA_URI)
+        invalid_uri = f'data:image/gif;base64,{TEST_PNG_BASE64}'
+        Film.objects.filter(id=invalid_film.id).update(url_image=invalid_uri)
+        stderr = StringIO()
+        with self.captureOnCommitCallbacks(execute=True):
+            call_command('extract_images', stdout=StringIO(), stderr=stderr)
+        self.assertContains(self.client.get(f'/films/{film.id}/'), TEST_REFERENCE)
+        invalid_film.refresh_from_db()
+        self.assertEqual((invalid_film.url_image, invalid_film.poster), (invalid_uri, None))
+        self.assertIn(f'Film {invalid_film.id}: Image is not image/gif', stderr.getvalue())
@@ -0,0 +1,165 @@
+"""Module for testing live ticket changes pushed to detail pages."""
+
+
+import asyncio
+import json
+import warnings
+from datetime import datetime, timezone
+from uuid import uuid4
+
+from asgiref.sync import async_to_sync, sync_to_async
+from django.contrib.auth.models import User
+from django.test import AsyncClient, Client, TestCase, override_settings
+from django.urls import reverse
+from rest_framework import status
+
+from cinephile_server import booking, live
+from cinephile_server.models import Address, Cinema, Film, FilmCinema, Screening, Ticket
+from tests.data import test_address_attrs, test_film_attrs
+
+SHOW_TIME = datetime(2030, 1, 1, 18, 30, tzinfo=timezone.utc)
+
+
+@override_settings(LIVE_UPDATES_ENABLED=True, LIVE_POLL_INTERVAL=60, LIVE_STREAM_TIMEOUT=0)
+class LiveTest(TestCase):
+    """Test for events published by bookings and fanned out by the feed of a process."""
+
+    def setUp(self) -> None:
+        """Set up free ticket and screening of film shown in cinema and an empty feed."""
+        live.get_cache().clear()
+        self.user = User.objects.create_user(username='user', password='user')
+        self.film = Film.objects.create(**test_film_attrs)
+        self.cinema = Cinema.objects.create(name='cinema', address=Address.objects.create(**test_address_attrs))
+        self.film_cinema = FilmCinema.objects.create(film=self.film, cinema=self.cinema)
+        self.ticket = Ticket.objects.create(place='1', film_cinema=self.film_cinema, film_date=SHOW_TIME)
+        self.screening = Screening.objects.create(
+            film_cinema=self.film_cinema, start_time=SHOW_TIME, hall='Hall 1', capacity=10,
+        )
+
+    def get_states(self, kind: str = live.FILM, after: int = 0) -> list[tuple]:
+        """Return tickets, states and seats of events published after number.
+
+        Args:
+            kind: "film" or "cinema"
+            after: number of the last received event
+
+        Returns:
+            list[tuple]: tickets, states and seats
+        """
+        object_id = self.film.id if kind == live.FILM else self.cinema.id
+        events = async_to_sync(live.get_missed)(kind, object_id, after)
+        return [(event['ticket'], event['state'], event['seat']) for _, event in events]
+
+    def book(self) -> None:
+        """Book free ticket and commit."""
+        with self.captureOnCommitCallbacks(execute=True):
+            booking.book(self.ticket.id, self.user)
+
+    def test_bookings_publish_events(self):
+        """Test booking and cancelling of tickets and seats publish their states after commit."""
+        with self.captureOnCommitCallbacks() as callbacks:
+            booking.book(self.ticket.id, self.user)
+        self.assertFalse(self.get_states())
+        for callback in callbacks:
+            callback()
+        with self.captureOnCommitCallbacks(execute=True):
+            booking.cancel(self.ticket.id, self.user)
+            booking.book_seat(self.screening.id, 2, self.user)
+        seat_ticket = str(Ticket.objects.get(screening=self.screening).id)
+        with self.captureOnCommitCallbacks(execute=True):
+            booking.cancel(seat_ticket, self.user)
+        ticket = str(self.ticket.id)
+        self.assertEqual(self.get_states(live.CINEMA), [
+            (ticket, live.BOOKED, None), (ticket, live.FREE, None), (seat_ticket, live.BOOKED, 2),
+            (seat_ticket, live.FREE, 2), (seat_ticket, live.DELETED, 2),
+        ])
+        self.assertEqual(self.get_states(after=3), self.get_states()[3:])
+
+    def test_saved_tickets_publish_events(self):
+        """Test tickets saved and deleted through models, as in admin and REST, publish their states."""
+        ticket = str(self.ticket.id)
+        with self.captureOnCommitCallbacks(execute=True):
+            self.ticket.user = self.user
+            self.ticket.save()
+            self.ticket.delete()
+        self.assertEqual(self.get_states(), [(ticket, live.BOOKED, None), (ticket, live.DELETED, None)])
+
+    def test_feed_fans_out(self):
+        """Test one poll of the feed delivers event to every subscriber of its film and cinema.
+
+        The polling task is cancelled, so the test polls the feed itself.
+        """
+
+        async def receive() -> list:
+            feed = live.get_feed()
+            subscriptions = [
+                feed.subscribe(live.FILM, self.film.id),
+                feed.subscribe(live.FILM, self.film.id),
+                feed.subscribe(live.CINEMA, self.cinema.id),
+                feed.subscribe(live.FILM, uuid4()),
+            ]
+            feed.task.cancel()
+            await sync_to_async(self.book)()
+            await feed.poll()
+            sizes = [subscription.queue.qsize() for subscription in subscriptions]
+            for subscription in subscriptions:
+                feed.unsubscribe(subscription)
+            return [sizes, feed.subscriptions]
+
+        sizes, subscriptions = async_to_sync(receive)()
+        self.assertEqual(sizes, [1, 1, 1, 0])
+        self.assertFalse(subscriptions)
+
+    def test_slow_subscriber_is_dropped(self):
+        """Test subscriber whose queue is full is dropped instead of blocking the feed."""
+
+        async def overflow() -> tuple:
+            feed = live.Feed(asyncio.get_running_loop())
+            subscription = live.Subscription(live.FILM, str(self.film.id))
+            feed.subscriptions[(subscription.kind, subscription.object_id)] = {subscription}
+            event = {live.FILM: str(self.film.id), live.CINEMA: str(self.cinema.id)}
+            for number in range(live.QUEUE_SIZE + 1):
+                feed.dispatch(number, event)
+            return subscription.overflowed, feed.subscriptions
+
+        overflowed, subscriptions = async_to_sync(overflow)()
+        self.assertTrue(overflowed)
+        self.assertFalse(subscriptions)
+
+    async def test_stream(self):
+        """Test stream replays events missed after Last-Event-ID in Server-Sent Events format."""
+        await sync_to_async(self.book)()
+        client = AsyncClient()
+        response = await client.get(reverse('film_live', args=[self.film.id]), headers={'Last-Event-ID': '0'})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response['Content-Type'], live.CONTENT_TYPE)
+        self.assertEqual(response['Cache-Control'], 'no-cache')
+        body = b''.join([chunk async for chunk in response.streaming_content]).decode()
+        self.assertTrue(body.startswith(f'retry: {live.RETRY_MILLISECONDS}\n\n'))
+        self.assertIn('id: 1\nevent: ticket\ndata: ', body)
+        data = json.loads(body.split('data: ')[1].split('\n')[0])
+        self.assertEqual((data['ticket'], data['state']), (str(self.ticket.id), live.BOOKED))
+        response = await client.get(reverse('cinema_live', args=[uuid4()]))
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+
+    def test_detail_pages_subscribe(self):
+        """Test detail pages subscribe to their streams when live updates are enabled."""
+        response = self.client.get(reverse('film', args=[self.film.id]))
+        self.assertContains(response, f'new EventSource(\'{reverse("film_live", args=[self.film.id])}\')')
+        response = self.client.get(reverse('cinema', args=[self.cinema.id]))
+        self.assertContains(response, f'new EventSource(\'{reverse("cinema_live", args=[self.cinema.id])}\')')
+
+    @override_settings(LIVE_UPDATES_ENABLED=False)
+    def test_wsgi_does_not_stream(self):
+        """Test WSGI deployment neither subscribes pages to streams nor buffers them."""
+        client = Client()
+        with warnings.catch_warnings(record=True) as caught:
+            warnings.simplefilter('always')
+            for kind, obj in (('film', self.film), ('cinema', self.cinema)):
+                response = client.get(reverse(kind, args=[obj.id]))
+                self.assertEqual(response.status_code, status.HTTP_200_OK)
+                self.assertNotContains(response, 'EventSource')
+                response = client.get(reverse(f'{kind}_live', args=[obj.id]))
+                self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+                self.assertFalse(response.streaming)
+        self.assertFalse([warning for warning in caught if 'StreamingHttpResponse' in str(warning.message)])
@@ -0,0 +1,83 @@
+"""Module for testing request metrics."""
+
+
+from django.contrib.auth.models import User
+from django.db import connection
+from django.test import TestCase, override_settings
+from django.test.client import Client as TestClient
+from django.test.utils import CaptureQueriesContext
+from rest_framework import status
+from rest_framework.authtoken.models import Token
+from rest_framework.test import APIClient
+
+from cinephile_server import metrics
+from cinephile_server.models import Film
+from tests.data import test_film_attrs
+
+OTHER_PROCESS_KEY = f'{metrics.KEY_PREFIX}:process:other:1'
+
+
+@override_settings(PAGE_CACHE_TIMEOUT=0, METRICS_FLUSH_INTERVAL=0)
+class MetricsTest(TestCase):
+    """Test for metrics middleware and endpoint."""
+
+    def setUp(self) -> None:
+        """Set up empty metrics and superuser client."""
+        metrics.reset()
+        self.addCleanup(metrics.reset)
+        self.client = TestClient()
+        superuser = User.objects.create_user(username='metrics', password='metrics', is_superuser=True)
+        self.admin_client = APIClient()
+        self.admin_client.credentials(HTTP_AUTHORIZATION=f'Bearer {Token.objects.create(user=superuser).key}')
+        Film.objects.create(**test_film_attrs)
+
+    def test_request_is_measured(self):
+        """Test queries, template time and size of page are recorded by url name."""
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get('/films/')
+        stats = metrics.collect()[('films', 'GET')]
+        self.assertEqual(stats.requests, 1)
+        self.assertEqual(stats.queries, len(queries))
+        self.assertGreater(stats.sql_seconds, 0)
+        self.assertGreater(stats.template_seconds, 0)
+        self.assertEqual(stats.response_bytes, len(response.content))
+        self.assertEqual(stats.statuses, {status.HTTP_200_OK: 1})
+        self.assertEqual(sum(stats.buckets), 1)
+
+    def test_endpoint(self):
+        """Test metrics are served to superusers in text format."""
+        self.client.get('/films/')
+        self.assertEqual(self.client.get('/metrics').status_code, status.HTTP_401_UNAUTHORIZED)
+        response = self.admin_client.get('/metrics')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response['Content-Type'], metrics.CONTENT_TYPE)
+        text = response.content.decode()
+        self.assertIn('cinephile_request_duration_seconds_bucket{view="films",method="GET",le="+Inf"} 1', text)
+        self.assertIn('cinephile_request_duration_seconds_count{view="films",method="GET"} 1', text)
+        self.assertIn('cinephile_responses_total{view="films",method="GET",status="200"} 1', text)
+
+    def test_processes_are_summed(self):
+        """Test snapshots written by other processes are added to totals."""
+        self.client.get('/films/')
+        other = metrics.ViewStats()
+        other.add(1, metrics.RequestMeasure(queries=3), status.HTTP_200_OK, 10)
+        cache = metrics.get_cache()
+        cache.set(OTHER_PROCESS_KEY, {('films', 'GET'): other})
+        cache.set(metrics.PROCESSES_KEY, cache.get(metrics.PROCESSES_KEY) | {OTHER_PROCESS_KEY})
+        stats = metrics.collect()[('films', 'GET')]
+        self.assertEqual(stats.requests, 2)
+        self.assertEqual(stats.statuses, {status.HTTP_200_OK: 2})
+        cache.delete(OTHER_PROCESS_KEY)
+        self.assertEqual(metrics.collect()[('films', 'GET')].requests, 1)
+
+    @override_settings(METRICS_SERVER_TIMING=True)
+    def test_server_timing(self):
+        """Test Server-Timing header."""
+        response = self.client.get('/films/')
+        self.assertRegex(response['Server-Timing'], r'^db;dur=[\d.]+;desc="\d+ queries", tpl;dur=[\d.]+, total;dur=')
+
+    @override_settings(METRICS_ENABLED=False)
+    def test_disabled(self):
+        """Test requests are not measured when metrics are disabled."""
+        self.client.get('/films/')
+        self.assertEqual(metrics.collect(), {})
@@ -2,14 +2,24 @@
 
 
 from datetime import datetime, timezone
+from io import StringIO
 from typing import Iterable
 
+from django.contrib.auth.models import User
 from django.core.exceptions import ValidationError
+from django.core.management import CommandError, call_command
+from django.db.models import Count, Max, Min
 from django.test import TestCase
 
 from cinephile_server.models import Address, Cinema, Film, FilmCinema, Ticket
+from cinephile_server.seats import SeatMap, resize_bitmap
 from tests.data import TEST_URL_IMAGE, test_address_attrs, test_film_attrs
 
+GENERATED_COUNTS = {
+    'addresses': 3, 'cinemas': 4, 'films': 6, 'cinemas_per_film': 2, 'users': 5, 'tickets': 200,
+    'booking_ratio': 0.5, 'chunk_size': 64,
+}
+
 
 def create_model_test(model_class, valid_attrs: dict, bunch_of_invalid_attrs: Iterable = None):
     """Create test for model.
@@ -134,3 +144,79 @@ class TicketModelTest(TestCase):
         instance = Ticket(**attrs)
         instance.full_clean()
         instance.save()
+
+
+class SeatMapTest(TestCase):
+    """Test for seat bitmap."""
+
+    def test_with_seat(self):
+        """Test booking and releasing seats."""
+        seat_map = SeatMap(bytes(2), 10)
+        seat_map = SeatMap(seat_map.with_seat(10, booked=True), 10)
+        self.assertTrue(seat_map.is_booked(10))
+        self.assertEqual(str(seat_map), '0000000001')
+        self.assertEqual(seat_map.free_count, 9)
+        seat_map = SeatMap(seat_map.with_seat(10, booked=False), 10)
+        self.assertFalse(seat_map.is_booked(10))
+
+    def test_resize(self):
+        """Test resizing keeps remaining seats and drops removed ones."""
+        bitmap = SeatMap(bytes(2), 12).with_seat(2, booked=True)
+        bitmap = SeatMap(bitmap, 12).with_seat(12, booked=True)
+        self.assertEqual(str(SeatMap(resize_bitmap(bitmap, 4), 4)), '0100')
+        self.assertEqual(SeatMap(resize_bitmap(bitmap, 4), 16).booked_count, 1)
+        self.assertEqual(len(resize_bitmap(bitmap, 30)), 4)
+
+
+class GenerateDataTest(TestCase):
+    """Test for command which generates data."""
+
+    def generate(self, **options) -> str:
+        """Run command with small counts.
+
+        Args:
+            options: changed options
+
+        Returns:
+            str: output of command
+        """
+        stdout = StringIO()
+        call_command('generate_data', **{**GENERATED_COUNTS, **options}, stdout=stdout)
+        return stdout.getvalue()
+
+    def test_counts(self):
+        """Test numbers of rows, fan-out, booking ratio and dates."""
+        output = self.generate(start='2024-01-01T00:00:00', end='2024-02-01T00:00:00')
+        self.assertIn('Ticket: 200 rows', output)
+        self.assertEqual(Address.objects.count(), GENERATED_COUNTS['addresses'])
+        self.assertEqual(Cinema.objects.count(), GENERATED_COUNTS['cinemas'])
+        self.assertEqual(Film.objects.count(), GENERATED_COUNTS['films'])
+        fan_out = Film.objects.annotate(shows=Count('filmcinema')).values_list('shows', flat=True)
+        self.assertTrue(all(1 <= shows <= 2 * GENERATED_COUNTS['cinemas_per_film'] - 1 for shows in fan_out))
+        tickets = Ticket.objects.all()
+        self.assertEqual(tickets.count(), GENERATED_COUNTS['tickets'])
+        booked = tickets.filter(user__isnull=False).count()
+        self.assertTrue(0 < booked < GENERATED_COUNTS['tickets'])
+        ratings = Film.objects.aggregate(lowest=Min('rating'), highest=Max('rating'))
+        self.assertGreaterEqual(ratings['lowest'], 1)
+        self.assertLessEqual(ratings['highest'], 5)
+        dates = tickets.aggregate(first=Min('film_date'), last=Max('film_date'))
+        self.assertGreaterEqual(dates['first'], datetime(2024, 1, 1, tzinfo=timezone.utc))
+        self.assertLessEqual(dates['last'], datetime(2024, 2, 1, tzinfo=timezone.utc))
+
+    def test_seed_is_deterministic(self):
+        """Test the same seed generates the same rows."""
+        self.generate(seed=5)
+        tickets = set(Ticket.objects.values_list('id', 'film_cinema__film__name', 'place'))
+        Address.objects.all().delete()
+        Film.objects.all().delete()
+        User.objects.all().delete()
+        self.generate(seed=5)
+        self.assertEqual(set(Ticket.objects.values_list('id', 'film_cinema__film__name', 'place')), tickets)
+
+    def test_invalid_options(self):
+        """Test inconsistent options."""
+        with self.assertRaises(CommandError):
+            self.generate(booking_ratio=2)
+        with self.assertRaises(CommandError):
+            self.generate(films=0)
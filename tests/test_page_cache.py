@@ -0,0 +1,126 @@
+"""Module for testing cache of anonymous pages."""
+
+
+from tempfile import TemporaryDirectory
+
+from django.contrib.auth.models import User
+from django.core.cache import caches
+from django.test import TestCase
+from django.test.client import Client as TestClient
+from django.test.utils import override_settings
+from django.urls import reverse
+from rest_framework import status
+
+from cinephile_server import booking, page_cache
+from cinephile_server.models import Address, Cinema, Film, FilmCinema, Ticket
+from tests.data import test_address_attrs, test_film_attrs
+
+FILE_BASED_CACHE = 'django.core.cache.backends.filebased.FileBasedCache'
+
+
+@override_settings(PAGE_CACHE_TIMEOUT=300)
+class PageCacheTest(TestCase):
+    """Test for cache of anonymous pages."""
+
+    def setUp(self) -> None:
+        """Set up film shown in cinema with free ticket."""
+        page_cache.get_cache().clear()
+        self.client = TestClient(enforce_csrf_checks=True)
+        self.address = Address.objects.create(**test_address_attrs)
+        self.film = Film.objects.create(**test_film_attrs)
+        self.cinema = Cinema.objects.create(name='cinema', address=self.address)
+        film_cinema = FilmCinema.objects.create(film=self.film, cinema=self.cinema)
+        self.ticket = Ticket.objects.create(place='1', film_cinema=film_cinema)
+        self.film_url = reverse('film', args=[self.film.id])
+        self.cinema_url = reverse('cinema', args=[self.cinema.id])
+
+    def assert_cached(self, url: str, cached: bool = True) -> None:
+        """Check page is served from cache or rendered again.
+
+        Args:
+            url: url of page
+            cached: True if page must be taken from cache
+        """
+        response = self.client.get(url)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(not response.templates, cached)
+
+    def test_anonymous_page_is_cached(self):
+        """Test pages are rendered once for anonymous visitors."""
+        for url in ('/', '/films/', '/films/more/', '/cinemas/', '/cinemas/more/', self.film_url, self.cinema_url):
+            self.assert_cached(url, cached=False)
+            self.assert_cached(url)
+
+    def test_csrf_token_is_personal(self):
+        """Test cached page contains csrf token of visitor which passes csrf check."""
+        first = self.client.get(self.film_url)
+        other_client = TestClient(enforce_csrf_checks=True)
+        second = other_client.get(self.film_url)
+        self.assertFalse(second.templates)
+        self.assertNotIn(page_cache.CSRF_PLACEHOLDER, second.content.decode())
+        self.assertNotEqual(first.cookies['csrftoken'].value, second.cookies['csrftoken'].value)
+        token = second.content.decode().split('name="csrfmiddlewaretoken" value="')[1].split('"')[0]
+        response = other_client.post(
+            f"{reverse('book_ticket')}?ticket_id={self.ticket.id}", {'csrfmiddlewaretoken': token},
+        )
+        self.assertEqual(response.status_code, status.HTTP_302_FOUND)
+
+    def test_authenticated_page_is_not_cached(self):
+        """Test pages of authenticated users are always rendered."""
+        self.client.force_login(User.objects.create_user(username='viewer', password='viewer'))
+        self.assert_cached(self.film_url, cached=False)
+        self.assert_cached(self.film_url, cached=False)
+
+    def test_edit_evicts_only_pages_showing_row(self):
+        """Test edit of film evicts its pages and keeps pages of other films."""
+        other_film = Film.objects.create(**test_film_attrs)
+        other_url = reverse('film', args=[other_film.id])
+        for url in (self.film_url, self.cinema_url, other_url, '/films/', '/cinemas/'):
+            self.client.get(url)
+        with self.captureOnCommitCallbacks(execute=True):
+            self.film.name = 'renamed film'
+            self.film.save()
+        self.assert_cached(self.film_url, cached=False)
+        self.assert_cached(self.cinema_url, cached=False)
+        self.assert_cached('/films/', cached=False)
+        self.assert_cached(other_url)
+        self.assert_cached('/cinemas/')
+
+    def test_address_and_link_changes_evict_pages(self):
+        """Test address change and new link through related manager evict pages."""
+        other_cinema = Cinema.objects.create(name='other cinema', address=Address.objects.create(**test_address_attrs))
+        other_url = reverse('cinema', args=[other_cinema.id])
+        for url in (self.film_url, self.cinema_url, other_url):
+            self.client.get(url)
+        with self.captureOnCommitCallbacks(execute=True):
+            self.address.street_name = 'renamed street'
+            self.address.save()
+        self.assert_cached(self.film_url, cached=False)
+        self.assert_cached(self.cinema_url, cached=False)
+        self.assert_cached(other_url)
+        with self.captureOnCommitCallbacks(execute=True):
+            self.film.cinemas.add(other_cinema)
+        self.assert_cached(self.film_url, cached=False)
+        self.assert_cached(other_url, cached=False)
+        self.assert_cached(self.cinema_url)
+
+    def test_booking_evicts_pages(self):
+        """Test booking of ticket evicts pages which show its state."""
+        self.client.get(self.film_url)
+        with self.captureOnCommitCallbacks(execute=True):
+            booking.book(self.ticket.id, User.objects.create_user(username='booker', password='booker'))
+        response = self.client.get(self.film_url)
+        self.assertTrue(response.templates)
+        self.assertContains(response, 'This ticket has booked')
+
+    def test_file_based_cache(self):
+        """Test pages are cached in file-based cache."""
+        with TemporaryDirectory() as directory:
+            file_cache = {'BACKEND': FILE_BASED_CACHE, 'LOCATION': directory}
+            with override_settings(CACHES={'default': file_cache}):
+                self.assertEqual(caches['default'].__class__.__name__, 'FileBasedCache')
+                self.assert_cached(self.film_url, cached=False)
+                self.assert_cached(self.film_url)
+                with self.captureOnCommitCallbacks(execute=True):
+                    self.film.save()
+                self.assert_cached(self.film_url, cached=False)
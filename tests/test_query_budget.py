@@ -0,0 +1,452 @@
+"""Module for testing query budgets of all routes.
+
+Every route of cinephile_server.urls and of its REST router has a declared number of queries.
+Routes are requested with a small dataset and again after the dataset has grown, so a view
+whose query count scales with rows (N+1 queries) fails the suite. On PostgreSQL a catalog is
+analyzed with sequential scans allowed, every combination of list filters and ordering and the
+hot queries of pages are explained to check they are read by the indexes built for them.
+"""
+
+
+import sys
+from dataclasses import dataclass, field
+from datetime import datetime, timedelta, timezone
+from itertools import combinations
+from tempfile import TemporaryDirectory
+from typing import Callable
+
+from django.contrib.auth.models import User
+from django.db import connection
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import URLPattern, URLResolver, reverse
+from django.utils import timezone as django_timezone
+from django.utils.encoding import force_bytes
+from django.utils.http import urlsafe_base64_encode
+from rest_framework.authtoken.models import Token
+from rest_framework.test import APIClient
+
+from cinephile_server import booking, schedule, tokens, urls
+from cinephile_server.models import Address, Cinema, Film, FilmCinema, ScheduleEntry, Screening, Ticket
+from tests.data import TEST_DATA_URI, TEST_URL_IMAGE, test_address_attrs, test_film_attrs
+
+BASE_ROWS = 2
+GROWN_ROWS = 30
+SCREENING_CAPACITY = 100
+PASSWORD = 'budget_password'  # noqa: S105
+REPORT_HEADER = ('route', 'base', 'grown', 'budget')
+REPORT_ROW = '{0:<26}{1:>6}{2:>7}{3:>8}'
+FILTER_DAY = datetime(2030, 1, 1, tzinfo=timezone.utc)
+INDEXED_ROWS = 2000
+INDEXED_CITIES = INDEXED_ROWS // 2
+SEARCHED_FILM = 'nosferatu'
+SEARCHED_CINEMA = 'odeon'
+# rows as wide as real ones, the planner reads narrow tables sequentially however large they are
+INDEXED_DESCRIPTION = 'A restored print of a silent classic shown with live music and an introduction. ' * 2
+INDEXED_MODELS = (Address, Cinema, Film, FilmCinema, Ticket, Screening, ScheduleEntry)
+SEARCH_INDEXES = ('film_search_vector_idx', 'film_name_trgm_idx', 'cinema_search_vector_idx', 'cinema_name_trgm_idx')
+
+
+@dataclass(frozen=True)
+class Route:
+    """Request to named route and number of queries it may send."""
+
+    name: str
+    budget: int
+    method: str = 'get'
+    kwargs: Callable[['QueryBudgetTest'], dict] = field(default=lambda case: {})
+    query: Callable[['QueryBudgetTest'], str] = field(default=lambda case: '')
+    data: Callable[['QueryBudgetTest'], dict] = field(default=lambda case: {})
+    auth: str = 'session'
+
+
+def detail(name: str, budget: int, attribute: str) -> Route:
+    """Return route of object detail.
+
+    Args:
+        name: name of route
+        budget: number of queries
+        attribute: attribute of test case with requested object
+
+    Returns:
+        Route: route with pk of object
+    """
+    return Route(name, budget, kwargs=lambda case: {'pk': getattr(case, attribute).pk})
+
+
+ROUTES = (
+    Route('api-root', 1),
+    Route('cinema-list', 4),
+    detail('cinema-detail', 4, 'cinema'),
+    Route('film-list', 4),
+    detail('film-detail', 4, 'film'),
+    Route('filmcinema-list', 3),
+    detail('filmcinema-detail', 3, 'film_cinema'),
+    Route('ticket-list', 3),
+    detail('ticket-detail', 3, 'ticket'),
+    Route('ticket-export', 2),
+    Route('ticket-hold', 4, method='post', data=lambda case: {'tickets': [str(case.free_ticket().pk)]}),
+    Route('ticket-confirm', 10, method='post', data=lambda case: {'tickets': [str(case.held_ticket().pk)]}),
+    Route('screening-list', 3),
+    detail('screening-detail', 3, 'screening'),
+    Route(
+        'screening-book', 16, method='post',
+        kwargs=lambda case: {'pk': case.screening.pk}, data=lambda case: {'seat': case.next_seat()},
+    ),
+    Route('address-list', 3),
+    detail('address-detail', 3, 'address'),
+    Route('scheduleentry-list', 3, query=lambda case: case.schedule_query()),
+    detail('scheduleentry-detail', 3, 'schedule_entry'),
+    Route('user-list', 2),
+    detail('user-detail', 2, 'user'),
+    Route(
+        'signed_token', 1, method='post', auth='anonymous',
+        data=lambda case: {'username': case.user.username, 'password': PASSWORD},
+    ),
+    Route('revoke_signed_token', 0, method='post', auth='signed'),
+    Route('home', 0, auth='anonymous'),
+    Route('profile', 2),
+    Route('register', 2),
+    Route('films', 4),
+    Route('films_more', 4),
+    Route('cinemas', 4),
+    Route('cinemas_more', 4),
+    detail('film', 9, 'film'),
+    detail('cinema', 9, 'cinema'),
+    detail('film_live', 1, 'film'),
+    detail('cinema_live', 1, 'cinema'),
+    Route('book_ticket', 10, method='post', query=lambda case: f'ticket_id={case.free_ticket().pk}'),
+    Route('cancel_ticket', 11, method='post', query=lambda case: f'ticket_id={case.booked_ticket().pk}'),
+    Route(
+        'book_seat', 17, method='post',
+        query=lambda case: f'screening_id={case.screening.pk}', data=lambda case: {'seat': case.next_seat()},
+    ),
+    Route('tickets', 3),
+    Route('schedule', 1, query=lambda case: case.schedule_query()),
+    Route('poster', 0, auth='anonymous', kwargs=lambda case: {'size': 'original', 'reference': case.film.poster}),
+    Route('metrics', 1),
+    Route('login', 0),
+    Route('logout', 4, method='post'),
+    Route('password_change', 2),
+    Route('password_change_done', 2),
+    Route('password_reset', 0, auth='anonymous'),
+    Route('password_reset_done', 0, auth='anonymous'),
+    Route(
+        'password_reset_confirm', 1, auth='anonymous',
+        kwargs=lambda case: {'uidb64': urlsafe_base64_encode(force_bytes(case.user.pk)), 'token': 'expired'},
+    ),
+    Route('password_reset_complete', 0, auth='anonymous'),
+)
+
+LIST_FILTERS = {
+    'film-list': (
+        lambda case: {'rating_min': '2', 'rating_max': '4'},
+        lambda case: {'cinema': case.cinema.pk},
+        lambda case: {'ordering': '-rating'},
+    ),
+    'cinema-list': (
+        lambda case: {'city': case.address.city_name},
+        lambda case: {'film': case.film.pk},
+        lambda case: {'ordering': '-name'},
+    ),
+    'ticket-list': (
+        lambda case: {'date_from': FILTER_DAY.isoformat(), 'date_to': (FILTER_DAY + timedelta(days=7)).isoformat()},
+        lambda case: {'booked': 'false'},
+        lambda case: {'film': case.film.pk},
+        lambda case: {'cinema': case.cinema.pk},
+        lambda case: {'ordering': '-film_date'},
+    ),
+}
+
+
+def get_route_names(patterns: list) -> set[str]:
+    """Collect names of routes including nested ones.
+
+    Args:
+        patterns: url patterns
+
+    Returns:
+        set[str]: names of routes
+    """
+    names = set()
+    for pattern in patterns:
+        if isinstance(pattern, URLResolver):
+            names.update(get_route_names(pattern.url_patterns))
+        elif isinstance(pattern, URLPattern):
+            names.add(pattern.name)
+    return names
+
+
+class QueryBudgetTest(TestCase):
+    """Test that every route stays within its query budget while data grows."""
+
+    def setUp(self) -> None:
+        """Set up user, main film and cinema and a small dataset around them."""
+        directory = TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        settings_override = override_settings(
+            PAGE_CACHE_TIMEOUT=0, IMAGE_STORE_ROOT=directory.name, LIVE_UPDATES_ENABLED=True, LIVE_STREAM_TIMEOUT=0,
+        )
+        settings_override.enable()
+        self.addCleanup(settings_override.disable)
+        self.user = User.objects.create_user(username='budget', password=PASSWORD, is_superuser=True)
+        self.token = Token.objects.create(user=self.user)
+        self.address = Address.objects.create(**test_address_attrs)
+        self.film = Film.objects.create(**{**test_film_attrs, 'url_image': TEST_DATA_URI})
+        self.cinema = Cinema.objects.create(name='budget cinema', address=self.address)
+        self.film_cinema = FilmCinema.objects.create(film=self.film, cinema=self.cinema)
+        self.screening = Screening.objects.create(
+            film_cinema=self.film_cinema, hall='1', start_time=datetime.now(tz=timezone.utc),
+            capacity=SCREENING_CAPACITY,
+        )
+        self.ticket = Ticket.objects.create(place='1', film_cinema=self.film_cinema, user=self.user)
+        self.schedule_entry = ScheduleEntry.objects.get(film_cinema=self.film_cinema)
+        self.seat = 0
+        self.grow(BASE_ROWS)
+
+    def grow(self, rows: int) -> None:
+        """Add films and cinemas shown with main cinema and film with tickets and screenings.
+
+        Args:
+            rows: number of added films and cinemas
+        """
+        start_time = datetime.now(tz=timezone.utc) + timedelta(days=1)
+        for index in range(rows):
+            film = Film.objects.create(**{**test_film_attrs, 'name': f'budget film {index}'})
+            cinema = Cinema.objects.create(name=f'budget cinema {index}', address=self.address)
+            for film_cinema in (
+                FilmCinema.objects.create(film=film, cinema=self.cinema),
+                FilmCinema.objects.create(film=self.film, cinema=cinema),
+            ):
+                Ticket.objects.create(place=str(index), film_cinema=film_cinema)
+                Ticket.objects.create(place=str(index), film_cinema=film_cinema, user=self.user)
+                Screening.objects.create(
+                    film_cinema=film_cinema, hall=str(index), start_time=start_time, capacity=SCREENING_CAPACITY,
+                )
+
+    def free_ticket(self) -> Ticket:
+        """Return ticket which may be booked.
+
+        Returns:
+            Ticket: free ticket
+        """
+        return Ticket.objects.filter(user__isnull=True, screening__isnull=True).first()
+
+    def held_ticket(self) -> Ticket:
+        """Return free ticket held by user.
+
+        Returns:
+            Ticket: held ticket
+        """
+        ticket = self.free_ticket()
+        booking.hold([ticket.id], self.user)
+        return ticket
+
+    def booked_ticket(self) -> Ticket:
+        """Return ticket without seat booked by user which is not requested directly.
+
+        Returns:
+            Ticket: booked ticket
+        """
+        return Ticket.objects.filter(user=self.user, screening__isnull=True).exclude(id=self.ticket.id).first()
+
+    def schedule_query(self) -> str:
+        """Return query of schedule of main cinema city today.
+
+        Returns:
+            str: query string
+        """
+        return f'city={self.address.city_name}&day={django_timezone.localdate().isoformat()}'
+
+    def next_seat(self) -> int:
+        """Return seat of main screening which was not booked yet.
+
+        Returns:
+            int: seat number
+        """
+        self.seat += 1
+        return self.seat
+
+    def get_client(self, auth: str) -> APIClient:
+        """Return client authenticated for pages and REST or anonymous client.
+
+        Args:
+            auth: "session", "signed" or "anonymous"
+
+        Returns:
+            APIClient: client
+        """
+        client = APIClient()
+        if auth == 'session':
+            client.force_login(self.user)
+            client.credentials(HTTP_AUTHORIZATION=f'Bearer {self.token.key}')
+        elif auth == 'signed':
+            client.credentials(HTTP_AUTHORIZATION=f'Bearer {tokens.issue(self.user).token}')
+        return client
+
+    def measure(self, route: Route) -> int:
+        """Request route and count its queries.
+
+        Args:
+            route: requested route
+
+        Returns:
+            int: number of queries
+        """
+        url = reverse(route.name, kwargs=route.kwargs(self))
+        query = route.query(self)
+        if query:
+            url = f'{url}?{query}'
+        request = getattr(self.get_client(route.auth), route.method)
+        data = route.data(self)
+        with CaptureQueriesContext(connection) as queries:
+            response = request(url, data)
+            if response.streaming:
+                b''.join(response)
+        self.assertLess(response.status_code, 400, f'{route.method.upper()} {url}')
+        return len(queries)
+
+    def test_all_routes_have_budget(self):
+        """Test that a new route cannot be added without query budget."""
+        self.assertEqual({route.name for route in ROUTES}, get_route_names(urls.urlpatterns))
+
+    def test_query_budgets(self):
+        """Test query counts do not exceed budgets and do not grow with data."""
+        base = {route.name: self.measure(route) for route in ROUTES}
+        self.grow(GROWN_ROWS)
+        grown = {route.name: self.measure(route) for route in ROUTES}
+        report = [REPORT_ROW.format(*REPORT_HEADER)]
+        for route in ROUTES:
+            report.append(REPORT_ROW.format(route.name, base[route.name], grown[route.name], route.budget))
+        sys.stderr.write('\n{0}\n'.format('\n'.join(report)))
+        for route in ROUTES:
+            with self.subTest(route=route.name):
+                self.assertEqual(grown[route.name], base[route.name], 'query count grows with data')
+                self.assertLessEqual(grown[route.name], route.budget, 'query budget is exceeded')
+
+
+@override_settings(PAGE_CACHE_TIMEOUT=0)
+class IndexUsageTest(TestCase):
+    """Test that list filters and hot queries of pages are read by their indexes on a grown catalog."""
+
+    @classmethod
+    def setUpTestData(cls) -> None:
+        """Set up a catalog large enough for the planner to prefer indexes and analyze its tables."""
+        if connection.vendor != 'postgresql':
+            return
+        cls.user = User.objects.create_user(username='budget', password=PASSWORD, is_superuser=True)
+        addresses = Address.objects.bulk_create(
+            Address(**{**test_address_attrs, 'city_name': f'city {index % INDEXED_CITIES}'})
+            for index in range(INDEXED_ROWS)
+        )
+        cinemas = Cinema.objects.bulk_create(
+            Cinema(
+                name=f'budget cinema {index}' if index else SEARCHED_CINEMA, address=address, url_image=TEST_URL_IMAGE,
+            )
+            for index, address in enumerate(addresses)
+        )
+        films = Film.objects.bulk_create(
+            Film(
+                name=f'budget film {index}' if index else SEARCHED_FILM, description=INDEXED_DESCRIPTION,
+                rating=index % 5 + 1, url_image=TEST_URL_IMAGE,
+            )
+            for index in range(INDEXED_ROWS)
+        )
+        film_cinemas = FilmCinema.objects.bulk_create(
+            FilmCinema(film=film, cinema=cinema) for film, cinema in zip(films, cinemas)
+        )
+        Ticket.objects.bulk_create(
+            Ticket(
+                place=str(index), film_cinema=film_cinema, film_date=FILTER_DAY + timedelta(hours=index),
+                user=cls.user if booked else None,
+            )
+            for index, film_cinema in enumerate(film_cinemas) for booked in (False, True)
+        )
+        Screening.objects.bulk_create(
+            Screening(
+                film_cinema=film_cinema, hall='1', start_time=FILTER_DAY + timedelta(hours=index),
+                capacity=SCREENING_CAPACITY,
+            )
+            for index, film_cinema in enumerate(film_cinemas)
+        )
+        schedule.rebuild()
+        cls.address, cls.cinema, cls.film = addresses[0], cinemas[0], films[0]
+        with connection.cursor() as cursor:
+            # rows inserted in the test transaction wait in pending lists of GIN indexes until autovacuum
+            for name in SEARCH_INDEXES:
+                cursor.execute('SELECT gin_clean_pending_list(%s::regclass)', [f'api_data.{name}'])
+            for model in INDEXED_MODELS:
+                cursor.execute(f'ANALYZE {model._meta.db_table}')
+
+    def setUp(self) -> None:
+        """Skip plans on other databases and authenticate superuser."""
+        if connection.vendor != 'postgresql':
+            self.skipTest('plans are checked on PostgreSQL')
+        self.client = APIClient()
+        self.client.force_authenticate(user=self.user)
+
+    def explain(self, path: str, params: dict | None = None) -> str:
+        """Request path and explain every select it sent.
+
+        Args:
+            path: requested path
+            params: query parameters
+
+        Returns:
+            str: plans of selects
+        """
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(path, params)
+        self.assertEqual(response.status_code, 200, params)
+        plans = []
+        with connection.cursor() as cursor:
+            for query in queries:
+                if query['sql'].startswith('SELECT'):
+                    cursor.execute(f'EXPLAIN {query["sql"]}')
+                    plans.extend(row[0] for row in cursor.fetchall())
+        return '\n'.join(plans)
+
+    def assertIndexed(self, plan: str, indexes: tuple[str, ...] = ()) -> None:  # noqa: N802
+        """Assert that plan uses indexes and does not scan seeded tables sequentially.
+
+        Args:
+            plan: plans of selects
+            indexes: names of indexes which must be used
+        """
+        for model in INDEXED_MODELS:
+            table = model._meta.db_table.rpartition('.')[2].strip('"')
+            self.assertNotIn(f'Seq Scan on {table} ', plan)
+        for index in indexes:
+            self.assertIn(index, plan)
+
+    def test_filter_combinations(self):
+        """Test filters and ordering of lists are backed by indexes in every combination."""
+        for name, filters in LIST_FILTERS.items():
+            for count in range(len(filters) + 1):
+                for combination in combinations(filters, count):
+                    params = {}
+                    for get_params in combination:
+                        params.update(get_params(self))
+                    with self.subTest(route=name, params=params):
+                        self.assertIndexed(self.explain(reverse(name), params))
+
+    def test_hot_queries(self):
+        """Test pages and lists read their rows by the indexes built for them."""
+        for path, params, indexes in (
+            (reverse('films'), {}, ('film_name_id_idx',)),
+            (reverse('cinemas_more'), {}, ('cinema_name_id_idx',)),
+            (reverse('films'), {'q': SEARCHED_FILM}, SEARCH_INDEXES[:2]),
+            (reverse('cinemas'), {'q': SEARCHED_CINEMA}, SEARCH_INDEXES[2:]),
+            (reverse('film-list'), {}, ('film_name_id_idx',)),
+            (reverse('film-list'), {'ordering': '-rating'}, ('film_rating_id_idx',)),
+            (reverse('ticket-list'), {'booked': 'false'}, ('ticket_free_film_date_idx',)),
+            (reverse('ticket-list'), {'ordering': '-film_date'}, ('ticket_film_date_desc_id_idx',)),
+            (reverse('film', args=[self.film.pk]), {}, ('ticket_film_cinema_', 'screening_film_cinema_')),
+            (reverse('cinema', args=[self.cinema.pk]), {}, ('ticket_film_cinema_', 'screening_film_cinema_')),
+            (reverse('schedule'), {'city': self.address.city_name, 'day': FILTER_DAY.date().isoformat()}, (
+                'schedule_city_day_idx',
+            )),
+        ):
+            with self.subTest(path=path, params=params):
+                plan = self.explain(path, params)
+                self.assertIndexed(plan, indexes)
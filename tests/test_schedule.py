@@ -0,0 +1,120 @@
+"""Module for testing the schedule of films shown in cities by days."""
+
+
+from datetime import datetime, timedelta, timezone
+
+from django.db import connection
+from django.test import TestCase
+from django.test.client import Client as TestClient
+from django.test.utils import CaptureQueriesContext
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from cinephile_server import schedule
+from cinephile_server.models import Address, Cinema, Film, FilmCinema, ScheduleEntry, Ticket
+from tests.data import test_address_attrs, test_film_attrs
+
+SHOW_TIME = datetime(2030, 1, 1, 18, 30, tzinfo=timezone.utc)
+DAY = SHOW_TIME.date()
+CITY = 'some_city_name'
+
+
+class ScheduleTest(TestCase):
+    """Test for schedule entries maintained from tickets."""
+
+    def setUp(self) -> None:
+        """Set up two films shown in one cinema with tickets on one day."""
+        self.address = Address.objects.create(**test_address_attrs)
+        self.cinema = Cinema.objects.create(name='cinema', address=self.address)
+        self.film = Film.objects.create(**{**test_film_attrs, 'name': 'late film'})
+        self.film_cinema = FilmCinema.objects.create(film=self.film, cinema=self.cinema)
+        self.other_film_cinema = FilmCinema.objects.create(
+            film=Film.objects.create(**{**test_film_attrs, 'name': 'early film'}), cinema=self.cinema,
+        )
+        self.ticket = Ticket.objects.create(place='1', film_cinema=self.film_cinema, film_date=SHOW_TIME)
+        Ticket.objects.create(place='2', film_cinema=self.film_cinema, film_date=SHOW_TIME + timedelta(hours=2))
+        Ticket.objects.create(place='1', film_cinema=self.other_film_cinema, film_date=SHOW_TIME - timedelta(hours=1))
+
+    def get_entries(self, day=DAY) -> list[tuple]:
+        """Return film names, first shows and tickets of city schedule.
+
+        Args:
+            day: day of schedule
+
+        Returns:
+            list[tuple]: entries
+        """
+        return list(schedule.get_entries(CITY, day).values_list('film_name', 'first_show', 'tickets'))
+
+    def test_tickets_change_entries(self):
+        """Test entries follow created, moved and deleted tickets."""
+        self.assertEqual(self.get_entries(), [
+            ('early film', SHOW_TIME - timedelta(hours=1), 1),
+            ('late film', SHOW_TIME, 2),
+        ])
+        self.ticket.film_date = SHOW_TIME + timedelta(days=1)
+        self.ticket.save()
+        self.assertEqual(self.get_entries()[1], ('late film', SHOW_TIME + timedelta(hours=2), 1))
+        self.assertEqual(self.get_entries(DAY + timedelta(days=1)), [('late film', self.ticket.film_date, 1)])
+        self.ticket.delete()
+        self.assertFalse(self.get_entries(DAY + timedelta(days=1)))
+
+    def test_renames_change_entries(self):
+        """Test names of film, cinema and city are copied to entries."""
+        self.film.name = 'renamed film'
+        self.film.save()
+        self.cinema.name = 'renamed cinema'
+        self.cinema.save()
+        self.address.city_name = 'other city'
+        self.address.save()
+        entries = ScheduleEntry.objects.filter(film_cinema=self.film_cinema).values_list(
+            'film_name', 'cinema_name', 'city_name',
+        )
+        self.assertEqual(list(entries), [('renamed film', 'renamed cinema', 'other city')])
+        self.assertFalse(self.get_entries())
+
+    def test_rebuild(self):
+        """Test rebuilt entries are the same as maintained ones."""
+        maintained = self.get_entries()
+        Ticket.objects.filter(id=self.ticket.id).update(film_date=None)
+        self.assertEqual(schedule.rebuild(), 2)
+        self.assertEqual(self.get_entries()[1], ('late film', SHOW_TIME + timedelta(hours=2), 1))
+        Ticket.objects.filter(id=self.ticket.id).update(film_date=SHOW_TIME)
+        schedule.rebuild([self.film_cinema.id])
+        self.assertEqual(self.get_entries(), maintained)
+
+    def test_one_index_range_scan(self):
+        """Test schedule of city and day is read by one index scan without sorting."""
+        with CaptureQueriesContext(connection) as queries:
+            self.get_entries()
+        self.assertEqual(len(queries), 1)
+        if connection.vendor != 'postgresql':
+            return
+        with connection.cursor() as cursor:
+            cursor.execute('SET enable_seqscan = off')
+            try:
+                cursor.execute(f'EXPLAIN {queries[0]["sql"]}')
+                plan = '\n'.join(row[0] for row in cursor.fetchall())
+            finally:
+                cursor.execute('RESET enable_seqscan')
+        self.assertIn('schedule_city_day_idx', plan)
+        self.assertNotIn('Sort', plan)
+
+    def test_rest_list(self):
+        """Test REST list needs city and day and returns entries by first show."""
+        client = APIClient()
+        response = client.get('/rest/schedule/', {'city': CITY})
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        response = client.get('/rest/schedule/', {'city': CITY, 'day': DAY.isoformat()})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual([row['film_name'] for row in response.data['results']], ['early film', 'late film'])
+
+    def test_page(self):
+        """Test page shows entries of city on day."""
+        response = TestClient().get('/schedule/', {'city': CITY, 'day': DAY.isoformat()})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertTemplateUsed(response, 'schedule.html')
+        self.assertEqual([entry.film_name for entry in response.context['entries']], ['early film', 'late film'])
+        response = TestClient().get('/schedule/')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertFalse(response.context['entries'])
@@ -0,0 +1,150 @@
+"""Module for testing token-bucket throttling of booking, authentication and user endpoints."""
+
+
+from asgiref.sync import async_to_sync
+from django.contrib.auth.models import User
+from django.core.cache import caches
+from django.test import SimpleTestCase, TestCase, override_settings
+from django.test.client import Client as TestClient
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from cinephile_server import throttling
+from cinephile_server.models import Address, Cinema, Film, FilmCinema, Ticket
+from tests.data import test_address_attrs, test_film_attrs
+
+SLOW_RATE = 0.001
+BUCKETS = {
+    'booking': {'user': (2, SLOW_RATE), 'global': (3, SLOW_RATE)},
+    'auth': {'ip': (1, SLOW_RATE)},
+}
+
+
+class TakeTokensTest(SimpleTestCase):
+    """Test for buckets of both stores."""
+
+    def setUp(self) -> None:
+        """Set up empty stores."""
+        caches['default'].clear()
+        self.stores = [throttling.LocalBucketStore(), throttling.CacheBucketStore(caches['default'])]
+
+    def test_capacity_and_refill(self):
+        """Test bucket allows burst of capacity and then one request per refilled token."""
+        bucket = throttling.Bucket('key', 2, 1)
+        retry_after, full_at = throttling.take_tokens({}, [bucket], 100)
+        self.assertEqual((retry_after, full_at), (0, {'key': 101}))
+        retry_after, full_at = throttling.take_tokens(full_at, [bucket], 100)
+        self.assertEqual((retry_after, full_at), (0, {'key': 102}))
+        retry_after, full_at = throttling.take_tokens(full_at, [bucket], 100.25)
+        self.assertEqual((retry_after, full_at), (0.75, {}))
+        self.assertEqual(throttling.take_tokens({'key': 102}, [bucket], 101)[0], 0)
+
+    def test_request_takes_all_tokens_or_none(self):
+        """Test rejected request does not take tokens from its other buckets."""
+        small = throttling.Bucket('small', 1, SLOW_RATE)
+        large = throttling.Bucket('large', 3, SLOW_RATE)
+        for store in self.stores:
+            with self.subTest(store=type(store).__name__):
+                self.assertEqual(store.take([small, large]), 0)
+                self.assertGreater(store.take([small, large]), 0)
+                self.assertEqual(store.take([large]), 0)
+                self.assertEqual(async_to_sync(store.atake)([large]), 0)
+                self.assertGreater(store.take([large]), 0)
+
+
+@override_settings(THROTTLE_ENABLED=True, THROTTLE_STORE=throttling.LOCAL_STORE, THROTTLE_BUCKETS=BUCKETS)
+class ThrottleTest(TestCase):
+    """Test for limits of function views and DRF views."""
+
+    def setUp(self) -> None:
+        """Set up free tickets and empty buckets."""
+        throttling.get_store().clear()
+        film_cinema = FilmCinema.objects.create(
+            film=Film.objects.create(**test_film_attrs),
+            cinema=Cinema.objects.create(name='cinema', address=Address.objects.create(**test_address_attrs)),
+        )
+        self.tickets = [Ticket.objects.create(place=str(place), film_cinema=film_cinema) for place in range(4)]
+
+    def book(self, client: TestClient, ticket: Ticket):
+        """Post booking of ticket.
+
+        Args:
+            client: client of user
+            ticket: booked ticket
+
+        Returns:
+            HttpResponse: response
+        """
+        return client.post(f'/book_tickets/?ticket_id={ticket.id}')
+
+    def logged_in(self, username: str) -> TestClient:
+        """Return client of new logged in user.
+
+        Args:
+            username: name of user
+
+        Returns:
+            TestClient: client
+        """
+        client = TestClient()
+        client.force_login(User.objects.create_user(username=username, password=username))
+        return client
+
+    def test_user_and_global_buckets_of_booking(self):
+        """Test booking is limited per user and for all users with Retry-After header."""
+        client = self.logged_in('user')
+        self.assertEqual(self.book(client, self.tickets[0]).status_code, status.HTTP_200_OK)
+        self.assertEqual(self.book(client, self.tickets[1]).status_code, status.HTTP_200_OK)
+        response = self.book(client, self.tickets[2])
+        self.assertEqual(response.status_code, throttling.TOO_MANY_REQUESTS)
+        self.assertGreater(int(response['Retry-After']), 0)
+        self.assertFalse(Ticket.objects.filter(id=self.tickets[2].id, user__isnull=False).exists())
+        self.assertEqual(client.get('/book_tickets/').status_code, status.HTTP_200_OK)
+        other_client = self.logged_in('other')
+        self.assertEqual(self.book(other_client, self.tickets[2]).status_code, status.HTTP_200_OK)
+        self.assertEqual(self.book(other_client, self.tickets[3]).status_code, throttling.TOO_MANY_REQUESTS)
+
+    def test_drf_view_is_limited_per_address(self):
+        """Test signed token view gets 429 with Retry-After header from DRF throttle."""
+        User.objects.create_user(username='user', password='user')
+        client = APIClient()
+        credentials = {'username': 'user', 'password': 'user'}
+        self.assertEqual(client.post('/api-signed-token-auth/', credentials).status_code, status.HTTP_200_OK)
+        response = client.post('/api-signed-token-auth/', credentials)
+        self.assertEqual(response.status_code, throttling.TOO_MANY_REQUESTS)
+        self.assertGreater(int(response['Retry-After']), 0)
+
+    def test_database_token_view_is_limited_by_middleware(self):
+        """Test obtain_auth_token, which has no DRF throttles, gets 429 from the middleware."""
+        User.objects.create_user(username='user', password='user')
+        credentials = {'username': 'user', 'password': 'user'}
+        self.assertEqual(self.client.post('/api-token-auth/', credentials).status_code, status.HTTP_200_OK)
+        response = self.client.post('/api-token-auth/', credentials)
+        self.assertEqual(response.status_code, throttling.TOO_MANY_REQUESTS)
+        self.assertGreater(int(response['Retry-After']), 0)
+
+    def test_forwarded_address(self):
+        """Test DRF views and function views share buckets of client, X-Forwarded-For is trusted behind proxies."""
+        User.objects.create_user(username='user', password='user')
+        client = APIClient(REMOTE_ADDR='10.0.0.1')
+
+        def post(path: str, forwarded_for: str) -> int:
+            credentials = {'username': 'user', 'password': 'user'}
+            return client.post(path, credentials, headers={'X-Forwarded-For': forwarded_for}).status_code
+
+        self.assertEqual(post('/api-signed-token-auth/', '192.0.2.1'), status.HTTP_200_OK)
+        self.assertEqual(post('/api-token-auth/', '192.0.2.2'), throttling.TOO_MANY_REQUESTS)
+        throttling.get_store().clear()
+        with self.settings(THROTTLE_PROXIES=1):
+            for address in ('192.0.2.1', '192.0.2.2'):
+                self.assertEqual(post('/api-token-auth/', f'198.51.100.1, {address}'), status.HTTP_200_OK)
+                self.assertEqual(
+                    post('/api-signed-token-auth/', f'198.51.100.1, {address}'), throttling.TOO_MANY_REQUESTS,
+                )
+
+    @override_settings(THROTTLE_ENABLED=False)
+    def test_disabled(self):
+        """Test disabled throttling does not limit requests."""
+        client = self.logged_in('user')
+        for ticket in self.tickets:
+            self.assertEqual(self.book(client, ticket).status_code, status.HTTP_200_OK)
@@ -0,0 +1,151 @@
+"""Module for testing import and export of catalog rows."""
+
+
+import json
+from io import StringIO
+from pathlib import Path
+from tempfile import TemporaryDirectory
+from unittest import mock
+from uuid import uuid4
+
+from django.core.management import call_command
+from django.test import TestCase, override_settings
+
+from cinephile_server import images, transfer
+from cinephile_server.models import Address, Cinema, Film, FilmCinema, Ticket
+from tests.data import TEST_DATA_URI, TEST_PNG_BASE64, test_address_attrs, test_film_attrs
+
+FILMS = 5
+BATCH_SIZE = 2
+
+
+def export(model, file_format: str) -> str:
+    """Export rows of model.
+
+    Args:
+        model: exported model
+        file_format: "csv" or "ndjson"
+
+    Returns:
+        str: exported text
+    """
+    stream = StringIO()
+    transfer.export_rows(model, stream, file_format, chunk_size=BATCH_SIZE)
+    return stream.getvalue()
+
+
+def import_text(model, text: str, file_format: str) -> transfer.ImportResult:
+    """Import rows of model.
+
+    Args:
+        model: imported model
+        text: exported text
+        file_format: "csv" or "ndjson"
+
+    Returns:
+        transfer.ImportResult: numbers of rows
+    """
+    importer = transfer.Importer(model, batch_size=BATCH_SIZE)
+    return importer.run(transfer.read_rows(StringIO(text), file_format))
+
+
+class TransferTest(TestCase):
+    """Test for streaming import and export."""
+
+    def setUp(self) -> None:
+        """Set up films shown in cinema with tickets."""
+        self.address = Address.objects.create(**test_address_attrs)
+        self.cinema = Cinema.objects.create(name='transfer cinema', address=self.address)
+        for index in range(FILMS):
+            film = Film.objects.create(**{**test_film_attrs, 'name': f'film {index}'})
+            film_cinema = FilmCinema.objects.create(film=film, cinema=self.cinema)
+            Ticket.objects.create(place=str(index), film_cinema=film_cinema)
+
+    def test_round_trip(self):
+        """Test exported rows are imported back with the same values in both formats."""
+        models = (Address, Cinema, Film, FilmCinema, Ticket)
+        for file_format in (transfer.CSV, transfer.NDJSON):
+            exported = {model: export(model, file_format) for model in models}
+            values = {model: list(model.objects.order_by('pk').values()) for model in models}
+            Address.objects.all().delete()
+            Film.objects.all().delete()
+            for model in models:
+                result = import_text(model, exported[model], file_format)
+                self.assertEqual(result.imported, len(values[model]))
+                self.assertEqual(result.rejected, 0)
+            for model in models:
+                fields = [name for name in values[model][0] if name != 'updated_at']
+                self.assertEqual(
+                    list(model.objects.order_by('pk').values(*fields)),
+                    [{name: row[name] for name in fields} for row in values[model]],
+                )
+
+    def test_upsert(self):
+        """Test rows with existing ids are updated."""
+        film = Film.objects.first()
+        text = json.dumps({**transfer.encode_row(film), 'name': 'renamed'})
+        result = import_text(Film, text, transfer.NDJSON)
+        self.assertEqual(result.imported, 1)
+        film.refresh_from_db()
+        self.assertEqual(film.name, 'renamed')
+        self.assertEqual(Film.objects.count(), FILMS)
+
+    def test_invalid_rows_are_rejected(self):
+        """Test validators, references and parse errors reject rows without stopping import."""
+        rows = [
+            {'city_name': 'city', 'street_name': 'street', 'house_number': 1},
+            {'city_name': 'city', 'street_name': 'street', 'house_number': -1},
+            {'city_name': 'city', 'street_name': 'street', 'house_number': 'one'},
+            {'city_name': 'city', 'house_number': 1},
+            {'city_name': 'city', 'street_name': 'street', 'house_number': 1, 'body': 'ab'},
+            {'city_name': 'city', 'street_name': 'street', 'house_number': 1, 'color': 'red'},
+        ]
+        text = '\n'.join([*map(json.dumps, rows), '{broken'])
+        result = import_text(Address, text, transfer.NDJSON)
+        self.assertEqual((result.read, result.imported, result.rejected), (7, 1, 6))
+        cinema = {'name': 'cinema', 'address_id': str(uuid4())}
+        result = import_text(Cinema, json.dumps(cinema), transfer.NDJSON)
+        self.assertEqual(result.rejected, 1)
+
+    def test_inline_posters_are_validated_once_and_stored(self):
+        """Test inline posters of a batch are validated once per distinct image and moved to the store."""
+        invalid_uri = f'data:image/gif;base64,{TEST_PNG_BASE64}'
+        rows = [{**test_film_attrs, 'name': f'poster {index}', 'url_image': TEST_DATA_URI} for index in range(4)]
+        rows.append({**test_film_attrs, 'name': 'invalid poster', 'url_image': invalid_uri})
+        directory = TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        importer = transfer.Importer(Film, batch_size=len(rows))
+        with override_settings(IMAGE_STORE_ROOT=directory.name):
+            with mock.patch.object(images, 'validate', wraps=images.validate) as validate:
+                result = importer.run(transfer.read_rows(StringIO('\n'.join(map(json.dumps, rows))), transfer.NDJSON))
+        self.assertEqual((result.imported, result.rejected), (4, 1))
+        self.assertEqual(validate.call_count, 3)
+        films = Film.objects.filter(name__startswith='poster ')
+        self.assertEqual({(film.url_image, film.poster is not None) for film in films}, {(None, True)})
+        self.assertFalse(Film.objects.filter(name='invalid poster').exists())
+
+    def test_constraint_rejects_only_broken_rows(self):
+        """Test batch which breaks unique constraint is saved row by row."""
+        film = Film.objects.create(**test_film_attrs)
+        rows = [
+            {'film_id': str(film.id), 'cinema_id': str(self.cinema.id)},
+            {'film_id': str(film.id), 'cinema_id': str(self.cinema.id)},
+        ]
+        result = import_text(FilmCinema, '\n'.join(map(json.dumps, rows)), transfer.NDJSON)
+        self.assertEqual((result.imported, result.rejected), (1, 1))
+
+    def test_command_resumes_from_checkpoint(self):
+        """Test import continues after rows of checkpoint and removes checkpoint when finished."""
+        text = export(Film, transfer.CSV)
+        Film.objects.all().delete()
+        with TemporaryDirectory() as directory:
+            source = Path(directory) / 'films.csv'
+            source.write_text(text)
+            checkpoint = Path(f'{source}.checkpoint')
+            checkpoint.write_text(json.dumps({'rows': 2}))
+            stdout = StringIO()
+            call_command('import_data', 'film', str(source), batch_size=BATCH_SIZE, stdout=stdout)
+            self.assertIn(f'{FILMS - 2} imported', stdout.getvalue())
+            self.assertIn('2 skipped', stdout.getvalue())
+            self.assertFalse(checkpoint.exists())
+        self.assertEqual(Film.objects.count(), FILMS - 2)
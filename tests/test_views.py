@@ -1,14 +1,43 @@
 """Module for testing views."""
 
 
+from datetime import datetime, timezone
+from time import perf_counter
+
+from asgiref.sync import iscoroutinefunction
 from django.contrib.auth.models import User
-from django.test import TestCase
+from django.db import connection
+from django.test import AsyncClient, TestCase
 from django.test.client import Client as TestClient
+from django.test.utils import CaptureQueriesContext, override_settings
 from django.urls import reverse
 from rest_framework import status
 
-from cinephile_server.models import Film
-from tests.data import test_film_attrs
+from cinephile_server.models import Address, Cinema, Film, FilmCinema, Screening, Ticket
+from cinephile_server.views import pages, queries
+from cinephile_server.views.pages import CATALOG_PAGE_SIZE
+from tests.data import test_address_attrs, test_film_attrs
+
+DETAIL_PAGE_REPEATS = 5
+UNRELATED_TICKETS = 300
+LATENCY_GROWTH_LIMIT = 3
+LATENCY_SLACK = 0.05
+SCREENING_CAPACITY = 20
+CATALOG_FILMS = 60
+CATALOG_PAGE_QUERIES = 2
+SEARCHED_FILMS = 25
+
+PAGE_CACHE_OFF = override_settings(PAGE_CACHE_TIMEOUT=0)
+
+
+def setUpModule():
+    """Render pages on every request, the page cache is tested in test_page_cache."""
+    PAGE_CACHE_OFF.enable()
+
+
+def tearDownModule():
+    """Restore page cache settings."""
+    PAGE_CACHE_OFF.disable()
 
 # helper methods
 
@@ -96,3 +125,320 @@ class TicketPageTest(TestCase):
         response = self.client.get('/tickets/')
         self.assertEqual(response.status_code, status.HTTP_200_OK)
         self.assertTemplateUsed('booked_tickets.hmtl')
+
+
+class DetailPageCostTest(TestCase):
+    """Test that detail pages cost does not depend on the size of ticket table."""
+
+    def setUp(self) -> None:
+        """Set up one film with tickets in two cinemas."""
+        self.client = TestClient()
+        self.address = Address.objects.create(**test_address_attrs)
+        self.film = Film.objects.create(**test_film_attrs)
+        self.cinema = Cinema.objects.create(name='main cinema', address=self.address)
+        self.create_tickets(self.film, self.cinema)
+        self.create_tickets(self.film, Cinema.objects.create(name='second cinema', address=self.address))
+
+    def create_tickets(self, film: Film, cinema: Cinema) -> None:
+        """Create ticket for film in cinema.
+
+        Args:
+            film: film of ticket
+            cinema: cinema of ticket
+        """
+        film_cinema = FilmCinema.objects.create(film=film, cinema=cinema)
+        Ticket.objects.create(film_date=datetime.now(tz=timezone.utc), place='1', film_cinema=film_cinema)
+        Screening.objects.create(
+            film_cinema=film_cinema, hall='1', start_time=datetime.now(tz=timezone.utc), capacity=SCREENING_CAPACITY,
+        )
+
+    def grow_ticket_table(self) -> None:
+        """Create a lot of tickets which do not belong to tested film and cinema."""
+        other_cinema = Cinema.objects.create(name='other cinema', address=self.address)
+        for _ in range(UNRELATED_TICKETS):
+            self.create_tickets(Film.objects.create(**test_film_attrs), other_cinema)
+
+    def measure(self, url: str) -> tuple[int, float]:
+        """Measure query count and best latency of page.
+
+        Args:
+            url: url of page
+
+        Returns:
+            tuple[int, float]: query count and latency in seconds
+        """
+        timings = []
+        for _ in range(DETAIL_PAGE_REPEATS):
+            with CaptureQueriesContext(connection) as queries:
+                start = perf_counter()
+                response = self.client.get(url)
+                timings.append(perf_counter() - start)
+            self.assertEqual(response.status_code, status.HTTP_200_OK)
+        return len(queries), min(timings)
+
+    def check_flat_cost(self, url: str) -> None:
+        """Check that page cost stays the same when ticket table grows.
+
+        Args:
+            url: url of page
+        """
+        queries, latency = self.measure(url)
+        self.grow_ticket_table()
+        grown_queries, grown_latency = self.measure(url)
+        self.assertEqual(grown_queries, queries)
+        self.assertLess(grown_latency, latency * LATENCY_GROWTH_LIMIT + LATENCY_SLACK)
+
+    def test_film_detail_page(self):
+        """Test film detail page cost."""
+        self.check_flat_cost(reverse('film', kwargs={'pk': self.film.id}))
+
+    def test_cinema_detail_page(self):
+        """Test cinema detail page cost."""
+        self.check_flat_cost(reverse('cinema', kwargs={'pk': self.cinema.id}))
+
+    def test_page_shows_only_own_tickets(self):
+        """Test film detail page contains tickets only for this film."""
+        self.grow_ticket_table()
+        response = self.client.get(reverse('film', kwargs={'pk': self.film.id}))
+        self.assertEqual(len(response.context['tickets']), 2)
+        self.assertEqual(len(response.context['screenings']), 2)
+
+
+class CatalogPageTest(TestCase):
+    """Test for paginated films and cinemas pages."""
+
+    def setUp(self) -> None:
+        """Set up catalog."""
+        self.client = TestClient()
+        address = Address.objects.create(**test_address_attrs)
+        for index in range(CATALOG_FILMS):
+            Film.objects.create(**{**test_film_attrs, 'name': f'film {index:03}'})
+            Cinema.objects.create(name=f'cinema {index:03}', address=address)
+
+    def walk(self, url: str, context_name: str) -> list:
+        """Walk first page and then html fragments.
+
+        Args:
+            url: url of first page, fragments are loaded from its "more/" url
+            context_name: name of cards in context
+
+        Returns:
+            list: names of all cards
+        """
+        names = []
+        fragment_url = f'{url}more/'
+        while url:
+            with CaptureQueriesContext(connection) as queries:
+                response = self.client.get(url)
+            self.assertEqual(response.status_code, status.HTTP_200_OK)
+            self.assertEqual(len(queries), CATALOG_PAGE_QUERIES)
+            cards = response.context[context_name]
+            self.assertLessEqual(len(cards), CATALOG_PAGE_SIZE)
+            names.extend(card.name for card in cards)
+            next_cursor = response.context['next_cursor']
+            url = f'{fragment_url}?cursor={next_cursor}' if next_cursor else None
+        return names
+
+    def test_films_pages(self):
+        """Test films are loaded page by page with lazy images."""
+        response = self.client.get('/films/')
+        self.assertTemplateUsed(response, 'film_cards.html')
+        self.assertContains(response, 'loading="lazy"', count=CATALOG_PAGE_SIZE)
+        names = self.walk('/films/', 'films')
+        self.assertEqual(names, sorted(Film.objects.values_list('name', flat=True)))
+
+    def test_cinemas_pages(self):
+        """Test cinemas are loaded page by page."""
+        names = self.walk('/cinemas/', 'cinemas')
+        self.assertEqual(names, sorted(Cinema.objects.values_list('name', flat=True)))
+
+    def test_fragment(self):
+        """Test fragment contains only cards."""
+        response = self.client.get('/films/more/')
+        self.assertTemplateUsed(response, 'film_cards.html')
+        self.assertTemplateNotUsed(response, 'base_generic.html')
+
+    def test_invalid_cursor(self):
+        """Test invalid cursor."""
+        response = self.client.get('/films/?cursor=broken')
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+
+
+class SearchPageTest(TestCase):
+    """Test for search box of films and cinemas pages."""
+
+    def setUp(self) -> None:
+        """Set up films which match query by name or by description."""
+        self.client = TestClient()
+        for index in range(SEARCHED_FILMS):
+            Film.objects.create(**{**test_film_attrs, 'name': f'matrix {index:03}'})
+        Film.objects.create(**{**test_film_attrs, 'name': 'hackers', 'description': 'a matrix of hackers'})
+        Film.objects.create(**{**test_film_attrs, 'name': 'unrelated'})
+        address = Address.objects.create(**test_address_attrs)
+        Cinema.objects.create(name='matrix cinema', address=address)
+        Cinema.objects.create(name='another cinema', address=address)
+
+    def walk(self, url: str) -> list:
+        """Walk searched film cards following "load more" links.
+
+        Args:
+            url: url of first page
+
+        Returns:
+            list: names of all cards
+        """
+        names = []
+        while url:
+            response = self.client.get(url)
+            self.assertEqual(response.status_code, status.HTTP_200_OK)
+            names.extend(card.name for card in response.context['films'])
+            next_cursor = response.context['next_cursor']
+            url = f'/films/more/?cursor={next_cursor}&q=matrix' if next_cursor else None
+        return names
+
+    def test_films_search(self):
+        """Test name matches are ranked above description matches and pages keep the query."""
+        response = self.client.get('/films/?q=matrix')
+        self.assertTemplateUsed(response, 'search_form.html')
+        self.assertContains(response, '&q=matrix')
+        names = self.walk('/films/?q=matrix')
+        self.assertEqual(len(names), SEARCHED_FILMS + 1)
+        self.assertEqual(len(set(names)), SEARCHED_FILMS + 1)
+        self.assertEqual(names[-1], 'hackers')
+        self.assertNotIn('unrelated', names)
+
+    def test_cinemas_search(self):
+        """Test cinemas are searched by name."""
+        response = self.client.get('/cinemas/?q=matrix')
+        self.assertEqual([cinema.name for cinema in response.context['cinemas']], ['matrix cinema'])
+
+    def test_nothing_found(self):
+        """Test page without matching rows."""
+        response = self.client.get('/films/?q=nothing')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertFalse(response.context['films'])
+        self.assertContains(response, 'Nothing found')
+
+    def test_typo(self):
+        """Test names with typos are found by trigrams on PostgreSQL."""
+        if connection.vendor != 'postgresql':
+            self.skipTest('trigram search needs PostgreSQL')
+        response = self.client.get('/films/?q=hackerz')
+        self.assertIn('hackers', [film.name for film in response.context['films']])
+
+
+class ConditionalPageTest(TestCase):
+    """Test for ETag and Last-Modified of pages."""
+
+    def setUp(self) -> None:
+        """Set up film shown in cinema."""
+        self.client = TestClient()
+        self.film = Film.objects.create(**test_film_attrs)
+        self.cinema = Cinema.objects.create(name='cinema', address=Address.objects.create(**test_address_attrs))
+        film_cinema = FilmCinema.objects.create(film=self.film, cinema=self.cinema)
+        self.ticket = Ticket.objects.create(place='1', film_cinema=film_cinema)
+
+    def check_not_modified(self, url: str) -> str:
+        """Check page is not rendered again for actual etag.
+
+        Args:
+            url: url of page
+
+        Returns:
+            str: etag of page
+        """
+        self.client.get(url)  # the first response sets csrf cookie which is a part of etag
+        response = self.client.get(url)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertTrue(response.has_header('Last-Modified'))
+        etag = response['ETag']
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, status.HTTP_304_NOT_MODIFIED)
+        self.assertEqual(response['ETag'], etag)
+        self.assertFalse(response.content)
+        self.assertLessEqual(len(queries), 3)
+        return etag
+
+    def test_detail_pages(self):
+        """Test detail pages are validated by film, cinema and ticket changes."""
+        for url in (reverse('film', args=[self.film.id]), reverse('cinema', args=[self.cinema.id])):
+            etag = self.check_not_modified(url)
+            Ticket.objects.filter(id=self.ticket.id).update(place='2', updated_at=datetime.now(tz=timezone.utc))
+            response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+            self.assertEqual(response.status_code, status.HTTP_200_OK)
+            self.assertNotEqual(response['ETag'], etag)
+
+    def test_catalog_pages(self):
+        """Test catalog pages are validated by changes of their rows."""
+        for url in ('/films/', '/films/more/', '/cinemas/', '/cinemas/more/'):
+            self.check_not_modified(url)
+        etag = self.check_not_modified('/films/')
+        Film.objects.create(**test_film_attrs)
+        response = self.client.get('/films/', HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+    def test_catalog_validators_read_page(self):
+        """Test catalog pages are validated by one query of their page rows, not by aggregates of all rows."""
+        for url in ('/films/', '/cinemas/more/'):
+            etag = self.check_not_modified(url)
+            with CaptureQueriesContext(connection) as queries:
+                self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+            self.assertEqual(len(queries), 1)
+            self.assertIn(f'LIMIT {CATALOG_PAGE_SIZE + 1}', queries[0]['sql'])
+
+    def test_detail_validators_take_one_query(self):
+        """Test detail pages are validated by one query of the row, its relations, tickets and screenings."""
+        for url in (reverse('film', args=[self.film.id]), reverse('cinema', args=[self.cinema.id])):
+            etag = self.check_not_modified(url)
+            with self.assertNumQueries(1):
+                self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+
+    def test_user_changes_etag(self):
+        """Test the same page for another user is rendered again."""
+        url = reverse('film', args=[self.film.id])
+        etag = self.check_not_modified(url)
+        self.client.force_login(User.objects.create_user(username='viewer', password='viewer'))
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+
+class AsyncViewTest(TestCase):
+    """Test for pages and booking served by async views."""
+
+    def setUp(self) -> None:
+        """Set up free ticket of film shown in cinema and logged in async client."""
+        self.film = Film.objects.create(**test_film_attrs)
+        self.cinema = Cinema.objects.create(name='cinema', address=Address.objects.create(**test_address_attrs))
+        film_cinema = FilmCinema.objects.create(film=self.film, cinema=self.cinema)
+        self.ticket = Ticket.objects.create(place='1', film_cinema=film_cinema)
+        self.user = User.objects.create_user(username='async', password='async')
+        self.client = AsyncClient()
+        self.client.force_login(self.user)
+
+    def test_views_are_async(self):
+        """Test page and booking views do not take a thread per request under ASGI."""
+        views = (
+            pages.films_page, pages.films_fragment, pages.cinemas_page, pages.cinemas_fragment,
+            pages.film_detail_page, pages.cinema_detail_page, pages.booked_tickets_page, pages.schedule_page,
+            queries.book_ticket, queries.cancel_ticket, queries.book_seat,
+        )
+        for view in views:
+            self.assertTrue(iscoroutinefunction(view), view.__name__)
+
+    async def test_pages(self):
+        """Test pages are rendered by the async handler."""
+        for url in ('/films/', '/cinemas/more/', reverse('film', args=[self.film.id]), '/tickets/'):
+            response = await self.client.get(url)
+            self.assertEqual(response.status_code, status.HTTP_200_OK, url)
+        response = await self.client.get(reverse('cinema', args=[self.cinema.id]))
+        self.assertContains(response, self.film.name)
+
+    async def test_book_and_cancel(self):
+        """Test ticket is booked and cancelled by the async handler."""
+        response = await self.client.post(f'/book_tickets/?ticket_id={self.ticket.id}')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertTrue(await Ticket.objects.filter(id=self.ticket.id, user=self.user).aexists())
+        response = await self.client.post(f'/cancel_ticket/?ticket_id={self.ticket.id}')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertTrue(await Ticket.objects.filter(id=self.ticket.id, user__isnull=True).aexists())